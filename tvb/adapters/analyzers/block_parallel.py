@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Evaluate an analyzer on independent blocks of a TimeSeries, using a pool of workers.
+
+Blocks are read from the input file and written into the result file by the calling thread,
+in their original order; only the evaluation of the algorithm happens in the workers.
+Worker threads are used for algorithms spending their time in numpy / scipy routines which release
+the GIL (FFT, BLAS / LAPACK). Algorithms looping in Python (e.g. integrating a model in time) are
+evaluated in forked worker processes instead; their blocks and results (numpy arrays, not traited
+objects) are then pickled between processes.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+
+"""
+
+import os
+import threading
+import multiprocessing
+from collections import deque
+from multiprocessing.pool import ThreadPool
+import psutil
+from tvb.basic.logger.builder import get_logger
+
+
+LOG = get_logger(__name__)
+
+## Upper limit for the number of workers; None means one worker per available core.
+MAX_BLOCK_WORKERS = None
+
+## Fraction of the currently free memory which can be used by the blocks in evaluation.
+FREE_MEMORY_FRACTION = 0.8
+
+## Target memory (in Bytes) for evaluating one block of nodes.
+NODE_BLOCK_MEMORY = 64 * 2 ** 20
+
+## Evaluation function of the executor starting a process pool; the forked workers inherit it.
+_PROCESS_EVALUATE = [None]
+_PROCESS_POOL_LOCK = threading.Lock()
+
+
+
+def compute_nr_workers(block_memory, nr_blocks, max_workers=MAX_BLOCK_WORKERS):
+    """
+    Number of blocks to be evaluated in parallel, limited by the available cores,
+    by the free memory (each block in evaluation needs `block_memory` bytes) and by `nr_blocks`.
+    """
+    try:
+        nr_workers = multiprocessing.cpu_count()
+    except NotImplementedError:
+        nr_workers = 1
+    if max_workers is not None:
+        nr_workers = min(nr_workers, max_workers)
+    if block_memory > 0:
+        free_memory = psutil.virtual_memory().free * FREE_MEMORY_FRACTION
+        nr_workers = min(nr_workers, int(free_memory // block_memory))
+    return max(1, min(nr_workers, nr_blocks))
+
+
+
+def compute_node_block_size(time_series, node_memory, node_dimension=2):
+    """
+    Number of nodes to be read and evaluated together from `time_series`, when evaluating one
+    node requires `node_memory` bytes. The block is rounded to whole chunks of the input file
+    along the nodes dimension, so that each chunk is read from disk only once.
+    """
+    nr_nodes = time_series.read_data_shape()[node_dimension]
+    block_size = max(1, int(NODE_BLOCK_MEMORY // max(node_memory, 1)))
+    chunk_shape = time_series.get_data_chunk_shape('data')
+    if chunk_shape is not None:
+        chunk_nodes = chunk_shape[node_dimension]
+        if block_size >= chunk_nodes:
+            block_size -= block_size % chunk_nodes
+    return min(block_size, nr_nodes)
+
+
+
+class BlockParallelExecutor(object):
+    """
+    Run an evaluation function over a sequence of blocks, with a bounded number of blocks in memory.
+
+    - `read_block(index)` is called in the current thread and returns the input for one block;
+    - `evaluate_block(data)` is called in a worker and must not share mutable state
+      with other blocks (e.g. build a new algorithm instance for each call);
+    - `write_result(index, result)` is called in the current thread, in increasing block order.
+
+    With `use_processes`, the workers are processes (where fork is available): `data` and the result
+    of `evaluate_block` must be picklable, and changes made by `evaluate_block` are not seen by the caller.
+    """
+
+    def __init__(self, block_memory, nr_blocks, max_workers=MAX_BLOCK_WORKERS, use_processes=False):
+        self.nr_blocks = nr_blocks
+        self.nr_workers = compute_nr_workers(block_memory, nr_blocks, max_workers)
+        self.use_processes = use_processes and hasattr(os, 'fork')
+
+
+    def run(self, read_block, evaluate_block, write_result):
+        """
+        Evaluate all the blocks and pass each result to `write_result`, in order.
+        """
+        if self.nr_workers == 1:
+            for index in xrange(self.nr_blocks):
+                write_result(index, evaluate_block(read_block(index)))
+            return
+
+        LOG.debug("Evaluating %d blocks on %d worker %s." % (self.nr_blocks, self.nr_workers,
+                                                             "processes" if self.use_processes else "threads"))
+        if self.use_processes:
+            with _PROCESS_POOL_LOCK:
+                _PROCESS_EVALUATE[0] = evaluate_block
+                try:
+                    pool = multiprocessing.Pool(self.nr_workers)
+                finally:
+                    _PROCESS_EVALUATE[0] = None
+            evaluate_block = _evaluate_in_process
+        else:
+            pool = ThreadPool(self.nr_workers)
+        try:
+            pending = deque()
+            for index in xrange(self.nr_blocks):
+                ## Keep at most one block read ahead for each worker.
+                if len(pending) >= self.nr_workers:
+                    self._write_first(pending, write_result)
+                pending.append((index, pool.apply_async(evaluate_block, (read_block(index),))))
+            while pending:
+                self._write_first(pending, write_result)
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+    @staticmethod
+    def _write_first(pending, write_result):
+        """
+        Wait for the oldest block in evaluation and write its result.
+        Exceptions raised in the worker are re-raised here.
+        """
+        index, async_result = pending.popleft()
+        write_result(index, async_result.get())
+
+
+
+def _evaluate_in_process(data):
+    """ Run in a worker process, with the evaluation function inherited from the parent at fork. """
+    return _PROCESS_EVALUATE[0](data)
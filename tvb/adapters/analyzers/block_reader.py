@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Read a TimeSeries in blocks of consecutive time points, bounded in size, instead of loading the whole data.
+Used by the analyzers and viewers which make a single pass over (possibly large) TimeSeries files,
+and by the builders storing derived data-sets next to the TimeSeries data.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+
+"""
+
+import threading
+import numpy
+
+
+## Maximum size (in Bytes) of one block of time points, read from a TimeSeries file or collected in memory.
+READ_BLOCK_SIZE = 32 * 2 ** 20
+
+_DATA_LOCKS = {}
+_DATA_LOCKS_GUARD = threading.Lock()
+
+
+
+def time_block_length(shape, item_size=8, multiple_of=1, max_block_size=None):
+    """
+    :param shape: shape of the data, with time on the first dimension
+    :param item_size: Bytes for one value, in the array read
+    :param multiple_of: the number of time points in a block is rounded to a multiple of this
+    :param max_block_size: size limit in Bytes, READ_BLOCK_SIZE by default
+    :returns: number of time points in one block
+    """
+    if max_block_size is None:
+        max_block_size = READ_BLOCK_SIZE
+    row_size = max(int(numpy.prod(shape[1:])) * item_size * multiple_of, 1)
+    return max(int(max_block_size // row_size), 1) * multiple_of
+
+
+
+def time_slices(nr_time_points, block_length, start=0):
+    """
+    Yield consecutive slices of (at most) block_length time points, covering [start, nr_time_points).
+    """
+    for block_start in xrange(start, nr_time_points, block_length):
+        yield slice(block_start, min(block_start + block_length, nr_time_points))
+
+
+
+def read_time_blocks(time_series, space_slices=None, dtype=None, block_length=None, start=0, end=None):
+    """
+    Yield pairs (time slice, block) with the data of time_series, read one block of time points at a time.
+
+    :param space_slices: slices on the dimensions after time (all the values by default)
+    :param dtype: numpy dtype of the blocks (by default, the one of the stored data)
+    :param block_length: time points in a block (by default, computed from READ_BLOCK_SIZE)
+    :param start, end: time points to be read (all of them by default)
+    """
+    shape = time_series.read_data_shape()
+    if space_slices is None:
+        space_slices = tuple(slice(dim) for dim in shape[1:])
+    if end is None:
+        end = shape[0]
+    if block_length is None:
+        row_shape = [len(xrange(*one_slice.indices(dim))) if isinstance(one_slice, slice) else 1
+                     for one_slice, dim in zip(space_slices, shape[1:])]
+        block_length = time_block_length([end - start] + row_shape, numpy.dtype(dtype or numpy.float64).itemsize)
+    for rows in time_slices(end, block_length, start):
+        block = time_series.read_data_slice((rows,) + tuple(space_slices))
+        yield rows, (numpy.asarray(block, dtype=dtype) if dtype is not None else block)
+
+
+
+def read_float_slice(time_series, data_slice):
+    """
+    :param data_slice: tuple (or list) of slices, one for each dimension of the data
+    :returns: the values of time_series in data_slice, as float64 whatever the stored precision
+    """
+    return numpy.asarray(time_series.read_data_slice(tuple(data_slice)), dtype=numpy.float64)
+
+
+
+def stored_data_lock(time_series):
+    """
+    :returns: the lock to be held while building data-sets stored next to the data of time_series,
+              so that concurrent requests do not write the same data-set twice
+    """
+    with _DATA_LOCKS_GUARD:
+        return _DATA_LOCKS.setdefault(time_series.gid, threading.Lock())
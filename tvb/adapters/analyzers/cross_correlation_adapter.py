@@ -48,6 +48,8 @@ from tvb.datatypes.temporal_correlations import CrossCorrelation
 from tvb.datatypes.graph import CorrelationCoefficients
 from tvb.analyzers.cross_correlation import CrossCorrelate
 from tvb.analyzers.correlation_coefficient import CorrelationCoefficient
+from tvb.adapters.analyzers.pairwise_tiles import PairwiseTiles, tile_cross_correlation
+from tvb.adapters.analyzers.block_reader import read_float_slice
 
 LOG = get_logger(__name__)
 
@@ -99,7 +101,17 @@ class CrossCorrelateAdapter(ABCAsynchronous):
         used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
         input_size = numpy.prod(used_shape) * 8.0
         output_size = self.algorithm.result_size(used_shape)
-        return input_size + output_size
+        return min(input_size + output_size, self._get_tiles().tile_memory)
+
+
+    def _get_tiles(self):
+        """
+        Node x node tiles, in which the result of one state-variable is computed.
+        """
+        used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
+        pair_memory = self.algorithm.result_size(used_shape) / float(self.input_shape[2] ** 2)
+        return PairwiseTiles(self.input_shape[2], pair_memory, self.input_shape[0] * self.input_shape[3] * 8.0,
+                             pair_elements=pair_memory / 8.0)
     
     def get_required_disk_size(self, **kwargs):
         """
@@ -122,15 +134,41 @@ class CrossCorrelateAdapter(ABCAsynchronous):
         
         node_slice = [slice(self.input_shape[0]), None, slice(self.input_shape[2]), slice(self.input_shape[3])]
         ##---------- Iterate over slices and compose final result ------------##
-        small_ts = TimeSeries(use_storage=False)
-        small_ts.sample_period = time_series.sample_period
-        partial_cross_corr = None
+        nr_nodes = self.input_shape[2]
+        tiles = self._get_tiles()
+        partial_results = []
+
+        def _read_nodes(nodes):
+            node_slice[2] = nodes
+            return read_float_slice(time_series, node_slice)
+
+        def _evaluate(data):
+            small_ts = TimeSeries(use_storage=False)
+            small_ts.sample_period = time_series.sample_period
+            small_ts.data = data
+            algorithm = CrossCorrelate()
+            algorithm.time_series = small_ts
+            partial_result = algorithm.evaluate()
+            partial_results[:] = [partial_result]
+            return partial_result.array_data
+
+        def _evaluate_tile(rows_data, cols_data):
+            ## The algorithm for the pairs inside a group, only the pairs across groups otherwise.
+            if cols_data is None:
+                return _evaluate(rows_data), None
+            return tile_cross_correlation(rows_data, cols_data)
+
         for var in range(self.input_shape[1]):
             node_slice[1] = slice(var, var + 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
-            self.algorithm.time_series = small_ts
-            partial_cross_corr = self.algorithm.evaluate()
-            cross_corr.write_data_slice(partial_cross_corr)
+
+            def _write_tile(rows, cols, block):
+                full_shape = (block.shape[0], nr_nodes, nr_nodes, self.input_shape[1], block.shape[4])
+                region = (slice(block.shape[0]), rows, cols, slice(var, var + 1), slice(block.shape[4]))
+                cross_corr.store_data_region('array_data', block, region, full_shape,
+                                             tiles.chunk_shape(block.shape, (1, 2)), close_file=False)
+
+            tiles.run(_read_nodes, _evaluate_tile, _write_tile)
+        partial_cross_corr = partial_results[0]
         cross_corr.time = partial_cross_corr.time
         cross_corr.labels_ordering[1] = time_series.labels_ordering[2]
         cross_corr.labels_ordering[2] = time_series.labels_ordering[2]
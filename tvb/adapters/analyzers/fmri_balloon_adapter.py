@@ -35,6 +35,7 @@ Adapter that uses the traits module to generate interfaces for BalloonModel Anal
 
 """
 
+import math
 import numpy
 from tvb.basic.config.settings import TVBSettings
 from tvb.analyzers.fmri_balloon import BalloonModel
@@ -44,6 +45,8 @@ from tvb.core.adapters.abcadapter import ABCAsynchronous
 from tvb.basic.traits.util import log_debug_array
 from tvb.basic.filters.chain import FilterChain
 from tvb.basic.logger.builder import get_logger
+from tvb.adapters.analyzers.block_parallel import BlockParallelExecutor, compute_node_block_size
+from tvb.adapters.analyzers.block_reader import read_float_slice
 
 LOG = get_logger(__name__)
 
@@ -137,17 +140,32 @@ class BalloonModelAdapter(ABCAsynchronous):
                                        start_time=time_series.start_time,
                                        connectivity=time_series.connectivity)
 
-        ##---------- Iterate over slices and compose final result ------------##
-
+        ##---------- Iterate over node blocks and compose final result ------------##
         node_slice = [slice(self.input_shape[0]), slice(self.input_shape[1]), None, slice(self.input_shape[3])]
-        small_ts = TimeSeries(use_storage=False, sample_period=time_series.sample_period, time=time_line)
-        
-        for node in range(self.input_shape[2]):
-            node_slice[2] = slice(node, node + 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
-            self.algorithm.time_series = small_ts
-            partial_bold = self.algorithm.evaluate()
-            bold_signal.write_data_slice(partial_bold.data, grow_dimension=2)
+        nr_nodes = self.input_shape[2]
+        node_memory = self.get_required_memory_size() / nr_nodes
+        block_size = compute_node_block_size(time_series, node_memory)
+        nr_blocks = int(math.ceil(nr_nodes / float(block_size)))
+
+        def _read_block(block):
+            node_slice[2] = slice(block * block_size, min((block + 1) * block_size, nr_nodes))
+            return read_float_slice(time_series, node_slice)
+
+        def _evaluate_block(data):
+            small_ts = TimeSeries(use_storage=False, sample_period=time_series.sample_period, time=time_line)
+            small_ts.data = data
+            algorithm = BalloonModel(dt=self.algorithm.dt, bold_model=self.algorithm.bold_model,
+                                     RBM=self.algorithm.RBM,
+                                     neural_input_transformation=self.algorithm.neural_input_transformation)
+            algorithm.time_series = small_ts
+            return algorithm.evaluate().data
+
+        def _write_result(_, partial_bold):
+            bold_signal.write_data_slice(partial_bold, grow_dimension=2)
+
+        ## The model is integrated in a Python loop over time, thus blocks are evaluated in processes.
+        executor = BlockParallelExecutor(node_memory * block_size, nr_blocks, use_processes=True)
+        executor.run(_read_block, _evaluate_block, _write_result)
 
         bold_signal.write_time_slice(time_line)
         bold_signal.close_file()
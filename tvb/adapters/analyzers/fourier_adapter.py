@@ -44,7 +44,10 @@ import tvb.core.adapters.abcadapter as abcadapter
 import tvb.basic.filters.chain as entities_filter
 import tvb.datatypes.time_series as datatypes_time_series
 import tvb.datatypes.spectral as spectral
+from tvb.adapters.analyzers.block_parallel import BlockParallelExecutor
+from tvb.adapters.simulator.streaming_analyzers import streamed_fourier_data_name
 from tvb.basic.logger.builder import get_logger
+from tvb.adapters.analyzers.block_reader import read_float_slice
 
 LOG = get_logger(__name__)
 
@@ -122,6 +125,16 @@ class FourierAdapter(abcadapter.ABCAsynchronous):
         return total_required_memory / self.memory_factor
 
 
+    def _get_block_memory(self, input_shape):
+        """
+        Memory needed for evaluating one block of nodes (as split in `get_required_memory_size`).
+        """
+        input_size = numpy.prod(input_shape) * 8.0
+        output_size = self.algorithm.result_size(input_shape, self.algorithm.segment_length,
+                                                 self.algorithm.time_series.sample_period)
+        return (input_size + output_size) / self.memory_factor
+
+
     def get_required_disk_size(self, **kwargs):
         """
         Returns the required disk size to be able to run the adapter (in kB).
@@ -146,9 +159,8 @@ class FourierAdapter(abcadapter.ABCAsynchronous):
 
         """
         shape = time_series.read_data_shape()
-        block_size = int(math.floor(time_series.read_data_shape()[2]
-                                    / self.memory_factor))
-        blocks = int(math.ceil(time_series.read_data_shape()[2] / block_size))
+        block_size = int(math.floor(shape[2] / self.memory_factor))
+        blocks = int(math.ceil(shape[2] / float(block_size)))
         
         ##----------- Prepare a FourierSpectrum object for result ------------##
         spectra = spectral.FourierSpectrum(source=time_series,
@@ -156,18 +168,43 @@ class FourierAdapter(abcadapter.ABCAsynchronous):
                                            window_function=self.algorithm.window_function,
                                            storage_path=self.storage_path)
         
+        ##------- Spectra streamed while the simulation was running --------##
+        streamed = time_series.get_data(streamed_fourier_data_name(self.algorithm.segment_length,
+                                                                   self.algorithm.window_function),
+                                        ignore_errors=True)
+        if streamed is not None and streamed.ndim == 5 and tuple(streamed.shape[1:4]) == tuple(shape[1:]):
+            LOG.debug("Using the streamed spectra, with %d segments" % streamed.shape[4])
+            spectra.write_data_slice(spectral.FourierSpectrum(array_data=streamed, use_storage=False))
+            if streamed.shape[4] == 1:
+                spectra.segment_length = shape[0] * time_series.sample_period
+            spectra.close_file()
+            return spectra
+
         ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
         node_slice = [slice(shape[0]), slice(shape[1]), None, slice(shape[3])]
         
-        ##---------- Iterate over slices and compose final result ------------##
-        small_ts = datatypes_time_series.TimeSeries(use_storage=False)
-        small_ts.sample_period = time_series.sample_period
-        for block in range(blocks):
-            node_slice[2] = slice(block * block_size, min([(block+1) * block_size, shape[2]]), 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
-            self.algorithm.time_series = small_ts
-            partial_result = self.algorithm.evaluate()
+        def _read_block(block):
+            node_slice[2] = slice(block * block_size, min([(block + 1) * block_size, shape[2]]), 1)
+            return read_float_slice(time_series, node_slice)
+        
+        def _evaluate_block(data):
+            small_ts = datatypes_time_series.TimeSeries(use_storage=False)
+            small_ts.sample_period = time_series.sample_period
+            small_ts.data = data
+            algorithm = fft.FFT(segment_length=self.algorithm.segment_length,
+                                window_function=self.algorithm.window_function)
+            algorithm.time_series = small_ts
+            return algorithm.evaluate()
+        
+        partial_results = []
+        def _write_result(_, partial_result):
             spectra.write_data_slice(partial_result)
+            partial_results[:] = [partial_result]
+        
+        ##---------- Iterate over slices and compose final result ------------##
+        executor = BlockParallelExecutor(self._get_block_memory(shape), blocks)
+        executor.run(_read_block, _evaluate_block, _write_result)
+        partial_result = partial_results[0]
         
         LOG.debug("partial segment_length is %s" % (str(partial_result.segment_length)))
         spectra.segment_length = partial_result.segment_length
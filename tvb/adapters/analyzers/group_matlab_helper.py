@@ -31,8 +31,9 @@
 """
 This module implements a class for executing arbitray MATLAB code
 
-Conversion between Python types and MATLAB types is handled and dependent
-on scipy.io's loadmat and savemat function.
+The code runs on long-lived interpreters (see `matlab_engine`). When those can not be used,
+a new MATLAB process is started for each call; conversion between Python types and MATLAB
+types is then dependent on scipy.io's loadmat and savemat function.
 
 .. moduleauthor:: Marmaduke Woodman <Marmaduke@tvb.invalid>
 .. moduleauthor:: Stuart A. Knock <Stuart@tvb.invalid>
@@ -46,6 +47,8 @@ from scipy.io import loadmat, savemat
 from tvb.basic.config.settings import TVBSettings as cfg
 from tvb.core.utils import MATLAB, OCTAVE, matlab_cmd
 from tvb.core.adapters.abcadapter import ABCAsynchronous
+from tvb.core.adapters.exceptions import MatlabEngineException
+from tvb.adapters.analyzers import matlab_engine
 
 
 
@@ -143,19 +146,53 @@ class MatlabAnalyzer(ABCAsynchronous):
             [0] string of code exec'd by MATLAB
             [1] string of log produced by MATLAB
             [2] dict of data from MATLAB's workspace
+
+        When the code fails, the error is not raised: the workspace holds success<hex> = 0
+        and exception<hex>, the same whether the code ran on a long-lived interpreter or not.
+        """
+        try:
+            logtext, retdata, error = matlab_engine.execute(self.mlab_exe, self._matlab_body(code), data,
+                                                            self.matlab_paths)
+        except MatlabEngineException, excep:
+            self.log.warning("Could not use a long-lived interpreter (%s). Starting a new process." % str(excep))
+            return self._matlab_script(code, data, work_dir, cleanup)
+        if error is not None:
+            self.log.warning("MATLAB code failed: %s" % error)
+            retdata['exception%s' % self.hex] = error
+        return self._matlab_code(code, data), logtext, retdata
+
+
+    def _matlab_body(self, code):
+        """
+        The code, with the success<hex> flag (set to 1 only when all of it was executed).
+        """
+        return ("\nsuccess%s = 0\n" + code + "\nsuccess%s = 1\n") % (self.hex, self.hex)
+
+
+    def _matlab_code(self, code, data=None):
+        """
+        :returns: the full MATLAB script for `code`, loading `data` and saving the workspace
+        """
+        pre = self._matlab_pre()
+        if data:
+            pre += "\nload %s\n" % self.wkspc_name
+        return pre + self._matlab_body(code) + self._matlab_post()
+
+
+    def _matlab_script(self, code, data=None, work_dir=None, cleanup=True):
+        """
+        Run the code in a new MATLAB process, exchanging data through .mat files.
+        Returns the same as method `matlab`.
         """
         wdir = tempfile.tempdir or os.getcwd()
         os.chdir(wdir)
         os.chdir(work_dir or os.getcwd())
 
-        pre, post = self._matlab_pre(), self._matlab_post()
-        code = ("\nsuccess%s = 0\n" + code + "\nsuccess%s = 1\n") % (self.hex, self.hex)
-
+        script = self._matlab_code(code, data)
         if data:
-            pre += "\nload %s\n" % self.wkspc_name
             savemat(self.wkspc_fname, data, format="5")
         with open(self.script_fname, 'w') as file_data:
-            file_data.write(pre + code + post)
+            file_data.write(script)
 
         matlab_cmd(self.mlab_exe, self.script_name, self.log_fname)
         while not os.path.exists(self.done_fname):
@@ -167,5 +204,5 @@ class MatlabAnalyzer(ABCAsynchronous):
 
         if cleanup:
             self.cleanup()
-        return pre + code + post, logtext, retdata
+        return script, logtext, retdata
 
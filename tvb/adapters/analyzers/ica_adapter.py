@@ -44,6 +44,9 @@ from tvb.basic.traits.util import log_debug_array
 from tvb.basic.filters.chain import FilterChain
 from tvb.basic.logger.builder import get_logger
 from tvb.basic.config.settings import TVBSettings
+from tvb.adapters.analyzers.streamed_decompositions import get_decomposition_interface, is_streamed, project
+from tvb.adapters.analyzers.streamed_decompositions import streamed_memory_size, streamed_pca, time_series_blocks
+from tvb.adapters.analyzers.block_reader import read_float_slice
 LOG = get_logger(__name__)
 
 
@@ -67,13 +70,13 @@ class ICAAdapter(ABCAsynchronous):
             if node['name'] == 'time_series':
                 node['conditions'] = FilterChain(fields=[FilterChain.datatype + '._nr_dimensions'],
                                                  operations=["=="], values=[4])
-        return tree
+        return tree + get_decomposition_interface(include_components=False)
     
     
     def get_output(self):
         return [IndependentComponents]
     
-    def configure(self, time_series, n_components=None):
+    def configure(self, time_series, n_components=None, decomposition=None):
         """
         Store the input shape to be later used to estimate memory usage. Also
         create the algorithm instance.
@@ -89,15 +92,24 @@ class ICAAdapter(ABCAsynchronous):
             ## It will only work for Simulator results.
             algorithm.n_components = self.input_shape[2]
         self.algorithm = algorithm
+        ## When set, the input is first reduced to its principal components, computed from blocks of time points.
+        self.reduction_method = None
+        if is_streamed(decomposition, n_components) and int(n_components) < self.input_shape[2]:
+            self.reduction_method = decomposition
         
     def get_required_memory_size(self, **kwargs):
         """
         Return the required memory to run this algorithm.
         """
         used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
+        if self.reduction_method is not None:
+            used_shape = (self.input_shape[0], 1, int(self.algorithm.n_components), self.input_shape[3])
+            reduction_size = streamed_memory_size(self.input_shape, self.algorithm.n_components)
+        else:
+            reduction_size = 0
         input_size = numpy.prod(used_shape) * 8.0
         output_size = self.algorithm.result_size(used_shape)
-        return input_size + output_size  
+        return input_size + output_size + reduction_size
     
     def get_required_disk_size(self, **kwargs):
         """
@@ -106,9 +118,14 @@ class ICAAdapter(ABCAsynchronous):
         used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
         return self.algorithm.result_size(used_shape) * TVBSettings.MAGIC_NUMBER / 8 / 2 ** 10
     
-    def launch(self, time_series, n_components=None):
+    def launch(self, time_series, n_components=None, decomposition=None):
         """ 
         Launch algorithm and build results. 
+
+        :param decomposition: when "incremental" or "randomized" and `n_components` is smaller than the number of
+                              nodes, FastICA runs on the projection of the input on its first `n_components`
+                              principal components; the (components x nodes) projection weights are stored as
+                              "reduction_weights" in the result
         """
         ##--------- Prepare a IndependentComponents object for result ----------##
         ica_result = IndependentComponents(source=time_series,
@@ -121,8 +138,11 @@ class ICAAdapter(ABCAsynchronous):
         ##---------- Iterate over slices and compose final result ------------##
         small_ts = TimeSeries(use_storage=False)
         for var in range(self.input_shape[1]):
-            node_slice[1] = slice(var, var + 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
+            if self.reduction_method is not None:
+                small_ts.data = self._reduce_state_variable(time_series, var, ica_result)
+            else:
+                node_slice[1] = slice(var, var + 1)
+                small_ts.data = read_float_slice(time_series, node_slice)
             self.algorithm.time_series = small_ts 
             partial_ica = self.algorithm.evaluate()
             ica_result.write_data_slice(partial_ica)
@@ -130,3 +150,21 @@ class ICAAdapter(ABCAsynchronous):
         return ica_result
 
 
+    def _reduce_state_variable(self, time_series, var, ica_result):
+        """
+        Project one state-variable on its first principal components (for each mode), without loading it fully.
+
+        :returns: the projected data, shaped as a 4D TimeSeries with one node per component
+        """
+        n_components = int(self.algorithm.n_components)
+        reduced = numpy.zeros((self.input_shape[0], 1, n_components, self.input_shape[3]))
+        weights = numpy.zeros((n_components, self.input_shape[2], 1, self.input_shape[3]))
+        for mode in range(self.input_shape[3]):
+            blocks = time_series_blocks(time_series, var, mode)
+            weights[:, :, 0, mode], _ = streamed_pca(blocks, n_components, self.reduction_method)
+            reduced[:, 0, :, mode] = project(blocks, weights[:, :, 0, mode])
+        ica_result.store_data_chunk('reduction_weights', weights, grow_dimension=2, close_file=False)
+        return reduced
+
+
+
@@ -0,0 +1,597 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Long-lived MATLAB / Octave interpreters, reused by the group (e.g. BCT) analyzers.
+
+Each interpreter is a child process which receives code through its standard input and reports
+back through its standard output. Real numeric arrays are exchanged as raw binary files, in a shared
+memory folder when available; other values (e.g. complex arrays, cells or structures) still go through
+a .mat workspace, so that the variables returned are the same as with `loadmat`.
+
+Operations run in separate processes, so the interpreters are kept by a small pool server, started
+on demand by the first operation and stopped after being idle for a while. Every following operation
+connects to it through a local socket. Operations starting at the same time take turns on a lock,
+so that only one of them starts the server. When the server can not be used, a pool local to the
+current process is used instead.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+
+"""
+
+import os
+import sys
+import time
+import uuid
+import Queue
+import select
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+import numpy
+from scipy.io import loadmat, savemat
+try:
+    import fcntl
+except ImportError:
+    ## Not available on Windows, where the interpreters pool server is not used (see `execute`).
+    fcntl = None
+from multiprocessing.connection import Listener, Client
+from tvb.core.utils import OCTAVE
+from tvb.core.adapters.exceptions import MatlabEngineException
+from tvb.basic.logger.builder import get_logger
+
+
+LOG = get_logger(__name__)
+
+## Interpreters started by the pool, for the same executable.
+ENGINE_POOL_SIZE = 2
+## Seconds to wait for a new interpreter, and for a running one to answer a health check.
+START_TIMEOUT = 120
+HEALTH_CHECK_TIMEOUT = 30
+## Seconds without requests after which the pool server stops, with all its interpreters.
+POOL_IDLE_TIMEOUT = 30 * 60
+## Seconds to wait for a pool server to accept connections, after starting it.
+SERVER_START_TIMEOUT = 20
+
+SHARED_MEMORY_FOLDER = "/dev/shm"
+
+PREFIX_VARIABLE = "TVB_VAR"
+PREFIX_ERROR = "TVB_ERROR"
+PREFIX_MAT_OUTPUTS = "TVB_MAT"
+
+## Workspaces for the variables which are not exchanged as binary arrays.
+MAT_INPUTS_FILE = "tvb_inputs.mat"
+MAT_OUTPUTS_FILE = "tvb_outputs.mat"
+
+
+
+def _read_binary_code(name, file_path, shape):
+    """ MATLAB code which loads an array of doubles written in column major order. """
+    return ("tvb_fid = fopen('%s', 'r'); %s = reshape(fread(tvb_fid, Inf, 'double'), [%s]); fclose(tvb_fid);"
+            % (file_path, name, " ".join(str(dim) for dim in shape)))
+
+
+
+class MatlabEngine(object):
+    """
+    One interpreter process, executing one piece of code at a time.
+    """
+
+    def __init__(self, executable):
+        self.executable = executable
+        self.is_octave = OCTAVE in os.path.basename(executable).lower()
+        self.process = None
+        self.work_dir = None
+        self._output = ''
+
+
+    def start(self):
+        """
+        Start the interpreter, and wait until it answers.
+        """
+        folder = SHARED_MEMORY_FOLDER if os.path.isdir(SHARED_MEMORY_FOLDER) else None
+        self.work_dir = tempfile.mkdtemp(prefix="tvb_engine_", dir=folder)
+        if self.is_octave:
+            command = [self.executable, '--quiet', '--norc', '--no-history', '--no-line-editing']
+        else:
+            command = [self.executable, '-nodesktop', '-nosplash', '-nojvm']
+        ## The same as for `matlab_cmd`, run with the user environment, not the TVB one.
+        environment = dict(os.environ)
+        environment.pop('LD_LIBRARY_PATH', None)
+        environment.pop('LD_RUN_PATH', None)
+        LOG.info("Starting interpreter: %s" % " ".join(command))
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.STDOUT, cwd=self.work_dir, env=environment)
+        except OSError, excep:
+            raise MatlabEngineException("Could not start %s: %s" % (self.executable, str(excep)))
+        self._output = ''
+        self.ping(START_TIMEOUT)
+
+
+    def stop(self):
+        """
+        Stop the interpreter (if running) and remove its working folder.
+        """
+        if self.is_alive():
+            try:
+                self._send("exit")
+                self.process.wait()
+            except MatlabEngineException:
+                self.process.kill()
+        self.process = None
+        if self.work_dir is not None:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+
+    def is_healthy(self):
+        """
+        Check that the interpreter is running and answers in a reasonable time.
+        """
+        if not self.is_alive():
+            return False
+        try:
+            self.ping()
+            return True
+        except MatlabEngineException, excep:
+            LOG.warning("Interpreter is not responding: %s" % str(excep))
+            return False
+
+
+    def ping(self, timeout=HEALTH_CHECK_TIMEOUT):
+        marker = self._print_marker()
+        self._read_until(marker, timeout)
+
+
+    def execute(self, code, data=None, paths=()):
+        """
+        Run `code`, after loading `data` in the workspace.
+
+        :param data: dictionary of input variables (anything `savemat` knows how to deal with)
+        :param paths: folders to be added to the MATLAB path
+        :returns: tuple (log of the execution, dictionary with the workspace variables,
+                  error message or None)
+        """
+        script = ["clear;"]
+        script.extend("addpath('%s');" % path for path in paths)
+        mat_inputs = {}
+        for name, value in (data or {}).iteritems():
+            if value is None:
+                continue
+            input_code = self._input_code(name, value)
+            if input_code is None:
+                mat_inputs[name] = value
+            else:
+                script.append(input_code)
+        if mat_inputs:
+            mat_path = os.path.join(self.work_dir, MAT_INPUTS_FILE)
+            savemat(mat_path, mat_inputs, format="5")
+            script.append("load('%s');" % mat_path)
+        script.extend(["tvb_success = 0;", "try", code, "tvb_success = 1;", "catch tvb_exception",
+                       "fprintf(1, '\\n%s %%s\\n', tvb_exception.message);" % PREFIX_ERROR, "end",
+                       self._output_code()])
+        self._send("\n".join(script))
+        lines = self._read_until(self._print_marker())
+
+        log_lines, result, error = [], {}, None
+        for line in lines:
+            if line.startswith(PREFIX_VARIABLE + " "):
+                name, shape = line.split()[1], [int(dim) for dim in line.split()[2:]]
+                result[name] = self._read_output(name, shape)
+            elif line.startswith(PREFIX_ERROR + " "):
+                error = line[len(PREFIX_ERROR) + 1:]
+            elif line == PREFIX_MAT_OUTPUTS:
+                mat_outputs = loadmat(os.path.join(self.work_dir, MAT_OUTPUTS_FILE), squeeze_me=True)
+                result.update((name, value) for name, value in mat_outputs.iteritems() if not name.startswith('__'))
+            else:
+                log_lines.append(line)
+        for file_name in os.listdir(self.work_dir):
+            os.remove(os.path.join(self.work_dir, file_name))
+        return "\n".join(log_lines), result, error
+
+
+    def _input_code(self, name, value):
+        """
+        :returns: MATLAB code which defines an input variable, with real arrays written in a binary file,
+                  or None when the variable is to be loaded from a .mat workspace
+        """
+        if isinstance(value, basestring):
+            return "%s = '%s';" % (name, value.replace("'", "''"))
+        try:
+            array = numpy.asarray(value)
+        except Exception:
+            return None
+        if array.dtype.kind not in 'biuf':
+            return None
+        array = array.astype(numpy.float64)
+        shape = array.shape
+        if array.ndim == 0:
+            shape = (1, 1)
+        elif array.ndim == 1:
+            ## The same as `savemat`, which stores 1D arrays as row vectors.
+            shape = (1, array.size)
+        file_path = os.path.join(self.work_dir, name + ".in.bin")
+        numpy.ravel(array, order='F').tofile(file_path)
+        return _read_binary_code(name, file_path, shape)
+
+
+    def _output_code(self):
+        """
+        :returns: MATLAB code which writes the real numeric workspace variables in binary files,
+                  and the other ones in a .mat workspace
+        """
+        return "\n".join(["tvb_names = who;",
+                          "tvb_others = {};",
+                          "for tvb_i = 1:numel(tvb_names)",
+                          "  if strncmp(tvb_names{tvb_i}, 'tvb_', 4), continue; end",
+                          "  tvb_value = eval(tvb_names{tvb_i});",
+                          "  if ~((isnumeric(tvb_value) || islogical(tvb_value)) && isreal(tvb_value))",
+                          "    tvb_others{end + 1} = tvb_names{tvb_i};",
+                          "    continue;",
+                          "  end",
+                          "  tvb_fid = fopen(['%s' filesep tvb_names{tvb_i} '.out.bin'], 'w');" % self.work_dir,
+                          "  fwrite(tvb_fid, full(double(tvb_value)), 'double');",
+                          "  fclose(tvb_fid);",
+                          "  fprintf(1, '\\n%s %%s %%s\\n', tvb_names{tvb_i}, sprintf('%%d ', size(tvb_value)));"
+                          % PREFIX_VARIABLE,
+                          "end",
+                          "if ~isempty(tvb_others)",
+                          "  save('%s', tvb_others{:}, '-v7');" % os.path.join(self.work_dir, MAT_OUTPUTS_FILE),
+                          "  fprintf(1, '\\n%s\\n');" % PREFIX_MAT_OUTPUTS,
+                          "end"])
+
+
+    def _read_output(self, name, shape):
+        """
+        :returns: an output variable, squeezed the same as by `loadmat(squeeze_me=True)`
+        """
+        data = numpy.fromfile(os.path.join(self.work_dir, name + ".out.bin"), dtype=numpy.float64)
+        return numpy.squeeze(data.reshape(shape, order='F'))[()]
+
+
+    def _print_marker(self):
+        """
+        Ask the interpreter to print a new marker line, and return it.
+        The marker is built from two strings, so that an echo of the command does not match it.
+        """
+        token = uuid.uuid4().hex
+        self._send("fprintf(1, '\\n%%s%%s\\n', 'TVB_DONE_', '%s');" % token)
+        return 'TVB_DONE_' + token
+
+
+    def _send(self, code):
+        if not self.is_alive():
+            raise MatlabEngineException("Interpreter %s is not running." % self.executable)
+        if self.is_octave:
+            code += "\nfflush(stdout);"
+        try:
+            self.process.stdin.write(code + "\n")
+            self.process.stdin.flush()
+        except (IOError, OSError), excep:
+            raise MatlabEngineException("Could not send code to the interpreter: %s" % str(excep))
+
+
+    def _read_until(self, marker, timeout=None):
+        """
+        Read output lines until the `marker` line.
+
+        :returns: the lines printed before the marker
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        output_fd = self.process.stdout.fileno()
+        lines = []
+        while True:
+            while '\n' in self._output:
+                line, self._output = self._output.split('\n', 1)
+                line = line.rstrip('\r')
+                if line.endswith(marker):
+                    return lines
+                lines.append(line)
+            wait = None if deadline is None else max(deadline - time.time(), 0)
+            ready = select.select([output_fd], [], [], wait)[0]
+            if not ready:
+                raise MatlabEngineException("No answer from the interpreter in %s seconds." % timeout)
+            chunk = os.read(output_fd, 65536)
+            if not chunk:
+                raise MatlabEngineException("The interpreter stopped unexpectedly. Last output: %s"
+                                            % "\n".join(lines[-10:]))
+            self._output += chunk
+
+
+
+class MatlabEnginePool(object):
+    """
+    Hand out running interpreters, checking their health first and restarting them when needed.
+    """
+
+    def __init__(self, executable, size=ENGINE_POOL_SIZE):
+        self.executable = executable
+        self.size = size
+        self._idle = Queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+
+    def execute(self, code, data=None, paths=()):
+        """
+        Run `code` on one of the interpreters. When the interpreter fails (not the code), the call is
+        retried once on a restarted interpreter.
+        """
+        for attempt in range(2):
+            engine = self._acquire()
+            try:
+                return engine.execute(code, data, paths)
+            except MatlabEngineException, excep:
+                LOG.warning("Interpreter failed: %s" % str(excep))
+                engine.stop()
+                if attempt > 0:
+                    raise
+            finally:
+                self._idle.put(engine)
+
+
+    def _acquire(self):
+        try:
+            engine = self._idle.get_nowait()
+        except Queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            engine = MatlabEngine(self.executable) if can_create else self._idle.get()
+        if not engine.is_healthy():
+            try:
+                engine.restart()
+            except MatlabEngineException:
+                engine.stop()
+                self._idle.put(engine)
+                raise
+        return engine
+
+
+    def close(self):
+        """
+        Stop the interpreters not in use.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except Queue.Empty:
+                break
+
+
+
+def _server_address(executable):
+    """
+    :returns: (socket path, key file path) for the pool server of an executable
+    """
+    name = "tvb_engines_%s_%s" % (os.getuid(), hashlib.md5(executable).hexdigest()[:10])
+    base_path = os.path.join(tempfile.gettempdir(), name)
+    return base_path + ".sock", base_path + ".key"
+
+
+
+class PoolActivity(object):
+    """
+    Requests in progress on a pool server, and the time when the last one started or ended.
+    """
+
+    def __init__(self):
+        self.active = 0
+        self.last_time = time.time()
+        self.stopping = False
+        self._lock = threading.Lock()
+
+
+    def begin(self):
+        """
+        :returns: False when the server is stopping, and the request is not to be handled
+        """
+        with self._lock:
+            if self.stopping:
+                return False
+            self.active += 1
+            self.last_time = time.time()
+            return True
+
+
+    def end(self):
+        with self._lock:
+            self.active -= 1
+            self.last_time = time.time()
+
+
+    def stop_if_idle(self, idle_timeout):
+        """
+        :returns: True when no request is in progress and none was for `idle_timeout` seconds;
+                  from then on, new requests are refused
+        """
+        with self._lock:
+            if self.active == 0 and time.time() - self.last_time >= idle_timeout:
+                self.stopping = True
+            return self.stopping
+
+
+
+def serve(executable, size=ENGINE_POOL_SIZE, idle_timeout=POOL_IDLE_TIMEOUT):
+    """
+    Run a pool server until it is idle for `idle_timeout` seconds.
+    """
+    address, key_file = _server_address(executable)
+    if os.path.exists(address):
+        os.remove(address)
+    authkey = uuid.uuid4().hex
+    key_fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0600)
+    os.write(key_fd, authkey)
+    os.close(key_fd)
+    listener = Listener(address, family='AF_UNIX', authkey=authkey)
+    pool = MatlabEnginePool(executable, size)
+    activity = PoolActivity()
+
+    def _stop_when_idle():
+        while not activity.stop_if_idle(idle_timeout):
+            time.sleep(min(60, idle_timeout))
+        LOG.info("Stopping idle interpreters pool for %s" % executable)
+        ## Following operations start a new server, instead of connecting to this one.
+        try:
+            os.remove(address)
+        except OSError:
+            pass
+        pool.close()
+        os._exit(0)
+
+    def _handle(connection):
+        try:
+            request = connection.recv()
+            try:
+                connection.send((True, pool.execute(request['code'], request['data'], request['paths'])))
+            except Exception, excep:
+                LOG.exception(excep)
+                connection.send((False, str(excep)))
+        except EOFError:
+            pass
+        finally:
+            connection.close()
+            activity.end()
+
+    threading.Thread(target=_stop_when_idle).start()
+    LOG.info("Interpreters pool for %s listening on %s" % (executable, address))
+    while True:
+        try:
+            connection = listener.accept()
+        except Exception, excep:
+            ## E.g. a client with an old key, from a previous server.
+            LOG.warning("Refused connection to the interpreters pool: %s" % str(excep))
+            continue
+        if not activity.begin():
+            connection.close()
+            continue
+        handler = threading.Thread(target=_handle, args=(connection,))
+        handler.daemon = True
+        handler.start()
+
+
+
+def _connect(executable):
+    """
+    :returns: a connection to the pool server, or None when it is not running
+    """
+    address, key_file = _server_address(executable)
+    try:
+        with open(key_file) as key_data:
+            return Client(address, family='AF_UNIX', authkey=key_data.read())
+    except Exception:
+        return None
+
+
+
+def _start_server(executable):
+    """
+    Start a pool server, detached from the current (operation) process, and connect to it.
+    The key file is locked meanwhile: an operation waiting for the lock connects to the server
+    started by the one holding it, instead of starting another server.
+    """
+    _, key_file = _server_address(executable)
+    lock_fd = os.open(key_file, os.O_RDWR | os.O_CREAT, 0600)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        connection = _connect(executable)
+        if connection is not None:
+            return connection
+        with open(os.devnull, 'r+') as devnull:
+            subprocess.Popen([sys.executable, '-m', 'tvb.adapters.analyzers.matlab_engine', executable],
+                             stdin=devnull, stdout=devnull, stderr=devnull, close_fds=True, preexec_fn=os.setsid)
+        deadline = time.time() + SERVER_START_TIMEOUT
+        while time.time() < deadline:
+            connection = _connect(executable)
+            if connection is not None:
+                return connection
+            time.sleep(0.2)
+        return None
+    finally:
+        ## Closing the file releases the lock.
+        os.close(lock_fd)
+
+
+LOCAL_POOLS = {}
+
+
+
+def execute(executable, code, data=None, paths=()):
+    """
+    Run MATLAB / Octave `code` with the `data` input variables, on a long-lived interpreter.
+
+    :returns: tuple (log of the execution, dictionary with the numeric workspace variables, error message or None)
+    :raises MatlabEngineException: when no interpreter could run the code
+    """
+    if not executable:
+        raise MatlabEngineException("No MATLAB or Octave executable is configured.")
+    if os.name == 'nt':
+        raise MatlabEngineException("Long-lived interpreters are not supported on this platform.")
+    for attempt in range(2):
+        connection = None
+        if executable not in LOCAL_POOLS:
+            connection = _connect(executable) or _start_server(executable)
+        if connection is None:
+            if executable not in LOCAL_POOLS:
+                LOG.warning("Could not use the interpreters pool server; starting interpreters for this process only.")
+                LOCAL_POOLS[executable] = MatlabEnginePool(executable, size=1)
+            return LOCAL_POOLS[executable].execute(code, data, paths)
+        try:
+            connection.send({'code': code, 'data': data, 'paths': list(paths)})
+            success, result = connection.recv()
+        except (EOFError, IOError), excep:
+            ## E.g. the server was stopping when the connection was made; retry once on a new server.
+            if attempt > 0:
+                raise MatlabEngineException("Lost connection to the interpreters pool: %s" % str(excep))
+            LOG.warning("Lost connection to the interpreters pool, connecting again: %s" % str(excep))
+            continue
+        finally:
+            connection.close()
+        if not success:
+            raise MatlabEngineException(result)
+        return result
+
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1])
+
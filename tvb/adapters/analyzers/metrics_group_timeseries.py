@@ -46,6 +46,8 @@ from tvb.basic.traits.util import log_debug_array
 from tvb.basic.traits.parameters_factory import get_traited_subclasses
 from tvb.basic.filters.chain import FilterChain
 from tvb.analyzers.metrics_base import BaseTimeseriesMetricAlgorithm
+from tvb.adapters.simulator.streaming_analyzers import STREAMED_METRIC_PREFIX, StreamingMetrics
+from tvb.adapters.analyzers.block_reader import read_time_blocks, time_block_length
 from tvb.basic.logger.builder import get_logger
 
 
@@ -88,15 +90,21 @@ class TimeseriesMetricsAdapter(ABCAsynchronous):
 
     def configure(self, time_series, algorithms=None):
         """
-        Store the input shape to be later used to estimate memory usage.
+        Store the input shape and the selected algorithms, to be later used to estimate memory usage.
         """
         self.input_shape = time_series.read_data_shape()
+        self.algorithms = algorithms if algorithms is not None else self.available_algorithms.keys()
 
 
     def get_required_memory_size(self, **kwargs):
         """
         Return the required memory to run this algorithm.
+        The full data is read in memory only when some selected algorithm can not be reduced block by block.
         """
+        if all(name in StreamingMetrics.METRIC_NAMES for name in self.algorithms):
+            ## One block as read, and the centered copies used for the running sums.
+            block_length = min(time_block_length(self.input_shape), self.input_shape[0])
+            return numpy.prod(self.input_shape[1:]) * block_length * 8.0 * 3
         input_size = numpy.prod(self.input_shape) * 8.0
         return input_size
 
@@ -120,36 +128,78 @@ class TimeseriesMetricsAdapter(ABCAsynchronous):
         """
         if algorithms is None:
             algorithms = self.available_algorithms.keys()
-        shape = time_series.read_data_shape()
         log_debug_array(LOG, time_series, "time_series")
 
-        metrics_results = {}
+        ## Validate algorithm filters first, to avoid reading the data when no algorithm applies.
+        applicable_algorithms = {}
         for algorithm_name in algorithms:
-            ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
-            node_slice = [slice(shape[0]), slice(shape[1]), slice(shape[2]), slice(shape[3])]
-
-            ##---------- Iterate over slices and compose final result ------------##
-            unstored_ts = TimeSeries(use_storage=False)
-
-            unstored_ts.data = time_series.read_data_slice(tuple(node_slice))
-
-            ##-------------------- Fill Algorithm for Analysis -------------------##
-            algorithm = self.available_algorithms[algorithm_name](time_series=unstored_ts)
-            ## Validate that current algorithm's filter is valid.
+            algorithm = self.available_algorithms[algorithm_name]()
             if (algorithm.accept_filter is not None and
                     not algorithm.accept_filter.get_python_filter_equivalent(time_series)):
                 LOG.warning('Measure algorithm will not be computed because of incompatibility on input. '
                             'Filters failed on algo: ' + str(algorithm_name))
-                continue
             else:
-                LOG.debug("Applying measure: " + str(algorithm_name))
+                applicable_algorithms[algorithm_name] = algorithm
 
-            unstored_result = algorithm.evaluate()
-            ##----------------- Prepare a Float object for result ----------------##
-            metrics_results[algorithm_name] = unstored_result
+        metrics_results = {}
+        ##------ Metrics streamed while the simulation was running need no data read ------##
+        for algorithm_name in applicable_algorithms.keys():
+            streamed = time_series.get_data(STREAMED_METRIC_PREFIX + algorithm_name, ignore_errors=True)
+            if streamed is not None and numpy.size(streamed) == 1:
+                LOG.debug("Using streamed measure: " + str(algorithm_name))
+                metrics_results[algorithm_name] = float(numpy.ravel(streamed)[0])
+                del applicable_algorithms[algorithm_name]
+
+        ##------ Variance metrics and KuramotoIndex are reduced one block of time points at a time ------##
+        if any(name in StreamingMetrics.METRIC_NAMES for name in applicable_algorithms):
+            reduced_results = self._reduce_in_blocks(time_series)
+            for algorithm_name in applicable_algorithms.keys():
+                if algorithm_name in reduced_results:
+                    LOG.debug("Measure reduced in blocks: " + str(algorithm_name))
+                    metrics_results[algorithm_name] = reduced_results[algorithm_name]
+                    del applicable_algorithms[algorithm_name]
+
+        if applicable_algorithms:
+            ##------ Read the data once, shared by all the other selected algorithms ------##
+            unstored_ts = TimeSeries(use_storage=False)
+            unstored_ts.data = self._read_data(time_series)
+
+            for algorithm_name, algorithm in applicable_algorithms.iteritems():
+                LOG.debug("Applying measure: " + str(algorithm_name))
+                algorithm.time_series = unstored_ts
+                ##----------------- Prepare a Float object for result ----------------##
+                metrics_results[algorithm_name] = algorithm.evaluate()
 
         result = DatatypeMeasure(analyzed_datatype=time_series, storage_path=self.storage_path,
                                  data_name=self._ui_name, metrics=metrics_results)
         return result
 
 
+    @staticmethod
+    def _reduce_in_blocks(time_series):
+        """
+        Accumulate the metrics known by StreamingMetrics (the same ones computed while simulating),
+        reading the TimeSeries in blocks along time, without holding the full data in memory.
+
+        :returns: dictionary {metric algorithm name: value}
+        """
+        ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
+        reducer = StreamingMetrics()
+        for _, block in read_time_blocks(time_series, dtype=numpy.float64):
+            reducer.update(block)
+        return reducer.results() if reducer.nr_samples > 0 else {}
+
+
+    @staticmethod
+    def _read_data(time_series):
+        """
+        Read the full TimeSeries data, in blocks along time, into a single float64 array
+        (without an intermediate copy when the data is stored with a smaller precision).
+        """
+        ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
+        data = numpy.empty(time_series.read_data_shape(), dtype=numpy.float64)
+        for rows, block in read_time_blocks(time_series):
+            data[rows] = block
+        return data
+
+
@@ -45,6 +45,8 @@ from tvb.datatypes.spectral import CoherenceSpectrum
 from tvb.basic.traits.util import log_debug_array
 from tvb.basic.filters.chain import FilterChain
 from tvb.basic.logger.builder import get_logger
+from tvb.adapters.analyzers.pairwise_tiles import PairwiseTiles, tile_coherence
+from tvb.adapters.analyzers.block_reader import read_float_slice
 
 LOG = get_logger(__name__)
 
@@ -98,7 +100,17 @@ class NodeCoherenceAdapter(ABCAsynchronous):
         used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
         input_size = numpy.prod(used_shape) * 8.0
         output_size = self.algorithm.result_size(used_shape)
-        return input_size + output_size    
+        return min(input_size + output_size, self._get_tiles().tile_memory)
+
+
+    def _get_tiles(self):
+        """
+        Node x node tiles, in which the result of one state-variable is computed.
+        """
+        used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
+        pair_memory = self.algorithm.result_size(used_shape) / float(self.input_shape[2] ** 2)
+        return PairwiseTiles(self.input_shape[2], pair_memory, self.input_shape[0] * self.input_shape[3] * 8.0,
+                             pair_elements=pair_memory / 8.0)    
 
 
     def get_required_disk_size(self, **kwargs):
@@ -122,15 +134,41 @@ class NodeCoherenceAdapter(ABCAsynchronous):
         node_slice = [slice(self.input_shape[0]), None, slice(self.input_shape[2]), slice(self.input_shape[3])]
         
         ##---------- Iterate over slices and compose final result ------------##
-        small_ts = TimeSeries(use_storage=False)
-        small_ts.sample_rate = time_series.sample_rate
-        partial_coh = None
+        nr_nodes = self.input_shape[2]
+        tiles = self._get_tiles()
+        partial_results = []
+
+        def _read_nodes(nodes):
+            node_slice[2] = nodes
+            return read_float_slice(time_series, node_slice)
+
+        def _evaluate(data):
+            small_ts = TimeSeries(use_storage=False)
+            small_ts.sample_rate = time_series.sample_rate
+            small_ts.data = data
+            algorithm = NodeCoherence(nfft=self.algorithm.nfft)
+            algorithm.time_series = small_ts
+            partial_result = algorithm.evaluate()
+            partial_results[:] = [partial_result]
+            return partial_result.array_data
+
+        def _evaluate_tile(rows_data, cols_data):
+            ## The algorithm for the pairs inside a group, only the pairs across groups otherwise.
+            if cols_data is None:
+                return _evaluate(rows_data), None
+            return tile_coherence(rows_data, cols_data, self.algorithm.nfft)
+
         for var in range(self.input_shape[1]):
             node_slice[1] = slice(var, var + 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
-            self.algorithm.time_series = small_ts
-            partial_coh = self.algorithm.evaluate()
-            coherence.write_data_slice(partial_coh)
+
+            def _write_tile(rows, cols, block):
+                full_shape = (block.shape[0], nr_nodes, nr_nodes, self.input_shape[1], block.shape[4])
+                region = (slice(block.shape[0]), rows, cols, slice(var, var + 1), slice(block.shape[4]))
+                coherence.store_data_region('array_data', block, region, full_shape,
+                                            tiles.chunk_shape(block.shape, (1, 2)), close_file=False)
+
+            tiles.run(_read_nodes, _evaluate_tile, _write_tile)
+        partial_coh = partial_results[0]
         coherence.frequency = partial_coh.frequency
         coherence.close_file()
         return coherence
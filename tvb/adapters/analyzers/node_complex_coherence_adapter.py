@@ -44,6 +44,7 @@ from tvb.datatypes.time_series import TimeSeries
 from tvb.datatypes.spectral import ComplexCoherenceSpectrum
 from tvb.basic.filters.chain import FilterChain
 from tvb.basic.logger.builder import get_logger
+from tvb.adapters.analyzers.block_reader import read_float_slice
 
 LOG = get_logger(__name__)
 
@@ -138,7 +139,7 @@ class NodeComplexCoherenceAdapter(ABCAsynchronous):
         ##---------- Iterate over slices and compose final result ------------##
         small_ts = TimeSeries(use_storage=False)
         small_ts.sample_rate = time_series.sample_rate
-        small_ts.data = time_series.read_data_slice(tuple(node_slice))
+        small_ts.data = read_float_slice(time_series, node_slice)
         self.algorithm.time_series = small_ts
         
         partial_result = self.algorithm.evaluate()
@@ -40,11 +40,13 @@ import numpy
 from tvb.basic.config.settings import TVBSettings
 from tvb.analyzers.node_covariance import NodeCovariance
 from tvb.core.adapters.abcadapter import ABCAsynchronous
-from tvb.datatypes.time_series import TimeSeries
 from tvb.datatypes.graph import Covariance
+from tvb.adapters.simulator.streaming_analyzers import STREAMED_COVARIANCE_DATA
+from tvb.adapters.analyzers.pairwise_tiles import PairwiseTiles, tile_covariance
 from tvb.basic.traits.util import log_debug_array
 from tvb.basic.filters.chain import FilterChain
 from tvb.basic.logger.builder import get_logger
+from tvb.adapters.analyzers.block_reader import read_float_slice
 
 LOG = get_logger(__name__)
 
@@ -93,7 +95,14 @@ class NodeCovarianceAdapter(ABCAsynchronous):
         used_shape = (self.input_shape[0], 1, self.input_shape[2], 1)
         input_size = numpy.prod(used_shape) * 8.0
         output_size = self.algorithm.result_size(used_shape)
-        return input_size + output_size    
+        return min(input_size + output_size, self._get_tiles().tile_memory)
+
+
+    def _get_tiles(self):
+        """
+        Node x node tiles, in which the covariance of one state-variable and mode is computed.
+        """
+        return PairwiseTiles(self.input_shape[2], pair_memory=8.0, node_memory=self.input_shape[0] * 8.0)
 
 
     def get_required_disk_size(self, **kwargs):
@@ -114,18 +123,37 @@ class NodeCovarianceAdapter(ABCAsynchronous):
         #Create a FourierSpectrum dataType object.
         covariance = Covariance(source=time_series, storage_path=self.storage_path)
         
+        ## When computed during the simulation, the covariance is already stored in the TimeSeries file.
+        streamed_covariance = time_series.get_data(STREAMED_COVARIANCE_DATA, ignore_errors=True)
+        expected_shape = (self.input_shape[2], self.input_shape[2], self.input_shape[1], self.input_shape[3])
+        if streamed_covariance is not None and streamed_covariance.shape == expected_shape:
+            LOG.debug("Using the covariance computed while simulating, instead of reading the full TimeSeries.")
+            for mode in range(self.input_shape[3]):
+                for var in range(self.input_shape[1]):
+                    covariance.write_data_slice(streamed_covariance[:, :, var:var + 1, mode:mode + 1])
+            covariance.close_file()
+            return covariance
+
         #NOTE: Assumes 4D, Simulator timeSeries.
-        node_slice = [slice(self.input_shape[0]), None, slice(self.input_shape[2]), None]
-        
+        node_slice = [slice(self.input_shape[0]), None, None, None]
+        tiles = self._get_tiles()
+        chunk_shape = tiles.chunk_shape((None, None, 1, 1), (0, 1))
+
+        def _read_nodes(nodes):
+            node_slice[2] = nodes
+            return read_float_slice(time_series, node_slice)[:, 0, :, 0]
+
         for mode in range(self.input_shape[3]):
             for var in range(self.input_shape[1]):
-                small_ts = TimeSeries(use_storage=False)
                 node_slice[1] = slice(var, var + 1)
                 node_slice[3] = slice(mode, mode + 1)
-                small_ts.data = time_series.read_data_slice(tuple(node_slice))
-                self.algorithm.time_series = small_ts 
-                partial_cov = self.algorithm.evaluate()
-                covariance.write_data_slice(partial_cov.array_data)
+
+                def _write_tile(rows, cols, block):
+                    covariance.store_data_region('array_data', block[:, :, numpy.newaxis, numpy.newaxis],
+                                                 (rows, cols, slice(var, var + 1), slice(mode, mode + 1)),
+                                                 expected_shape, chunk_shape, close_file=False)
+
+                tiles.run(_read_nodes, tile_covariance, _write_tile)
         covariance.close_file()
         return covariance
 
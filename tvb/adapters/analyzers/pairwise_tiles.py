@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Compute node x node results (covariance, correlation, coherence) in square tiles.
+
+Nodes are split in groups; a tile holds the pairs between two groups. Tiles are evaluated
+in parallel (see `block_parallel`) and each one is written into its region of the result
+data-set, so that peak memory is bounded by the tile size and not by the number of nodes squared.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+
+"""
+
+import math
+import numpy
+from tvb.core.entities.file.hdf5_storage_manager import CHUNK_BLOCK_SIZE
+from tvb.adapters.analyzers.block_parallel import BlockParallelExecutor
+from tvb.basic.logger.builder import get_logger
+
+
+LOG = get_logger(__name__)
+
+## Target memory (in Bytes) for evaluating one tile.
+TILE_MEMORY = 64 * 2 ** 20
+
+
+
+def tile_covariance(rows_data, cols_data=None):
+    """
+    Covariance between each row node and each column node (the same as `numpy.cov`, normalized by N - 1),
+    computed with a single matrix product.
+
+    :param rows_data: array (time, nodes) for the row group
+    :param cols_data: array (time, nodes) for the column group, or None for the diagonal tile
+    :returns: (rows x cols, cols x rows) blocks, as expected by `PairwiseTiles.run`
+    """
+    rows_data = rows_data - rows_data.mean(axis=0)[numpy.newaxis, :]
+    if cols_data is None:
+        return numpy.dot(rows_data.T, rows_data) / (rows_data.shape[0] - 1.0), None
+    cols_data = cols_data - cols_data.mean(axis=0)[numpy.newaxis, :]
+    block = numpy.dot(rows_data.T, cols_data) / (rows_data.shape[0] - 1.0)
+    return block, block.T
+
+
+
+def tile_cross_correlation(rows_data, cols_data):
+    """
+    Cross-correlation between each row node and each column node, as computed by the CrossCorrelate
+    algorithm for one pair (`scipy.signal.correlate` of the centered series, in mode "same"),
+    with the correlations of one row node against all the column nodes from a single inverse FFT.
+
+    :param rows_data: 4D input data for the row nodes (time, 1 state-variable, nodes, modes)
+    :param cols_data: 4D input data for the column nodes
+    :returns: (rows x cols, cols x rows) blocks, with shape (time offsets, nodes, nodes, 1, modes)
+    """
+    nr_points, nr_modes = rows_data.shape[0], rows_data.shape[3]
+    nr_rows, nr_cols = rows_data.shape[2], cols_data.shape[2]
+    nfft = 2 ** int(math.ceil(math.log(max(2 * nr_points - 1, 1), 2)))
+    rows_fft = numpy.fft.rfft(rows_data - rows_data.mean(axis=0), nfft, axis=0)
+    cols_fft = numpy.conj(numpy.fft.rfft(cols_data - cols_data.mean(axis=0), nfft, axis=0))
+    ## Offsets of the "same" mode, centered in the full correlation; negative ones wrap around.
+    offsets = numpy.arange(nr_points) + (nr_points - 1) // 2 - (nr_points - 1)
+
+    rows_cols = numpy.empty((nr_points, nr_rows, nr_cols, 1, nr_modes))
+    cols_rows = numpy.empty((nr_points, nr_cols, nr_rows, 1, nr_modes))
+    for mode in xrange(nr_modes):
+        for row in xrange(nr_rows):
+            products = rows_fft[:, 0, row, mode, numpy.newaxis] * cols_fft[:, 0, :, mode]
+            circular = numpy.fft.irfft(products, nfft, axis=0)
+            rows_cols[:, row, :, 0, mode] = circular[offsets % nfft]
+            cols_rows[:, :, row, 0, mode] = circular[(-offsets) % nfft]
+    return rows_cols, cols_rows
+
+
+
+def _segments_spectra(data, nfft):
+    """
+    FFT of the consecutive (not overlapping) segments of nfft time points, each linearly detrended.
+
+    :returns: complex array (segments, frequencies, ...) for the (time, ...) data
+    """
+    nr_segments = data.shape[0] // nfft
+    segments = data[:nr_segments * nfft].reshape((nr_segments, nfft) + data.shape[1:])
+    trend = (numpy.arange(nfft) - (nfft - 1) / 2.0).reshape((1, nfft) + (1,) * (data.ndim - 1))
+    segments = segments - segments.mean(axis=1)[:, numpy.newaxis]
+    slopes = (segments * trend).sum(axis=1) / (trend ** 2).sum()
+    return numpy.fft.rfft(segments - slopes[:, numpy.newaxis] * trend, axis=1)
+
+
+
+def tile_coherence(rows_data, cols_data, nfft):
+    """
+    Coherence between each row node and each column node, as computed by the NodeCoherence algorithm
+    for one pair (`matplotlib.mlab.cohere`: Welch's method over segments of nfft points, linear detrend,
+    no window and no overlap), with the spectra of each node computed once for the whole tile.
+
+    :param rows_data: 4D input data for the row nodes (time, 1 state-variable, nodes, modes)
+    :param cols_data: 4D input data for the column nodes
+    :returns: (rows x cols, cols x rows) blocks, with shape (frequencies, nodes, nodes, 1, modes)
+    """
+    nfft = int(nfft)
+    if rows_data.shape[0] < 2 * nfft:
+        raise ValueError("Coherence is averaged over segments of %d points, the TimeSeries is too short." % nfft)
+    rows_spectra = _segments_spectra(rows_data[:, 0], nfft)
+    cols_spectra = _segments_spectra(cols_data[:, 0], nfft)
+    rows_power = (numpy.abs(rows_spectra) ** 2).mean(axis=0)
+    cols_power = (numpy.abs(cols_spectra) ** 2).mean(axis=0)
+
+    nr_freqs, nr_modes = rows_spectra.shape[1], rows_data.shape[3]
+    rows_cols = numpy.empty((nr_freqs, rows_data.shape[2], cols_data.shape[2], 1, nr_modes))
+    for mode in xrange(nr_modes):
+        cross = numpy.einsum('sfr,sfc->frc', numpy.conj(rows_spectra[..., mode]),
+                             cols_spectra[..., mode]) / rows_spectra.shape[0]
+        rows_cols[..., 0, mode] = numpy.abs(cross) ** 2 / (rows_power[:, :, numpy.newaxis, mode] *
+                                                           cols_power[:, numpy.newaxis, :, mode])
+    return rows_cols, rows_cols.transpose((0, 2, 1, 3, 4))
+
+
+
+class PairwiseTiles(object):
+    """
+    Split `nr_nodes` nodes in groups and evaluate the pairwise result for each pair of groups.
+    """
+
+    def __init__(self, nr_nodes, pair_memory, node_memory, pair_elements=1):
+        """
+        :param pair_memory: memory (in Bytes) needed for the result of one pair of nodes
+        :param node_memory: memory (in Bytes) needed for the input of one node
+        :param pair_elements: how many values are written in the result data-set for one pair of nodes
+        """
+        self.nr_nodes = nr_nodes
+        ## A tile holds the (rows x cols) and the (cols x rows) results: 2 * size ** 2 pairs.
+        size = int(math.sqrt(TILE_MEMORY / (2.0 * max(pair_memory, 1))))
+        size = min(size, int(TILE_MEMORY / (2.0 * max(node_memory, 1))))
+        size = max(1, min(size, nr_nodes))
+        ## Square chunks along the node dimensions; groups hold whole chunks.
+        self.node_chunk = max(1, int(math.sqrt(CHUNK_BLOCK_SIZE / (8.0 * max(pair_elements, 1)))))
+        if size > self.node_chunk:
+            size -= size % self.node_chunk
+        else:
+            self.node_chunk = size
+        self.group_size = size
+        self.groups = [slice(start, min(start + size, nr_nodes)) for start in xrange(0, nr_nodes, size)]
+        self.tile_memory = 2 * size ** 2 * pair_memory + 2 * size * node_memory
+
+
+    def chunk_shape(self, region_shape, node_axes):
+        """
+        Chunk layout for the result data-set, aligned with the tiles along `node_axes`.
+
+        :param region_shape: shape of a region written for one tile; values on `node_axes` are ignored
+        """
+        chunk_shape = list(region_shape)
+        for axis in node_axes:
+            chunk_shape[axis] = self.node_chunk
+        return tuple(chunk_shape)
+
+
+    def run(self, read_nodes, evaluate_tile, write_tile):
+        """
+        - `read_nodes(node_slice)` returns the input data for a group of nodes (called in the current thread);
+        - `evaluate_tile(rows_data, cols_data)` returns the (rows x cols, cols x rows) result blocks;
+          for tiles on the diagonal, `cols_data` is None and the second block is ignored;
+        - `write_tile(row_slice, col_slice, block)` stores one block (called in the current thread).
+        """
+        tiles = [(row, col) for row in xrange(len(self.groups)) for col in xrange(row, len(self.groups))]
+        LOG.debug("Evaluating %d tiles of %d nodes." % (len(tiles), self.group_size))
+        ## The row group is the same for consecutive tiles, so read it only once.
+        current_rows = {}
+
+        def _read_tile(index):
+            row, col = tiles[index]
+            if row not in current_rows:
+                current_rows.clear()
+                current_rows[row] = read_nodes(self.groups[row])
+            cols_data = None if row == col else read_nodes(self.groups[col])
+            return current_rows[row], cols_data
+
+        def _evaluate_tile(tile_data):
+            return evaluate_tile(*tile_data)
+
+        def _write_tile(index, blocks):
+            row, col = tiles[index]
+            write_tile(self.groups[row], self.groups[col], blocks[0])
+            if row != col:
+                write_tile(self.groups[col], self.groups[row], blocks[1])
+
+        BlockParallelExecutor(self.tile_memory, len(tiles)).run(_read_tile, _evaluate_tile, _write_tile)
+
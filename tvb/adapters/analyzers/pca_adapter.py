@@ -45,6 +45,11 @@ from tvb.datatypes.mode_decompositions import PrincipalComponents
 from tvb.basic.traits.util import log_debug_array
 from tvb.basic.filters.chain import FilterChain
 from tvb.basic.logger.builder import get_logger
+from tvb.adapters.analyzers.block_parallel import BlockParallelExecutor
+from tvb.adapters.analyzers.streamed_decompositions import get_decomposition_interface, is_streamed
+from tvb.adapters.analyzers.streamed_decompositions import streamed_memory_size, streamed_pca, time_series_blocks
+from tvb.adapters.analyzers.streamed_decompositions import project_blocks
+from tvb.adapters.analyzers.block_reader import read_float_slice
 
 LOG = get_logger(__name__)
 
@@ -67,14 +72,14 @@ class PCAAdapter(ABCAsynchronous):
         tree = algorithm.interface[self.INTERFACE_ATTRIBUTES]
         tree[0]['conditions'] = FilterChain(fields=[FilterChain.datatype + '._nr_dimensions'],
                                             operations=["=="], values=[4])
-        return tree
+        return tree + get_decomposition_interface()
     
     
     def get_output(self):
         return [PrincipalComponents]
 
 
-    def configure(self, time_series):
+    def configure(self, time_series, decomposition=None, n_components=None):
         """
         Store the input shape to be later used to estimate memory usage. Also
         create the algorithm instance.
@@ -83,12 +88,17 @@ class PCAAdapter(ABCAsynchronous):
         log_debug_array(LOG, time_series, "time_series")
         ##-------------------- Fill Algorithm for Analysis -------------------##
         self.algorithm = PCA()
+        self.n_components = None
+        if is_streamed(decomposition, n_components):
+            self.n_components = min(int(n_components), self.input_shape[0], self.input_shape[2])
 
 
     def get_required_memory_size(self, **kwargs):
         """
         Return the required memory to run this algorithm.
         """
+        if self.n_components is not None:
+            return streamed_memory_size(self.input_shape, self.n_components)
         used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
         input_size = numpy.prod(used_shape) * 8.0
         output_size = self.algorithm.result_size(used_shape)
@@ -99,31 +109,79 @@ class PCAAdapter(ABCAsynchronous):
         """
         Returns the required disk size to be able to run the adapter (in kB).
         """
+        if self.n_components is not None:
+            ## Weights and fractions, for each of the requested components, the normalised source,
+            ## and the two component time series.
+            nr_time_points, nr_nodes = self.input_shape[0], self.input_shape[2]
+            output_size = (self.n_components * (nr_nodes + 1 + 2 * nr_time_points) + nr_time_points * nr_nodes)
+            output_size *= numpy.prod(self.input_shape[1::2]) * 8.0
+            return output_size * TVBSettings.MAGIC_NUMBER / 8 / 2 ** 10
         used_shape = (self.input_shape[0], 1, self.input_shape[2], self.input_shape[3])
         return self.algorithm.result_size(used_shape) * TVBSettings.MAGIC_NUMBER / 8 / 2 ** 10
 
 
-    def launch(self, time_series):
+    def launch(self, time_series, decomposition=None, n_components=None):
         """ 
         Launch algorithm and build results.
 
+        :param decomposition: when "incremental" or "randomized" (and `n_components` is given), the components
+                              are computed from blocks of time points, and only `n_components` are stored
         :returns: the `PrincipalComponents` object built with the given timeseries as source
         """
         ##--------- Prepare a PrincipalComponents object for result ----------##
         pca_result = PrincipalComponents(source=time_series, storage_path=self.storage_path)
+        if self.n_components is not None:
+            self._launch_streamed(time_series, decomposition, pca_result)
+            pca_result.close_file()
+            return pca_result
         
         ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
         node_slice = [slice(self.input_shape[0]), None, slice(self.input_shape[2]), slice(self.input_shape[3])]
         
         ##---------- Iterate over slices and compose final result ------------##
-        small_ts = TimeSeries(use_storage=False)
-        for var in range(self.input_shape[1]):
+        def _read_block(var):
             node_slice[1] = slice(var, var + 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
-            self.algorithm.time_series = small_ts 
-            partial_pca = self.algorithm.evaluate()
+            return read_float_slice(time_series, node_slice)
+
+        def _evaluate_block(data):
+            small_ts = TimeSeries(use_storage=False)
+            small_ts.data = data
+            algorithm = PCA()
+            algorithm.time_series = small_ts
+            return algorithm.evaluate()
+
+        def _write_result(_, partial_pca):
             pca_result.write_data_slice(partial_pca)
+
+        executor = BlockParallelExecutor(self.get_required_memory_size(), self.input_shape[1])
+        executor.run(_read_block, _evaluate_block, _write_result)
         pca_result.close_file()
         return pca_result
 
 
+    def _launch_streamed(self, time_series, decomposition, pca_result):
+        """
+        Compute `n_components` for each state-variable and mode, reading the TimeSeries in blocks of time points.
+        Weights are stored as (components, nodes, state-variables, modes) and fractions as
+        (components, state-variables, modes), the same layout as for the dense decomposition.
+        A second pass over the blocks stores the normalised source and the component time series,
+        with `n_components` in place of the nodes dimension.
+        """
+        nr_time_points, nr_vars, nr_nodes, nr_modes = self.input_shape
+        components_shape = (nr_time_points, nr_vars, self.n_components, nr_modes)
+        for var in range(nr_vars):
+            weights = numpy.zeros((self.n_components, nr_nodes, 1, nr_modes))
+            fractions = numpy.zeros((self.n_components, 1, nr_modes))
+            for mode in range(nr_modes):
+                blocks = time_series_blocks(time_series, var, mode)
+                weights[:, :, 0, mode], fractions[:, 0, mode] = streamed_pca(blocks, self.n_components, decomposition)
+                for rows, normalised, components, normalised_components in project_blocks(blocks,
+                                                                                         weights[:, :, 0, mode]):
+                    pca_result.store_data_region('norm_source', normalised, (rows, var, slice(None), mode),
+                                                 self.input_shape, close_file=False)
+                    pca_result.store_data_region('component_time_series', components,
+                                                 (rows, var, slice(None), mode), components_shape, close_file=False)
+                    pca_result.store_data_region('normalised_component_time_series', normalised_components,
+                                                 (rows, var, slice(None), mode), components_shape, close_file=False)
+            pca_result.store_data_chunk('weights', weights, grow_dimension=2, close_file=False)
+            pca_result.store_data_chunk('fractions', fractions, grow_dimension=1, close_file=False)
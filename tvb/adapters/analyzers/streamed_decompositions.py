@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Principal component decompositions computed from a TimeSeries read in blocks of time points,
+for inputs where a dense decomposition of the full (time x nodes) matrix does not fit in memory.
+
+Memory grows with the number of components (times the number of nodes), instead of with the
+square of the number of nodes. As for the dense PCA, each node is first normalised to zero
+mean and unit standard deviation.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+
+"""
+
+import numpy
+from tvb.core.adapters import xml_reader
+from tvb.adapters.analyzers import block_reader
+from tvb.adapters.analyzers.block_reader import read_float_slice
+from tvb.basic.logger.builder import get_logger
+
+
+LOG = get_logger(__name__)
+
+DECOMPOSITION_DENSE = "dense"
+DECOMPOSITION_INCREMENTAL = "incremental"
+DECOMPOSITION_RANDOMIZED = "randomized"
+DECOMPOSITIONS = [DECOMPOSITION_DENSE, DECOMPOSITION_INCREMENTAL, DECOMPOSITION_RANDOMIZED]
+
+## Extra dimensions and power iterations used by the randomized decomposition, for accuracy.
+RANDOMIZED_OVERSAMPLES = 10
+RANDOMIZED_POWER_ITERATIONS = 2
+
+
+
+def get_decomposition_interface(include_components=True):
+    """
+    :returns: attributes to be added in the input tree of a decomposition analyzer.
+    """
+    options = [{xml_reader.ATT_NAME: name, xml_reader.ATT_VALUE: name} for name in DECOMPOSITIONS]
+    interface = [{xml_reader.ATT_NAME: 'decomposition', 'label': 'Decomposition method',
+                  xml_reader.ATT_TYPE: xml_reader.TYPE_SELECT, xml_reader.ELEM_OPTIONS: options,
+                  'default': DECOMPOSITION_DENSE, 'required': False,
+                  xml_reader.ATT_DESCRIPTION: 'Use "%s" or "%s" for large (e.g. surface) TimeSeries: the data is '
+                                              'read in blocks of time points and only the requested number of '
+                                              'components is computed.' % (DECOMPOSITION_INCREMENTAL,
+                                                                          DECOMPOSITION_RANDOMIZED)}]
+    if include_components:
+        interface.append({xml_reader.ATT_NAME: 'n_components', 'label': 'Number of components',
+                          xml_reader.ATT_TYPE: xml_reader.TYPE_INT, 'required': False,
+                          xml_reader.ATT_DESCRIPTION: 'Components to be computed, when the decomposition is '
+                                                      'not "%s" (all of them by default).' % DECOMPOSITION_DENSE})
+    return interface
+
+
+
+def is_streamed(decomposition, n_components):
+    """
+    :returns: True when the decomposition is to be computed from blocks of time points.
+    """
+    return (decomposition in (DECOMPOSITION_INCREMENTAL, DECOMPOSITION_RANDOMIZED)
+            and n_components is not None and int(n_components) > 0)
+
+
+
+def streamed_memory_size(input_shape, n_components):
+    """
+    Memory (in Bytes) required by a streamed decomposition of one (time x nodes) matrix.
+    """
+    nr_time_points, nr_nodes = input_shape[0], input_shape[2]
+    nr_samples = min(int(n_components) + RANDOMIZED_OVERSAMPLES, nr_nodes)
+    block_size = min(block_reader.READ_BLOCK_SIZE, nr_time_points * nr_nodes * 8.0)
+    return (nr_time_points + 3 * nr_nodes) * nr_samples * 8.0 + 2 * block_size
+
+
+
+class TimeBlocks(object):
+    """
+    Read a (time x nodes) matrix in blocks of time points, normalised per node.
+
+    :param read_rows: function returning the (time x nodes) array for a slice of time points
+    """
+
+    def __init__(self, read_rows, nr_time_points, nr_nodes, block_size=None):
+        self.read_rows = read_rows
+        self.nr_time_points = nr_time_points
+        self.nr_nodes = nr_nodes
+        if block_size is None:
+            block_size = block_reader.time_block_length((nr_time_points, nr_nodes))
+        self.slices = list(block_reader.time_slices(nr_time_points, block_size))
+        self.mean, self.std = self._compute_moments()
+
+
+    def _compute_moments(self):
+        """
+        Per node mean and standard deviation, in one pass.
+        Nodes which do not vary are left unscaled, to avoid divisions by zero.
+        """
+        count, mean, squares = 0, numpy.zeros(self.nr_nodes), numpy.zeros(self.nr_nodes)
+        for rows in self.slices:
+            block = self.read_rows(rows)
+            ## Combine the moments of each block (Chan et al.), to avoid cancellation errors.
+            block_count, block_mean = block.shape[0], block.mean(axis=0)
+            delta = block_mean - mean
+            squares += ((block - block_mean) ** 2).sum(axis=0) + delta ** 2 * count * block_count / (count + block_count)
+            mean += delta * block_count / (count + block_count)
+            count += block_count
+        std = numpy.sqrt(squares / count)
+        std[std == 0] = 1.0
+        return mean, std
+
+
+    def __iter__(self):
+        """
+        Yield pairs of (time slice, normalised block).
+        """
+        for rows in self.slices:
+            yield rows, (self.read_rows(rows) - self.mean) / self.std
+
+
+    @property
+    def total_variance(self):
+        """ Sum of squares of the normalised matrix (the sum of all the PCA eigenvalues). """
+        return float(self.nr_time_points * self.nr_nodes)
+
+
+
+def time_series_blocks(time_series, state_variable, mode):
+    """
+    :returns: `TimeBlocks` reading the (time x nodes) matrix of one state-variable and mode from a 4D TimeSeries.
+    """
+    shape = time_series.read_data_shape()
+
+    def _read_rows(rows):
+        data_slice = (rows, slice(state_variable, state_variable + 1), slice(shape[2]), slice(mode, mode + 1))
+        return read_float_slice(time_series, data_slice)[:, 0, :, 0]
+
+    return TimeBlocks(_read_rows, shape[0], shape[2])
+
+
+
+def _flip_signs(components):
+    """
+    Make the largest weight of each component positive, for results which do not depend on the input order.
+    """
+    signs = numpy.sign(components[numpy.arange(components.shape[0]), numpy.abs(components).argmax(axis=1)])
+    signs[signs == 0] = 1
+    return components * signs[:, numpy.newaxis]
+
+
+
+def incremental_pca(blocks, n_components):
+    """
+    Update the decomposition with one block of time points at a time (Ross et al., 2008).
+
+    :param blocks: a `TimeBlocks` instance
+    :returns: (components, singular values), with components as rows of a (n_components x nodes) matrix
+    """
+    components = numpy.zeros((0, blocks.nr_nodes))
+    singular_values = numpy.zeros(0)
+    for _, block in blocks:
+        stacked = numpy.vstack((singular_values[:, numpy.newaxis] * components, block))
+        _, singular_values, components = numpy.linalg.svd(stacked, full_matrices=False)
+        singular_values, components = singular_values[:n_components], components[:n_components]
+    return _flip_signs(components), singular_values
+
+
+
+def randomized_pca(blocks, n_components, oversamples=RANDOMIZED_OVERSAMPLES,
+                   power_iterations=RANDOMIZED_POWER_ITERATIONS, seed=0):
+    """
+    Randomized SVD (Halko et al., 2011), with every product against the data computed block by block.
+
+    :param blocks: a `TimeBlocks` instance
+    :returns: (components, singular values), with components as rows of a (n_components x nodes) matrix
+    """
+    nr_samples = min(n_components + oversamples, blocks.nr_nodes, blocks.nr_time_points)
+    random_state = numpy.random.RandomState(seed)
+    projection = random_state.normal(size=(blocks.nr_nodes, nr_samples))
+
+    def _multiply(right):
+        """ data x right, as a (time x samples) matrix. """
+        result = numpy.empty((blocks.nr_time_points, right.shape[1]))
+        for rows, block in blocks:
+            result[rows] = numpy.dot(block, right)
+        return result
+
+    def _multiply_transposed(left):
+        """ data.T x left, as a (nodes x samples) matrix. """
+        result = numpy.zeros((blocks.nr_nodes, left.shape[1]))
+        for rows, block in blocks:
+            result += numpy.dot(block.T, left[rows])
+        return result
+
+    basis, _ = numpy.linalg.qr(_multiply(projection))
+    for _ in xrange(power_iterations):
+        basis, _ = numpy.linalg.qr(_multiply_transposed(basis))
+        basis, _ = numpy.linalg.qr(_multiply(basis))
+    ## The small (samples x nodes) matrix holding the data projected on the basis.
+    small = _multiply_transposed(basis).T
+    _, singular_values, components = numpy.linalg.svd(small, full_matrices=False)
+    return _flip_signs(components[:n_components]), singular_values[:n_components]
+
+
+
+def streamed_pca(blocks, n_components, method=DECOMPOSITION_RANDOMIZED):
+    """
+    :returns: (weights, fractions): the (n_components x nodes) components and the fraction of the
+              total variance explained by each of them
+    """
+    LOG.debug("Computing %d components with the %s decomposition." % (n_components, method))
+    if method == DECOMPOSITION_INCREMENTAL:
+        weights, singular_values = incremental_pca(blocks, n_components)
+    else:
+        weights, singular_values = randomized_pca(blocks, n_components)
+    return weights, singular_values ** 2 / blocks.total_variance
+
+
+
+def project(blocks, weights):
+    """
+    :returns: the (time x n_components) series of the normalised data projected on the `weights` components
+    """
+    result = numpy.empty((blocks.nr_time_points, weights.shape[0]))
+    for rows, block in blocks:
+        result[rows] = numpy.dot(block, weights.T)
+    return result
+
+
+
+def project_blocks(blocks, weights):
+    """
+    Yield, for each block of time points: (time slice, normalised block, block projected on `weights`,
+    normalised block projected on `weights`), the last two as (time x n_components) matrices.
+    """
+    for rows in blocks.slices:
+        block = blocks.read_rows(rows)
+        normalised = (block - blocks.mean) / blocks.std
+        yield rows, normalised, numpy.dot(block, weights.T), numpy.dot(normalised, weights.T)
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Min/max envelopes of TimeSeries data, used by the line viewers to draw long recordings
+with (at most) two points per pixel, instead of all the samples in the displayed window.
+
+To avoid reading all the samples for wide windows, a pyramid of decimated levels is stored
+next to the TimeSeries data: level k keeps the minimum and maximum of each PYRAMID_FACTOR ** k
+consecutive samples, for every state-variable, channel and mode. The pyramid is built by the
+Simulator, when the results of a monitor are complete (see MonitorResultsBuffer.finish), and its size
+is part of the disk space required by the simulation (see envelope_size_ratio).
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+from tvb.core.entities.file.exceptions import MissingDataSetException
+from tvb.adapters.analyzers import block_reader
+from tvb.basic.logger.builder import get_logger
+
+
+LOG = get_logger(__name__)
+
+## Number of samples (from the previous level) reduced into a single point of the next pyramid level.
+PYRAMID_FACTOR = 16
+## Pyramid levels are built only for TimeSeries with at least this many time points.
+PYRAMID_MIN_LENGTH = 64 * 1024
+## Pyramid levels shorter than this are not worth storing.
+PYRAMID_MIN_LEVEL_LENGTH = 1024
+## Name of the data-sets in the TimeSeries file holding a pyramid level ("min"/"max", samples per point).
+PYRAMID_DATASET = "envelope_%s_%d"
+
+
+
+def _level_name(kind, samples_per_point):
+    return PYRAMID_DATASET % (kind, samples_per_point)
+
+
+
+def _level_length(time_series, samples_per_point, length):
+    """
+    :returns: number of points in the pyramid level, or 0 when the level is missing or was not completely written.
+    """
+    expected_length = (length + samples_per_point - 1) // samples_per_point
+    for kind in ("min", "max"):
+        shape = time_series.get_data_shape(_level_name(kind, samples_per_point))
+        if not shape or shape[0] != expected_length:
+            return 0
+    return expected_length
+
+
+
+def _remove_level(time_series, samples_per_point):
+    """
+    Remove the data-sets of a pyramid level, e.g. left incomplete by an interrupted build.
+    """
+    for kind in ("min", "max"):
+        try:
+            time_series.get_data_shape(_level_name(kind, samples_per_point))
+        except MissingDataSetException:
+            continue
+        time_series.remove_data(_level_name(kind, samples_per_point))
+
+
+
+def _pyramid_levels(time_series, factor=PYRAMID_FACTOR):
+    """
+    :returns: the number of samples per point, for every complete pyramid level stored for time_series.
+    """
+    length = time_series.read_data_shape()[0]
+    levels = []
+    samples_per_point = factor
+    while samples_per_point < length:
+        try:
+            if not _level_length(time_series, samples_per_point, length):
+                break
+        except MissingDataSetException:
+            break
+        levels.append(samples_per_point)
+        samples_per_point *= factor
+    return levels
+
+
+
+def envelope_size_ratio(nr_time_points, factor=PYRAMID_FACTOR, min_length=PYRAMID_MIN_LENGTH,
+                        min_level_length=PYRAMID_MIN_LEVEL_LENGTH):
+    """
+    :returns: the size of the pyramid stored by build_envelope_pyramid for a TimeSeries with
+              nr_time_points, as a fraction of the size of the TimeSeries data
+    """
+    if nr_time_points < min_length:
+        return 0.0
+    ratio = 0.0
+    level_length = nr_time_points
+    while (level_length + factor - 1) // factor >= min_level_length:
+        level_length = (level_length + factor - 1) // factor
+        ## Minimum and maximum, in the same dtype as the data.
+        ratio += 2.0 * level_length / nr_time_points
+    return ratio
+
+
+
+def build_envelope_pyramid(time_series, factor=PYRAMID_FACTOR, min_length=PYRAMID_MIN_LENGTH,
+                           min_level_length=PYRAMID_MIN_LEVEL_LENGTH):
+    """
+    Store the pyramid levels in the file of time_series, unless they are already there,
+    or the TimeSeries is too short to need them. The data is read in blocks of time points,
+    and each level is computed from the previous one.
+
+    :returns: the number of samples per point, for every stored level
+    """
+    with block_reader.stored_data_lock(time_series):
+        shape = time_series.read_data_shape()
+        if shape[0] < min_length:
+            return []
+        levels = _pyramid_levels(time_series, factor)
+
+        if levels:
+            samples_per_point = levels[-1]
+            source_length = _level_length(time_series, samples_per_point, shape[0])
+        else:
+            samples_per_point = 1
+            source_length = shape[0]
+
+        block_length = block_reader.time_block_length(shape, multiple_of=factor)
+
+        while (source_length + factor - 1) // factor >= min_level_length:
+            level_samples = samples_per_point * factor
+            LOG.debug("Storing envelope of %d samples per point for %s" % (level_samples, time_series.gid))
+            ## Chunks are appended, so start from empty data-sets.
+            _remove_level(time_series, level_samples)
+            for rows in block_reader.time_slices(source_length, block_length):
+                block_slice = (rows,) + tuple(slice(dim) for dim in shape[1:])
+                if samples_per_point == 1:
+                    mins = maxs = numpy.asarray(time_series.read_data_slice(block_slice))
+                else:
+                    mins = time_series.get_data(_level_name("min", samples_per_point), block_slice)
+                    maxs = time_series.get_data(_level_name("max", samples_per_point), block_slice)
+                starts = numpy.arange(0, mins.shape[0], factor)
+                if not numpy.isfinite(mins).all() or not numpy.isfinite(maxs).all():
+                    mins, maxs = numpy.nan_to_num(mins), numpy.nan_to_num(maxs)
+                time_series.store_data_chunk(_level_name("min", level_samples),
+                                             numpy.minimum.reduceat(mins, starts, axis=0),
+                                             grow_dimension=0, close_file=False)
+                time_series.store_data_chunk(_level_name("max", level_samples),
+                                             numpy.maximum.reduceat(maxs, starts, axis=0),
+                                             grow_dimension=0, close_file=False)
+            time_series.close_file()
+            levels.append(level_samples)
+            samples_per_point = level_samples
+            source_length = (source_length + factor - 1) // factor
+        return levels
+
+
+
+def read_envelope(time_series, from_idx, to_idx, width, state_variable=0, mode=0, channels=None,
+                  factor=PYRAMID_FACTOR):
+    """
+    Compute the min/max envelope of the samples between from_idx and to_idx, in (at most) width buckets.
+    The coarsest pyramid level with less points per bucket than the window has is used, when stored;
+    otherwise the raw data is read, in blocks of whole buckets.
+
+    :param channels: list of channel indices to include, or None for all channels
+    :returns: tuple (time indices, data), with the minimum and the maximum of each bucket as consecutive rows
+              (2 * width rows, one column per channel), and the index of the first sample of the bucket repeated
+              for both rows
+    """
+    shape = time_series.read_data_shape()
+    from_idx = max(int(from_idx), 0)
+    to_idx = min(int(to_idx), shape[0])
+    if to_idx <= from_idx:
+        return numpy.zeros((0,), dtype=numpy.int64), numpy.zeros((0, len(channels or [])))
+    width = max(min(int(width), to_idx - from_idx), 1)
+
+    samples_per_point = 1
+    for level in _pyramid_levels(time_series, factor):
+        if level * width <= to_idx - from_idx:
+            samples_per_point = level
+    level_from = from_idx // samples_per_point
+    level_to = (to_idx + samples_per_point - 1) // samples_per_point
+    width = min(width, level_to - level_from)
+
+    def _read_block(start, end):
+        block_slice = (slice(level_from + start, level_from + end), slice(state_variable, state_variable + 1),
+                       slice(shape[2]), slice(mode, mode + 1))
+        if samples_per_point == 1:
+            mins = maxs = numpy.asarray(time_series.read_data_slice(block_slice))[:, 0, :, 0]
+        else:
+            mins = time_series.get_data(_level_name("min", samples_per_point), block_slice)[:, 0, :, 0]
+            maxs = time_series.get_data(_level_name("max", samples_per_point), block_slice)[:, 0, :, 0]
+        if channels is not None:
+            mins, maxs = mins[:, channels], maxs[:, channels]
+        return mins, maxs
+
+    ## Bucket boundaries, relative to level_from
+    bounds = (numpy.arange(width + 1) * (level_to - level_from)) // width
+    bucket_length = bounds[1] - bounds[0]
+    buckets_per_block = block_reader.time_block_length((width, shape[2]), multiple_of=bucket_length) // bucket_length
+    all_mins, all_maxs = [], []
+    for first in xrange(0, width, buckets_per_block):
+        last = min(first + buckets_per_block, width)
+        mins, maxs = _read_block(bounds[first], bounds[last])
+        if not numpy.isfinite(mins).all() or not numpy.isfinite(maxs).all():
+            mins, maxs = numpy.nan_to_num(mins), numpy.nan_to_num(maxs)
+        starts = bounds[first:last] - bounds[first]
+        all_mins.append(numpy.minimum.reduceat(mins, starts, axis=0))
+        all_maxs.append(numpy.maximum.reduceat(maxs, starts, axis=0))
+
+    mins, maxs = numpy.concatenate(all_mins), numpy.concatenate(all_maxs)
+    data = numpy.empty((2 * width,) + mins.shape[1:], dtype=mins.dtype)
+    data[0::2] = mins
+    data[1::2] = maxs
+    time_indices = numpy.maximum((level_from + bounds[:-1]) * samples_per_point, from_idx).repeat(2)
+    return time_indices, data
+
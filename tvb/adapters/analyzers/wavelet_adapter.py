@@ -37,6 +37,7 @@ ContinuousWaveletTransform Analyzer.
 
 """
 
+import math
 import numpy
 from tvb.basic.config.settings import TVBSettings
 from tvb.analyzers.wavelet import ContinuousWaveletTransform
@@ -47,6 +48,8 @@ from tvb.basic.traits.types_basic import Range
 from tvb.basic.traits.util import log_debug_array
 from tvb.basic.filters.chain import FilterChain
 from tvb.basic.logger.builder import get_logger
+from tvb.adapters.analyzers.block_parallel import BlockParallelExecutor, compute_node_block_size
+from tvb.adapters.analyzers.block_reader import read_float_slice
 
 LOG = get_logger(__name__)
 
@@ -145,16 +148,35 @@ class ContinuousWaveletTransformAdapter(ABCAsynchronous):
         ##------------- NOTE: Assumes 4D, Simulator timeSeries. --------------##
         node_slice = [slice(self.input_shape[0]), slice(self.input_shape[1]), None, slice(self.input_shape[3])]
         
-        ##---------- Iterate over slices and compose final result ------------##
-        small_ts = TimeSeries(use_storage=False)
-        small_ts.sample_rate = time_series.sample_rate
-        small_ts.sample_period = time_series.sample_period
-        for node in range(self.input_shape[2]):
-            node_slice[2] = slice(node, node + 1)
-            small_ts.data = time_series.read_data_slice(tuple(node_slice))
-            self.algorithm.time_series = small_ts
-            partial_wavelet = self.algorithm.evaluate()
-            wavelet.write_data_slice(partial_wavelet)
+        ##---------- Iterate over node blocks and compose final result ------------##
+        nr_nodes = self.input_shape[2]
+        node_memory = self.get_required_memory_size()
+        block_size = compute_node_block_size(time_series, node_memory)
+        nr_blocks = int(math.ceil(nr_nodes / float(block_size)))
+
+        def _read_block(block):
+            node_slice[2] = slice(block * block_size, min((block + 1) * block_size, nr_nodes))
+            return read_float_slice(time_series, node_slice)
+
+        def _evaluate_block(data):
+            small_ts = TimeSeries(use_storage=False)
+            small_ts.sample_rate = time_series.sample_rate
+            small_ts.sample_period = time_series.sample_period
+            small_ts.data = data
+            algorithm = ContinuousWaveletTransform(mother=self.algorithm.mother,
+                                                   sample_period=self.algorithm.sample_period,
+                                                   frequencies=self.algorithm.frequencies,
+                                                   normalisation=self.algorithm.normalisation,
+                                                   q_ratio=self.algorithm.q_ratio)
+            algorithm.time_series = small_ts
+            return algorithm.evaluate().array_data
+
+        def _write_result(_, coefficients):
+            wavelet.write_data_slice(WaveletCoefficients(array_data=coefficients, use_storage=False))
+
+        ## The transform loops in Python over frequencies and nodes, thus blocks are evaluated in processes.
+        executor = BlockParallelExecutor(node_memory * block_size, nr_blocks, use_processes=True)
+        executor.run(_read_block, _evaluate_block, _write_result)
         
         wavelet.close_file()
         return wavelet
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+TimeSeries with only part of the vertices of a surface, as stored by a surface simulation
+with a reduced spatial output (see tvb.adapters.simulator.surface_output).
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+from tvb.basic.traits import types_basic as basic
+from tvb.datatypes import arrays, surfaces
+from tvb.datatypes.time_series import TimeSeries
+
+
+
+class TimeSeriesVertexSubset(TimeSeries):
+    """
+    A surface time-series, stored only for the vertices in `kept_vertices`.
+    It is a different type than TimeSeriesSurface, for the viewers and analyzers expecting
+    one value for each vertex of the surface not to accept it.
+    """
+    __generate_table__ = True
+    _ui_name = "Surface vertices subset time-series"
+
+    surface = surfaces.CorticalSurface(label="Surface",
+                                       doc="The surface on which the kept vertices are defined.")
+
+    kept_vertices = arrays.IntegerArray(label="Kept vertices",
+                                        doc="Indices of the surface vertices stored, in the order of the space "
+                                            "dimension of this time-series.")
+
+    labels_ordering = basic.List(default=["Time", "State Variable", "Vertex", "Mode"])
+
+
+    def get_space_labels(self):
+        """
+        :returns: one label for each stored vertex, with its index on the full surface.
+        """
+        return ["Vertex-%d" % vertex for vertex in self.kept_vertices]
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Helpers for computing a batch of region simulations in a single Simulator run.
+
+The K simulations are placed on K disconnected copies of the same Connectivity (a block-diagonal
+network of K * N regions), with each set of model parameters applied on its own block of nodes.
+The Simulator then integrates all of them together, with its usual vectorized numpy code,
+and the monitor outputs are split back along the nodes dimension.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import copy
+import numpy
+from tvb.datatypes.connectivity import Connectivity
+
+
+## Connectivity attributes with one entry per region, to be repeated for each block.
+REGION_ATTRIBUTES = ['centres', 'region_labels', 'orientations', 'areas', 'cortical', 'hemispheres']
+
+
+
+def stack_connectivity(connectivity, nr_blocks):
+    """
+    :returns: a transient Connectivity with nr_blocks disconnected copies of the given one.
+    """
+    nr_regions = connectivity.number_of_regions
+    stacked = Connectivity(use_storage=False)
+    stacked.weights = numpy.kron(numpy.eye(nr_blocks), connectivity.weights)
+    stacked.tract_lengths = numpy.kron(numpy.eye(nr_blocks), connectivity.tract_lengths)
+    for attribute in REGION_ATTRIBUTES:
+        value = getattr(connectivity, attribute)
+        if value is not None and numpy.size(value) > 0 and len(value) == nr_regions:
+            setattr(stacked, attribute, numpy.concatenate([numpy.asarray(value)] * nr_blocks))
+    stacked.speed = connectivity.speed
+    stacked.configure()
+    return stacked
+
+
+
+def is_scalar_number(value):
+    """ True for a float/int or for a numeric array with a single element. """
+    if isinstance(value, numpy.ndarray):
+        return value.size == 1 and numpy.issubdtype(value.dtype, numpy.number)
+    return isinstance(value, (int, long, float)) and not isinstance(value, bool)
+
+
+
+def same_input(first, second):
+    """
+    Compare two converted adapter inputs (DataTypes by GID, arrays by value, dictionaries recursively).
+    """
+    if isinstance(first, dict) and isinstance(second, dict):
+        return set(first.keys()) == set(second.keys()) and all(same_input(first[key], second[key]) for key in first)
+    if isinstance(first, numpy.ndarray) or isinstance(second, numpy.ndarray):
+        return numpy.array_equal(first, second)
+    if hasattr(first, 'gid') and hasattr(second, 'gid'):
+        return first.gid == second.gid
+    return first == second
+
+
+
+def stack_model_parameters(parameters_list, nr_regions):
+    """
+    Build the model parameters for the stacked network: parameters which differ between the batch entries,
+    or which are already specified per region, become arrays with one value per stacked node.
+    """
+    nr_blocks = len(parameters_list)
+    stacked = copy.deepcopy(parameters_list[0])
+    for name, value in parameters_list[0].iteritems():
+        if not isinstance(value, (numpy.ndarray, int, long, float)) or isinstance(value, bool):
+            continue
+        values = [parameters[name] for parameters in parameters_list]
+        if all(same_input(value, other) for other in values[1:]):
+            if numpy.size(value) == nr_regions and nr_regions > 1:
+                stacked[name] = numpy.tile(numpy.asarray(value).ravel(), nr_blocks)
+        else:
+            stacked[name] = numpy.repeat([float(numpy.asarray(other).ravel()[0]) for other in values], nr_regions)
+    return stacked
+
+
+
+def split_sample(sample, nr_blocks):
+    """
+    :param sample: one monitor output, with shape (state variables, nr_blocks * nodes, modes)
+    :returns: list with the part of the sample corresponding to each block
+    """
+    nr_nodes = sample.shape[1] // nr_blocks
+    return [sample[:, idx * nr_nodes: (idx + 1) * nr_nodes] for idx in xrange(nr_blocks)]
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Helper for the Simulator adapter: accumulate monitor samples in memory and write them in large blocks.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import psutil
+import numpy
+from tvb.core.adapters import xml_reader
+from tvb.core.entities.file.hdf5_storage_manager import CHUNK_BLOCK_SIZE
+from tvb.adapters.analyzers.block_reader import READ_BLOCK_SIZE
+from tvb.adapters.analyzers.time_series_envelope import build_envelope_pyramid
+from tvb.basic.logger.builder import get_logger
+
+
+LOG = get_logger(__name__)
+
+
+# Fraction of the free memory which can be used by all the monitor blocks together.
+FREE_MEMORY_FRACTION = 0.1
+
+KEY_OUTPUT_PRECISION = "output_precision"
+## Precision in which monitor results can be stored. The first one is the default.
+## float16 is not offered: without a stored scale, large amplitudes would overflow (above 65504).
+OUTPUT_PRECISIONS = ["float64", "float32"]
+
+
+
+def get_precision_interface():
+    """
+    :returns: attribute to be added in the input tree of each monitor, for choosing the stored precision.
+    """
+    return [{xml_reader.ATT_NAME: KEY_OUTPUT_PRECISION, 'label': 'Stored precision',
+             xml_reader.ATT_TYPE: xml_reader.TYPE_SELECT, 'default': OUTPUT_PRECISIONS[0], 'required': False,
+             xml_reader.ELEM_OPTIONS: [{xml_reader.ATT_NAME: name, xml_reader.ATT_VALUE: name}
+                                       for name in OUTPUT_PRECISIONS],
+             xml_reader.ATT_DESCRIPTION: 'Numeric type of the stored results. Single precision (float32) '
+                                         'takes half of the disk space.'}]
+
+
+
+def pop_output_precision(monitor_parameters):
+    """
+    Remove the precision option from the parameters of a monitor (it is not known by the Monitor class).
+
+    :returns: numpy dtype for the results of this monitor
+    """
+    precision = monitor_parameters.pop(KEY_OUTPUT_PRECISION, None) or OUTPUT_PRECISIONS[0]
+    if str(precision) not in OUTPUT_PRECISIONS:
+        precision = OUTPUT_PRECISIONS[0]
+    return numpy.dtype(str(precision))
+
+
+
+class MonitorResultsBuffer(object):
+    """
+    Collect consecutive (time, data) samples returned by a monitor into preallocated numpy blocks,
+    and write them into the result TimeSeries with a single slice per block,
+    instead of one write_time_slice/write_data_slice call per sample.
+    """
+
+    def __init__(self, time_series, max_samples=None, max_block_size=READ_BLOCK_SIZE, analyzers=None, dtype=None):
+        """
+        :param time_series: result TimeSeries (with storage) where the samples are to be written
+        :param max_samples: expected number of samples from this monitor, to avoid over-allocating on short runs
+        :param max_block_size: maximum size in Bytes of the block kept in memory
+        :param analyzers: streaming analyzers to be updated with each block (see streaming_analyzers module)
+        :param dtype: numpy dtype in which samples are stored (by default, the dtype of the first sample)
+        """
+        self.time_series = time_series
+        self.analyzers = analyzers or []
+        self.dtype = dtype
+        self.max_samples = max_samples
+        self.max_block_size = max_block_size
+        self.times = None
+        self.data = None
+        self.count = 0
+
+
+    @staticmethod
+    def compute_block_size(nr_monitors):
+        """
+        :returns: maximum size in Bytes for the block of one monitor, considering the current free memory.
+        """
+        free_memory = psutil.virtual_memory().free
+        return int(max(min(READ_BLOCK_SIZE, free_memory * FREE_MEMORY_FRACTION / max(nr_monitors, 1)), 1))
+
+
+    def append(self, sample_time, sample_data):
+        """
+        Add one sample. The block is written in the TimeSeries when it is full.
+        """
+        if self.data is None:
+            self._allocate(numpy.asarray(sample_data))
+        self.times[self.count] = sample_time
+        self.data[self.count] = sample_data
+        self.count += 1
+        if self.count == self.data.shape[0]:
+            self.flush()
+
+
+    def _allocate(self, sample):
+        """
+        Number of samples in a block is a multiple of the HDF5 chunk length (when possible), within the size limit.
+        """
+        dtype = self.dtype if self.dtype is not None else sample.dtype
+        sample_size = max(sample.size * dtype.itemsize, 1)
+        samples_per_chunk = max(CHUNK_BLOCK_SIZE // sample_size, 1)
+        nr_samples = max(self.max_block_size // sample_size, 1)
+        if nr_samples > samples_per_chunk:
+            nr_samples -= nr_samples % samples_per_chunk
+        if self.max_samples is not None:
+            nr_samples = max(min(nr_samples, self.max_samples), 1)
+        self.data = numpy.empty((nr_samples,) + sample.shape, dtype=dtype)
+        self.times = numpy.empty(nr_samples)
+
+
+    def flush(self):
+        """
+        Write the samples collected so far.
+        The block is handed to the storage layer (which might keep a reference to it in its own buffer),
+        thus a new block is allocated on the next append instead of overwriting this one.
+        """
+        if self.count > 0:
+            if self.data.dtype.itemsize < 4 and not numpy.all(numpy.isfinite(self.data[:self.count])):
+                LOG.warning("Monitor values outside of the %s range were stored as infinite." % str(self.data.dtype))
+            for analyzer in self.analyzers:
+                analyzer.update(self.data[:self.count])
+            self.time_series.write_time_slice(self.times[:self.count])
+            self.time_series.write_data_slice(self.data[:self.count])
+        self.times = None
+        self.data = None
+        self.count = 0
+
+
+    def finish(self):
+        """
+        Write the remaining samples, and store the results of the streaming analyzers in the TimeSeries file,
+        together with the envelopes used by the viewers of long TimeSeries.
+        """
+        self.flush()
+        for analyzer in self.analyzers:
+            analyzer.finalize(self.time_series)
+        build_envelope_pyramid(self.time_series)
@@ -47,6 +47,15 @@ from tvb.simulator.integrators import Integrator
 from tvb.simulator.coupling import Coupling
 from tvb.core.adapters.abcadapter import ABCAsynchronous
 from tvb.core.adapters.exceptions import LaunchException
+from tvb.adapters.simulator.monitor_buffer import MonitorResultsBuffer, get_precision_interface, pop_output_precision
+from tvb.adapters.analyzers.time_series_envelope import envelope_size_ratio
+from tvb.adapters.simulator.batched_simulation import stack_connectivity, stack_model_parameters, split_sample
+from tvb.adapters.simulator.batched_simulation import same_input, is_scalar_number
+from tvb.adapters.simulator.simulator_cache import SIMULATOR_CACHE, input_fingerprint
+from tvb.adapters.simulator.surface_output import SurfaceOutputReducer, get_output_interface, pop_output_options
+from tvb.adapters.simulator.surface_output import OUTPUT_ALL_VERTICES, OUTPUT_REGION_AVERAGE
+from tvb.adapters.simulator.streaming_analyzers import build_streaming_analyzers
+from tvb.adapters.datatypes.time_series_subset import TimeSeriesVertexSubset
 from tvb.basic.traits.parameters_factory import get_traited_subclasses
 from tvb.datatypes.equations import HRFKernelEquation
 from tvb.datatypes.surfaces import Cortex
@@ -98,9 +107,19 @@ class SimulatorAdapter(ABCAsynchronous):
     # We exclude from this for example EEG, MEG or Bold which return 
     HAVE_STATE_VARIABLES = ["GlobalAverage", "SpatialAverage", "Raw", "SubSample", "TemporalAverage"]
 
+    # Monitors returning one value per region, thus their result can be split when simulations are batched.
+    BATCHABLE_MONITORS = ["Raw", "SubSample", "TemporalAverage", "Bold"]
+
+    # Monitors returning one value per vertex for surface simulations, thus their result can be reduced
+    # to part of the vertices.
+    SPATIALLY_REDUCIBLE_MONITORS = ["Raw", "SubSample", "TemporalAverage", "Bold"]
+
 
     def __init__(self):
         super(SimulatorAdapter, self).__init__()
+        self.nr_batched_simulations = 1
+        self.spatial_outputs = {}
+        self.output_dtypes = {}
         self.log.debug("%s: Initialized..." % str(self))
 
 
@@ -116,6 +135,18 @@ class SimulatorAdapter(ABCAsynchronous):
         # We should add as hidden the Simulator State attribute.
         result.append({self.KEY_NAME: 'simulation_state', self.KEY_TYPE: SimulationState,
                        self.KEY_LABEL: "Continuation of", self.KEY_REQUIRED: False, self.KEY_UI_HIDE: True})
+        # Hidden as well, filled by the burst with the analyzers to be computed while simulating.
+        result.append({self.KEY_NAME: 'streaming_analyzers', self.KEY_TYPE: 'str',
+                       self.KEY_LABEL: "Streaming analyzers", self.KEY_REQUIRED: False, self.KEY_UI_HIDE: True})
+        # All monitors get the option for the stored precision, and those with one value per vertex
+        # get the options for reducing the stored surface results.
+        for node in result:
+            if node[self.KEY_NAME] == 'monitors':
+                for option in node.get(self.KEY_OPTIONS) or []:
+                    attributes = (option.get(self.KEY_ATTRIBUTES) or []) + get_precision_interface()
+                    if option[self.KEY_VALUE] in self.SPATIALLY_REDUCIBLE_MONITORS:
+                        attributes += get_output_interface()
+                    option[self.KEY_ATTRIBUTES] = attributes
         return result
 
 
@@ -129,7 +160,7 @@ class SimulatorAdapter(ABCAsynchronous):
     def configure(self, model, model_parameters, integrator, integrator_parameters, connectivity,
                   monitors, monitors_parameters=None, surface=None, surface_parameters=None, stimulus=None,
                   coupling=None, coupling_parameters=None, initial_conditions=None,
-                  conduction_speed=None, simulation_length=0, simulation_state=None):
+                  conduction_speed=None, simulation_length=0, simulation_state=None, streaming_analyzers=None):
         """
         Make preparations for the adapter launch.
         """
@@ -140,7 +171,8 @@ class SimulatorAdapter(ABCAsynchronous):
         self.log.debug("%s: Initializing Model..." % str(self))
         noise_framework.build_noise(model_parameters)
         model_instance = self.available_models[str(model)](**model_parameters)
-        self._validate_model_parameters(model_instance, connectivity, surface)
+        simulator_connectivity = self._get_configured_connectivity(connectivity, self.nr_batched_simulations)
+        self._validate_model_parameters(model_instance, simulator_connectivity, surface)
 
         self.log.debug("%s: Initializing Integration scheme..." % str(self))
         noise_framework.build_noise(integrator_parameters)
@@ -148,9 +180,13 @@ class SimulatorAdapter(ABCAsynchronous):
 
         self.log.debug("%s: Instantiating Monitors..." % str(self))
         monitors_list = []
+        output_options = {}
+        self.output_dtypes = {}
         for monitor_name in monitors:
             if (monitors_parameters is not None) and (str(monitor_name) in monitors_parameters):
-                current_monitor_parameters = monitors_parameters[str(monitor_name)]
+                current_monitor_parameters = dict(monitors_parameters[str(monitor_name)])
+                output_options[str(monitor_name)] = pop_output_options(current_monitor_parameters)
+                self.output_dtypes[str(monitor_name)] = pop_output_precision(current_monitor_parameters)
                 HRFKernelEquation.build_equation_from_dict('hrf_kernel', current_monitor_parameters, True)
                 monitors_list.append(self.available_monitors[str(monitor_name)](**current_monitor_parameters))
             else:
@@ -165,7 +201,7 @@ class SimulatorAdapter(ABCAsynchronous):
 
         self.log.debug("Initializing Cortex...")
         if self._is_surface_simulation(surface, surface_parameters):
-            cortex_entity = Cortex(use_storage=False).populate_cortex(surface, surface_parameters)
+            cortex_entity = self._get_populated_cortex(surface, surface_parameters)
             if cortex_entity.region_mapping_data.connectivity.number_of_regions != connectivity.number_of_regions:
                 raise LaunchException("Incompatible RegionMapping -- Connectivity !!")
             if cortex_entity.region_mapping_data.surface.number_of_vertices != surface.number_of_vertices:
@@ -173,12 +209,13 @@ class SimulatorAdapter(ABCAsynchronous):
             select_loc_conn = cortex_entity.local_connectivity
             if select_loc_conn is not None and select_loc_conn.surface.number_of_vertices != surface.number_of_vertices:
                 raise LaunchException("Incompatible LocalConnectivity -- Surface !!")
+            self._prepare_spatial_outputs(output_options, cortex_entity.region_mapping_data.array_data,
+                                          connectivity.number_of_regions)
         else:
             cortex_entity = None
 
         self.log.debug("%s: Instantiating requested simulator..." % str(self))
-        connectivity.configure()
-        self.algorithm = Simulator(connectivity=connectivity, coupling=coupling_inst, surface=cortex_entity,
+        self.algorithm = Simulator(connectivity=simulator_connectivity, coupling=coupling_inst, surface=cortex_entity,
                                    stimulus=stimulus, model=model_instance, integrator=integr,
                                    monitors=monitors_list, initial_conditions=initial_conditions,
                                    conduction_speed=conduction_speed)
@@ -193,18 +230,66 @@ class SimulatorAdapter(ABCAsynchronous):
                                   "of an incompatibility between different version of TVB code.", err)
 
 
+    @staticmethod
+    def _get_configured_connectivity(connectivity, nr_blocks):
+        """
+        :returns: a transient, configured Connectivity holding nr_blocks disconnected copies of the given one,
+                  reused from the per-process cache when the same Connectivity was already used.
+        """
+        key = ('connectivity', connectivity.gid, connectivity.speed, nr_blocks)
+        return SIMULATOR_CACHE.get_or_build(key, lambda: stack_connectivity(connectivity, nr_blocks))
+
+
+    @staticmethod
+    def _get_populated_cortex(surface, surface_parameters):
+        """
+        :returns: the Cortex for the given surface and parameters. The same instance is returned for
+                  subsequent simulations in this process, so its local connectivity and region mapping,
+                  once computed by the Simulator, are not computed again.
+        """
+        key = ('cortex', surface.gid, input_fingerprint(surface_parameters))
+        return SIMULATOR_CACHE.get_or_build(key, lambda: Cortex(use_storage=False).populate_cortex(surface,
+                                                                                                   surface_parameters))
+
+
+    def _prepare_spatial_outputs(self, output_options, region_mapping, nr_regions):
+        """
+        Build the reducers for the monitors where only part of the vertices output is to be stored.
+        """
+        self.spatial_outputs = {}
+        for monitor_name, (output_type, decimation_step, selected_regions) in output_options.iteritems():
+            if monitor_name in self.SPATIALLY_REDUCIBLE_MONITORS and output_type != OUTPUT_ALL_VERTICES:
+                self.spatial_outputs[monitor_name] = SurfaceOutputReducer(output_type, region_mapping, nr_regions,
+                                                                          decimation_step, selected_regions)
+
+
     def get_required_memory_size(self, **kwargs):
         """
         Return the required memory to run this algorithm.
         """
-        return self.algorithm.memory_requirement()
+        nr_monitors = len(self.algorithm.monitors)
+        return self.algorithm.memory_requirement() + MonitorResultsBuffer.compute_block_size(nr_monitors) * nr_monitors
 
 
     def get_required_disk_size(self, **kwargs):
         """
         Return the required disk size this algorithm estimates it will take. (in kB)
         """
-        return self.algorithm.storage_requirement(self.simulation_length) / 2 ** 10
+        full_size = self.algorithm.storage_requirement(self.simulation_length) / 2 ** 10
+        # Approximation: consider all monitors of equal size (in float64), and scale those with a
+        # reduced surface output or a smaller stored precision, or long enough to get envelopes stored.
+        ratios = []
+        for monitor in self.algorithm.monitors:
+            monitor_name = monitor.__class__.__name__
+            ratio = 1.0
+            if monitor_name in self.spatial_outputs:
+                ratio *= self.spatial_outputs[monitor_name].size_ratio
+            if monitor_name in self.output_dtypes:
+                ratio *= self.output_dtypes[monitor_name].itemsize / 8.0
+            nr_time_points = int(float(self.simulation_length) / monitor.period) + 1
+            ratio *= 1.0 + envelope_size_ratio(nr_time_points)
+            ratios.append(ratio)
+        return full_size * sum(ratios) / len(ratios)
     
     
     def get_execution_time_approximation(self, **kwargs):
@@ -230,7 +315,7 @@ class SimulatorAdapter(ABCAsynchronous):
     def launch(self, model, model_parameters, integrator, integrator_parameters, connectivity,
                monitors, monitors_parameters=None, surface=None, surface_parameters=None, stimulus=None,
                coupling=None, coupling_parameters=None, initial_conditions=None,
-               conduction_speed=None, simulation_length=0, simulation_state=None):
+               conduction_speed=None, simulation_length=0, simulation_state=None, streaming_analyzers=None):
         """
         Called from the GUI to launch a simulation.
           *: string class name of chosen model, etc...
@@ -238,6 +323,8 @@ class SimulatorAdapter(ABCAsynchronous):
           connectivity: tvb.datatypes.connectivity.Connectivity object.
           surface: tvb.datatypes.surfaces.CorticalSurface: or None.
           stimulus: tvb.datatypes.patters.* object
+          streaming_analyzers: comma separated analyzers (with parameters) to be computed on region results,
+                               while running
         """
         result_datatypes = dict()
         start_time = self.algorithm.current_step * self.algorithm.integrator.dt
@@ -280,31 +367,60 @@ class SimulatorAdapter(ABCAsynchronous):
                                                                         title='Regions ' + m_name,
                                                                         start_time=start_time)
 
+            elif (m_name in self.spatial_outputs
+                  and self.spatial_outputs[m_name].output_type == OUTPUT_REGION_AVERAGE):
+                result_datatypes[m_name] = time_series.TimeSeriesRegion(storage_path=self.storage_path,
+                                                                        connectivity=connectivity,
+                                                                        sample_period=sample_period,
+                                                                        title='Regions average ' + m_name,
+                                                                        start_time=start_time)
+
+            elif m_name in self.spatial_outputs:
+                ## Only part of the vertices is stored, thus not to be displayed as a full surface result.
+                reducer = self.spatial_outputs[m_name]
+                result_datatypes[m_name] = TimeSeriesVertexSubset(storage_path=self.storage_path, surface=surface,
+                                                                  kept_vertices=reducer.kept_vertices,
+                                                                  sample_period=sample_period,
+                                                                  title='Surface ' + m_name + ' (' +
+                                                                        reducer.output_type + ')',
+                                                                  start_time=start_time)
+
             else:
                 result_datatypes[m_name] = time_series.TimeSeriesSurface(storage_path=self.storage_path,
                                                                          surface=surface, sample_period=sample_period,
                                                                          title='Surface ' + m_name,
                                                                          start_time=start_time)
-            # Now check if the monitor will return results for each state variable, in which case store
-            # the labels for these state variables.
-            if m_name in self.HAVE_STATE_VARIABLES:
-                selected_state_vars = [self.algorithm.model.state_variables[idx]
-                                       for idx in self.algorithm.monitors[m_ind].voi]
-                state_variable_dimension_name = result_datatypes[m_name].labels_ordering[1]
-                result_datatypes[m_name].labels_dimensions[state_variable_dimension_name] = selected_state_vars
+            self._fill_state_variable_labels(result_datatypes[m_name], m_name, m_ind)
         
         #### Create Simulator State entity and persist it in DB. H5 file will be empty now.
         if not self._is_group_launch():
             simulation_state = SimulationState(storage_path=self.storage_path)
             self._capture_operation_results([simulation_state])
 
+        ### Monitor samples are collected in memory and written in large blocks.
+        block_size = MonitorResultsBuffer.compute_block_size(len(monitors))
+        result_buffers, reducers = [], []
+        for m_ind, m_name in enumerate(monitors):
+            expected_samples = int(float(simulation_length) / self.algorithm.monitors[m_ind].period) + 1
+            analyzers = []
+            if isinstance(result_datatypes[m_name], time_series.TimeSeriesRegion):
+                analyzers = build_streaming_analyzers(streaming_analyzers, result_datatypes[m_name].sample_period,
+                                                      expected_samples)
+            result_buffers.append(MonitorResultsBuffer(result_datatypes[m_name], expected_samples, block_size,
+                                                       analyzers, self.output_dtypes.get(m_name)))
+            reducers.append(self.spatial_outputs.get(m_name))
+
         ### Run simulation
         self.log.debug("%s: Starting simulation..." % str(self))
         for result in self.algorithm(simulation_length=simulation_length):
-            for j, monitor in enumerate(monitors):
+            for j, monitor_buffer in enumerate(result_buffers):
                 if result[j] is not None:
-                    result_datatypes[monitor].write_time_slice([result[j][0]])
-                    result_datatypes[monitor].write_data_slice([result[j][1]])
+                    if reducers[j] is None:
+                        monitor_buffer.append(result[j][0], result[j][1])
+                    else:
+                        monitor_buffer.append(result[j][0], reducers[j](result[j][1]))
+        for monitor_buffer in result_buffers:
+            monitor_buffer.finish()
 
         self.log.debug("%s: Completed simulation, starting to store simulation state " % str(self))
         ### Populate H5 file for simulator state. This step could also be done while running sim, in background.
@@ -321,6 +437,104 @@ class SimulatorAdapter(ABCAsynchronous):
         return final_results
 
 
+    def _fill_state_variable_labels(self, result, monitor_name, monitor_index):
+        """
+        Check if the monitor will return results for each state variable, in which case store
+        the labels for these state variables.
+        """
+        if monitor_name in self.HAVE_STATE_VARIABLES:
+            selected_state_vars = [self.algorithm.model.state_variables[idx]
+                                   for idx in self.algorithm.monitors[monitor_index].voi]
+            state_variable_dimension_name = result.labels_ordering[1]
+            result.labels_dimensions[state_variable_dimension_name] = selected_state_vars
+
+
+    def can_launch_batch(self, kwargs_list):
+        """
+        Region simulations which differ only in scalar model parameters can be computed together,
+        on a block-diagonal Connectivity (see batched_simulation module).
+        """
+        first = kwargs_list[0]
+        if self._is_surface_simulation(first.get('surface'), first.get('surface_parameters')):
+            return False
+        for input_name in ['stimulus', 'initial_conditions', 'simulation_state']:
+            if first.get(input_name) is not None:
+                return False
+        if any(str(monitor) not in self.BATCHABLE_MONITORS for monitor in first['monitors']):
+            return False
+
+        first_parameters = first['model_parameters']
+        for kwargs in kwargs_list[1:]:
+            if set(kwargs.keys()) != set(first.keys()):
+                return False
+            for input_name in first:
+                if input_name != 'model_parameters' and not same_input(first[input_name], kwargs[input_name]):
+                    return False
+            if set(kwargs['model_parameters'].keys()) != set(first_parameters.keys()):
+                return False
+            for name, value in kwargs['model_parameters'].iteritems():
+                if not same_input(value, first_parameters[name]) and not (is_scalar_number(value) and
+                                                                          is_scalar_number(first_parameters[name])):
+                    return False
+        return True
+
+
+    def configure_batch(self, kwargs_list):
+        """
+        Build a single Simulator, for all the model parameters in the batch.
+        """
+        kwargs = dict(kwargs_list[0])
+        kwargs['model_parameters'] = stack_model_parameters([one_kwargs['model_parameters']
+                                                             for one_kwargs in kwargs_list],
+                                                            kwargs['connectivity'].number_of_regions)
+        self.nr_batched_simulations = len(kwargs_list)
+        self.configure(**kwargs)
+
+
+    def launch_batch(self, kwargs_list):
+        """
+        Run the stacked simulation and split each monitor output into one TimeSeriesRegion per batch entry.
+        """
+        connectivity = kwargs_list[0]['connectivity']
+        monitors = kwargs_list[0]['monitors']
+        simulation_length = kwargs_list[0]['simulation_length']
+        streaming_analyzers = kwargs_list[0].get('streaming_analyzers')
+        nr_blocks = len(kwargs_list)
+        start_time = self.algorithm.current_step * self.algorithm.integrator.dt
+
+        batch_results, result_buffers = [], []
+        block_size = MonitorResultsBuffer.compute_block_size(len(monitors) * nr_blocks)
+        for storage_path in self.batch_storage_paths:
+            results, buffers = [], []
+            for m_ind, m_name in enumerate(monitors):
+                sample_period = self.algorithm.monitors[m_ind].period
+                result = time_series.TimeSeriesRegion(storage_path=storage_path, connectivity=connectivity,
+                                                      sample_period=sample_period, title='Regions ' + m_name,
+                                                      start_time=start_time)
+                self._fill_state_variable_labels(result, m_name, m_ind)
+                results.append(result)
+                expected_samples = int(float(simulation_length) / sample_period) + 1
+                analyzers = build_streaming_analyzers(streaming_analyzers, sample_period, expected_samples)
+                buffers.append(MonitorResultsBuffer(result, expected_samples, block_size, analyzers,
+                                                    self.output_dtypes.get(m_name)))
+            batch_results.append(results)
+            result_buffers.append(buffers)
+
+        self.log.debug("%s: Starting batch of %d simulations..." % (str(self), nr_blocks))
+        for result in self.algorithm(simulation_length=simulation_length):
+            for j in xrange(len(monitors)):
+                if result[j] is not None:
+                    for buffers, sample in zip(result_buffers, split_sample(result[j][1], nr_blocks)):
+                        buffers[j].append(result[j][0], sample)
+
+        for buffers, results in zip(result_buffers, batch_results):
+            for monitor_buffer, result in zip(buffers, results):
+                monitor_buffer.finish()
+                result.close_file()
+        self.log.info("%s: Batch of simulations finished!!" % str(self))
+        return batch_results
+
+
     def _validate_model_parameters(self, model_instance, connectivity, surface):
         """
         Checks if the size of the model parameters is set correctly.
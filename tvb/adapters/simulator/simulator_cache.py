@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Per-process cache for the expensive inputs of a Simulator (stacked/configured Connectivity, populated Cortex),
+so that consecutive simulations on the same structural data, computed in the same worker process
+(e.g. PSE points grouped in a batch), skip rebuilding them.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import hashlib
+import threading
+import numpy
+from collections import OrderedDict
+from tvb.basic.logger.builder import get_logger
+
+
+# Maximum number of components kept in memory, the least recently used ones are evicted first.
+MAX_CACHED_COMPONENTS = 4
+
+
+
+def input_fingerprint(value):
+    """
+    :returns: a hashable key for a converted adapter input (DataTypes by GID, arrays by content).
+    """
+    if isinstance(value, dict):
+        return tuple((key, input_fingerprint(value[key])) for key in sorted(value.keys()))
+    if isinstance(value, (list, tuple)):
+        return tuple(input_fingerprint(entry) for entry in value)
+    if isinstance(value, numpy.ndarray):
+        return value.shape, str(value.dtype), hashlib.md5(numpy.ascontiguousarray(value).tostring()).hexdigest()
+    if hasattr(value, 'gid'):
+        return value.gid
+    return value
+
+
+
+class SimulatorComponentsCache(object):
+    """
+    Least-recently-used cache of configured Simulator components, keyed by input fingerprints.
+    Only components which are entirely defined by their key should be stored here; anything the Simulator
+    changes while running (history, monitors, model state) is rebuilt for each launch.
+    """
+
+    def __init__(self, max_size=MAX_CACHED_COMPONENTS):
+        self.max_size = max_size
+        self.logger = get_logger(self.__class__.__module__)
+        self._components = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get_or_build(self, key, builder):
+        """
+        :param key: hashable identifier, e.g. computed with input_fingerprint
+        :param builder: callable without parameters, invoked to build the component when not cached
+        :returns: the cached component for key
+        """
+        with self._lock:
+            if key in self._components:
+                component = self._components.pop(key)
+                self._components[key] = component
+                self.logger.debug("Reusing cached simulator component %s" % str(key[0]))
+                return component
+
+        component = builder()
+        with self._lock:
+            self._components[key] = component
+            while len(self._components) > self.max_size:
+                self._components.popitem(last=False)
+        return component
+
+
+    def clear(self):
+        """ Drop all cached components. """
+        with self._lock:
+            self._components.clear()
+
+
+    def __len__(self):
+        return len(self._components)
+
+
+
+SIMULATOR_CACHE = SimulatorComponentsCache()
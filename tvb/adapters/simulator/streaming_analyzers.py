@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Analyzers fed with the blocks of samples produced by a simulation monitor, while the simulation is running.
+Their result is stored next to the data, in the resulting TimeSeries file, where the analyzer adapters
+look for it before reading the full TimeSeries again.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+import tvb.analyzers.fft as fft
+from tvb.config import STREAMING_PARAMETERS_SEPARATOR
+from tvb.analyzers.metric_kuramoto_index import KuramotoIndex
+from tvb.analyzers.metric_variance_global import GlobalVariance
+from tvb.analyzers.metric_variance_of_node_variance import VarianceNodeVariance
+from tvb.datatypes.time_series import TimeSeries
+
+
+STREAMING_COVARIANCE = "covariance"
+STREAMING_METRICS = "metrics"
+STREAMING_FOURIER = "fourier"
+
+## Dataset (in the TimeSeries H5 file) holding the streamed node covariance, shape (nodes, nodes, state vars, modes)
+STREAMED_COVARIANCE_DATA = "streamed_covariance"
+
+## Prefix of the datasets holding the streamed metrics (one value each), followed by the metric algorithm name.
+STREAMED_METRIC_PREFIX = "streamed_metric_"
+
+
+
+def streamed_fourier_data_name(segment_length, window_function):
+    """
+    :returns: name of the dataset holding the Fourier spectra streamed with these parameters,
+              shape (frequencies, state vars, nodes, modes, segments)
+    """
+    return "streamed_fourier_%s_%s" % (float(segment_length), window_function or "none")
+
+
+
+def fft_segments(nr_samples, sample_period, segment_length):
+    """
+    Split a TimeSeries in (overlapping) segments, the same way the FFT algorithm does before evaluating.
+
+    :returns: list of (first, last + 1) time point indices, one tuple per segment
+    """
+    time_series_length = nr_samples * sample_period
+    nr_segments = int(numpy.ceil(time_series_length / segment_length))
+    if nr_segments <= 1:
+        return [(0, nr_samples)]
+    segment_points = segment_length / sample_period
+    overlap = (segment_points * nr_segments - nr_samples) / (nr_segments - 1)
+    starts = [max(segment * (segment_points - overlap), 0) for segment in xrange(nr_segments)]
+    return [(int(start), min(int(start + segment_points), nr_samples)) for start in starts]
+
+
+
+class StreamingCovariance(object):
+    """
+    Temporal covariance between nodes, for each state variable and mode, accumulated one block at a time.
+    Same result as numpy.cov over the full time dimension (as computed by the NodeCovariance analyzer).
+    """
+
+    def __init__(self, sample_period=1.0, expected_samples=None):
+        self.nr_samples = 0
+        self.shift = None
+        self.sums = None
+        self.products = None
+
+
+    def update(self, block):
+        """
+        :param block: monitor samples with shape (time, state variables, nodes, modes)
+        """
+        block = numpy.asarray(block, dtype=numpy.float64)
+        if self.shift is None:
+            ## Data is centered on the first sample, for numerical stability of the sums.
+            self.shift = block[0].copy()
+            _, nr_vars, nr_nodes, nr_modes = block.shape
+            self.sums = numpy.zeros((nr_vars, nr_modes, nr_nodes))
+            self.products = numpy.zeros((nr_vars, nr_modes, nr_nodes, nr_nodes))
+        centered = (block - self.shift).transpose((1, 3, 0, 2))
+        for var in xrange(centered.shape[0]):
+            for mode in xrange(centered.shape[1]):
+                self.sums[var, mode] += centered[var, mode].sum(axis=0)
+                self.products[var, mode] += numpy.dot(centered[var, mode].T, centered[var, mode])
+        self.nr_samples += block.shape[0]
+
+
+    def result(self):
+        """
+        :returns: covariance with shape (nodes, nodes, state variables, modes)
+        """
+        outer_sums = self.sums[:, :, :, numpy.newaxis] * self.sums[:, :, numpy.newaxis, :]
+        covariance = (self.products - outer_sums / self.nr_samples) / (self.nr_samples - 1)
+        return covariance.transpose((2, 3, 0, 1))
+
+
+    def finalize(self, time_series):
+        """ Store the result in the file of the analyzed TimeSeries. """
+        if self.nr_samples > 1:
+            time_series.store_data(STREAMED_COVARIANCE_DATA, self.result())
+
+
+
+class StreamingMetrics(object):
+    """
+    The metrics computed by TimeseriesMetricsAdapter after each PSE simulation, accumulated one block at a time:
+     - GlobalVariance and VarianceNodeVariance, from the running sums of each (state var, node, mode) series,
+       after the start point of the algorithm;
+     - KuramotoIndex, as the running mean over time of the order parameter.
+    """
+    VARIANCE_ALGORITHMS = [GlobalVariance, VarianceNodeVariance]
+    METRIC_NAMES = [GlobalVariance.__name__, VarianceNodeVariance.__name__, KuramotoIndex.__name__]
+
+
+    def __init__(self, sample_period=1.0, expected_samples=None):
+        self.nr_samples = 0
+        ## The metrics adapter evaluates them on an unstored TimeSeries, thus with its default sample period.
+        metrics_sample_period = TimeSeries(use_storage=False).sample_period
+        self.variances = [_StreamedVariance(algorithm(), metrics_sample_period)
+                          for algorithm in self.VARIANCE_ALGORITHMS]
+        self.nr_state_variables = 0
+        self.order_parameter_sum = 0.0
+
+
+    def update(self, block):
+        """
+        :param block: monitor samples with shape (time, state variables, nodes, modes)
+        """
+        block = numpy.asarray(block, dtype=numpy.float64)
+        for variance in self.variances:
+            variance.update(block, self.nr_samples)
+        self.nr_state_variables = block.shape[1]
+        if block.shape[1] > 1:
+            phases = numpy.angle(block[:, 0, :, 0] + 1j * block[:, 1, :, 0])
+            self.order_parameter_sum += numpy.abs(numpy.exp(1j * phases).mean(axis=1)).sum()
+        self.nr_samples += block.shape[0]
+
+
+    def results(self):
+        """
+        :returns: dictionary {metric algorithm name: value}
+        """
+        results = {}
+        for variance in self.variances:
+            value = variance.result(self.nr_samples)
+            if value is not None:
+                results[variance.algorithm.__class__.__name__] = value
+        if self.nr_state_variables > 1:
+            results[KuramotoIndex.__name__] = self.order_parameter_sum / self.nr_samples
+        return results
+
+
+    def finalize(self, time_series):
+        """ Store each metric in the file of the analyzed TimeSeries. """
+        if self.nr_samples > 0:
+            for name, value in self.results().iteritems():
+                time_series.store_data(STREAMED_METRIC_PREFIX + name, numpy.array([value]))
+
+
+
+class _StreamedVariance(object):
+    """
+    Running sums of each (state var, node, mode) series, from the time point where a variance metric starts.
+    Samples before that point are kept until the series is known to be longer, because a short series
+    is evaluated from another start point (see metric_start_index).
+    """
+
+    def __init__(self, algorithm, sample_period):
+        self.algorithm = algorithm
+        self.sample_period = sample_period
+        self.start = algorithm.start_point / sample_period if algorithm.start_point != 0.0 else 0
+        self.head = []
+        self.count = 0
+        self.shift = None
+        self.sums = None
+        self.squares = None
+
+
+    def update(self, block, offset):
+        if self.shift is None:
+            self.head.append(block.copy())
+            if offset + block.shape[0] <= self.start:
+                return
+            block = numpy.concatenate(self.head)[int(self.start):]
+            self.head = []
+            if block.shape[0] == 0:
+                return
+            self.shift = block[0].copy()
+            self.sums = numpy.zeros(block.shape[1:])
+            self.squares = numpy.zeros(block.shape[1:])
+        centered = block - self.shift
+        self.sums += centered.sum(axis=0)
+        self.squares += (centered ** 2).sum(axis=0)
+        self.count += block.shape[0]
+
+
+    def result(self, nr_samples):
+        """
+        :returns: the metric value, or None when it could not be computed from the streamed samples
+        """
+        if self.shift is None:
+            if not self.head or nr_samples >= self.start:
+                return None
+            ## Short series: all samples are still here, evaluate them as the adapter would.
+            unstored_ts = TimeSeries(use_storage=False)
+            unstored_ts.sample_period = self.sample_period
+            unstored_ts.data = numpy.concatenate(self.head)
+            self.algorithm.time_series = unstored_ts
+            return float(self.algorithm.evaluate())
+        ## Variance in time of each series, then combined over series as in the algorithms.
+        variances = (self.squares - self.sums ** 2 / self.count) / self.count
+        if isinstance(self.algorithm, VarianceNodeVariance):
+            nr_nodes = variances.shape[1]
+            node_variances = variances.transpose((1, 0, 2)).reshape((nr_nodes, -1)).mean(axis=1)
+            return float(node_variances.var())
+        return float(variances.mean())
+
+
+
+class StreamingFourier(object):
+    """
+    Fourier spectra of the (overlapping) segments of the TimeSeries, as computed by FourierAdapter.
+    Each segment is evaluated with the FFT algorithm as soon as all its samples were received.
+    The segments depend on the final number of samples, thus they are prepared both for the expected
+    number and for one sample less, and only the spectra matching the actual number are stored.
+    """
+
+    def __init__(self, sample_period=1.0, expected_samples=None, segment_length='', window_function=''):
+        self.sample_period = float(sample_period)
+        self.segment_length = float(segment_length) if segment_length else fft.FFT().segment_length
+        self.window_function = window_function or fft.FFT().window_function
+        self.nr_samples = 0
+        self.candidates = {}
+        for nr_samples in set([expected_samples or 0, (expected_samples or 0) - 1]):
+            if nr_samples > 0:
+                self.candidates[nr_samples] = _SegmentsSpectra(fft_segments(nr_samples, self.sample_period,
+                                                                            self.segment_length))
+
+
+    def update(self, block):
+        """
+        :param block: monitor samples with shape (time, state variables, nodes, modes)
+        """
+        block = numpy.asarray(block, dtype=numpy.float64)
+        for nr_samples, candidate in self.candidates.items():
+            if self.nr_samples + block.shape[0] > nr_samples:
+                del self.candidates[nr_samples]
+            else:
+                candidate.update(block, self.nr_samples, self._evaluate_segment)
+        self.nr_samples += block.shape[0]
+
+
+    def _evaluate_segment(self, segment_data):
+        """ FFT of a single segment (its length is the segment length, thus the algorithm does not split it). """
+        small_ts = TimeSeries(use_storage=False)
+        small_ts.sample_period = self.sample_period
+        small_ts.data = segment_data
+        algorithm = fft.FFT(segment_length=segment_data.shape[0] * self.sample_period,
+                            window_function=self.window_function)
+        algorithm.time_series = small_ts
+        return algorithm.evaluate().array_data
+
+
+    def result(self):
+        """
+        :returns: spectra with shape (frequencies, state variables, nodes, modes, segments),
+                  or None when the number of samples received does not match a prepared segmentation
+        """
+        candidate = self.candidates.get(self.nr_samples)
+        if candidate is None or not candidate.is_complete():
+            return None
+        spectra = candidate.spectra
+        if any(one_spectra.shape != spectra[0].shape for one_spectra in spectra):
+            return None
+        return numpy.concatenate(spectra, axis=4)
+
+
+    def finalize(self, time_series):
+        """ Store the result in the file of the analyzed TimeSeries. """
+        result = self.result()
+        if result is not None:
+            time_series.store_data(streamed_fourier_data_name(self.segment_length, self.window_function), result)
+
+
+
+class _SegmentsSpectra(object):
+    """
+    Samples of the segments still open, and the spectra of those already evaluated.
+    """
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.buffers = [None] * len(segments)
+        self.spectra = [None] * len(segments)
+
+
+    def update(self, block, offset, evaluate):
+        block_end = offset + block.shape[0]
+        for idx, (first, last) in enumerate(self.segments):
+            if self.spectra[idx] is not None or last <= offset or first >= block_end:
+                continue
+            if self.buffers[idx] is None:
+                self.buffers[idx] = numpy.empty((last - first,) + block.shape[1:])
+            copy_first, copy_last = max(first, offset), min(last, block_end)
+            self.buffers[idx][copy_first - first: copy_last - first] = block[copy_first - offset: copy_last - offset]
+            if copy_last == last:
+                self.spectra[idx] = evaluate(self.buffers[idx])
+                self.buffers[idx] = None
+
+
+    def is_complete(self):
+        return all(one_spectra is not None for one_spectra in self.spectra)
+
+
+
+AVAILABLE_STREAMING_ANALYZERS = {STREAMING_COVARIANCE: StreamingCovariance,
+                                 STREAMING_METRICS: StreamingMetrics,
+                                 STREAMING_FOURIER: StreamingFourier}
+
+
+
+def build_streaming_analyzers(specifications, sample_period=1.0, expected_samples=None):
+    """
+    :param specifications: comma separated streaming analyzers, each a name optionally followed by its
+                           parameters (see STREAMING_PARAMETERS_SEPARATOR); unknown names are ignored
+    :param sample_period: sample period of the monitor feeding the analyzers
+    :param expected_samples: number of samples expected from the monitor
+    :returns: list of new analyzer instances
+    """
+    if not specifications:
+        return []
+    analyzers = []
+    for specification in str(specifications).split(','):
+        parameters = [parameter.strip() for parameter in specification.split(STREAMING_PARAMETERS_SEPARATOR)]
+        if parameters[0] in AVAILABLE_STREAMING_ANALYZERS:
+            analyzers.append(AVAILABLE_STREAMING_ANALYZERS[parameters[0]](sample_period, expected_samples,
+                                                                           *parameters[1:]))
+    return analyzers
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Options for reducing the spatial size of the results of a surface simulation, per monitor:
+keep all vertices, average them on the regions of the RegionMapping, keep every n-th vertex,
+or keep only the vertices mapped onto some selected regions.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+import scipy.sparse
+from tvb.core.adapters import xml_reader
+from tvb.core.adapters.exceptions import LaunchException
+
+
+KEY_SPATIAL_OUTPUT = "spatial_output"
+KEY_DECIMATION_STEP = "decimation_step"
+KEY_OUTPUT_REGIONS = "output_regions"
+
+OUTPUT_ALL_VERTICES = "All vertices"
+OUTPUT_REGION_AVERAGE = "Region average"
+OUTPUT_DECIMATED = "Every n-th vertex"
+OUTPUT_REGIONS_SUBSET = "Vertices in selected regions"
+
+
+
+def get_output_interface():
+    """
+    :returns: attributes to be added in the input tree of a monitor with one output value per vertex.
+    """
+    options = [{xml_reader.ATT_NAME: name, xml_reader.ATT_VALUE: name}
+               for name in [OUTPUT_ALL_VERTICES, OUTPUT_REGION_AVERAGE, OUTPUT_DECIMATED, OUTPUT_REGIONS_SUBSET]]
+    return [{xml_reader.ATT_NAME: KEY_SPATIAL_OUTPUT, 'label': 'Stored surface output',
+             xml_reader.ATT_TYPE: xml_reader.TYPE_SELECT, xml_reader.ELEM_OPTIONS: options,
+             'default': OUTPUT_ALL_VERTICES, 'required': False,
+             xml_reader.ATT_DESCRIPTION: 'Only for surface simulations: which part of the vertices '
+                                         'to be written in the resulting TimeSeries.'},
+            {xml_reader.ATT_NAME: KEY_DECIMATION_STEP, 'label': 'Keep every n-th vertex',
+             xml_reader.ATT_TYPE: xml_reader.TYPE_INT, 'default': 4, 'required': False,
+             xml_reader.ATT_DESCRIPTION: 'Decimation step, used with "%s".' % OUTPUT_DECIMATED},
+            {xml_reader.ATT_NAME: KEY_OUTPUT_REGIONS, 'label': 'Region indices to keep',
+             xml_reader.ATT_TYPE: xml_reader.TYPE_ARRAY, 'elementType': 'int',
+             xml_reader.ATT_QUATIFIER: xml_reader.QUANTIFIER_MANUAL, 'default': '[]', 'required': False,
+             xml_reader.ATT_DESCRIPTION: 'Regions whose vertices are kept, used with "%s".' % OUTPUT_REGIONS_SUBSET}]
+
+
+
+def pop_output_options(monitor_parameters):
+    """
+    Remove from the parameters of a monitor the spatial output options (not known by the Monitor class).
+
+    :returns: tuple (output type, decimation step, selected regions)
+    """
+    output_type = monitor_parameters.pop(KEY_SPATIAL_OUTPUT, None) or OUTPUT_ALL_VERTICES
+    decimation_step = monitor_parameters.pop(KEY_DECIMATION_STEP, None) or 1
+    selected_regions = monitor_parameters.pop(KEY_OUTPUT_REGIONS, None)
+    if selected_regions is None:
+        selected_regions = []
+    return str(output_type), int(decimation_step), numpy.asarray(selected_regions, dtype=int).ravel()
+
+
+
+class SurfaceOutputReducer(object):
+    """
+    Reduce the vertices dimension of the samples returned by a monitor,
+    with shape (state variables, vertices, modes).
+    """
+
+    def __init__(self, output_type, region_mapping, nr_regions, decimation_step=1, selected_regions=None):
+        region_mapping = numpy.asarray(region_mapping, dtype=int).ravel()
+        self.output_type = output_type
+        self.nr_vertices = len(region_mapping)
+        self.kept_vertices = None
+        self.averaging = None
+
+        if output_type == OUTPUT_REGION_AVERAGE:
+            ## Sparse (regions x vertices) matrix, with 1 / (vertices in region) on each mapped pair.
+            counts = numpy.bincount(region_mapping, minlength=nr_regions).astype(float)
+            self.averaging = scipy.sparse.csr_matrix((1.0 / counts[region_mapping],
+                                                      (region_mapping, numpy.arange(self.nr_vertices))),
+                                                     shape=(nr_regions, self.nr_vertices))
+            self.output_size = nr_regions
+        elif output_type == OUTPUT_DECIMATED:
+            self.kept_vertices = numpy.arange(0, self.nr_vertices, max(decimation_step, 1))
+            self.output_size = len(self.kept_vertices)
+        elif output_type == OUTPUT_REGIONS_SUBSET:
+            self.kept_vertices = numpy.nonzero(numpy.in1d(region_mapping, selected_regions))[0]
+            if len(self.kept_vertices) == 0:
+                raise LaunchException("No vertex is mapped onto the regions %s selected for output." %
+                                      str(list(selected_regions)))
+            self.output_size = len(self.kept_vertices)
+        else:
+            self.output_size = self.nr_vertices
+
+
+    @property
+    def size_ratio(self):
+        """ Fraction of the full vertices output which is actually written. """
+        return self.output_size / float(self.nr_vertices)
+
+
+    def __call__(self, sample):
+        if self.averaging is not None:
+            nr_state_vars, nr_vertices, nr_modes = sample.shape
+            flat = sample.transpose((1, 0, 2)).reshape((nr_vertices, nr_state_vars * nr_modes))
+            averaged = numpy.asarray(self.averaging.dot(flat))
+            return averaged.reshape((self.output_size, nr_state_vars, nr_modes)).transpose((1, 0, 2))
+        if self.kept_vertices is not None:
+            return sample[:, self.kept_vertices]
+        return sample
@@ -33,10 +33,10 @@
 .. moduleauthor:: Bogdan Neacsa <bogdan.neacsa@codemart.ro>
 """
 import json
-import math
+import threading
 import numpy
 import pylab
-from copy import copy
+from collections import OrderedDict
 from tvb.basic.config.settings import TVBSettings as config
 from tvb.core.adapters.abcdisplayer import ABCDisplayer
 from tvb.core.adapters.exceptions import LaunchException
@@ -218,26 +218,35 @@ class Connectivity3DViewer():
         represent the rays and colors of the nodes from the matrix(optional) 
         this method will build the required parameter dictionary that will be 
         sent to the HTML/JS 3D representation of the connectivity matrix.
+        The rays and colors arrays are read by the viewer as binary arrays (see ConnectivityPayload).
+        """
+        payload = CONNECTIVITY_PAYLOADS_CACHE.load(input_data, colors, rays)
+        rays_array = payload.arrays[ConnectivityPayload.RAYS]
+        colors_array = payload.arrays[ConnectivityPayload.COLORS]
+        params = dict(raysURL=payload.url(ConnectivityPayload.RAYS),
+                      rayMin=float(rays_array.min()), rayMax=float(rays_array.max()),
+                      colorsURL=payload.url(ConnectivityPayload.COLORS),
+                      colorMin=float(colors_array.min()), colorMax=float(colors_array.max()))
+        return params, {}
+
+
+    @staticmethod
+    def compute_arrays(input_data, colors=None, rays=None):
+        """
+        :returns: the colors and the sizes of the spheres drawn for each node (1 when not given)
         """
         if colors is not None:
-            color_list = colors.array_data.tolist()
-            color_list = ABCDisplayer.get_one_dimensional_list(color_list, input_data.number_of_regions,
-                                                               "Invalid input size for Sphere Colors")
-            color_list = numpy.nan_to_num(numpy.array(color_list, dtype=numpy.float64)).tolist()
+            colors_array = numpy.nan_to_num(_one_dimensional_array(colors.array_data, input_data.number_of_regions,
+                                                                   "Invalid input size for Sphere Colors"))
         else:
-            color_list = [1.0] * input_data.number_of_regions
+            colors_array = numpy.ones(input_data.number_of_regions)
 
         if rays is not None:
-            rays_list = rays.array_data.tolist()
-            rays_list = ABCDisplayer.get_one_dimensional_list(rays_list, input_data.number_of_regions,
-                                                              "Invalid input size for Sphere Sizes")
-            rays_list = numpy.nan_to_num(numpy.array(rays_list, dtype=numpy.float64)).tolist()
+            rays_array = numpy.nan_to_num(_one_dimensional_array(rays.array_data, input_data.number_of_regions,
+                                                                 "Invalid input size for Sphere Sizes"))
         else:
-            rays_list = [1.0] * input_data.number_of_regions
-
-        params = dict(raysArray=json.dumps(rays_list), rayMin=min(rays_list), rayMax=max(rays_list),
-                      colorsArray=json.dumps(color_list), colorMin=min(color_list), colorMax=max(color_list))
-        return params, {}
+            rays_array = numpy.ones(input_data.number_of_regions)
+        return colors_array, rays_array
 
 
 # -------------------- Connectivity 2D code starting  ------------------
@@ -272,25 +281,15 @@ class Connectivity2DViewer():
         if input_data.number_of_regions <= 3:
             raise LaunchException('The connectivity matrix you selected has fewer nodes than acceptable for display!')
 
+        payload = CONNECTIVITY_PAYLOADS_CACHE.load(input_data, colors, rays)
         half = input_data.number_of_regions / 2
-        normalized_weights = self._normalize_weights(input_data.weights)
-        weights = Connectivity2DViewer._get_weights(normalized_weights)
-
-        ## Compute shapes and colors ad adjacent data
-        norm_rays, min_ray, max_ray = self._normalize_rays(rays, input_data.number_of_regions)
-        colors, step = self._prepare_colors(colors, input_data.number_of_regions, step)
-
-        right_json = self._get_json(input_data.region_labels[half:], input_data.centres[half:], weights[1], math.pi,
-                                    1, 2, norm_rays[half:], colors[half:], X_CANVAS_SMALL, Y_CANVAS_SMALL)
-        left_json = self._get_json(input_data.region_labels[:half], input_data.centres[:half], weights[0], math.pi,
-                                   1, 2, norm_rays[:half], colors[:half], X_CANVAS_SMALL, Y_CANVAS_SMALL)
-        full_json = self._get_json(input_data.region_labels, input_data.centres, input_data.weights, math.pi,
-                                   0, 1, norm_rays, colors, X_CANVAS_FULL, Y_CANVAS_FULL)
-
-        params = dict(bothHemisphereJson=full_json, rightHemisphereJson=right_json, leftHemisphereJson=left_json,
-                      stepValue=step or max_ray, firstColor=self.DEFAULT_COLOR,
-                      secondColor=self.OTHER_COLOR, minRay=min_ray, maxRay=max_ray)
-        return params, {}
+        views = {ConnectivityPayload.LEFT: self._get_view(input_data, payload, ConnectivityPayload.LEFT, 0,
+                                                          X_CANVAS_SMALL, Y_CANVAS_SMALL),
+                 ConnectivityPayload.BOTH: self._get_view(input_data, payload, ConnectivityPayload.BOTH, 0,
+                                                          X_CANVAS_FULL, Y_CANVAS_FULL),
+                 ConnectivityPayload.RIGHT: self._get_view(input_data, payload, ConnectivityPayload.RIGHT, half,
+                                                           X_CANVAS_SMALL, Y_CANVAS_SMALL)}
+        return self._get_parameters(input_data, payload, views, colors, step), {}
 
 
     def compute_preview_parameters(self, input_data, width, height, colors=None, rays=None, step=None):
@@ -299,111 +298,108 @@ class Connectivity2DViewer():
         """
         if input_data.number_of_regions <= 3:
             raise LaunchException('The connectivity matrix you selected has fewer nodes than acceptable for display!')
-        norm_rays, min_ray, max_ray = self._normalize_rays(rays, input_data.number_of_regions)
-        colors, step = self._prepare_colors(colors, input_data.number_of_regions, step)
+        payload = CONNECTIVITY_PAYLOADS_CACHE.load(input_data, colors, rays)
         normalizer_size_coeficient = width / 600.0
         if height / 700 < normalizer_size_coeficient:
             normalizer_size_coeficient = (height * 0.8) / 700.0
         x_size = X_CANVAS_FULL * normalizer_size_coeficient
         y_size = Y_CANVAS_FULL * normalizer_size_coeficient
-        full_json = self._get_json(input_data.region_labels, input_data.centres, input_data.weights, math.pi, 0, 1,
-                                   norm_rays, colors, x_size, y_size)
-        params = dict(bothHemisphereJson=full_json, stepValue=step or max_ray, firstColor=self.DEFAULT_COLOR,
-                      secondColor=self.OTHER_COLOR, minRay=min_ray, maxRay=max_ray)
-        return params, {}
+        views = {ConnectivityPayload.BOTH: self._get_view(input_data, payload, ConnectivityPayload.BOTH, 0,
+                                                          x_size, y_size)}
+        return self._get_parameters(input_data, payload, views, colors, step), {}
 
 
-    def _get_json(self, labels, positions, weights, rotate_angle, coord_idx1,
-                  coord_idx2, dimensions_list, colors_list, x_canvas, y_canvas):
+    def _get_parameters(self, input_data, payload, views, colors=None, step=None):
         """
-        Method used for creating a valid JSON for an entire chart.
+        Parameters for the 2D views, drawn from the node and edge arrays of the payload (see _get_view).
+        Nodes with a color value smaller than step are drawn with OTHER_COLOR.
         """
-        result_json = '['
-        max_y = max(positions[:, coord_idx2])
-        min_y = min(positions[:, coord_idx2])
-        max_x = max(positions[:, coord_idx1])
-        min_x = min(positions[:, coord_idx1])
-        y_scale = 2 * y_canvas / (max_y - min_y)
-        x_scale = 2 * x_canvas / (max_x - min_x)
-        mid_x_value = (max_x + min_x) / 2
-        mid_y_value = (max_y + min_y) / 2
-        for i in xrange(len(positions)):
-            result_json += self.point2json(labels[i], (positions[i][coord_idx1] - mid_x_value) * x_scale,
-                                           (positions[i][coord_idx2] - mid_y_value) * y_scale,
-                                           Connectivity2DViewer.get_adjacencies_json(weights[i], labels),
-                                           rotate_angle, dimensions_list[i], colors_list[i])
-            if i != len(positions) - 1:
-                result_json += ','
-        return result_json + ']'
+        if colors is not None and step is None:
+            step = (payload.min_color + payload.max_color) / 2
+        hemispheres = dict(labels=input_data.region_labels.tolist(), views=views, colorsThreshold=step,
+                           colors=[self.DEFAULT_COLOR, self.OTHER_COLOR])
+        return dict(hemispheresJson=json.dumps(hemispheres), stepValue=step or payload.max_ray,
+                    firstColor=self.DEFAULT_COLOR, secondColor=self.OTHER_COLOR,
+                    minRay=payload.min_ray, maxRay=payload.max_ray)
 
 
-    @classmethod
-    def _get_weights(cls, weights):
+    @staticmethod
+    def _get_view(input_data, payload, view, labels_offset, x_canvas, y_canvas):
         """
-        Method used for calculating the weights for the right and for the 
-        left hemispheres. Those matrixes are obtained from
-        a weights matrix which contains data related to both hemispheres.
+        Where to read the arrays for a chart, and the size of the canvas on which they are drawn.
         """
-        half = len(weights) / 2
-        l_aux, r_aux = weights[:half], weights[half:]
-        r_weights = []
-        l_weights = []
-        for i in range(half):
-            l_weights.append(l_aux[i][:half])
-        for i in range(half, len(weights)):
-            r_weights.append(r_aux[i - half][half:])
-        return l_weights, r_weights
+        return dict(nodesURL=payload.url(ConnectivityPayload.NODES + view),
+                    edgesURL=payload.url(ConnectivityPayload.EDGES + view),
+                    labelsOffset=labels_offset, canvas=[x_canvas, y_canvas])
 
 
-    def point2json(self, node_lbl, x_coord, y_coord, adjacencies, angle, shape_dimension, shape_color):
+    def compute_arrays(self, input_data, colors=None, rays=None):
         """
-        Method used for creating a valid JSON for a certain point.
+        Compute the arrays drawn in the charts for the left and right hemispheres, and the one with both.
+
+        :returns: a dictionary with 2 arrays for each chart: NODES + view has one row for each node, with
+                  its position (scaled to [-1, 1] on each axis), shape dimension, and color value (NaN when no
+                  colors are given), while EDGES + view has one row (from, to, weight) for each non-zero weight;
+                  and the minimum and maximum of the rays (before normalization)
         """
-        form = "circle"
-        default_dimension = 6
-        angle += math.atan2(y_coord, x_coord)
-        radius = math.sqrt(math.pow(x_coord, 2) + math.pow(y_coord, 2))
+        half = input_data.number_of_regions / 2
+        normalized_weights = self._normalize_weights(input_data.weights)
+        weights = Connectivity2DViewer._get_weights(normalized_weights)
+
+        ## Compute shapes and colors ad adjacent data
+        norm_rays, min_ray, max_ray = self._normalize_rays(rays, input_data.number_of_regions)
+        colors = self._prepare_colors(colors, input_data.number_of_regions)
+
+        arrays = {}
+        arrays.update(self._get_arrays(ConnectivityPayload.RIGHT, input_data.centres[half:], weights[1],
+                                       1, 2, norm_rays[half:], colors[half:]))
+        arrays.update(self._get_arrays(ConnectivityPayload.LEFT, input_data.centres[:half], weights[0],
+                                       1, 2, norm_rays[:half], colors[:half]))
+        arrays.update(self._get_arrays(ConnectivityPayload.BOTH, input_data.centres, input_data.weights,
+                                       0, 1, norm_rays, colors))
+        return arrays, min_ray, max_ray
+
 
-        result_json = '{"id": "' + node_lbl + '",' + '"name": "' + node_lbl + '", '
-        result_json += '"data": {"$dim": ' + str(default_dimension) + ', "$type": "' + form + '",'
-        result_json += '  "$color": "' + self.DEFAULT_COLOR + '", "customShapeDimension": ' + str(shape_dimension) + ','
-        result_json += '  "customShapeColor": "' + str(shape_color) + '", "angle": ' + str(angle) + ','
-        result_json += '  "radius": ' + str(radius) + ' }, '
-        result_json += '"adjacencies": [' + adjacencies + '] }'
-        return result_json
+    @staticmethod
+    def _get_arrays(view, positions, weights, coord_idx1, coord_idx2, dimensions, colors):
+        """
+        Method used for creating the node and edge arrays for an entire chart.
+        """
+        positions = numpy.asarray(positions)
+        x_coords, y_coords = positions[:, coord_idx1], positions[:, coord_idx2]
+        x_scale = 2.0 / (x_coords.max() - x_coords.min())
+        y_scale = 2.0 / (y_coords.max() - y_coords.min())
+        nodes = numpy.column_stack(((x_coords - (x_coords.max() + x_coords.min()) / 2) * x_scale,
+                                    (y_coords - (y_coords.max() + y_coords.min()) / 2) * y_scale,
+                                    dimensions, colors))
+        weights = numpy.asarray(weights)
+        sources, targets = numpy.nonzero(weights)
+        edges = numpy.column_stack((sources, targets, weights[sources, targets]))
+        return {ConnectivityPayload.NODES + view: nodes.astype(numpy.float32),
+                ConnectivityPayload.EDGES + view: edges.astype(numpy.float32).reshape((-1, 3))}
 
 
     @classmethod
-    def get_adjacencies_json(cls, point_weights, points_labels):
+    def _get_weights(cls, weights):
         """
-        Method used for obtaining a valid JSON which will contain all the edges of a certain node.
+        Method used for calculating the weights for the right and for the 
+        left hemispheres. Those matrixes are obtained from
+        a weights matrix which contains data related to both hemispheres.
         """
-        adjacencies = ""
-        for i, weight in enumerate(point_weights):
-            if weight:
-                if len(adjacencies) > 0:
-                    adjacencies += ","
-                adjacencies += '{ "nodeTo": "' + points_labels[i] + '", "data": {"weight": ' + str(weight) + '} }'
-        return adjacencies
+        half = len(weights) / 2
+        return weights[:half, :half], weights[half:, half:]
 
 
-    def _prepare_colors(self, colors, expected_size, step=None):
+    @staticmethod
+    def _prepare_colors(colors, expected_size):
         """
-        From the input array, all values smaller than step will get a different color
+        Read the color values of the nodes (NaN for all when no colors are given).
+        The threshold between the two node colors is applied by the viewers (see _get_parameters).
         """
         if colors is None:
-            return [self.DEFAULT_COLOR] * expected_size, None
-        colors = numpy.nan_to_num(numpy.array(colors.array_data, dtype=numpy.float64)).tolist()
-        colors = ABCDisplayer.get_one_dimensional_list(colors, expected_size, "Invalid size for colors array!")
-        result = []
-        if step is None:
-            step = (max(colors) + min(colors)) / 2
-        for val in colors:
-            if val < step:
-                result.append(self.OTHER_COLOR)
-            else:
-                result.append(self.DEFAULT_COLOR)
-        return result, step
+            return numpy.repeat(numpy.NaN, expected_size)
+        return numpy.nan_to_num(_one_dimensional_array(colors.array_data, expected_size,
+                                                       "Invalid size for colors array!"))
 
 
     def _normalize_rays(self, rays, expected_size):
@@ -412,22 +408,18 @@ class Connectivity2DViewer():
         """
         if rays is None:
             value = (self.MAX_RAY + self.MIN_RAY) / 2
-            return [value] * expected_size, value, value
-        rays = rays.array_data.tolist()
-        rays = ABCDisplayer.get_one_dimensional_list(rays, expected_size, "Invalid size for rays array.")
-        min_x = min(rays)
-        max_x = max(rays)
+            return numpy.repeat(float(value), expected_size), value, value
+        rays = _one_dimensional_array(rays.array_data, expected_size, "Invalid size for rays array.")
+        min_x = rays.min()
+        max_x = rays.max()
         if min_x >= self.MIN_RAY and max_x <= self.MAX_RAY:
             # No need to normalize
             return rays, min_x, max_x
-        result = []
         diff = max_x - min_x
         if min_x == max_x:
             diff = self.MAX_RAY - self.MIN_RAY
-        for ray in rays:
-            result.append(self.MIN_RAY + self.MAX_RAY * (ray - min_x) / diff)
-        result = numpy.nan_to_num(numpy.array(result, dtype=numpy.float64)).tolist()
-        return result, min(rays), max(rays)
+        result = numpy.nan_to_num(self.MIN_RAY + self.MAX_RAY * (rays - min_x) / diff)
+        return result, min_x, max_x
 
 
     def _normalize_weights(self, weights):
@@ -435,20 +427,119 @@ class Connectivity2DViewer():
         Normalize the weights matrix. The values should be between 
         MIN_WEIGHT_VALUE and MAX_WEIGHT_VALUE
         """
-        weights = copy(weights)
+        weights = numpy.array(weights, dtype=numpy.float64)
         min_value = numpy.min(weights)
         max_value = numpy.max(weights)
         if min_value < self.MIN_WEIGHT_VALUE or max_value > self.MAX_WEIGHT_VALUE:
-            for i, row in enumerate(weights):
-                for j in xrange(len(row)):
-                    if min_value == max_value:
-                        weights[i][j] = self.MAX_WEIGHT_VALUE
-                    else:
-                        weights[i][j] = (self.MIN_WEIGHT_VALUE + ((weights[i][j] - min_value) / (max_value - min_value))
-                                         * (self.MAX_WEIGHT_VALUE - self.MIN_WEIGHT_VALUE))
+            if min_value == max_value:
+                weights.fill(self.MAX_WEIGHT_VALUE)
+            else:
+                weights = (self.MIN_WEIGHT_VALUE + ((weights - min_value) / (max_value - min_value))
+                           * (self.MAX_WEIGHT_VALUE - self.MIN_WEIGHT_VALUE))
         return weights
 
 
+
+def _one_dimensional_array(array_data, expected_size, error_msg):
+    """
+    Array equivalent of ABCDisplayer.get_one_dimensional_list: the first expected_size values
+    (from the first row, for 2D input), as float64.
+
+    :raises LaunchException: when there are less than expected_size values
+    """
+    array_data = numpy.asarray(array_data)
+    if array_data.ndim > 1:
+        array_data = array_data[0]
+    if len(array_data) < expected_size:
+        raise LaunchException(error_msg)
+    return numpy.array(array_data[:expected_size], dtype=numpy.float64)
+
+
+# -------------------- Connectivity payloads cache starting  ------------------
+
+# Maximum number of payloads kept in memory, the least recently used ones are evicted first.
+MAX_CACHED_PAYLOADS = 4
+
+
+
+class ConnectivityPayload(object):
+    """
+    Arrays drawn by the 2D and 3D Connectivity viewers, for a Connectivity and its (optional) colors and rays
+    measures. The viewers read them as binary arrays, from FlowController.read_connectivity_payload.
+    """
+    LEFT = "left"
+    BOTH = "both"
+    RIGHT = "right"
+    NODES = "nodes_"
+    EDGES = "edges_"
+    RAYS = "rays"
+    COLORS = "colors"
+    URL_PREFIX = "/flow/read_connectivity_payload/"
+
+
+    def __init__(self, connectivity, colors=None, rays=None):
+        self.connectivity_gid = connectivity.gid
+        self.colors_gid = colors.gid if colors is not None else None
+        self.rays_gid = rays.gid if rays is not None else None
+
+        self.arrays, self.min_ray, self.max_ray = Connectivity2DViewer().compute_arrays(connectivity, colors, rays)
+        colors_3d, rays_3d = Connectivity3DViewer.compute_arrays(connectivity, colors, rays)
+        self.arrays[self.COLORS] = colors_3d
+        self.arrays[self.RAYS] = rays_3d
+        self.min_color = colors_3d.min()
+        self.max_color = colors_3d.max()
+
+
+    def url(self, array_name):
+        """
+        :returns: URL of FlowController.read_connectivity_payload, for one of the arrays
+        """
+        return "%s%s/%s?colors_gid=%s;rays_gid=%s" % (self.URL_PREFIX, self.connectivity_gid, array_name,
+                                                      self.colors_gid or '', self.rays_gid or '')
+
+
+
+class ConnectivityPayloadCache(object):
+    """
+    Least-recently-used cache of ConnectivityPayload, by (connectivity GID, colors GID, rays GID).
+    """
+
+    def __init__(self, max_size=MAX_CACHED_PAYLOADS):
+        self.max_size = max_size
+        self._payloads = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def load(self, connectivity, colors=None, rays=None):
+        """
+        :returns: ConnectivityPayload for the given inputs, computed only when not already cached
+        :raises LaunchException: when colors or rays have less values than the connectivity regions
+        """
+        key = (connectivity.gid, colors.gid if colors is not None else None, rays.gid if rays is not None else None)
+        with self._lock:
+            payload = self._payloads.pop(key, None)
+            if payload is not None:
+                self._payloads[key] = payload
+                return payload
+
+        payload = ConnectivityPayload(connectivity, colors, rays)
+        with self._lock:
+            self._payloads[key] = payload
+            while len(self._payloads) > self.max_size:
+                self._payloads.popitem(last=False)
+        return payload
+
+
+    def clear(self):
+        """ Drop all cached payloads. """
+        with self._lock:
+            self._payloads.clear()
+
+
+
+CONNECTIVITY_PAYLOADS_CACHE = ConnectivityPayloadCache()
+
+
 # -------------------- Connectivity MPLH5 code starting  ------------------
 
 class MPLH5Connectivity():
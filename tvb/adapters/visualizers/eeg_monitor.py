@@ -37,6 +37,7 @@ import numpy
 from tvb.core.adapters.abcdisplayer import ABCDisplayer
 from tvb.datatypes.time_series import TimeSeriesEEG
 from tvb.core.adapters.exceptions import LaunchException
+from tvb.adapters.visualizers.time_series_page_statistics import page_statistics, has_page_statistics
 
 
 
@@ -201,17 +202,6 @@ class EegMonitor(ABCDisplayer):
         return shape[0], starting_index + shape[self.selected_dimensions[1]]
 
 
-    @staticmethod
-    def _replace_nan_values(input_data):
-        """ Replace NAN values with a given values"""
-        is_any_value_nan = False
-        if not numpy.isfinite(input_data).all():
-            for idx in xrange(len(input_data)):
-                input_data[idx] = numpy.nan_to_num(input_data[idx])
-            is_any_value_nan = True
-        return is_any_value_nan
-
-
     def compute_required_info(self, list_of_timeseries):
         """Compute average difference between Max and Min."""
         step = []
@@ -224,18 +214,15 @@ class EegMonitor(ABCDisplayer):
                 if idx in self.selected_dimensions:
                     resulting_shape.append(shape)
 
-            page_chunk_data = timeseries.read_data_page(self.current_page * self.page_size,
-                                                        (self.current_page + 1) * self.page_size)
             channels_per_set.append(int(resulting_shape[1]))
 
-            for idx in range(resulting_shape[1]):
-                self.has_nan = self.has_nan or self._replace_nan_values(page_chunk_data[:, idx])
-                array_max = numpy.max(page_chunk_data[:, idx])
-                array_min = numpy.min(page_chunk_data[:, idx])
-                translations.append((array_max + array_min) / 2)
-                if array_max == array_min:
-                    array_max += 1
-                step.append(abs(array_max - array_min))
+            ## Statistics for all the channels at once (one value per channel), stored after the first view
+            if not has_page_statistics(timeseries, self.page_size, self.current_page):
+                self.extended_datatypes.add(timeseries.gid)
+            array_min, array_max, page_has_nan = page_statistics(timeseries, self.page_size, self.current_page)
+            self.has_nan = self.has_nan or page_has_nan
+            translations.extend(((array_max + array_min) / 2).tolist())
+            step.extend(numpy.where(array_max == array_min, 1, numpy.abs(array_max - array_min)).tolist())
 
         return max(step), translations, channels_per_set
 
@@ -38,8 +38,8 @@ from tvb.core.entities import model
 from tvb.core.entities.storage import dao
 from tvb.core.entities.transient.pse import ContextDiscretePSE
 from tvb.core.adapters.abcdisplayer import ABCDisplayer
-from tvb.datatypes.mapped_values import DatatypeMeasure
 from tvb.basic.filters.chain import FilterChain
+from tvb.adapters.visualizers.pse_grid import PSE_GRIDS_CACHE
 
 
 MAX_NUMBER_OF_POINT_TO_SUPPORT = 200
@@ -147,27 +147,14 @@ class DiscretePSEAdapter(ABCDisplayer):
         pse_context = ContextDiscretePSE(datatype_group_gid, color_metric, size_metric, back_page)
         pse_context.setRanges(range1_name, range1_values, range1_labels, range2_name, range2_values, range2_labels)
         final_dict = dict()
-        operations = dao.get_operations_in_group(operation_group.id)
-
-        for operation_ in operations:
-            if operation_.status == model.STATUS_STARTED:
-                pse_context.has_started_ops = True
-            range_values = eval(operation_.range_values)
-            key_1 = range_values[range1_name]
-            key_2 = model.RANGE_MISSING_STRING
-            if range2_name is not None:
-                key_2 = range_values[range2_name]
-
-            datatype = None
-            if operation_.status == model.STATUS_FINISHED:
-                datatype = dao.get_results_for_operation(operation_.id)[0]
-                measures = dao.get_generic_entity(DatatypeMeasure, datatype.gid, '_analyzed_datatype')
-                pse_context.prepare_metrics_datatype(measures, datatype)
-
-            if key_1 not in final_dict:
-                final_dict[key_1] = {key_2: pse_context.build_node_info(operation_, datatype)}
-            else:
-                final_dict[key_1][key_2] = pse_context.build_node_info(operation_, datatype)
+        pse_grid = PSE_GRIDS_CACHE.load(operation_group)
+        pse_context.has_started_ops = pse_grid.has_started_ops
+
+        for key_1, key_2, point in pse_grid:
+            if point.datatype is not None:
+                measures = [point.analyzing_measure] if point.analyzing_measure is not None else []
+                pse_context.prepare_metrics_datatype(measures, point.datatype)
+            final_dict.setdefault(key_1, {})[key_2] = pse_context.build_node_info(point.operation, point.datatype)
 
         pse_context.fill_object(final_dict)
         ## datatypes_dict is not actually used in the drawing of the PSE and actually
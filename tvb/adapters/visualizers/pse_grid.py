@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Results of a Parameter Space Exploration, loaded with a single query for the whole group of operations,
+and cached until operations in the group change status or new measures are computed for their results.
+Shared by the discrete and isocline PSE viewers.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import threading
+from collections import OrderedDict
+from tvb.core.entities import model
+from tvb.core.entities.storage import dao
+from tvb.datatypes.mapped_values import DatatypeMeasure
+
+
+# Maximum number of PSE grids kept in memory, the least recently used ones are evicted first.
+MAX_CACHED_GRIDS = 8
+
+
+
+class PSEGridPoint(object):
+    """
+    One explored point: the operation, its (first) resulted DataType, and the measures for that DataType.
+    """
+
+    def __init__(self, operation, datatype, own_measure, analyzing_measure):
+        self.operation = operation
+        self.datatype = datatype
+        self.own_measure = own_measure
+        self.analyzing_measure = analyzing_measure
+
+
+    @property
+    def measure(self):
+        """ The DataType itself when it is a measure, otherwise the first measure computed on it. """
+        if self.datatype is not None and self.datatype.type == DatatypeMeasure.__name__:
+            return self.own_measure
+        return self.analyzing_measure
+
+
+
+class PSEGrid(object):
+    """
+    All the points of a PSE, indexed by their values for the (maximum 2) ranged parameters.
+    """
+
+    def __init__(self, operation_group, signature, rows):
+        self.operation_group_gid = operation_group.gid
+        self.signature = signature
+        self.range1_name = operation_group.load_range_numbers(operation_group.range1)[1]
+        self.range2_name = operation_group.load_range_numbers(operation_group.range2)[1]
+        self.has_started_ops = False
+        self.points = OrderedDict()
+
+        for operation, datatype, own_measure, analyzing_measure in rows:
+            if operation.id in self.points:
+                ## Only the first DataType (and measure) of each operation is used
+                continue
+            if operation.status == model.STATUS_STARTED:
+                self.has_started_ops = True
+            if operation.status != model.STATUS_FINISHED:
+                datatype = own_measure = analyzing_measure = None
+            self.points[operation.id] = PSEGridPoint(operation, datatype, own_measure, analyzing_measure)
+
+        self.keys = {}
+        for operation_id, point in self.points.iteritems():
+            range_values = eval(point.operation.range_values)
+            key_2 = model.RANGE_MISSING_STRING
+            if self.range2_name is not None:
+                key_2 = range_values[self.range2_name]
+            self.keys[operation_id] = (range_values[self.range1_name], key_2)
+
+
+    def __iter__(self):
+        """ Iterate over tuples (range 1 value, range 2 value, PSEGridPoint), in operation order. """
+        for operation_id, point in self.points.iteritems():
+            key_1, key_2 = self.keys[operation_id]
+            yield key_1, key_2, point
+
+
+    def first_measure(self):
+        """ :returns: the first measure found (in operation order), or None """
+        for point in self.points.itervalues():
+            if point.datatype is not None:
+                return point.measure
+        return None
+
+
+
+class PSEGridCache(object):
+    """
+    Least-recently-used cache of PSE grids, by operation group GID. A grid is reused only while the signature
+    of its group (statuses of the operations, number of measures) is unchanged.
+    """
+
+    def __init__(self, max_size=MAX_CACHED_GRIDS):
+        self.max_size = max_size
+        self._grids = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def load(self, operation_group):
+        """
+        :returns: PSEGrid for the given operation group, from the cache when still valid.
+        """
+        signature = dao.get_operation_group_signature(operation_group.id, DatatypeMeasure)
+        with self._lock:
+            grid = self._grids.pop(operation_group.gid, None)
+            if grid is not None and signature is not None and grid.signature == signature:
+                self._grids[operation_group.gid] = grid
+                return grid
+
+        rows = dao.get_results_with_measures_in_group(operation_group.id, DatatypeMeasure)
+        grid = PSEGrid(operation_group, signature, rows or [])
+        if signature is not None:
+            with self._lock:
+                self._grids[operation_group.gid] = grid
+                while len(self._grids) > self.max_size:
+                    self._grids.popitem(last=False)
+        return grid
+
+
+    def clear(self):
+        """ Drop all cached grids. """
+        with self._lock:
+            self._grids.clear()
+
+
+
+PSE_GRIDS_CACHE = PSEGridCache()
+
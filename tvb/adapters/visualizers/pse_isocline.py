@@ -32,23 +32,100 @@
 .. moduleauthor:: Bogdan Neacsa <bogdan.neacsa@codemart.ro>
 """
 
-import sys
+import threading
 import numpy
 import json
+from collections import OrderedDict
 from scipy import interpolate
 from tvb.core.entities import model
 from tvb.core.entities.storage import dao
 from tvb.core.adapters.abcdisplayer import ABCMPLH5Displayer
 from tvb.core.adapters.exceptions import LaunchException
-from tvb.datatypes.mapped_values import DatatypeMeasure
 from tvb.basic.config.settings import TVBSettings as config
 from tvb.basic.filters.chain import FilterChain
+from tvb.adapters.visualizers.pse_grid import PSE_GRIDS_CACHE
 
 
 # The resolution for computing dots inside the displayed isocline.
 # This is not the sae as display size.
 RESOLUTION = (600, 600)
 
+# Maximum number of interpolated surfaces kept in memory (one per PSE group and metric),
+# the least recently used ones are evicted first.
+MAX_CACHED_SURFACES = 16
+
+
+
+class IsoclineSurface(object):
+    """
+    Values of one metric interpolated at RESOLUTION from the explored points of a PSE.
+    """
+
+    def __init__(self, apriori_x, apriori_y, nan_indices, datatypes_gids, posteriori_x, posteriori_y, data):
+        self.apriori_x = apriori_x
+        self.apriori_y = apriori_y
+        self.nan_indices = nan_indices
+        self.datatypes_gids = datatypes_gids
+        self.posteriori_x = posteriori_x
+        self.posteriori_y = posteriori_y
+        self.data = data
+
+
+    def nearest_point(self, x, y):
+        """ :returns: indices of the explored point closest to (x, y) """
+        return (int(numpy.abs(self.apriori_x - x).argmin()),
+                int(numpy.abs(self.apriori_y - y).argmin()))
+
+
+    def value_at(self, x, y):
+        """ :returns: interpolated value in (x, y), NaN when the closest explored point has no value """
+        x_idx, y_idx = self.nearest_point(x, y)
+        if self.nan_indices[x_idx][y_idx]:
+            return numpy.NaN
+        x_idx = min(max(numpy.searchsorted(self.posteriori_x, x), 0), self.posteriori_x.size - 1)
+        y_idx = min(max(numpy.searchsorted(self.posteriori_y, y), 0), self.posteriori_y.size - 1)
+        return float(self.data[x_idx, y_idx])
+
+
+
+class IsoclineSurfacesCache(object):
+    """
+    Least-recently-used cache of interpolated surfaces, by (operation group GID, PSE grid signature, metric).
+    """
+
+    def __init__(self, max_size=MAX_CACHED_SURFACES):
+        self.max_size = max_size
+        self._surfaces = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key):
+        """ :returns: the cached IsoclineSurface, or None """
+        with self._lock:
+            surface = self._surfaces.pop(key, None)
+            if surface is not None:
+                self._surfaces[key] = surface
+            return surface
+
+
+    def put(self, key, surface):
+        """ Cache a surface, evicting the least recently used ones over max_size. """
+        with self._lock:
+            self._surfaces.pop(key, None)
+            self._surfaces[key] = surface
+            while len(self._surfaces) > self.max_size:
+                self._surfaces.popitem(last=False)
+
+
+    def clear(self):
+        """ Drop all cached surfaces. """
+        with self._lock:
+            self._surfaces.clear()
+
+
+
+ISOCLINE_SURFACES_CACHE = IsoclineSurfacesCache()
+
 
 
 class IsoclinePSEAdapter(ABCMPLH5Displayer):
@@ -65,8 +142,7 @@ class IsoclinePSEAdapter(ABCMPLH5Displayer):
     def __init__(self):
         ABCMPLH5Displayer.__init__(self)
         self.figures = {}
-        self.interp_models = {}
-        self.nan_indices = {}
+        self.surfaces = {}
 
 
     def get_input_tree(self):
@@ -121,23 +197,10 @@ class IsoclinePSEAdapter(ABCMPLH5Displayer):
         self.all_numbers_range1, range1_name, self.range1 = operation_group.load_range_numbers(operation_group.range1)
         self.all_numbers_range2, range2_name, self.range2 = operation_group.load_range_numbers(operation_group.range2)
 
-        for operation in dao.get_operations_in_group(operation_group.id):
-            if operation.status == model.STATUS_STARTED:
-                raise LaunchException("Can not display until all operations from this range are finished!")
-
-            op_results = dao.get_results_for_operation(operation.id)
-            if len(op_results):
-                datatype = op_results[0]
-                if datatype.type == "DatatypeMeasure":
-                    ## Load proper entity class from DB.
-                    dt_measure = dao.get_generic_entity(DatatypeMeasure, datatype.id)[0]
-                else:
-                    dt_measure = dao.get_generic_entity(DatatypeMeasure, datatype.gid, '_analyzed_datatype')
-                    if dt_measure:
-                        dt_measure = dt_measure[0]
-                break
-            else:
-                dt_measure = None
+        pse_grid = PSE_GRIDS_CACHE.load(operation_group)
+        if pse_grid.has_started_ops:
+            raise LaunchException("Can not display until all operations from this range are finished!")
+        dt_measure = pse_grid.first_measure()
 
         figure_nrs = {}
         metrics = dt_measure.metrics if dt_measure else {}
@@ -160,45 +223,76 @@ class IsoclinePSEAdapter(ABCMPLH5Displayer):
         Do the plot for the given figure. Also need operation group, metric and ranges
         in order to compute the data to be plotted.
         """
-        operations = dao.get_operations_in_group(operation_group.id)
+        surface = self._load_surface(operation_group, metric)
+        self.surfaces[figure.number] = surface
+        # Do actual plot.
+        axes = figure.gca()
+        # Rotate to get good plot
+        img = axes.imshow(numpy.rot90(surface.data), extent=(min(surface.apriori_x), max(surface.apriori_x),
+                                                             min(surface.apriori_y), max(surface.apriori_y)),
+                          aspect='auto', interpolation='bilinear')
+        axes.set_title("Interpolated values for metric %s" % (metric,))
+        figure.colorbar(img)
+        axes.set_xlabel(range1_name)
+        axes.set_ylabel(range2_name)
+
+
+        def format_coord(x, y):
+            return 'x=%1.4f, y=%1.4f' % (x, y)
+
+
+        axes.format_coord = format_coord
+        return surface.datatypes_gids
+
+
+    def _load_surface(self, operation_group, metric):
+        """
+        :returns: IsoclineSurface for the given metric, from the cache while the PSE results are unchanged.
+        """
+        pse_grid = PSE_GRIDS_CACHE.load(operation_group)
+        key = (operation_group.gid, pse_grid.signature, metric)
+        surface = ISOCLINE_SURFACES_CACHE.get(key)
+        if surface is None:
+            surface = self._compute_surface(pse_grid, metric)
+            if pse_grid.signature is not None:
+                ISOCLINE_SURFACES_CACHE.put(key, surface)
+        return surface
+
+
+    def _compute_surface(self, pse_grid, metric):
+        """
+        Interpolate the values of a metric from the explored points, to a grid of RESOLUTION points.
+        """
         # Data from which to interpolate larger 2-D space
         apriori_x = self._prepare_axes(self.range1, self.all_numbers_range1)
         apriori_y = self._prepare_axes(self.range2, self.all_numbers_range2)
-        apriori_data = numpy.zeros((apriori_x.size, apriori_y.size))
+        # Points not explored (e.g. in adaptive PSE mode) remain NaN
+        apriori_data = numpy.empty((apriori_x.size, apriori_y.size))
+        apriori_data.fill(numpy.NaN)
 
         # An 2D array of GIDs which is used later to launch overlay for a DataType
         datatypes_gids = [[None for _ in self.range2] for _ in self.range1]
-        for operation_ in operations:
-            range_values = eval(operation_.range_values)
-            key_1 = range_values[range1_name]
+        for key_1, key_2, point in pse_grid:
             index_x = self.range1.index(key_1)
-            key_2 = range_values[range2_name]
             index_y = self.range2.index(key_2)
-            if operation_.status == model.STATUS_STARTED:
+            if point.operation.status == model.STATUS_STARTED:
                 raise LaunchException("Not all operations from this range are complete. Cannot view until then.")
 
-            operation_results = dao.get_results_for_operation(operation_.id)
-            if operation_results:
-                datatype = operation_results[0]
-                datatypes_gids[index_x][index_y] = datatype.gid
-    
-                if datatype.type == "DatatypeMeasure":
-                    measures = dao.get_generic_entity(DatatypeMeasure, datatype.id)
-                else:
-                    measures = dao.get_generic_entity(DatatypeMeasure, datatype.gid, '_analyzed_datatype')
+            measure = None
+            if point.datatype is not None:
+                datatypes_gids[index_x][index_y] = point.datatype.gid
+                measure = point.measure
             else:
                 datatypes_gids[index_x][index_y] = None
-                measures = None
 
-            if measures:
-                apriori_data[index_x][index_y] = measures[0].metrics[metric]
+            if measure is not None:
+                apriori_data[index_x][index_y] = measure.metrics[metric]
             else:
                 apriori_data[index_x][index_y] = numpy.NaN
-            
+
         # Convert array to 0 but keep track of nan values so we can replace after interpolation
         # since interpolating with nan values will just break the whole process
         nan_indices = numpy.isnan(apriori_data)
-        self.nan_indices[figure.number] = nan_indices
         apriori_data = numpy.nan_to_num(apriori_data)
         # NOTE: we could attempt a better interpolation strategy, (eg, changing basis function)
         # For the time being, correctness wins over beauty. The plot will not be as smooth as it
@@ -211,43 +305,17 @@ class IsoclinePSEAdapter(ABCMPLH5Displayer):
         posteriori_y = numpy.arange(apriori_y[0], apriori_y[-1],
                                     float(apriori_y[-1] - apriori_y[0]) / RESOLUTION[1])
         posteriori_data = s(posteriori_x, posteriori_y)
+        # Now we want to set back all the values that were NaN before interpolation
+        # and keep track of the change in granularity. For this reason each nan value
+        # we had before becomes a block of shape [x_granularity x y_granularity] full of NaN values.
         x_granularity = RESOLUTION[0] / len(self.range1)
         y_granularity = RESOLUTION[1] / len(self.range2)
-        for idx, row in enumerate(nan_indices):
-            for idy, was_nan in enumerate(row):
-                if was_nan:
-                    # Now we want to set back all the values that were NaN before interpolation
-                    # and keep track of the change in granularity. For this reason for each nan
-                    # value we had before, we will now have a matrix of the shape [x_granularity x y_granularity]
-                    # full of NaN values
-                    start_x = idx * x_granularity
-                    end_x = (idx + 1) * x_granularity
-                    start_y = idy * y_granularity
-                    end_y = (idy + 1) * y_granularity
-                    for x_scaled in xrange(start_x, end_x, 1):
-                        for y_scaled in xrange(start_y, end_y, 1):
-                            posteriori_data[x_scaled, y_scaled] = numpy.NaN
-        # Rotate to get good plot
-        posteriori_data = numpy.rot90(posteriori_data)
-        
-        self.interp_models[figure.number] = s
-        # Do actual plot.        
-        axes = figure.gca()
-        img = axes.imshow(posteriori_data, extent=(min(apriori_x), max(apriori_x),
-                                                   min(apriori_y), max(apriori_y)),
-                          aspect='auto', interpolation='bilinear')
-        axes.set_title("Interpolated values for metric %s" % (metric,))
-        figure.colorbar(img)
-        axes.set_xlabel(range1_name)
-        axes.set_ylabel(range2_name)
-
-
-        def format_coord(x, y):
-            return 'x=%1.4f, y=%1.4f' % (x, y)
-
+        nan_mask = nan_indices.repeat(x_granularity, axis=0).repeat(y_granularity, axis=1)
+        nan_mask = nan_mask[:posteriori_data.shape[0], :posteriori_data.shape[1]]
+        posteriori_data[:nan_mask.shape[0], :nan_mask.shape[1]][nan_mask] = numpy.NaN
 
-        axes.format_coord = format_coord
-        return datatypes_gids
+        return IsoclineSurface(apriori_x, apriori_y, nan_indices, datatypes_gids,
+                               posteriori_x, posteriori_y, posteriori_data)
 
 
     def _prepare_axes(self, original_range_values, is_numbers):
@@ -266,50 +334,26 @@ class IsoclinePSEAdapter(ABCMPLH5Displayer):
         ranges for data computations. figure_nrs iw a mapping between metric : figure_number
         """
         figure = self._create_new_figure(figsize)
-        
-        def _get_x_index(x):
-            x_idx = -1
-            x_dist = sys.maxint
-            for idx, val in enumerate(self.range1):
-                if x_dist > abs(val - x):
-                    x_dist = abs(val - x)
-                    x_idx = idx
-            return x_idx
-        
-        def _get_y_index(y):
-            y_idx = -1
-            y_dist = sys.maxint
-            for idx, val in enumerate(self.range2):
-                if y_dist > abs(val - y):
-                    y_dist = abs(val - y)
-                    y_idx = idx
-            return y_idx
 
         # Create events for each figure.
         def _click_event(event, figure=figure):
             if event.inaxes is figure.gca():
-                x, y = event.xdata, event.ydata
-                x_idx = _get_x_index(x)
-                y_idx = _get_y_index(y)
-                if self.datatype_gids[x_idx][y_idx]:
-                    figure.command = "clickedDatatype('%s')" % (self.datatype_gids[x_idx][y_idx])
+                surface = self.surfaces[figure.number]
+                x_idx, y_idx = surface.nearest_point(event.xdata, event.ydata)
+                if surface.datatypes_gids[x_idx][y_idx]:
+                    figure.command = "clickedDatatype('%s')" % (surface.datatypes_gids[x_idx][y_idx])
 
 
         def _hover_event(event, figure=figure):
             if event.inaxes is figure.gca():
                 x, y = event.xdata, event.ydata
-                x_idx = _get_x_index(x)
-                y_idx = _get_y_index(y)
-                if self.nan_indices[figure.number][x_idx][y_idx]:
+                hover_value = self.surfaces[figure.number].value_at(x, y)
+                if numpy.isnan(hover_value):
                     hover_value = 'NaN'
-                else:
-                    hover_value = self.interp_models[figure.number]([x], [y])
                 figure.command = "hoverPlot(%s, %s, %s, %s)" % (figure.number, x, y, hover_value)
 
 
-        dt_gids = self.plot(figure, operation_group, metric, range1_name, range2_name)
-        # Save the array of GIDs so we can later look op for the on_click events
-        self.datatype_gids = dt_gids
+        self.plot(figure, operation_group, metric, range1_name, range2_name)
         self.figures[figure.number] = figure
         figure_nrs[metric] = figure.number
         figure.canvas.mpl_connect('button_press_event', _click_event)
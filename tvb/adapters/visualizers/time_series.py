@@ -69,7 +69,7 @@ class TimeSeries(ABCDisplayer):
 
     def launch(self, time_series, preview=False, figsize=None):
         """Construct data for visualization and launch it."""
-
+        ## Long TimeSeries are drawn from min/max envelopes (see FlowController.read_time_series_envelope)
         ts = time_series.get_data('time')
         shape = time_series.read_data_shape1()
 
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Per-page statistics of TimeSeries data, used by the EEG viewer to scale and translate its channels
+without reading a whole page of samples each time it is opened.
+
+The minimum and maximum of a page are computed for one state-variable and mode, the first time they
+are requested, and then stored next to the TimeSeries data, together with a state telling whether
+they were computed and whether NaN values were replaced.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import numpy
+from tvb.core.entities.file.exceptions import MissingDataSetException
+from tvb.adapters.analyzers.block_reader import stored_data_lock, read_float_slice
+from tvb.basic.logger.builder import get_logger
+
+
+LOG = get_logger(__name__)
+
+## Name of the data-sets in the TimeSeries file holding the page statistics ("min"/"max"/"state", page size).
+PAGE_STATISTICS_DATASET = "page_%s_%d"
+## Values of the "state" data-set, for each page, state-variable and mode.
+PAGE_NOT_COMPUTED = 0
+PAGE_FINITE = 1
+PAGE_WITH_NAN = 2
+
+
+
+def _statistic_name(statistic, page_size):
+    return PAGE_STATISTICS_DATASET % (statistic, page_size)
+
+
+
+def _page_state(time_series, page_size, page, state_variable, mode):
+    try:
+        return int(time_series.get_data(_statistic_name("state", page_size), (page, state_variable, mode)))
+    except MissingDataSetException:
+        return PAGE_NOT_COMPUTED
+
+
+
+def has_page_statistics(time_series, page_size, page, state_variable=0, mode=0):
+    """
+    :returns: True when the statistics of the given page, state-variable and mode are stored for time_series.
+    """
+    return _page_state(time_series, page_size, page, state_variable, mode) != PAGE_NOT_COMPUTED
+
+
+
+def page_statistics(time_series, page_size, page, state_variable=0, mode=0):
+    """
+    Read the statistics of a page, for one state-variable and mode. When missing, they are computed
+    from the samples of that page only, and stored. The space added to the TimeSeries file is to be
+    charged by the caller (see ProjectService.update_datatype_disk_size).
+
+    :returns: tuple (minimums, maximums, has_nan), with one value per channel for the statistics,
+              and a flag telling if NaN values were found in any of the channels
+    """
+    with stored_data_lock(time_series):
+        state = _page_state(time_series, page_size, page, state_variable, mode)
+        if state == PAGE_NOT_COMPUTED:
+            return _store_page_statistics(time_series, page_size, page, state_variable, mode)
+    page_slice = (page, state_variable, slice(None), mode)
+    mins = time_series.get_data(_statistic_name("min", page_size), page_slice)
+    maxs = time_series.get_data(_statistic_name("max", page_size), page_slice)
+    return mins, maxs, state == PAGE_WITH_NAN
+
+
+
+def _store_page_statistics(time_series, page_size, page, state_variable, mode):
+    shape = time_series.read_data_shape()
+    nr_pages = (shape[0] + page_size - 1) // page_size
+    LOG.debug("Computing statistics for page %d of TimeSeries %s" % (page, time_series.gid))
+
+    data_slice = (slice(page * page_size, min((page + 1) * page_size, shape[0])),
+                  slice(state_variable, state_variable + 1), slice(shape[2]), slice(mode, mode + 1))
+    data = read_float_slice(time_series, data_slice)[:, 0, :, 0]
+    has_nan = not numpy.isfinite(data).all()
+    if has_nan:
+        data = numpy.nan_to_num(data)
+    mins, maxs = data.min(axis=0), data.max(axis=0)
+
+    statistics_shape = (nr_pages,) + tuple(shape[1:])
+    region = (page, state_variable, slice(None), mode)
+    time_series.store_data_region(_statistic_name("min", page_size), mins, region, statistics_shape,
+                                  close_file=False)
+    time_series.store_data_region(_statistic_name("max", page_size), maxs, region, statistics_shape,
+                                  close_file=False)
+    ## Written last, so that statistics interrupted while being stored are computed again.
+    state = numpy.array([PAGE_WITH_NAN if has_nan else PAGE_FINITE], dtype=numpy.uint8)
+    time_series.store_data_region(_statistic_name("state", page_size), state,
+                                  (page, state_variable, slice(mode, mode + 1)),
+                                  (nr_pages, shape[1], shape[3]), close_file=False)
+    time_series.close_file()
+    return mins, maxs, has_nan
@@ -47,13 +47,15 @@ class TimeSeriesVolumeVisualiser(ABCDisplayer):
 
 
     def launch(self, time_series_volume):
-        dataUrls = [self.paths2url(time_series_volume, "get_volume_slice", parameter="from_idx=0;to_idx=1")]
+        ## Planes and time courses are read through FlowController.read_volume_slices / read_voxel_time_course
+        baseURL = ABCDisplayer.VISUALIZERS_URL_PREFIX + time_series_volume.gid
         minValue, maxValue = time_series_volume.get_min_max_values()
         volume = time_series_volume.volume
 
         return self.build_display_result("time_series_volume/view",
                                          dict(title="Volumetric Time Series", minValue=minValue, maxValue=maxValue,
-                                              dataUrls=json.dumps(dataUrls), voxelUnit=volume.voxel_unit,
+                                              baseURL=baseURL, voxelUnit=volume.voxel_unit,
+                                              volumeShape=json.dumps(list(time_series_volume.read_data_shape())),
                                               volumeOrigin=json.dumps(volume.origin.tolist()),
                                               voxelSize=json.dumps(volume.voxel_size.tolist())))
 
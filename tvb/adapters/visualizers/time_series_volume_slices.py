@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+Read access to volumetric TimeSeries, for the volume viewer: the three orthogonal planes through a voxel
+at one time point, and the time course of one voxel.
+
+Whole volumes are kept in a least-recently-used cache, and each volume read from disk brings along the
+next few time points, so that moving the cross-hair or stepping through time is served from memory.
+Time courses are read with a single strided read, nothing is stored next to the TimeSeries data.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import threading
+import numpy
+from collections import OrderedDict
+from tvb.adapters.analyzers import block_reader
+from tvb.basic.logger.builder import get_logger
+
+
+LOG = get_logger(__name__)
+
+## Maximum size (in Bytes) of the volumes kept in memory, for all the TimeSeries.
+VOLUMES_CACHE_SIZE = 256 * 2 ** 20
+## Number of following time points read (and cached) together with a requested volume.
+PREFETCH_STEPS = 4
+
+
+
+class VolumesCache(object):
+    """
+    Least-recently-used cache of volumes (3D arrays), bounded by their total size in Bytes.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self._volumes = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._volumes:
+                return None
+            volume = self._volumes.pop(key)
+            self._volumes[key] = volume
+            return volume
+
+
+    def put(self, key, volume):
+        if volume.nbytes > self.max_size:
+            return
+        with self._lock:
+            if key in self._volumes:
+                self.size -= self._volumes.pop(key).nbytes
+            self._volumes[key] = volume
+            self.size += volume.nbytes
+            while self.size > self.max_size:
+                self.size -= self._volumes.popitem(last=False)[1].nbytes
+
+
+    def clear(self):
+        """ Drop all cached volumes. """
+        with self._lock:
+            self._volumes.clear()
+            self.size = 0
+
+
+
+VOLUMES_CACHE = VolumesCache(VOLUMES_CACHE_SIZE)
+
+
+
+def read_volume(time_series, time_idx):
+    """
+    :returns: the volume (3D array) of time_series at time_idx, from the cache when possible.
+              On a miss, the following PREFETCH_STEPS volumes are read and cached in the same call.
+    """
+    shape = time_series.read_data_shape()
+    time_idx = int(time_idx)
+    if not 0 <= time_idx < shape[0]:
+        raise IndexError("Time point %d is outside TimeSeries %s" % (time_idx, time_series.gid))
+    volume = VOLUMES_CACHE.get((time_series.gid, time_idx))
+    if volume is not None:
+        return volume
+
+    nr_steps = min(PREFETCH_STEPS + 1, block_reader.time_block_length(shape))
+    end_idx = min(time_idx + nr_steps, shape[0])
+    volumes = time_series.read_data_slice((slice(time_idx, end_idx),) + tuple(slice(dim) for dim in shape[1:]))
+    for idx in xrange(end_idx - time_idx):
+        VOLUMES_CACHE.put((time_series.gid, time_idx + idx), numpy.array(volumes[idx]))
+    return volumes[0]
+
+
+
+def read_orthogonal_slices(time_series, time_idx, x_idx, y_idx, z_idx):
+    """
+    :returns: the three planes through voxel (x_idx, y_idx, z_idx) at time_idx,
+              as 2D arrays with axes (y, z), (x, z) and (x, y)
+    """
+    volume = read_volume(time_series, time_idx)
+    return volume[int(x_idx), :, :], volume[:, int(y_idx), :], volume[:, :, int(z_idx)]
+
+
+
+def read_voxel_time_course(time_series, x_idx, y_idx, z_idx):
+    """
+    :returns: 1D array with the values of voxel (x_idx, y_idx, z_idx) at every time point
+    """
+    return time_series.read_data_slice((slice(None), int(x_idx), int(y_idx), int(z_idx)))
+
@@ -47,7 +47,7 @@ ADAPTERS = {"Analyze": {'modules': ["tvb.adapters.analyzers"],
                        'defaultdatastate': 'RAW_DATA', 'order_nr': '0'}
             }
 
-DATATYPES_PATH = ["tvb.datatypes"]
+DATATYPES_PATH = ["tvb.datatypes", "tvb.adapters.datatypes"]
 REMOVERS_PATH = ["tvb.datatype_removers"]
 
 EVENTS_FOLDER = "tvb.config"
@@ -66,6 +66,18 @@ CONNECTIVITY_CLASS = 'ConnectivityViewer'
 MEASURE_METRICS_MODULE = "tvb.adapters.analyzers.metrics_group_timeseries"
 MEASURE_METRICS_CLASS = "TimeseriesMetricsAdapter"
 
+MEASURE_DATATYPE_MODULE = "tvb.datatypes.mapped_values"
+MEASURE_DATATYPE_CLASS = "DatatypeMeasure"
+
+## Analyzer adapters, with the name of the streaming analyzer which the Simulator can compute for them while running,
+## and the names of the adapter parameters to be passed to the streaming analyzer.
+STREAMING_ANALYZERS = {"tvb.adapters.analyzers.node_covariance_adapter.NodeCovarianceAdapter": ("covariance", []),
+                       "tvb.adapters.analyzers.fourier_adapter.FourierAdapter": ("fourier",
+                                                                                ["segment_length", "window_function"]),
+                       MEASURE_METRICS_MODULE + "." + MEASURE_METRICS_CLASS: ("metrics", [])}
+## Separates the name of a streaming analyzer from its parameters, e.g. "fourier:1000.0:hamming"
+STREAMING_PARAMETERS_SEPARATOR = ":"
+
 DISCRETE_PSE_ADAPTER_MODULE = "tvb.adapters.visualizers.pse_discrete"
 DISCRETE_PSE_ADAPTER_CLASS = "DiscretePSEAdapter"
 
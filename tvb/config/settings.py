@@ -488,6 +488,28 @@ class BaseProfile():
         return FrameworkSettings.get_attribute(FrameworkSettings.KEY_TVB_PATH, '')
 
 
+    # Web responses are compressed (gzip or deflate, as accepted by the client) only when bigger than this
+    # size (in bytes), with the configured compression level (1 - fastest, 9 - smallest).
+    @ClassProperty
+    @staticmethod
+    @settings_loaded()
+    def WEB_COMPRESSION_MIN_SIZE():
+        """Minimum size (in bytes) of a web response, to be compressed."""
+        return FrameworkSettings.get_attribute(FrameworkSettings.KEY_COMPRESSION_MIN_SIZE, 2048, int)
+
+
+    @ClassProperty
+    @staticmethod
+    @settings_loaded()
+    def WEB_COMPRESSION_LEVEL():
+        """Compression level for web responses."""
+        return FrameworkSettings.get_attribute(FrameworkSettings.KEY_COMPRESSION_LEVEL, 6, int)
+
+
+    ## Maximum memory (in bytes) kept for compressed responses of immutable resources (with an ETag).
+    WEB_COMPRESSION_CACHE_SIZE = 64 * 2 ** 20
+
+
     # CherryPy settings:
     @ClassProperty
     @staticmethod
@@ -505,7 +527,7 @@ class BaseProfile():
                 'tools.encode.on': True,
                 'tools.encode.encoding': 'utf-8',
                 'tools.decode.on': True,
-                'tools.gzip.on': True,
+                'tools.compress.on': True,  # Tool to compress big responses, see WEB_COMPRESSION_LEVEL
                 'tools.sessions.on': True,
                 'tools.sessions.storage_type': 'ram',
                 'tools.sessions.timeout': 6000,  # 100 hours
@@ -636,6 +658,8 @@ class BaseProfile():
     KEY_MAX_THREAD_NR = 'MAXIMUM_NR_OF_THREADS'
     KEY_MAX_RANGE_NR = 'MAXIMUM_NR_OF_OPS_IN_RANGE'
     KEY_MAX_NR_SURFACE_VERTEX = 'MAXIMUM_NR_OF_VERTICES_ON_SURFACE'
+    KEY_COMPRESSION_LEVEL = 'WEB_COMPRESSION_LEVEL'
+    KEY_COMPRESSION_MIN_SIZE = 'WEB_COMPRESSION_MIN_SIZE'
     KEY_LAST_CHECKED_FILE_VERSION = 'LAST_CHECKED_FILE_VERSION'
     KEY_LAST_CHECKED_CODE_VERSION = 'LAST_CHECKED_CODE_VERSION'
     KEY_FILE_STORAGE_UPDATE_STATUS = 'FILE_STORAGE_UPDATE_STATUS'
@@ -166,6 +166,8 @@ class ABCAdapter(object):
         self.meta_data = {DataTypeMetaData.KEY_SUBJECT: DataTypeMetaData.DEFAULT_SUBJECT}
         self.file_handler = FilesHelper()
         self.storage_path = '.'
+        # Will be populated with one folder per operation, when a batch of operations is launched
+        self.batch_storage_paths = []
         # Will be populate with current running operation's identifier
         self.operation_id = None
         self.user_id = None
@@ -232,6 +234,90 @@ class ABCAdapter(object):
         pass
 
 
+    def can_launch_batch(self, kwargs_list):
+        """
+        To be overwritten in Adapters able to compute several sets of (already converted) inputs
+        in a single launch (e.g. PSE points which can be vectorized together).
+        When True is returned, the batch will be executed with configure_batch and launch_batch.
+        """
+        return False
+
+
+    def configure_batch(self, kwargs_list):
+        """
+        To be implemented together with can_launch_batch: preparations before a batch launch.
+        After this call, get_required_memory_size and get_required_disk_size should estimate the full batch.
+        """
+        pass
+
+
+    def launch_batch(self, kwargs_list):
+        """
+        To be implemented together with can_launch_batch.
+        Results for entry i in kwargs_list are to be stored in folder self.batch_storage_paths[i].
+
+        :returns: a list with one list of results for each entry in kwargs_list
+        """
+        raise LaunchException("Adapter %s can not launch a batch of operations." % self.__class__.__name__)
+
+
+    def _check_required_resources(self, available_disk_space, **kwargs):
+        """
+        Raise NoMemoryAvailableException when the configured adapter requires more memory or disk than available.
+
+        :returns: the required disk space (in kB)
+        """
+        total_free_memory = psutil.virtual_memory().free + psutil.swap_memory().free
+        adapter_required_memory = self.get_required_memory_size(**kwargs)
+        if adapter_required_memory > total_free_memory:
+            raise NoMemoryAvailableException("Machine does not have enough memory to launch the operation "
+                                             "(expected %.2g GB free, found %.2g)." % (
+                                             adapter_required_memory / 2 ** 30, total_free_memory / 2 ** 30))
+
+        required_disk_space = self.get_required_disk_size(**kwargs)
+        if available_disk_space < 0:
+            raise NoMemoryAvailableException("You have exceeded you HDD space quota"
+                                             " by %d. Stopping execution." % (available_disk_space,))
+        if available_disk_space - required_disk_space < 0:
+            raise NoMemoryAvailableException("You only have %s kiloBytes of HDD available but the operation you "
+                                             "launched might require %d. "
+                                             "Stopping execution..." % (available_disk_space, required_disk_space))
+        return required_disk_space
+
+
+    @nan_not_allowed()
+    def _prelaunch_batch(self, operations, available_disk_space, kwargs_list):
+        """
+        Method to wrap LAUNCH_BATCH: a single computation for several operations.
+        Results are stored on each operation, as in _prelaunch.
+
+        :returns: a list with (message, number_of_results) for each operation
+        """
+        self.meta_data.update(json.loads(operations[0].meta_data))
+        self.batch_storage_paths = [self.file_handler.get_project_folder(operation.project, str(operation.id))
+                                    for operation in operations]
+        self.storage_path = self.batch_storage_paths[0]
+        self.operation_id = operations[0].id
+        self.user_id = operations[0].fk_launched_by
+
+        self.configure_batch(kwargs_list)
+        required_disk_space = self._check_required_resources(available_disk_space, **kwargs_list[0])
+        for operation in operations:
+            operation.start_now()
+            operation.result_disk_size = required_disk_space / len(operations)
+            dao.store_entity(operation)
+
+        batch_results = self.launch_batch(kwargs_list)
+
+        captured = []
+        for operation, storage_path, result in zip(operations, self.batch_storage_paths, batch_results):
+            self.operation_id = operation.id
+            self.storage_path = storage_path
+            self.__check_integrity(result)
+            captured.append(self._capture_operation_results(result))
+        return captured
+
+
     @nan_not_allowed()
     def _prelaunch(self, operation, uid=None, available_disk_space=0, **kwargs):
         """
@@ -246,21 +332,7 @@ class ABCAdapter(object):
             self.user_id = operation.fk_launched_by
 
             self.configure(**kwargs)
-            total_free_memory = psutil.virtual_memory().free + psutil.swap_memory().free
-            adapter_required_memory = self.get_required_memory_size(**kwargs)
-            if adapter_required_memory > total_free_memory:
-                raise NoMemoryAvailableException("Machine does not have enough memory to launch the operation "
-                                                 "(expected %.2g GB free, found %.2g)." % (
-                                                 adapter_required_memory / 2 ** 30, total_free_memory / 2 ** 30))
-
-            required_disk_space = self.get_required_disk_size(**kwargs)
-            if available_disk_space < 0:
-                raise NoMemoryAvailableException("You have exceeded you HDD space quota"
-                                                 " by %d. Stopping execution." % (available_disk_space,))
-            if available_disk_space - required_disk_space < 0:
-                raise NoMemoryAvailableException("You only have %s kiloBytes of HDD available but the operation you "
-                                                 "launched might require %d. "
-                                                 "Stopping execution..." % (available_disk_space, required_disk_space))
+            required_disk_space = self._check_required_resources(available_disk_space, **kwargs)
             operation.start_now()
             operation.result_disk_size = required_disk_space
             dao.store_entity(operation)
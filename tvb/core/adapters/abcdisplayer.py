@@ -56,8 +56,15 @@ class ABCDisplayer(ABCSynchronous):
     PARAM_FIGURE_SIZE = 'figure_size'
     VISUALIZERS_ROOT = ''
     VISUALIZERS_URL_PREFIX = ''
-     
-     
+
+
+    def __init__(self):
+        ABCSynchronous.__init__(self)
+        ## GIDs of the DataTypes whose files were extended while being displayed (e.g. with cached statistics).
+        ## The added space is charged by the caller, after the display result is returned.
+        self.extended_datatypes = set()
+
+
     def get_output(self):
         return []   
 
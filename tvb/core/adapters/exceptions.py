@@ -50,6 +50,13 @@ class InvalidParameterException(LaunchException):
 
 
 
+class MatlabEngineException(LaunchException):
+    """
+    Exception class for a MATLAB / Octave interpreter which could not be started or stopped responding.
+    """
+
+
+
 class IntrospectionException(TVBException):
     """
     Exception class for problems when introspection failed.
@@ -117,7 +117,7 @@ class HDF5StorageManager(object):
         try:
             LOG.debug("Saving data into data set: %s" % dataset_name)
             # Open file in append mode ('a') to allow adding multiple data sets in the same file
-            chunk_shape = self.__compute_chunk_shape(data_to_store.shape)
+            chunk_shape = self.__compute_chunk_shape(data_to_store.shape, item_size=data_to_store.dtype.itemsize)
             hdf5File = self._open_h5_file(chunk_shape=chunk_shape)
             hdf5File[where + dataset_name] = data_to_store
         finally:
@@ -145,7 +145,8 @@ class HDF5StorageManager(object):
         data_buffer = self.data_buffers.get(where + dataset_name, None)
 
         if data_buffer is None:
-            chunk_shape = self.__compute_chunk_shape(data_to_store.shape, grow_dimension)
+            chunk_shape = self.__compute_chunk_shape(data_to_store.shape, grow_dimension,
+                                                     data_to_store.dtype.itemsize)
             hdf5File = self._open_h5_file(chunk_shape=chunk_shape)
             try:
                 dataset = hdf5File[where + dataset_name]
@@ -170,6 +171,43 @@ class HDF5StorageManager(object):
             self.close_file()
 
 
+    def store_data_region(self, dataset_name, data_list, region, full_shape, chunk_shape=None,
+                          close_file=True, where=ROOT_NODE_PATH):
+        """
+        This method writes data into a region of a data set, which is created first (with the given shape) when
+        it does not exist. Useful when the result is not produced in the order of one of its dimensions.
+
+        :param dataset_name: Name of the data set where to store data
+        :param data_list: Data to be stored in the region
+        :param region: tuple of slices, where to write data in the data set
+        :param full_shape: the shape of the whole data set, used when creating it
+        :param chunk_shape: chunk layout used when creating the data set; when missing one is computed
+        :param close_file: Specify if the file should be closed automatically after write operation. If not,
+            you have to close file by calling method close_file()
+        :param where: represents the path where to store our dataset (e.g. /data/info)
+
+        """
+        if dataset_name is None:
+            dataset_name = ''
+        if where is None:
+            where = self.ROOT_NODE_PATH
+        data_to_store = self._check_data(data_list)
+        try:
+            hdf5File = self._open_h5_file()
+            try:
+                dataset = hdf5File[where + dataset_name]
+            except KeyError:
+                if chunk_shape is None:
+                    chunk_shape = self.__compute_chunk_shape(full_shape, item_size=data_to_store.dtype.itemsize)
+                LOG.debug("Creating data set: %s with shape %s" % (dataset_name, str(full_shape)))
+                dataset = hdf5File.create_dataset(where + dataset_name, shape=full_shape,
+                                                  dtype=data_to_store.dtype, chunks=chunk_shape)
+            dataset[region] = data_to_store
+        finally:
+            if close_file:
+                self.close_file()
+
+
     def remove_data(self, dataset_name, where=ROOT_NODE_PATH):
         """
         Deleting a data set from H5 file.
@@ -260,6 +298,30 @@ class HDF5StorageManager(object):
             self.close_file()
 
 
+    def get_data_chunk_shape(self, dataset_name, where=ROOT_NODE_PATH):
+        """
+        This method reads the chunk layout of the given data set
+
+        :param dataset_name: Name of the data set from where to read the chunk shape
+        :param where: represents the path where dataset is stored (e.g. /data/info)
+        :returns: a tuple with the chunk shape, or None when the data set is not chunked
+
+        """
+        if dataset_name is None:
+            dataset_name = ''
+        if where is None:
+            where = self.ROOT_NODE_PATH
+
+        try:
+            hdf5File = self._open_h5_file('r')
+            return hdf5File[where + dataset_name].chunks
+        except KeyError:
+            LOG.debug("Trying to read chunks from a missing data set: %s" % dataset_name)
+            raise MissingDataSetException("Could not locate dataset: %s" % dataset_name)
+        finally:
+            self.close_file()
+
+
     def set_metadata(self, meta_dictionary, dataset_name='', tvb_specific_metadata=True, where=ROOT_NODE_PATH):
         """
         Set meta-data information for root node or for a given data set.
@@ -510,11 +572,14 @@ class HDF5StorageManager(object):
         return file_obj
 
 
-    def __compute_chunk_shape(self, data_shape, grow_dim=None):
+    def __compute_chunk_shape(self, data_shape, grow_dim=None, item_size=8):
+        """
+        Chunks hold about CHUNK_BLOCK_SIZE Bytes, thus more elements when stored with a smaller precision.
+        """
         data_shape = list(data_shape)
         if not data_shape:
             return 1
-        nr_elems_per_block = CHUNK_BLOCK_SIZE / 8.0
+        nr_elems_per_block = CHUNK_BLOCK_SIZE / float(max(item_size, 1))
         if grow_dim is None:
             # We don't know what dimension is growing or we are not in
             # append mode and just want to write the whole data.
@@ -284,6 +284,10 @@ class OperationGroup(Base, Exportable):
 
 
 
+## Stored in the parameters of the first operation from a batch, with the ids of the other operations in the batch.
+KEY_BATCH_OPERATIONS = "RESERVEDbatch"
+
+
 #Possible values for Operation.status field
 STATUS_STARTED = "3-STARTED"
 STATUS_FINISHED = "4-FINISHED"
@@ -37,6 +37,7 @@ DAO operations related to Algorithms and User Operations are defined here.
 
 from sqlalchemy import or_, and_
 from sqlalchemy import func as func
+from sqlalchemy.orm import aliased
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.sql.expression import case as case_, desc
 from tvb.core.entities import model
@@ -157,6 +158,59 @@ class OperationDAO(RootDAO):
         return result
 
 
+    def get_results_with_measures_in_group(self, operation_group_id, measure_class):
+        """
+        Retrieve with a single query, for all the operations in a group, their resulted DataTypes and the
+        measures for them: the DataType itself when it is a measure, or the measures analyzing it.
+
+        :param measure_class: mapped class of the measures, with the analyzed DataType GID in `_analyzed_datatype`
+        :returns: list of tuples (operation, datatype, own measure, analyzing measure), ordered by operation,
+                  with None for the missing parts (e.g. no result for an operation still running)
+        """
+        try:
+            own_measure = aliased(measure_class)
+            analyzing_measure = aliased(measure_class)
+            query = self.session.query(model.Operation, model.DataType, own_measure, analyzing_measure
+                                       ).outerjoin(model.DataType,
+                                                   and_(model.DataType.fk_from_operation == model.Operation.id,
+                                                        model.DataType.type != self.EXCEPTION_DATATYPE_GROUP,
+                                                        model.DataType.type != self.EXCEPTION_DATATYPE_SIMULATION)
+                                       ).outerjoin(own_measure, own_measure.id == model.DataType.id
+                                       ).outerjoin(analyzing_measure,
+                                                   analyzing_measure._analyzed_datatype == model.DataType.gid
+                                       ).filter(model.Operation.fk_operation_group == operation_group_id
+                                       ).order_by(model.Operation.id, model.DataType.id, analyzing_measure.id)
+            result = query.all()
+            ## Traited entities look dirty after load, make sure they are not committed back.
+            self.session.expunge_all()
+        except Exception, excep:
+            self.logger.exception(excep)
+            result = None
+        return result
+
+
+    def get_operation_group_signature(self, operation_group_id, measure_class):
+        """
+        :returns: a value which changes whenever operations in the group change status,
+                  or measures are added for their results (e.g. to invalidate cached PSE views)
+        """
+        try:
+            statuses = self.session.query(model.Operation.status, func.count(model.Operation.id),
+                                          func.max(model.Operation.completion_date)
+                                          ).filter_by(fk_operation_group=operation_group_id
+                                          ).group_by(model.Operation.status).order_by(model.Operation.status).all()
+            analyzed = aliased(model.DataType)
+            measures = self.session.query(func.count(measure_class.id)
+                                          ).join(analyzed, measure_class._analyzed_datatype == analyzed.gid
+                                          ).join(model.Operation, analyzed.fk_from_operation == model.Operation.id
+                                          ).filter(model.Operation.fk_operation_group == operation_group_id).scalar()
+            result = tuple(statuses), measures
+        except Exception, excep:
+            self.logger.exception(excep)
+            result = None
+        return result
+
+
     def compute_disk_size_for_started_ops(self, user_id):
         """ Get all the disk space that should be reserved for the started operations of this user. """
         try:
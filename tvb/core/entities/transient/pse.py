@@ -173,6 +173,11 @@ class ContextDiscretePSE(EnhancedDictionary):
         if self.min_color == self.max_color:
             self.max_color += 1
             
+        ## In adaptive PSE mode not all the grid points are explored. Mark the missing ones accordingly.
+        for key_1 in self.values_x:
+            for key_2 in self.values_y:
+                final_dict.setdefault(key_1, {}).setdefault(key_2, {self.KEY_TOOLTIP: "Point not explored."})
+
         all_series = []
         for i, key_1 in enumerate(self.values_x):
             for j, key_2 in enumerate(self.values_y):
@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+Service layer for the adaptive Parameter Space Exploration mode.
+
+A Burst launched with numeric ranges can ask (through its simulator configuration) for adaptive
+refinement: after the coarse grid has finished, new simulations are scheduled between neighbouring
+points where the selected metric changes the most, until the requested budget is used.
+All new operations are added in the already existing groups, thus the result is still a
+DataTypeGroup which can be displayed with the PSE viewers.
+
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import json
+import numpy
+from tvb.config import MEASURE_DATATYPE_MODULE, MEASURE_DATATYPE_CLASS
+from tvb.basic.config.settings import TVBSettings as cfg
+from tvb.basic.traits.types_basic import MapAsJson
+from tvb.basic.logger.builder import get_logger
+from tvb.core.utils import parse_json_parameters
+from tvb.core.entities import model
+from tvb.core.entities.storage import dao
+from tvb.core.adapters.abcadapter import ABCAdapter
+
+
+KEY_ADAPTIVE_BUDGET = "pse_adaptive_budget"
+KEY_ADAPTIVE_METRIC = "pse_adaptive_metric"
+KEY_ADAPTIVE_CRITERION = "pse_adaptive_criterion"
+ADAPTIVE_KEYS = [KEY_ADAPTIVE_BUDGET, KEY_ADAPTIVE_METRIC, KEY_ADAPTIVE_CRITERION]
+
+CRITERION_GRADIENT = "gradient"
+CRITERION_VARIANCE = "variance"
+
+
+
+def get_adaptive_interface():
+    """
+    :returns: input tree nodes for the adaptive PSE settings, to be displayed in the Burst simulator form
+    """
+    return [{'name': KEY_ADAPTIVE_BUDGET, 'label': 'Adaptive PSE budget', 'type': 'int', 'default': '0',
+             'required': False,
+             'description': 'Total number of simulations allowed for a PSE with numeric ranges. When bigger than '
+                            'the number of points in the ranges, new simulations are placed where the metric '
+                            'changes the most. Leave 0 to explore only the given ranges.'},
+            {'name': KEY_ADAPTIVE_METRIC, 'label': 'Adaptive PSE metric', 'type': 'str', 'default': '',
+             'required': False,
+             'description': 'Name of the metric guiding the adaptive PSE (e.g. GlobalVariance). '
+                            'When empty, the first metric computed is used.'},
+            {'name': KEY_ADAPTIVE_CRITERION, 'label': 'Adaptive PSE criterion', 'type': 'select',
+             'default': CRITERION_GRADIENT, 'required': False,
+             'options': [{'name': 'Metric jump between neighbours', 'value': CRITERION_GRADIENT},
+                         {'name': 'Metric variance around a gap', 'value': CRITERION_VARIANCE}],
+             'description': 'How the gaps between explored points are scored, in adaptive PSE mode.'}]
+
+
+
+def compute_refinement_points(values_x, values_y, metric_grid, explored, max_points, criterion=CRITERION_GRADIENT):
+    """
+    Score the gaps between neighbouring explored points (along each range) and return the midpoints
+    of the best scored gaps.
+
+    :param values_x: sorted numbers explored so far on the first range
+    :param values_y: sorted numbers explored so far on the second range ([None] when a single range is used)
+    :param metric_grid: 2D array with shape (len(values_x), len(values_y)); NaN where no metric is available
+    :param explored: set of (x, y) points already scheduled, which should not be returned again
+    :param max_points: maximum number of points to be returned
+    :param criterion: 'gradient' scores the metric jump over a gap,
+                      'variance' scores the metric variance in the neighbourhood of a gap
+    :returns: list of (x, y) tuples, best scored first
+    """
+    metric_grid = numpy.asarray(metric_grid, dtype=numpy.float64)
+    candidates = {}
+
+    for j, y_value in enumerate(values_y):
+        for midpoint, score in _score_line(values_x, metric_grid[:, j], criterion):
+            _keep_best(candidates, (midpoint, y_value), score)
+    if len(values_y) > 1:
+        for i, x_value in enumerate(values_x):
+            for midpoint, score in _score_line(values_y, metric_grid[i, :], criterion):
+                _keep_best(candidates, (x_value, midpoint), score)
+
+    ordered = sorted(candidates.items(), key=lambda entry: entry[1], reverse=True)
+    return [point for point, score in ordered if point not in explored][:max(max_points, 0)]
+
+
+
+def _score_line(coordinates, values, criterion):
+    """
+    For one line of the grid, yield (midpoint, score) for each gap between two consecutive valid metric values.
+    """
+    valid = numpy.nonzero(numpy.isfinite(values))[0]
+    line_values = values[valid]
+    for k in xrange(len(valid) - 1):
+        if criterion == CRITERION_VARIANCE:
+            score = numpy.var(line_values[max(k - 1, 0): k + 3])
+        else:
+            score = abs(line_values[k + 1] - line_values[k])
+        if score > 0:
+            yield _midpoint(coordinates[valid[k]], coordinates[valid[k + 1]]), score
+
+
+
+def _keep_best(candidates, point, score):
+    """ Remember the highest score for a candidate point. """
+    if point not in candidates or candidates[point] < score:
+        candidates[point] = score
+
+
+
+def _midpoint(first, second):
+    """
+    Middle of two range values, rounded to one more decimal than the inputs, to keep the UI labels readable.
+    """
+    middle = (first + second) / 2.0
+    rounded = round(middle, min(max(_count_decimals(first), _count_decimals(second)) + 1, 15))
+    if min(first, second) < rounded < max(first, second):
+        return rounded
+    return middle
+
+
+
+def _count_decimals(number):
+    """ Number of decimals in the shortest representation of a float. """
+    text = repr(float(number))
+    if 'e' in text or '.' not in text:
+        return 15
+    return len(text.split('.')[1])
+
+
+
+class AdaptivePSEService:
+    """
+    Service layer for refining a finished PSE Burst, where the chosen metric varies the most.
+    """
+
+    ## Operation group id -> whether it is part of an adaptive PSE (settings do not change after launch).
+    _adaptive_groups = {}
+
+
+    def __init__(self):
+        self.logger = get_logger(self.__class__.__module__)
+
+
+    def is_adaptive_operation(self, operation):
+        """
+        :returns: True when the operation is part of a group launched from an adaptive PSE Burst.
+                  The Burst is read only once for each operation group.
+        """
+        group_id = operation.fk_operation_group
+        if group_id is None:
+            return False
+        is_adaptive = self._adaptive_groups.get(group_id)
+        if is_adaptive is None:
+            is_adaptive = False
+            burst = dao.get_burst_for_operation_id(operation.id)
+            if burst is not None:
+                burst.prepare_after_load()
+                is_adaptive = self.get_adaptive_settings(burst)[0] > 0
+            self._adaptive_groups[group_id] = is_adaptive
+        return is_adaptive
+
+
+    @staticmethod
+    def get_adaptive_settings(burst_config):
+        """
+        :returns: (budget, metric_name, criterion) as submitted for a burst. Budget is 0 when adaptive mode is off.
+        """
+        budget = burst_config.get_simulation_parameter_value(KEY_ADAPTIVE_BUDGET)
+        try:
+            budget = int(budget) if budget else 0
+        except ValueError:
+            budget = 0
+        metric = burst_config.get_simulation_parameter_value(KEY_ADAPTIVE_METRIC) or None
+        criterion = burst_config.get_simulation_parameter_value(KEY_ADAPTIVE_CRITERION) or CRITERION_GRADIENT
+        return budget, metric, criterion
+
+
+    def prepare_refinement(self, finished_operation_id):
+        """
+        To be called after an operation closed its workflow.
+        When it was the last one from an adaptive PSE Burst, create (but do not launch) the next batch
+        of simulations. The budget represents the total number of simulations allowed in the range.
+
+        :returns: list of simulator Operation entities to be launched (empty when nothing is to be refined)
+        """
+        burst = dao.get_burst_for_operation_id(finished_operation_id)
+        if burst is None or burst.status != burst.BURST_FINISHED:
+            return []
+        burst.prepare_after_load()
+        budget, metric, criterion = self.get_adaptive_settings(burst)
+        if budget <= 0:
+            return []
+
+        workflows = dao.get_workflows_for_burst(burst.id)
+        if len(workflows) < 2:
+            return []
+        seed_steps = dao.get_workflow_steps(workflows[0].id)
+        seed_operation = dao.get_operation_by_id(seed_steps[0].fk_operation)
+        operation_group = seed_operation.operation_group
+        if operation_group is None:
+            return []
+
+        are_numbers_1, range1_name, _ = operation_group.load_range_numbers(operation_group.range1)
+        are_numbers_2, range2_name, _ = operation_group.load_range_numbers(operation_group.range2)
+        if not are_numbers_1 or are_numbers_2 is False:
+            self.logger.warning("Adaptive PSE is only available for numeric ranges. Burst %s is not refined." % burst.id)
+            return []
+        if are_numbers_2 is None:
+            range2_name = None
+
+        operations = dao.get_operations_in_group(operation_group.id)
+        remaining = min(budget, cfg.MAX_RANGE_NUMBER) - len(operations)
+        if remaining <= 0:
+            return []
+
+        values_x, values_y, metric_grid, explored = self._load_metric_grid(operations, range1_name,
+                                                                           range2_name, metric)
+        ## Refine in several rounds, each at most half of the points explored so far.
+        round_size = min(remaining, max(1, len(operations) // 2))
+        points = compute_refinement_points(values_x, values_y, metric_grid, explored, round_size, criterion)
+        if not points:
+            return []
+
+        self.logger.debug("Adaptive PSE refinement with %d new points for burst %s." % (len(points), burst.id))
+        new_operations = self._store_refinement(burst, workflows[0], seed_steps, seed_operation,
+                                                points, range1_name, range2_name)
+        self._release_disk_quota(burst)
+        burst.status = burst.BURST_RUNNING
+        burst.finish_time = None
+        dao.store_entity(burst)
+        return new_operations
+
+
+    @staticmethod
+    def _release_disk_quota(burst):
+        """
+        The results of the finished rounds were charged to the user's disk quota, when the Burst was
+        marked as finished. Give them back, for the whole Burst to be charged only once, after the last round.
+        """
+        disk_size = dao.get_burst_disk_size(burst.id)
+        if disk_size > 0:
+            user = dao.get_project_by_id(burst.fk_project).administrator
+            user.used_disk_space = max(user.used_disk_space - disk_size, 0)
+            dao.store_entity(user)
+
+
+    @staticmethod
+    def _load_metric_grid(operations, range1_name, range2_name, metric):
+        """
+        Read the selected metric for every finished operation in the range.
+
+        :returns: sorted values on each range, a 2D metric grid (NaN where missing) and the set of explored points
+        """
+        explored = set()
+        measured = {}
+        for operation in operations:
+            range_values = json.loads(operation.range_values)
+            point = (float(range_values[range1_name]),
+                     float(range_values[range2_name]) if range2_name is not None else None)
+            explored.add(point)
+            if operation.status != model.STATUS_FINISHED:
+                continue
+            results = dao.get_results_for_operation(operation.id)
+            if not results:
+                continue
+            measures = dao.get_generic_entity(MEASURE_DATATYPE_MODULE + "." + MEASURE_DATATYPE_CLASS,
+                                              results[0].gid, '_analyzed_datatype')
+            if not measures or not measures[0].metrics:
+                continue
+            if metric is None:
+                metric = sorted(measures[0].metrics.keys())[0]
+            try:
+                measured[point] = float(measures[0].metrics[metric])
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        values_x = sorted(set(point[0] for point in explored))
+        values_y = sorted(set(point[1] for point in explored))
+        metric_grid = numpy.empty((len(values_x), len(values_y)))
+        metric_grid.fill(numpy.nan)
+        for (x_value, y_value), value in measured.iteritems():
+            metric_grid[values_x.index(x_value), values_y.index(y_value)] = value
+        return values_x, values_y, metric_grid, explored
+
+
+    @staticmethod
+    def _store_refinement(burst, seed_workflow, seed_steps, seed_operation, points, range1_name, range2_name):
+        """
+        Create one new workflow for each point, by cloning the steps of an existing workflow from the same burst.
+        Operations are placed in the groups of their seed operations, and group ranges are extended.
+        """
+        seed_parameters = parse_json_parameters(seed_operation.parameters)
+        seed_views = dao.get_visualization_steps(seed_workflow.id)
+        seed_step_operations = [dao.get_operation_by_id(step.fk_operation) for step in seed_steps[1:]]
+        new_operations = []
+
+        for x_value, y_value in points:
+            range_values = {range1_name: x_value}
+            if range2_name is not None:
+                range_values[range2_name] = y_value
+            parameters = dict(seed_parameters)
+            parameters.update(range_values)
+            range_values = json.dumps(range_values)
+
+            operation = model.Operation(seed_operation.fk_launched_by, burst.fk_project, seed_operation.fk_from_algo,
+                                        json.dumps(parameters, cls=MapAsJson.MapAsJsonEncoder),
+                                        seed_operation.meta_data, seed_operation.method_name,
+                                        op_group_id=seed_operation.fk_operation_group,
+                                        user_group=seed_operation.user_group, range_values=range_values)
+            operation.visible = seed_operation.visible
+            operation = dao.store_entity(operation)
+            new_operations.append(operation)
+
+            workflow = dao.store_entity(model.Workflow(burst.fk_project, burst.id))
+            simulation_step = model.WorkflowStep(algorithm_id=seed_operation.fk_from_algo, workflow_id=workflow.id,
+                                                 step_index=seed_steps[0].step_index, static_param=operation.parameters)
+            simulation_step.fk_operation = operation.id
+            dao.store_entity(simulation_step)
+
+            for step, step_operation in zip(seed_steps[1:], seed_step_operations):
+                cloned_step = step.clone()
+                cloned_step.fk_workflow = workflow.id
+                step_parameters = dict(cloned_step.static_param)
+                step_parameters.update(cloned_step.dynamic_param)
+                next_operation = model.Operation(step_operation.fk_launched_by, burst.fk_project, step.fk_algorithm,
+                                                 json.dumps(step_parameters, cls=MapAsJson.MapAsJsonEncoder),
+                                                 meta=step_operation.meta_data, method_name=ABCAdapter.LAUNCH_METHOD,
+                                                 op_group_id=step_operation.fk_operation_group,
+                                                 range_values=range_values, user_group=step_operation.user_group)
+                next_operation.visible = step.step_visible
+                next_operation = dao.store_entity(next_operation)
+                cloned_step.fk_operation = next_operation.id
+                dao.store_entity(cloned_step)
+
+            for view in seed_views:
+                cloned_view = view.clone()
+                cloned_view.fk_workflow = workflow.id
+                dao.store_entity(cloned_view)
+
+        group_ids = set([seed_operation.fk_operation_group] +
+                        [step_operation.fk_operation_group for step_operation in seed_step_operations])
+        for group_id in group_ids:
+            if group_id is not None:
+                AdaptivePSEService._extend_group_ranges(dao.get_operationgroup_by_id(group_id), points,
+                                                        range1_name, range2_name)
+        return new_operations
+
+
+    @staticmethod
+    def _extend_group_ranges(operation_group, points, range1_name, range2_name):
+        """
+        Add the refined values in the (sorted) ranges of an OperationGroup, for the PSE viewers to display them.
+        """
+        _, _, range1_values = operation_group.load_range_numbers(operation_group.range1)
+        operation_group.range1 = json.dumps((range1_name, sorted(set(range1_values + [x for x, _ in points]))))
+        if range2_name is not None:
+            _, _, range2_values = operation_group.load_range_numbers(operation_group.range2)
+            operation_group.range2 = json.dumps((range2_name, sorted(set(range2_values + [y for _, y in points]))))
+        dao.store_entity(operation_group)
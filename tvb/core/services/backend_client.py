@@ -39,7 +39,6 @@ import sys
 import signal
 import Queue
 import threading
-import datetime
 from subprocess import Popen, PIPE
 from tvb.basic.profile import TvbProfile as tvb_profile
 from tvb.basic.config.settings import TVBSettings as config
@@ -226,7 +225,9 @@ class ClusterSchedulerClient(object):
         # Load operation so we can estimate the execution time
         operation = dao.get_operation_by_id(operation_identifier)
         kwargs = parse_json_parameters(operation.parameters)
-        time_estimate = int(adapter_instance.get_execution_time_approximation(**kwargs))
+        ## The operations of a batch are computed in this same job
+        nr_batched_operations = 1 + len(kwargs.get(model.KEY_BATCH_OPERATIONS) or [])
+        time_estimate = int(adapter_instance.get_execution_time_approximation(**kwargs)) * nr_batched_operations
         hours = int(time_estimate / 3600)
         minutes = (int(time_estimate) % 3600) / 60
         seconds = int(time_estimate) % 60
@@ -234,8 +235,7 @@ class ClusterSchedulerClient(object):
         if hours < 2:
             walltime = "02:00:00"
         else:
-            walltime = datetime.time(hours, minutes, seconds)
-            walltime = walltime.strftime("%H:%M:%S")
+            walltime = "%02d:%02d:%02d" % (hours, minutes, seconds)
 
         call_arg = config.CLUSTER_SCHEDULE_COMMAND % (walltime, operation_identifier, user_name_label)
         LOGGER.info(call_arg)
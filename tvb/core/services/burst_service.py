@@ -36,10 +36,12 @@ Created on Apr 27, 2012
 """
 
 import json
+import math
 import threading
 from types import IntType
 from tvb.config import MEASURE_METRICS_MODULE, MEASURE_METRICS_CLASS, DEFAULT_PORTLETS
 from tvb.config import SIMULATION_DATATYPE_MODULE, SIMULATION_DATATYPE_CLASS
+from tvb.config import STREAMING_ANALYZERS, STREAMING_PARAMETERS_SEPARATOR
 from tvb.basic.logger.builder import get_logger
 import tvb.core.entities.model as model
 from tvb.core.entities.model import KEY_PARAMETER_CHECKED, KEY_SAVED_VALUE
@@ -48,16 +50,37 @@ from tvb.core.entities.transient.burst_configuration_entities import PortletConf
 from tvb.core.entities.storage import dao, transactional
 from tvb.core.adapters.abcadapter import ABCAdapter
 from tvb.core.adapters.abcdisplayer import ABCDisplayer, ABCMPLH5Displayer
-from tvb.core.services.operation_service import OperationService
+from tvb.core.services.operation_service import OperationService, prepare_batches
 from tvb.core.services.flow_service import FlowService
 from tvb.core.services.workflow_service import WorkflowService
 from tvb.core.services.project_service import ProjectService
+from tvb.core.services.adaptive_pse_service import ADAPTIVE_KEYS
 from tvb.core.services.exceptions import RemoveDataTypeException, InvalidPortletConfiguration, BurstServiceException
 from tvb.core.portlets.portlet_configurer import PortletConfigurer
 
 
 MAX_BURSTS_DISPLAYED = 50
 
+## Number of PSE points to be computed together in a single simulation (when only model parameters are ranged).
+## When the simulator can not vectorize them, the points of a batch are computed one after the other, in one process.
+KEY_PSE_BATCH_SIZE = "pse_batch_size"
+BATCHABLE_RANGE_PREFIX = "model_parameters_option_"
+
+
+## Hidden simulator input, with the analyzers to be computed while simulating.
+KEY_STREAMING_ANALYZERS = "streaming_analyzers"
+
+
+
+def get_pse_batch_interface():
+    """
+    :returns: input tree node for the PSE batch size, to be displayed in the Burst simulator form
+    """
+    return {'name': KEY_PSE_BATCH_SIZE, 'label': 'PSE batch size', 'type': 'int', 'default': '1', 'required': False,
+            'description': 'Number of PSE points to be computed together, in a single simulation. '
+                           'Only used when the ranged inputs are model parameters.'}
+
+
 
 class BurstService():
     """
@@ -353,6 +376,14 @@ class BurstService():
         sim_algo = FlowService().get_algorithm_by_identifier(simulator_id)
         metadata = {DataTypeMetaData.KEY_BURST: burst_id}
         launch_data = burst_config.get_all_simulator_values()[0]
+        ## Adaptive PSE settings are read by AdaptivePSEService from the burst, they are not simulator inputs.
+        for adaptive_key in ADAPTIVE_KEYS + [KEY_PSE_BATCH_SIZE]:
+            launch_data.pop(adaptive_key, None)
+        is_range = any(self.operation_service.get_range_values(launch_data, range_parameter) is not None
+                       for range_parameter in [model.RANGE_PARAMETER_1, model.RANGE_PARAMETER_2])
+        streaming_analyzers = self._get_streaming_analyzers(burst_config, is_range)
+        if streaming_analyzers:
+            launch_data[KEY_STREAMING_ANALYZERS] = ','.join(streaming_analyzers)
         operations, group = self.operation_service.prepare_operations(user_id, project_id, sim_algo, 
                                                                       sim_algo.algo_group.group_category, metadata, 
                                                                       **launch_data)
@@ -408,6 +439,33 @@ class BurstService():
         return operation_ids
     
     
+    @staticmethod
+    def _get_streaming_analyzers(burst_config, is_range):
+        """
+        :param is_range: when True, the PSE metrics step is added after each simulation
+        :returns: the streaming analyzers (name and parameters) for the analyzers in this burst
+                  which the Simulator can compute while running (see STREAMING_ANALYZERS)
+        """
+        streaming_analyzers = set()
+        if is_range:
+            streaming_analyzers.add(STREAMING_ANALYZERS[MEASURE_METRICS_MODULE + '.' + MEASURE_METRICS_CLASS][0])
+        for tab in burst_config.tabs:
+            for portlet_cfg in tab.portlets:
+                if portlet_cfg is None:
+                    continue
+                for entry in portlet_cfg.analyzers:
+                    algorithm = dao.get_algorithm_by_id(entry.fk_algorithm)
+                    algo_group = dao.get_algo_group_by_id(algorithm.fk_algo_group)
+                    streaming = STREAMING_ANALYZERS.get(algo_group.module + '.' + algo_group.classname)
+                    if streaming is not None:
+                        analyzer_name, parameter_names = streaming
+                        static_parameters = entry.static_param or {}
+                        specification = [analyzer_name] + [str(static_parameters.get(name) or '')
+                                                           for name in parameter_names]
+                        streaming_analyzers.add(STREAMING_PARAMETERS_SEPARATOR.join(specification))
+        return sorted(streaming_analyzers)
+
+
     def _async_launch_and_prepare(self, burst_config, simulator_index, simulator_id, user_id):
         """
         Prepare operations asynchronously.
@@ -416,12 +474,12 @@ class BurstService():
             operation_ids = self._prepare_operations(burst_config, simulator_index, simulator_id, user_id)
             self.logger.debug("Starting a total of %s workflows" % (len(operation_ids,)))
             wf_errs = 0
-            for operation_id in operation_ids:
+            for batch in self._prepare_batches(burst_config, operation_ids):
                 try:
-                    OperationService().launch_operation(operation_id, True)
+                    OperationService().launch_operation(batch[0].id, True)
                 except Exception, excep:
                     self.logger.error(excep)
-                    wf_errs += 1
+                    wf_errs += len(batch)
                     self.workflow_service.mark_burst_finished(burst_config, error=True, error_message=str(excep))
                     
             self.logger.debug("Finished launching workflows. " + str(len(operation_ids) - wf_errs) +
@@ -433,6 +491,28 @@ class BurstService():
         
                 
     
+    @staticmethod
+    def _prepare_batches(burst_config, operation_ids):
+        """
+        Split simulator operations in batches of at most KEY_PSE_BATCH_SIZE, to be computed together.
+        Only PSE ranges over model parameters are batched (see operation_service.prepare_batches).
+
+        :returns: list of lists of operations
+        """
+        operations = [dao.get_operation_by_id(operation_id) for operation_id in operation_ids]
+        try:
+            batch_size = int(burst_config.get_simulation_parameter_value(KEY_PSE_BATCH_SIZE) or 1)
+        except ValueError:
+            batch_size = 1
+        range_names = [burst_config.get_simulation_parameter_value(range_param)
+                       for range_param in [model.RANGE_PARAMETER_1, model.RANGE_PARAMETER_2]]
+        range_names = [name for name in range_names if name not in [None, '0']]
+        if (batch_size < 2 or not range_names
+                or not all(name.startswith(BATCHABLE_RANGE_PREFIX) for name in range_names)):
+            return prepare_batches(operations, len(operations))
+        return prepare_batches(operations, int(math.ceil(len(operations) / float(batch_size))))
+
+
     @staticmethod
     def launch_visualization(visualization, frame_width=None, frame_height=None, 
                              method_name=ABCAdapter.LAUNCH_METHOD, is_preview=True):
@@ -466,6 +546,9 @@ class BurstService():
         if isinstance(adapter_instance, ABCMPLH5Displayer) and is_preview is True:
             prepared_inputs[ABCMPLH5Displayer.SHOW_FULL_TOOLBAR] = False
         result = eval("adapter_instance." + method_name + "(**prepared_inputs)")
+        ## Space added by the viewer to the displayed files (e.g. cached statistics) is charged here.
+        for datatype_gid in adapter_instance.extended_datatypes:
+            ProjectService.update_datatype_disk_size(datatype_gid)
         return result, parameters_dict, operation_id
     
     
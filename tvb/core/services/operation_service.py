@@ -39,6 +39,7 @@ Module in charge with Launching an operation (creating the Operation entity as w
 
 import os
 import json
+import math
 import zipfile
 import tvb.core.utils as utils
 from copy import copy
@@ -49,6 +50,7 @@ from tvb.core.utils import parse_json_parameters
 from tvb.core.entities import model
 from tvb.core.entities.storage import dao
 from tvb.core.services.workflow_service import WorkflowService
+from tvb.core.services.adaptive_pse_service import AdaptivePSEService
 from tvb.core.entities.transient.structure_entities import DataTypeMetaData
 from tvb.core.entities.file.files_helper import FilesHelper
 from tvb.core.adapters.abcadapter import ABCAdapter, ABCSynchronous
@@ -72,6 +74,30 @@ RANGE_PARAMETER_2 = model.RANGE_PARAMETER_2
 UIKEY_SUBJECT = "RESERVEDsubject"
 UIKEY_USERGROUP = "RESERVEDusergroup"
 
+KEY_BATCH_OPERATIONS = model.KEY_BATCH_OPERATIONS
+
+
+
+def prepare_batches(operations, nr_batches):
+    """
+    Split operations in (at most) nr_batches contiguous batches, to be computed together.
+    The first operation in each batch is the one to be launched, and it receives the ids of the others
+    in its parameters (see OperationService._initiate_batch_prelaunch).
+
+    :returns: list of lists of operations
+    """
+    nr_batches = max(min(nr_batches, len(operations)), 1)
+    batch_size = int(math.ceil(len(operations) / float(nr_batches)))
+    batches = [operations[idx: idx + batch_size] for idx in xrange(0, len(operations), batch_size)]
+    for batch in batches:
+        if len(batch) > 1:
+            first_operation = batch[0]
+            parameters = json.loads(first_operation.parameters)
+            parameters[KEY_BATCH_OPERATIONS] = [operation.id for operation in batch[1:]]
+            first_operation.parameters = json.dumps(parameters)
+            dao.store_entity(first_operation)
+    return batches
+
 
 
 class OperationService:
@@ -86,6 +112,7 @@ class OperationService:
     def __init__(self):
         self.logger = get_logger(self.__class__.__module__)
         self.workflow_service = WorkflowService()
+        self.adaptive_pse_service = AdaptivePSEService()
         self.file_helper = FilesHelper()
 
 
@@ -195,13 +222,19 @@ class OperationService:
     
     def group_operation_launch(self, user_id, project_id, adapter_id, category_id, **kwargs):
         """
-        Create and prepare the launch of a group of operations.
+        Create and prepare the launch of a group of operations (e.g. an analyzer over all
+        the DataTypes in a DataTypeGroup). On the local backend, the operations are split in at most
+        MAX_THREADS_NUMBER batches, and each batch is computed in a single process (see
+        _initiate_batch_prelaunch). On the cluster, every operation is still a separate job.
+        Every operation produces its own results, in the same DataTypeGroup.
         """
         category = dao.get_category_by_id(category_id)
         algorithm = dao.get_algorithm_by_id(adapter_id)
         operations, _ = self.prepare_operations(user_id, project_id, algorithm, category, {}, **kwargs)
-        for operation in operations:
-            self.launch_operation(operation.id, True)
+        ## MAX_THREADS_NUMBER limits only the local processes; cluster jobs are better kept small.
+        nr_batches = len(operations) if cfg.DEPLOY_CLUSTER else cfg.MAX_THREADS_NUMBER
+        for batch in prepare_batches(operations, nr_batches):
+            self.launch_operation(batch[0].id, True)
 
 
     def prepare_operations(self, user_id, project_id, algorithm, category, metadata,
@@ -309,6 +342,10 @@ class OperationService:
         Public method.
         This should be the common point in calling an adapter- method.
         """
+        batch_operations = kwargs.pop(KEY_BATCH_OPERATIONS, None)
+        if batch_operations:
+            return self._initiate_batch_prelaunch(operation, adapter_instance, batch_operations, **kwargs)
+
         result_msg = ""
         try:
             unique_id = None
@@ -327,11 +364,7 @@ class OperationService:
             for k, value_ in filtered_kwargs.items():
                 params[str(k)] = value_
 
-            disk_space_per_user = cfg.MAX_DISK_SPACE
-            pending_op_disk_space = dao.compute_disk_size_for_started_ops(operation.fk_launched_by)
-            user_disk_space = dao.get_user_by_id(operation.fk_launched_by).used_disk_space  # Transform from kB to Bytes
-            available_space = disk_space_per_user - pending_op_disk_space - user_disk_space
-
+            available_space = self._compute_available_disk_space(operation)
             result_msg, nr_datatypes = adapter_instance._prelaunch(operation, unique_id, available_space, **params)
             operation = dao.get_operation_by_id(operation.id)
             ## Update DB stored kwargs for search purposes, to contain only valuable params (no unselected options)
@@ -359,9 +392,106 @@ class OperationService:
         ### Try to find next workflow Step. It might throw WorkflowException
         next_op_id = self.workflow_service.prepare_next_step(operation.id)
         self.launch_operation(next_op_id)
+        if next_op_id is None:
+            self._launch_pse_refinement(operation)
         return result_msg
 
 
+    @staticmethod
+    def _compute_available_disk_space(operation):
+        """
+        :returns: the disk space (kB) still available for the user which launched the operation.
+        """
+        disk_space_per_user = cfg.MAX_DISK_SPACE
+        pending_op_disk_space = dao.compute_disk_size_for_started_ops(operation.fk_launched_by)
+        user_disk_space = dao.get_user_by_id(operation.fk_launched_by).used_disk_space  # Transform from kB to Bytes
+        return disk_space_per_user - pending_op_disk_space - user_disk_space
+
+
+    def _initiate_batch_prelaunch(self, operation, adapter_instance, batch_operations, **kwargs):
+        """
+        Launch in a single computation an operation together with the other operations from its batch
+        (e.g. PSE points which differ only in scalar model parameters).
+        When the adapter can not compute them together, each operation is launched individually.
+        """
+        operations = [operation] + [dao.get_operation_by_id(op_id) for op_id in batch_operations]
+        kwargs_list = [kwargs] + [parse_json_parameters(one_operation.parameters) for one_operation in operations[1:]]
+        try:
+            params_list = []
+            for one_kwargs in kwargs_list:
+                filtered_kwargs = adapter_instance.prepare_ui_inputs(one_kwargs)
+                params_list.append(dict((str(k), value_) for k, value_ in filtered_kwargs.items()))
+            can_launch_batch = adapter_instance.can_launch_batch(params_list)
+        except Exception, excep:
+            self.logger.exception(excep)
+            can_launch_batch = False
+
+        if not can_launch_batch:
+            self.logger.debug("Operations %s can not be computed as a batch. Launching them one after the other."
+                              % str(batch_operations))
+            ## Stay in the current process, so that components cached by the adapter (e.g. a configured
+            ## Connectivity or Cortex) are reused between the operations of this batch.
+            ## A failed operation is already marked with its error, and does not stop the rest of the batch.
+            result_msg = ""
+            first_error = None
+            algo_group = dao.get_algo_group_by_id(operation.algorithm.fk_algo_group)
+            for idx, (one_operation, one_kwargs) in enumerate(zip(operations, kwargs_list)):
+                one_adapter = adapter_instance if idx == 0 else ABCAdapter.build_adapter(algo_group)
+                try:
+                    one_msg = self.initiate_prelaunch(one_operation, one_adapter, {}, **one_kwargs)
+                    result_msg = result_msg or one_msg
+                except Exception, excep:
+                    first_error = first_error or excep
+            if first_error is not None:
+                raise first_error
+            return result_msg
+
+        self.logger.debug("Launching operations %s as a batch." % str([op.id for op in operations]))
+        result_msg = ""
+        try:
+            available_space = self._compute_available_disk_space(operation)
+            captured = adapter_instance._prelaunch_batch(operations, available_space, params_list)
+            for one_operation, one_kwargs, (result_msg, nr_datatypes) in zip(operations, kwargs_list, captured):
+                one_operation = dao.get_operation_by_id(one_operation.id)
+                one_operation.parameters = json.dumps(one_kwargs)
+                one_operation.mark_complete(model.STATUS_FINISHED)
+                if nr_datatypes > 0:
+                    self.file_helper.write_operation_metadata(one_operation)
+                dao.store_entity(one_operation)
+        except LaunchException, excep:
+            self._handle_batch_exception(excep, excep.message, operations)
+        except MemoryError:
+            msg = ("Could not execute operation because there is not enough free memory." +
+                   " Please adjust operation parameters and re-launch it.")
+            self._handle_batch_exception(Exception(msg), msg, operations)
+        except Exception, excep1:
+            msg = "Could not launch Operation with the given input data!"
+            self._handle_batch_exception(excep1, msg, operations)
+
+        for one_operation in operations:
+            next_op_id = self.workflow_service.prepare_next_step(one_operation.id)
+            self.launch_operation(next_op_id)
+            if next_op_id is None:
+                self._launch_pse_refinement(one_operation)
+        return result_msg
+
+
+    def _launch_pse_refinement(self, finished_operation):
+        """
+        In adaptive PSE mode, schedule the next batch of simulations once the previous ones are finished.
+        """
+        try:
+            if not self.adaptive_pse_service.is_adaptive_operation(finished_operation):
+                return
+            refinement_operations = self.adaptive_pse_service.prepare_refinement(finished_operation.id)
+        except Exception, excep:
+            self.logger.error("Could not prepare adaptive PSE refinement!")
+            self.logger.exception(excep)
+            return
+        for operation in refinement_operations:
+            self.launch_operation(operation.id, True)
+
+
     def _send_to_cluster(self, operations, adapter_instance):
         """ Initiate operation on cluster"""
         for operation in operations:
@@ -410,6 +540,22 @@ class OperationService:
         raise exception
 
 
+    def _handle_batch_exception(self, exception, message, operations):
+        """
+        Same as _handle_exception, for all the operations in a batch which failed together:
+        each one is set in ERROR status (with its workflow), and only then the exception is raised.
+        """
+        self.logger.error(message)
+        self.logger.exception(exception)
+        for one_operation in operations:
+            one_operation = dao.get_operation_by_id(one_operation.id)
+            one_operation.mark_complete(model.STATUS_ERROR, str(exception))
+            dao.store_entity(one_operation)
+            self.workflow_service.update_executed_workflow_state(one_operation.id)
+        exception.message = message
+        raise exception
+
+
     def _remove_files(self, file_dictionary):
         """
         Remove any files that exist in the file_dictionary. 
@@ -691,6 +691,28 @@ class ProjectService:
             dao.store_entity(user)
 
 
+    @staticmethod
+    def update_datatype_disk_size(datatype_gid):
+        """
+        Recompute the disk size of a DataType whose file was written after its operation finished
+        (e.g. with data cached by a viewer), and charge the added space to the user who created it.
+        """
+        datatype = dao.get_datatype_by_gid(datatype_gid)
+        if datatype is None:
+            return
+        file_path = datatype.get_storage_file_path()
+        new_size = FilesHelper.compute_size_on_disk(file_path)
+        added_space = new_size - (datatype.disk_size or 0)
+        if added_space <= 0:
+            return
+        datatype.disk_size = new_size
+        dao.store_entity(datatype)
+        user = dao.get_user_for_datatype(datatype.id)
+        if user is not None:
+            user.used_disk_space = user.used_disk_space + added_space
+            dao.store_entity(user)
+
+
     def retrieve_launchers(self, datatype_gid, inspect_group=False, include_categories=None):
         """
         Returns all the available launch-able algorithms from the database.
@@ -232,6 +232,45 @@ class MappedType(model.DataType, mapped.MappedTypeLight):
         self._current_metadata[data_name] = new_metadata
 
 
+    def store_data_region(self, data_name, data, region, full_shape, chunk_shape=None,
+                          close_file=True, where=ROOT_NODE_PATH):
+        """
+        Store data into a region of a data-set from the HDF5 file on disk. The data-set is created
+        with `full_shape` at the first write. Each region is expected to be written only once.
+            :param data_name: name of the data-set where to store data
+            :param data: data to be stored (can be a list / array / numpy array...)
+            :param region: tuple of slices, specifying where to write data in the data-set
+            :param full_shape: shape of the entire data-set
+            :param chunk_shape: chunk layout for the data-set (when missing, one is computed)
+            :param close_file: Specify if the file should be closed automatically after write operation.
+                                If not, you have to close file by calling method close_file()
+            :param where: represents the path where to store our dataset (e.g. /data/info)
+        """
+        if isinstance(data, list):
+            data = numpy.array(data)
+        store_manager = self._get_file_storage_mng()
+        store_manager.store_data_region(data_name, data, region, full_shape, chunk_shape, close_file, where)
+
+        ### Update array meta-data, the same as when appending chunks.
+        new_metadata = self.__retrieve_array_metadata(data, data_name)
+        previous_meta = dict()
+        if data_name in self._current_metadata:
+            previous_meta = self._current_metadata[data_name]
+        self.__merge_metadata(new_metadata, previous_meta, data)
+        self._current_metadata[data_name] = new_metadata
+
+
+    def remove_data(self, data_name, where=ROOT_NODE_PATH):
+        """
+        Remove a data-set from the HDF5 file on disk, together with its cached array meta-data.
+            :param data_name: name of the data-set to be removed
+            :param where: represents the path where dataset is stored (e.g. /data/info)
+        """
+        store_manager = self._get_file_storage_mng()
+        store_manager.remove_data(data_name, where)
+        self._current_metadata.pop(data_name, None)
+
+
     def get_data(self, data_name, data_slice=None, where=ROOT_NODE_PATH, ignore_errors=False):
         """
         This method reads data from the given data set based on the slice specification
@@ -263,6 +302,23 @@ class MappedType(model.DataType, mapped.MappedTypeLight):
             return super(MappedType, self).get_data_shape(data_name)
 
 
+    def get_data_chunk_shape(self, data_name, where=ROOT_NODE_PATH):
+        """
+        This method reads the chunk layout of the given data set
+            :param data_name: Name of the data set from where to read the chunk shape
+            :param where: represents the path where dataset is stored (e.g. /data/info)
+            :returns: a shape tuple, or None when the data is not stored in chunks
+        """
+        if TVBSettings.TRAITS_CONFIGURATION.use_storage and self.trait.use_storage:
+            try:
+                store_manager = self._get_file_storage_mng()
+                return store_manager.get_data_chunk_shape(data_name, where)
+            except IOError, excep:
+                self.logger.warning(str(excep))
+                self.logger.warning("Could not read chunks from file. Most probably because data was not written....")
+        return None
+
+
     def get_info_about_array(self, array_name, included_info=None):
         """
         :returns: dictionary {label: value} about an attribute of type mapped.Array
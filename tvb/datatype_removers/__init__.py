@@ -49,5 +49,6 @@ REMOVERS_FACTORY = {'Connectivity': ConnectivityRemover,
                     'TimeSeriesRegion': TimeseriesRemover,
                     'TimeSeriesSurface': TimeseriesRemover,
                     'TimeSeriesVolume': TimeseriesRemover,
+                    'TimeSeriesVertexSubset': TimeseriesRemover,
                     'Volume': VolumeRemover
                     }
\ No newline at end of file
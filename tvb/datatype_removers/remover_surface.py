@@ -35,6 +35,7 @@
 from tvb.core.entities.storage import dao
 from tvb.core.adapters.abcremover import ABCRemover
 from tvb.datatypes.time_series import TimeSeriesSurface
+from tvb.adapters.datatypes.time_series_subset import TimeSeriesVertexSubset
 from tvb.datatypes.surfaces import LocalConnectivity, RegionMapping
 from tvb.datatypes.patterns_data import StimuliSurfaceData
 from tvb.core.services.exceptions import RemoveDataTypeException
@@ -55,12 +56,15 @@ class SurfaceRemover(ABCRemover):
         """
         if not skip_validation:
             associated_ts = dao.get_generic_entity(TimeSeriesSurface, self.handled_datatype.gid, '_surface')
+            associated_subsets = dao.get_generic_entity(TimeSeriesVertexSubset, self.handled_datatype.gid, '_surface')
             associated_rm = dao.get_generic_entity(RegionMapping, self.handled_datatype.gid, '_surface')
             associated_lc = dao.get_generic_entity(LocalConnectivity, self.handled_datatype.gid, '_surface')
             associated_stim = dao.get_generic_entity(StimuliSurfaceData, self.handled_datatype.gid, '_surface')
             error_msg = "Surface cannot be removed because is still used by a "
             if len(associated_ts) > 0:
                 raise RemoveDataTypeException(error_msg + " TimeSeriesSurface.")
+            if len(associated_subsets) > 0:
+                raise RemoveDataTypeException(error_msg + " TimeSeriesVertexSubset.")
             if len(associated_rm) > 0:
                 raise RemoveDataTypeException(error_msg + " RegionMapping.")
             if len(associated_lc) > 0:
@@ -51,9 +51,20 @@ import cherrypy
 from tvb.datatypes import connectivity, equations, surfaces, patterns
 from tvb.simulator import noise, integrators, models, coupling, monitors, simulator
 # framework
+from tvb.basic.config.settings import TVBSettings
+from tvb.adapters.simulator.monitor_buffer import MonitorResultsBuffer
 from tvb.interfaces.web.controllers import base_controller as base
 
 
+STATUS_WAITING = 'waiting'
+
+# upper limit (in seconds) for the long-poll of the wait method
+MAX_WAIT_TIMEOUT = 300
+
+# approximate size (in Bytes) of each chunk sent when streaming monitor data
+STREAM_CHUNK_SIZE = 4 * 2 ** 20
+
+
 def threadsafe(f):
     """
     Decorate f with a re-entrant lock to ensure that only
@@ -131,36 +142,172 @@ def build_and_run_(spec):
     sim = simulator.Simulator(**simargs)
     sim.configure()
 
-    # TODO open HDF5 first, figure out correct sizes, etc
+    # open HDF5 first, with one group per monitor; the file gets its final name only when complete
+    h5fname = result_file_name(spec)
+    h5 = h5py.File(h5fname + '.part', 'w', libver='latest')
 
-    # loop, writing data to h5
-    ts = [[] for _ in opt['monitors']]
-    ys = [[] for _ in opt['monitors']]
+    writers, buffers = [], []
+    block_size = MonitorResultsBuffer.compute_block_size(len(simargs['monitors']))
+    for i, mon in enumerate(simargs['monitors']):
+        mname = "mon_%d_%s" % (i, mon.__class__.__name__)
+        expected_samples = int(tf / mon.period) + 1
+        writers.append(H5MonitorWriter(h5.create_group(mname)))
+        buffers.append(MonitorResultsBuffer(writers[-1], expected_samples, block_size))
+
+    # loop, writing data to h5 in blocks
     for i, all_monitor_data in enumerate(sim(tf)):
         for j, mondata in enumerate(all_monitor_data):
             if not mondata is None:
                 t, y = mondata
-                ts[j].append(t)
-                ys[j].append(y)
-
-    # write data to hdf5 file
-    path = os.path.abspath(opt.get('wd', './'))
-    h5fname = os.path.join(path, "tvb_%s.h5" % (spec['md5sum'], ))
-    h5 = h5py.File(h5fname, 'w')
-
-    for i, (mon, (t, y)) in enumerate(zip(simargs['monitors'], zip(ts, ys))):
-        mname = "mon_%d_%s" % (i, mon.__class__.__name__)
-        g = h5.create_group(mname)
-        g.create_dataset('ts', data=t)
-        g.create_dataset('ys', data=y)
-
+                if not h5.swmr_mode:
+                    writers[j].prepare(y)
+                    # SWMR allows no new datasets, thus readers are let in once all monitors have theirs
+                    if all(writer.prepared for writer in writers):
+                        h5.swmr_mode = True
+                buffers[j].append(t, y)
+
+    for buffer_ in buffers:
+        buffer_.flush()
     h5.close()
+    os.rename(h5fname + '.part', h5fname)
 
     # return filename
     print "pool finished", opt
     return h5fname
 
 
+class H5MonitorWriter(object):
+    """
+    Writes the samples of one monitor into the datasets 'ts' and 'ys' of a group in the result file.
+    Datasets are created empty (before the file switches to SWMR mode) and grown with each block,
+    thus their length is the number of samples a concurrent reader can use.
+    """
+
+    def __init__(self, group):
+        self.group = group
+        self.prepared = False
+        self.count = 0
+
+
+    def prepare(self, sample):
+        """ Create the datasets, for samples like this one. """
+        if not self.prepared:
+            sample = numpy.asarray(sample)
+            self.group.create_dataset('ts', shape=(0,), maxshape=(None,), dtype=numpy.float64)
+            self.group.create_dataset('ys', shape=(0,) + sample.shape, maxshape=(None,) + sample.shape,
+                                      dtype=sample.dtype)
+            self.prepared = True
+
+
+    def _write(self, name, block):
+        dataset = self.group[name]
+        end = self.count + block.shape[0]
+        dataset.resize((end,) + dataset.shape[1:])
+        dataset[self.count:end] = block
+        dataset.flush()
+        return end
+
+
+    def write_time_slice(self, times):
+        self._write('ts', numpy.asarray(times))
+
+
+    def write_data_slice(self, data):
+        # times are written first, thus readers take the length of 'ys' as the count of complete samples
+        self.count = self._write('ys', numpy.asarray(data))
+
+
+
+class JobStore(object):
+    """
+    Keeps the specification and status of each simulation in a JSON file on disk,
+    so that jobs and their results are known after a server restart.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+
+    def _job_path(self, ix):
+        return os.path.join(self.folder, "job_%d.json" % int(ix))
+
+
+    def save(self, spec):
+        """ Write (or overwrite) one job, without its in-memory fields. """
+        stored = dict((k, v) for k, v in spec.iteritems() if k != 'async_result')
+        temp_path = self._job_path(spec['ix']) + '.tmp'
+        with open(temp_path, 'w') as job_file:
+            json.dump(stored, job_file)
+        os.rename(temp_path, self._job_path(spec['ix']))
+
+
+    def load_all(self):
+        """
+        :returns: dictionary {ix: spec} with all the stored jobs
+        """
+        jobs = {}
+        for file_name in os.listdir(self.folder):
+            if file_name.startswith('job_') and file_name.endswith('.json'):
+                with open(os.path.join(self.folder, file_name)) as job_file:
+                    spec = json.load(job_file)
+                jobs[int(spec['ix'])] = spec
+        return jobs
+
+
+    def find_result(self, md5sum):
+        """
+        :returns: the result file of a finished job with the same specification, if it still exists on disk
+        """
+        for spec in self.load_all().itervalues():
+            if (spec.get('md5sum') == md5sum and spec.get('status') is True
+                    and os.path.exists(spec.get('result', ''))):
+                return spec['result']
+        return None
+
+
+    def clear(self):
+        """ Forget all jobs (result files are kept). """
+        for file_name in os.listdir(self.folder):
+            if file_name.startswith('job_'):
+                os.remove(os.path.join(self.folder, file_name))
+
+
+
+def result_file_name(spec):
+    """
+    Path of the HDF5 file with the results of a simulation (with suffix '.part' while it is running).
+    """
+    path = os.path.abspath(spec['opt'].get('wd', './'))
+    return os.path.join(path, "tvb_%s.h5" % (spec['md5sum'], ))
+
+
+
+def read_monitor_window(group, t_start=None, t_end=None):
+    """
+    :returns: (first index, last index) of the samples already written in group, within [t_start, t_end)
+    """
+    if 'ys' not in group or 'ts' not in group:
+        return 0, 0
+    count = min(group['ys'].shape[0], group['ts'].shape[0])
+    if count == 0:
+        return 0, 0
+    times = group['ts'][:count]
+    first = 0 if t_start is None else int(numpy.searchsorted(times, float(t_start), side='left'))
+    last = count if t_end is None else int(numpy.searchsorted(times, float(t_end), side='left'))
+    return first, max(first, last)
+
+
+
+def spec_md5sum(opt):
+    """
+    Identify a simulation by its options only, so that identical requests get the same md5sum.
+    """
+    return hashlib.md5(json.dumps(opt, sort_keys=True)).hexdigest()
+
+
+
 def build_and_run(spec):
     try:
         r = build_and_run_(spec)
@@ -181,9 +328,70 @@ class SimulatorController(base.BaseController):
     exposed = True
 
 
-    def __init__(self, nproc=2):
+    def __init__(self, nproc=2, jobs_folder=None):
         super(SimulatorController, self).__init__()
-        self.reset(nproc=nproc)
+        if jobs_folder is None:
+            jobs_folder = os.path.join(TVBSettings.TVB_STORAGE, "API_SIMULATIONS")
+        self.store = JobStore(jobs_folder)
+        self.jobs_lock = threading.RLock()
+        self._start_pool(int(nproc))
+        # jobs stored by a previous server run; those not finished are computed again (once per md5sum)
+        self.sims = self.store.load_all()
+        self.nsim = max(self.sims.keys() or [0])
+        submitted = set()
+        for ix in sorted(self.sims.keys()):
+            spec = self.sims[ix]
+            if spec.get('status', STATUS_WAITING) == STATUS_WAITING and spec['md5sum'] not in submitted:
+                submitted.add(spec['md5sum'])
+                # partial results left by the interrupted run are not served, the job writes them again
+                partial_file = result_file_name(spec) + '.part'
+                if os.path.exists(partial_file):
+                    os.remove(partial_file)
+                self._submit(spec)
+
+
+    def _start_pool(self, nproc):
+        if hasattr(self, 'pool'):
+            # docs say GC'ing the pool will terminate() it, but let's be sure
+            self.pool.terminate()
+        self.pool = multiprocessing.Pool(processes=nproc)
+
+
+    def _submit(self, spec):
+        """
+        Send a job to the process pool; its status is stored when the result arrives.
+        """
+        spec['status'] = STATUS_WAITING
+        self.store.save(spec)
+        callback = functools.partial(self._job_finished, spec['ix'])
+        spec['async_result'] = self.pool.apply_async(build_and_run, (self.store_view(spec), ), callback=callback)
+
+
+    @staticmethod
+    def store_view(spec):
+        """ The job specification, without in-memory fields. """
+        return dict((k, v) for k, v in spec.iteritems() if k != 'async_result')
+
+
+    def _job_finished(self, ix, result):
+        """
+        Called (in the pool result thread) with the file name or the exception returned by build_and_run.
+        Jobs created with the same md5sum while this one was running share its result.
+        """
+        with self.jobs_lock:
+            if ix not in self.sims:
+                # the job list was reset meanwhile
+                return
+            for spec in self.sims.values():
+                if spec['ix'] == ix or (spec.get('md5sum') == self.sims[ix]['md5sum']
+                                        and spec.get('status') == STATUS_WAITING and 'async_result' not in spec):
+                    if isinstance(result, Exception):
+                        spec['status'] = repr(result)
+                    else:
+                        spec['status'] = True
+                        spec['result'] = result
+                    spec.pop('async_result', None)
+                    self.store.save(spec)
 
 
     @cherrypy.expose
@@ -198,30 +406,165 @@ class SimulatorController(base.BaseController):
         """
 
         if ix is not None:
-            sims = {ix: self.sims[int(ix)]} 
+            sims = {ix: self._get_spec(ix)}
         else:
             sims = self.sims
 
         dump = []
         for ix, sim in sims.iteritems():
-            kv = {}
-            for k, v in sim.iteritems():
-                if k == 'async_result':
-                    if v.ready():
-                        try:
-                            kv['result'] = v.get()
-                            kv['status'] = True
-                        except Exception as e:
-                            kv['status'] = repr(e)
-                    else:
-                        kv['status'] = 'waiting'
-                else:
-                    kv[k] = v
-            dump.append(kv)
+            dump.append(self.store_view(sim))
 
         return json.dumps(dump)
 
 
+    def _get_spec(self, ix):
+        """
+        :returns: the specification of simulation ix, or raise an HTTP error when there is no such simulation
+        """
+        try:
+            return self.sims[int(ix)]
+        except ValueError:
+            raise cherrypy.HTTPError(400, "Invalid simulation index %s." % ix)
+        except KeyError:
+            raise cherrypy.HTTPError(404, "No simulation %s, see the read method." % ix)
+
+
+    @staticmethod
+    def _float_argument(name, value):
+        """
+        :returns: value of a numeric request argument (None when missing), or raise an HTTP error
+        """
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            raise cherrypy.HTTPError(400, "Argument %s should be a number, not %s." % (name, value))
+
+
+    def _result_file(self, ix):
+        """
+        :returns: (path of the results file, finished flag); the path is None when nothing was written yet.
+        """
+        spec = self._get_spec(ix)
+        if spec.get('status') is True:
+            return spec['result'], True
+        if spec.get('status', STATUS_WAITING) != STATUS_WAITING:
+            raise cherrypy.HTTPError(500, "Simulation %s failed: %s" % (ix, spec['status']))
+        partial_file = result_file_name(spec) + '.part'
+        if os.path.exists(partial_file):
+            return partial_file, False
+        return None, False
+
+
+    @staticmethod
+    def _open_results(file_name, finished):
+        """
+        Open a results file for reading. A partial file is opened as a SWMR reader, next to the simulation
+        process writing it; it cannot be opened before the writer switched to SWMR mode, or when it was
+        renamed meanwhile (the simulation finished).
+        """
+        try:
+            if finished:
+                return h5py.File(file_name, 'r')
+            return h5py.File(file_name, 'r', libver='latest', swmr=True)
+        except (IOError, OSError, RuntimeError):
+            if finished:
+                raise cherrypy.HTTPError(500, "Results file %s can not be read." % os.path.basename(file_name))
+            raise cherrypy.HTTPError(503, "Results file is being written, please retry.")
+
+
+    @cherrypy.expose
+    def wait(self, ix, timeout=30):
+        """
+        Long-poll: return the simulation information (as read) once it finishes, or after timeout seconds
+        (at most MAX_WAIT_TIMEOUT, to not hold a server thread for long).
+        """
+        spec = self._get_spec(ix)
+        timeout = min(max(self._float_argument('timeout', timeout), 0), MAX_WAIT_TIMEOUT)
+        running = spec
+        if 'same_as' in spec and spec['same_as'] in self.sims:
+            running = self.sims[spec['same_as']]
+        async_result = running.get('async_result')
+        if async_result is not None:
+            # the pool calls _job_finished before marking the result as ready
+            async_result.wait(timeout)
+        return self.read(ix)
+
+
+    @cherrypy.expose
+    def monitors(self, ix):
+        """
+        Describe the monitor results written so far for a simulation (also while it is running).
+        """
+        file_name, finished = self._result_file(ix)
+        info = {'ix': int(ix), 'finished': finished, 'monitors': []}
+        if file_name is not None:
+            h5 = self._open_results(file_name, finished)
+            try:
+                for name in sorted(h5.keys()):
+                    group = h5[name]
+                    _, count = read_monitor_window(group)
+                    entry = {'name': name, 'count': count}
+                    if count > 0:
+                        entry['sample_shape'] = list(group['ys'].shape[1:])
+                        entry['dtype'] = group['ys'].dtype.newbyteorder('<').str
+                        entry['t_start'] = float(group['ts'][0])
+                        entry['t_end'] = float(group['ts'][count - 1])
+                    info['monitors'].append(entry)
+            finally:
+                h5.close()
+        cherrypy.response.headers['Content-Type'] = 'application/json'
+        return json.dumps(info)
+
+
+    @cherrypy.expose
+    def data(self, ix, monitor, t_start=None, t_end=None):
+        """
+        Stream the samples of one monitor, within the time window [t_start, t_end), written so far.
+
+        The response is a JSON header line (terminated by a new line) followed by the times (as '<f8')
+        and then the samples (as little-endian arrays of the announced dtype and shape), sent in chunks.
+        """
+        t_start = self._float_argument('t_start', t_start)
+        t_end = self._float_argument('t_end', t_end)
+        file_name, finished = self._result_file(ix)
+        if file_name is None:
+            raise cherrypy.HTTPError(404, "No results written yet for simulation %s." % ix)
+        h5 = self._open_results(file_name, finished)
+        try:
+            if monitor not in h5 or 'ys' not in h5[monitor]:
+                raise cherrypy.HTTPError(404, "No samples for monitor %s, see the monitors method." % monitor)
+            group = h5[monitor]
+            first, last = read_monitor_window(group, t_start, t_end)
+            times = group['ts'][first:last].astype('<f8')
+            dtype = group['ys'].dtype.newbyteorder('<')
+            sample_shape = group['ys'].shape[1:]
+        except Exception:
+            h5.close()
+            raise
+
+        header = {'ix': int(ix), 'monitor': monitor, 'finished': finished, 'count': last - first,
+                  'times_dtype': '<f8', 'dtype': dtype.str, 'sample_shape': list(sample_shape)}
+        sample_size = max(int(numpy.prod(sample_shape)) * dtype.itemsize, 1)
+        step = max(STREAM_CHUNK_SIZE // sample_size, 1)
+
+        def _stream():
+            try:
+                yield json.dumps(header) + '\n'
+                yield times.tostring()
+                for start in xrange(first, last, step):
+                    block = group['ys'][start:min(start + step, last)]
+                    yield numpy.asarray(block, dtype=dtype).tostring()
+            finally:
+                h5.close()
+
+        cherrypy.response.headers['Content-Type'] = 'application/octet-stream'
+        return _stream()
+
+    data._cp_config = {'response.stream': True}
+
+
     @cherrypy.expose
     @threadsafe
     def create(self, js):
@@ -229,14 +572,33 @@ class SimulatorController(base.BaseController):
         Create a new simulation and add to computational pool.
         """
 
-        spec = json.loads(js)
+        try:
+            spec = json.loads(js)
+            spec_md5sum(spec['opt'])
+        except (ValueError, KeyError, TypeError):
+            raise cherrypy.HTTPError(400, "Expected a JSON object with the simulation options under 'opt'.")
         self.nsim += 1
         ix = self.nsim
         spec['ix'] = ix
         spec['datetime'] = datetime.datetime.now().strftime("%y-%m-%d_%H-%M-%S")
-        spec['md5sum'] = hashlib.md5(json.dumps(spec)).hexdigest()
-        spec['async_result'] = self.pool.apply_async(build_and_run, (spec.copy(), ))
-        self.sims[ix] = spec
+        spec['md5sum'] = spec_md5sum(spec['opt'])
+
+        # reuse the result of an identical simulation, finished or still running
+        with self.jobs_lock:
+            self.sims[ix] = spec
+            previous_result = self.store.find_result(spec['md5sum'])
+            running = [sim for sim in self.sims.itervalues() if sim['md5sum'] == spec['md5sum']
+                       and sim['ix'] != ix and 'async_result' in sim]
+            if previous_result is not None:
+                spec['status'] = True
+                spec['result'] = previous_result
+                self.store.save(spec)
+            elif running:
+                spec['status'] = STATUS_WAITING
+                spec['same_as'] = running[0]['ix']
+                self.store.save(spec)
+            else:
+                self._submit(spec)
         return str(ix)
 
 
@@ -271,12 +633,11 @@ class SimulatorController(base.BaseController):
         """
 
         nproc = int(nproc)
-        if hasattr(self, 'pool'):
-            # docs say GC'ing the pool will terminate() it, but let's be sure
-            self.pool.terminate()
-        self.pool = multiprocessing.Pool(processes=nproc)
-        self.sims = {}
-        self.nsim = 0
+        with self.jobs_lock:
+            self._start_pool(nproc)
+            self.store.clear()
+            self.sims = {}
+            self.nsim = 0
         return str(nproc)
 
 
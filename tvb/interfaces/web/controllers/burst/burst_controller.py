@@ -43,7 +43,8 @@ from tvb.config import SIMULATOR_MODULE, SIMULATOR_CLASS, MEASURE_METRICS_MODULE
 from tvb.basic.config.settings import TVBSettings as cfg
 from tvb.core.utils import generate_guid
 from tvb.core.adapters.abcadapter import ABCAdapter
-from tvb.core.services.burst_service import BurstService, KEY_PARAMETER_CHECKED
+from tvb.core.services.burst_service import BurstService, KEY_PARAMETER_CHECKED, get_pse_batch_interface
+from tvb.core.services.adaptive_pse_service import get_adaptive_interface
 from tvb.core.services.workflow_service import WorkflowService
 from tvb.core.services.operation_service import RANGE_PARAMETER_1, RANGE_PARAMETER_2
 import tvb.interfaces.web.controllers.base_controller as base
@@ -80,12 +81,14 @@ class BurstController(base.BaseController):
         """
         Cache Simulator's input tree, for performance issues.
         Anyway, without restart, the introspected tree will not be different on multiple executions.
+        The PSE settings (read from the Burst, not by the simulator) are appended at the end.
         :returns: Simulator's Input Tree (copy from cache or just loaded)
         """
         cached_simulator_tree = base.get_from_session(base.KEY_CACHED_SIMULATOR_TREE)
         if cached_simulator_tree is None:
             cached_simulator_tree = self.flow_service.prepare_adapter(base.get_current_project().id,
                                                                       self.cached_simulator_algo_group)[1]
+            cached_simulator_tree = cached_simulator_tree + get_adaptive_interface() + [get_pse_batch_interface()]
             base.add2session(base.KEY_CACHED_SIMULATOR_TREE, cached_simulator_tree)
         return copy.deepcopy(cached_simulator_tree)
 
@@ -35,13 +35,18 @@ given action are described here.
 .. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
 """
 
+import os
 import cherrypy
 import formencode
 import copy
 import json
+import numpy
+from email.utils import formatdate
 from tvb.basic.filters.chain import FilterChain
 from tvb.datatypes.arrays import MappedArray
 from tvb.core.utils import url2path, parse_json_parameters, string2date, string2bool
+from tvb.core.entities import model
+from tvb.core.entities.storage import dao
 from tvb.core.entities.file.files_helper import FilesHelper
 from tvb.core.adapters.abcdisplayer import ABCDisplayer
 from tvb.core.adapters.abcadapter import ABCAdapter
@@ -49,6 +54,9 @@ from tvb.core.services.exceptions import OperationException
 from tvb.core.services.operation_service import OperationService, RANGE_PARAMETER_1
 from tvb.core.services.project_service import ProjectService
 from tvb.core.services.burst_service import BurstService
+from tvb.adapters.visualizers.connectivity import CONNECTIVITY_PAYLOADS_CACHE
+from tvb.adapters.analyzers.time_series_envelope import read_envelope
+from tvb.adapters.visualizers.time_series_volume_slices import read_orthogonal_slices, read_voxel_time_course
 from tvb.interfaces.web.entities.context_selected_adapter import SelectedAdapterContext
 from tvb.interfaces.web.controllers.users_controller import logged
 from tvb.interfaces.web.controllers.base_controller import using_template, ajax_call
@@ -61,6 +69,72 @@ FILTER_VALUES = "values"
 FILTER_OPERATIONS = "operations"
 KEY_CONTROLLS = "controlPage"
 
+## Response headers describing the raw bytes returned by read_binary_datatype_attribute.
+HEADER_ARRAY_DTYPE = "X-Array-Dtype"
+HEADER_ARRAY_SHAPE = "X-Array-Shape"
+
+## Lifetime (in seconds) allowed in client caches, for DataType attributes which never change.
+IMMUTABLE_CACHE_LIFETIME = 365 * 24 * 3600
+
+
+
+def binary_array(numpy_array):
+    """
+    Convert a numeric array into a little-endian, C-contiguous array with a type available in JavaScript
+    as a typed array: floats are sent as float32 and 64 bit integers as 32 bit integers (as used by WebGL).
+    """
+    numpy_array = numpy.asarray(numpy_array)
+    if numpy_array.dtype.kind == 'f':
+        dtype = numpy.float32
+    elif numpy_array.dtype.kind == 'b':
+        dtype = numpy.uint8
+    elif numpy_array.dtype.kind in 'iu':
+        dtype = numpy_array.dtype.kind + str(min(numpy_array.dtype.itemsize, 4))
+    else:
+        raise ValueError("Only numeric arrays can be sent as binary, not %s." % str(numpy_array.dtype))
+    return numpy.ascontiguousarray(numpy_array, dtype=numpy.dtype(dtype).newbyteorder('<'))
+
+
+
+def validate_cached_response(entities, immutable=False):
+    """
+    Set the ETag and Last-Modified response headers, derived from the GID and storage file of the DataTypes
+    from which the response is computed, and answer "304 Not Modified" (by raising cherrypy.HTTPRedirect)
+    when the client already holds that version. Nothing is cached for DataTypes without a storage file,
+    or whose operation is not finished yet.
+
+    :param immutable: when True, the client is allowed to reuse the response without asking again
+                      (e.g. surface geometry, which never changes for a given GID)
+    """
+    tags = []
+    last_modified = 0
+    for entity in entities:
+        if not hasattr(entity, 'get_storage_file_path') or not os.path.exists(entity.get_storage_file_path()):
+            return
+        operation = dao.get_operation_by_id(entity.fk_from_operation)
+        if operation is None or operation.status != model.STATUS_FINISHED:
+            return
+        modified = os.path.getmtime(entity.get_storage_file_path())
+        tags.append("%s-%x" % (entity.gid, int(modified * 1000)))
+        last_modified = max(last_modified, modified)
+
+    etag = '"%s"' % '_'.join(tags)
+    last_modified = formatdate(last_modified, usegmt=True)
+    cherrypy.response.headers['ETag'] = etag
+    cherrypy.response.headers['Last-Modified'] = last_modified
+    if immutable:
+        cherrypy.response.headers['Cache-Control'] = 'private, max-age=%d' % IMMUTABLE_CACHE_LIFETIME
+    else:
+        cherrypy.response.headers['Cache-Control'] = 'private, no-cache'
+
+    if_none_match = cherrypy.request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        not_modified = if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]
+    else:
+        not_modified = cherrypy.request.headers.get('If-Modified-Since') == last_modified
+    if not_modified:
+        raise cherrypy.HTTPRedirect([], 304)
+
 
 
 def context_selected():
@@ -477,6 +551,7 @@ class FlowController(base.BaseController):
                 self.context.add_adapter_to_session(None, None, copy.deepcopy(data))
 
             if isinstance(adapter_instance, ABCDisplayer):
+                self._charge_extended_datatypes(adapter_instance)
                 if isinstance(result, dict):
                     result[base.KEY_OPERATION_ID] = adapter_instance.operation_id
                     return result
@@ -573,26 +648,171 @@ class FlowController(base.BaseController):
         :param kwargs: extra parameters to be passed when dataset_name is method. 
         """
         try:
-            self.logger.debug("Starting to read HDF5: " + entity_gid + "/" + dataset_name + "/" + str(kwargs))
-            entity = ABCAdapter.load_entity_by_gid(entity_gid)
-            if kwargs is None:
-                kwargs = {}
-            datatype_kwargs = json.loads(datatype_kwargs)
-            if datatype_kwargs:
-                for key, value in datatype_kwargs.iteritems():
-                    kwargs[key] = ABCAdapter.load_entity_by_gid(value)
-            if not kwargs:
-                numpy_array = copy.deepcopy(getattr(entity, dataset_name))
-            else:
-                numpy_array = getattr(entity, dataset_name)(**kwargs)
-            if flatten is True or flatten == "True":
-                numpy_array = numpy_array.flatten()
+            numpy_array = self._read_datatype_attribute(entity_gid, dataset_name, flatten, datatype_kwargs, **kwargs)
             return numpy_array.tolist()
+        except cherrypy.HTTPRedirect:
+            raise
         except Exception, excep:
             self.logger.error("Could not retrieve complex entity field:" + str(entity_gid) + "/" + str(dataset_name))
             self.logger.exception(excep)
 
 
+    @cherrypy.expose
+    @ajax_call(False)
+    @logged()
+    def read_binary_datatype_attribute(self, entity_gid, dataset_name, flatten=False,
+                                       datatype_kwargs='null', **kwargs):
+        """
+        Same as read_datatype_attribute, but return the numeric array as raw bytes (little-endian, C order),
+        with its shape and type in the X-Array-Shape and X-Array-Dtype response headers.
+        To be used with the WebGL viewers (vertices, triangles, pages of activity data).
+        """
+        try:
+            numpy_array = self._read_datatype_attribute(entity_gid, dataset_name, flatten, datatype_kwargs, **kwargs)
+            return self._binary_response(numpy_array)
+        except cherrypy.HTTPRedirect:
+            raise
+        except Exception, excep:
+            self.logger.error("Could not retrieve complex entity field:" + str(entity_gid) + "/" + str(dataset_name))
+            self.logger.exception(excep)
+
+
+    @cherrypy.expose
+    @ajax_call(False)
+    @logged()
+    def read_connectivity_payload(self, entity_gid, array_name, colors_gid='', rays_gid=''):
+        """
+        Retrieve one of the arrays drawn by the Connectivity viewers, as raw bytes (see read_binary_datatype_attribute).
+        They are computed once for a Connectivity and its optional colors and rays measures (see ConnectivityPayload),
+        which also builds the URLs of this method.
+        """
+        try:
+            connectivity = ABCAdapter.load_entity_by_gid(entity_gid)
+            colors = ABCAdapter.load_entity_by_gid(colors_gid) if colors_gid else None
+            rays = ABCAdapter.load_entity_by_gid(rays_gid) if rays_gid else None
+            validate_cached_response([entity for entity in (connectivity, colors, rays) if entity is not None],
+                                     immutable=True)
+            payload = CONNECTIVITY_PAYLOADS_CACHE.load(connectivity, colors, rays)
+        except cherrypy.HTTPRedirect:
+            raise
+        except Exception, excep:
+            self.logger.error("Could not compute connectivity arrays:" + str(entity_gid))
+            self.logger.exception(excep)
+            raise cherrypy.HTTPError(500, "Could not compute the arrays of Connectivity %s." % entity_gid)
+        if array_name not in payload.arrays:
+            raise cherrypy.HTTPError(404, "No array %s for the Connectivity viewers." % array_name)
+        return self._binary_response(payload.arrays[array_name])
+
+
+    @staticmethod
+    def _binary_response(numpy_array):
+        """
+        Set the response headers for a binary array, and return its bytes.
+        """
+        numpy_array = binary_array(numpy_array)
+        cherrypy.response.headers['Content-Type'] = 'application/octet-stream'
+        cherrypy.response.headers[HEADER_ARRAY_DTYPE] = numpy_array.dtype.name
+        cherrypy.response.headers[HEADER_ARRAY_SHAPE] = json.dumps(numpy_array.shape)
+        return numpy_array.tostring()
+
+
+    @cherrypy.expose
+    @ajax_call()
+    @logged()
+    def read_time_series_envelope(self, entity_gid, from_idx, to_idx, width, state_variable=0, mode=0,
+                                  channels='null'):
+        """
+        Retrieve the min/max envelope of a TimeSeries window, to be drawn with (at most) two points per pixel.
+        :returns: JSON with 'data' (the minimum and maximum of each pixel, as consecutive rows, one column per
+                  channel) and 'time_indices' (the index of the first sample summarized by each row)
+        :param width: the number of pixels available for drawing the window [from_idx, to_idx)
+        :param channels: JSON list with the indices of the channels to include, or null for all
+        """
+        try:
+            time_series = ABCAdapter.load_entity_by_gid(entity_gid)
+            validate_cached_response([time_series])
+            time_indices, data = read_envelope(time_series, from_idx, to_idx, width, int(state_variable),
+                                               int(mode), json.loads(channels))
+            return {'data': data.tolist(), 'time_indices': time_indices.tolist()}
+        except cherrypy.HTTPRedirect:
+            raise
+        except Exception, excep:
+            self.logger.error("Could not compute envelope for TimeSeries:" + str(entity_gid))
+            self.logger.exception(excep)
+
+
+    @cherrypy.expose
+    @ajax_call()
+    @logged()
+    def read_volume_slices(self, entity_gid, time_idx, x_idx, y_idx, z_idx):
+        """
+        Retrieve the three orthogonal planes through a voxel, at one time point of a volumetric TimeSeries.
+        :returns: JSON list with the planes through x_idx, y_idx and z_idx (2D lists)
+        """
+        try:
+            time_series = ABCAdapter.load_entity_by_gid(entity_gid)
+            validate_cached_response([time_series], immutable=True)
+            slices = read_orthogonal_slices(time_series, time_idx, x_idx, y_idx, z_idx)
+            return [plane.tolist() for plane in slices]
+        except cherrypy.HTTPRedirect:
+            raise
+        except Exception, excep:
+            self.logger.error("Could not read volume slices for TimeSeries:" + str(entity_gid))
+            self.logger.exception(excep)
+
+
+    @cherrypy.expose
+    @ajax_call()
+    @logged()
+    def read_voxel_time_course(self, entity_gid, x_idx, y_idx, z_idx):
+        """
+        Retrieve the values of one voxel at all the time points of a volumetric TimeSeries.
+        :returns: JSON list
+        """
+        try:
+            time_series = ABCAdapter.load_entity_by_gid(entity_gid)
+            validate_cached_response([time_series], immutable=True)
+            return read_voxel_time_course(time_series, x_idx, y_idx, z_idx).tolist()
+        except cherrypy.HTTPRedirect:
+            raise
+        except Exception, excep:
+            self.logger.error("Could not read voxel time course for TimeSeries:" + str(entity_gid))
+            self.logger.exception(excep)
+
+
+    @staticmethod
+    def _read_datatype_attribute(entity_gid, dataset_name, flatten=False, datatype_kwargs='null', **kwargs):
+        """
+        Load the DataType and read its dataset_name property, or call its dataset_name method with kwargs.
+        Answers "304 Not Modified" when the client already has the result (see validate_cached_response).
+        """
+        entity = ABCAdapter.load_entity_by_gid(entity_gid)
+        if kwargs is None:
+            kwargs = {}
+        datatype_kwargs = json.loads(datatype_kwargs)
+        if datatype_kwargs:
+            for key, value in datatype_kwargs.iteritems():
+                kwargs[key] = ABCAdapter.load_entity_by_gid(value)
+        used_entities = [entity] + [value for value in kwargs.values() if isinstance(value, model.DataType)]
+        validate_cached_response(used_entities, immutable=not kwargs)
+        if not kwargs:
+            numpy_array = getattr(entity, dataset_name)
+        else:
+            numpy_array = getattr(entity, dataset_name)(**kwargs)
+        if flatten is True or flatten == "True":
+            numpy_array = numpy_array.flatten()
+        return numpy_array
+
+
+    @staticmethod
+    def _charge_extended_datatypes(displayer):
+        """
+        Charge to their owners the space added by a viewer to the files of the DataTypes it displayed.
+        """
+        for datatype_gid in displayer.extended_datatypes:
+            ProjectService.update_datatype_disk_size(datatype_gid)
+
+
     @cherrypy.expose
     @using_template('base_template')
     @logged()
@@ -607,6 +827,8 @@ class FlowController(base.BaseController):
             result = self.flow_service.fire_operation(adapter_instance, base.get_logged_user(),
                                                       base.get_current_project().id, method_name, **data)
             base.set_info_message("Submit OK!")
+            if isinstance(adapter_instance, ABCDisplayer):
+                self._charge_extended_datatypes(adapter_instance)
             if isinstance(adapter_instance, ABCDisplayer) and isinstance(result, dict):
                 base.remove_from_session(base.KEY_MESSAGE)
                 result[ABCDisplayer.KEY_IS_ADAPTER] = True
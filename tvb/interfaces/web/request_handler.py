@@ -32,19 +32,107 @@
 .. moduleauthor:: calin.pavel <calin.pavel@codemart.ro>
 """
 import os
+import gzip
+import zlib
 import shutil
+import threading
 import cherrypy
+from StringIO import StringIO
+from collections import OrderedDict
 import tvb.interfaces.web.controllers.base_controller as bc
+from tvb.basic.config.settings import TVBSettings
 from tvb.basic.logger.builder import get_logger
 
 # Constants for upload
 CONTENT_LENGTH_KEY = 'content-length'
 
+# Response types worth compressing (others, e.g. images or ZIP exports, are already compressed).
+COMPRESSIBLE_TYPES = ['text/', 'application/json', 'application/javascript', 'application/xml',
+                      'application/octet-stream']
+
 # Module logger
 LOG = get_logger(__name__)
 
 
 
+def accepted_encoding(accept_encoding):
+    """
+    :param accept_encoding: value of the Accept-Encoding request header
+    :returns: 'gzip' or 'deflate', the one preferred by the client (gzip when equal), or None
+    """
+    qualities = {}
+    for entry in (accept_encoding or '').split(','):
+        parts = entry.strip().split(';')
+        quality = 1.0
+        for param in parts[1:]:
+            if param.strip().startswith('q='):
+                try:
+                    quality = float(param.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+        qualities[parts[0].strip().lower()] = quality
+    best = None
+    for encoding in ['gzip', 'deflate']:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > 0 and (best is None or quality > qualities.get(best, qualities.get('*', 0.0))):
+            best = encoding
+    return best
+
+
+
+def compress(body, encoding, level):
+    """
+    :returns: body compressed with the given encoding ('gzip' or 'deflate') and compression level
+    """
+    if encoding == 'deflate':
+        return zlib.compress(body, level)
+    buffer_ = StringIO()
+    gzip_file = gzip.GzipFile(mode='wb', fileobj=buffer_, compresslevel=level)
+    gzip_file.write(body)
+    gzip_file.close()
+    return buffer_.getvalue()
+
+
+
+class CompressedResponsesCache(object):
+    """
+    Least-recently-used cache of compressed responses, bounded by their total size.
+    Only responses identified by an ETag are kept, so that an entry never gets stale.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._responses:
+                return None
+            body = self._responses.pop(key)
+            self._responses[key] = body
+            return body
+
+
+    def put(self, key, body):
+        if len(body) > self.max_size:
+            return
+        with self._lock:
+            if key in self._responses:
+                self.size -= len(self._responses.pop(key))
+            self._responses[key] = body
+            self.size += len(body)
+            while self.size > self.max_size:
+                self.size -= len(self._responses.popitem(last=False)[1])
+
+
+
+COMPRESSED_CACHE = CompressedResponsesCache(TVBSettings.WEB_COMPRESSION_CACHE_SIZE)
+
+
+
 class RequestHandler(object):
     """
     This class contains different methods that can be used to enhance
@@ -94,4 +182,40 @@ class RequestHandler(object):
                 else:
                     # File not found on disk, so we remove it from list
                     del files_list[i]
-    
\ No newline at end of file
+    
+
+
+    @staticmethod
+    def compress_response():
+        """
+        Compress the response body with gzip or deflate (as accepted by the client), when bigger than
+        WEB_COMPRESSION_MIN_SIZE. Compressed responses with an ETag are cached, to avoid compressing
+        the same immutable DataType data again.
+        """
+        request = cherrypy.serving.request
+        response = cherrypy.serving.response
+        content_type = response.headers.get('Content-Type', '')
+        if (response.stream or request.method == 'HEAD' or response.headers.get('Content-Encoding')
+                or not str(response.status or 200).startswith('200')
+                or not any(content_type.startswith(accepted) for accepted in COMPRESSIBLE_TYPES)):
+            return
+        response.headers['Vary'] = ', '.join([vary for vary in [response.headers.get('Vary')] if vary]
+                                             + ['Accept-Encoding'])
+        encoding = accepted_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return
+
+        body = response.collapse_body()
+        if len(body) < TVBSettings.WEB_COMPRESSION_MIN_SIZE:
+            return
+        level = TVBSettings.WEB_COMPRESSION_LEVEL
+        etag = response.headers.get('ETag')
+        cache_key = (request.path_info, request.query_string, etag, encoding, level)
+        compressed = COMPRESSED_CACHE.get(cache_key) if etag else None
+        if compressed is None:
+            compressed = compress(body, encoding, level)
+            if etag:
+                COMPRESSED_CACHE.put(cache_key, compressed)
+        response.body = [compressed]
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = str(len(compressed))
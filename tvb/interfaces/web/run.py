@@ -133,6 +133,8 @@ def init_cherrypy(arguments=None):
     cherrypy.tools.upload = Tool('on_start_resource', RequestHandler.check_upload_size)
     # This tools clean up files on disk (mainly after export)
     cherrypy.tools.cleanup = Tool('on_end_request', RequestHandler.clean_files_on_disk)
+    # This tool compresses big responses (replacing the default gzip tool)
+    cherrypy.tools.compress = Tool('before_finalize', RequestHandler.compress_response, priority=90)
     #----------------- End register additional request handlers ----------------
 
     #### HTTP Server is fired now ######  
@@ -82,11 +82,23 @@ tv.util = {
     },
 
     get_array_slice: function (baseURL, slices, callback, channels, currentMode, currentStateVar) {
+        if (slices[0].di > 1) {
+            // More samples than pixels: get the min/max of the samples behind each pixel, computed on the server.
+            var width = Math.ceil((slices[0].hi - slices[0].lo) / slices[0].di);
+            var envelopeURL = readEnvelopeURL(baseURL, slices[0].lo, slices[0].hi, width,
+                currentStateVar, currentMode, JSON.stringify(channels));
+            $.getJSON(envelopeURL, function (envelope) {
+                callback(envelope.data, envelope.time_indices);
+            });
+            return;
+        }
         var readDataURL = readDataChannelURL(baseURL, slices[0].lo, slices[0].hi,
             currentStateVar, currentMode, slices[0].di, JSON.stringify(channels));
         //NOTE: If we need to add slices for the other dimensions pass them as the 'specific_slices' parameter.
         //      Method called is from time_series_framework.py.
-        $.getJSON(readDataURL, callback)
+        $.getJSON(readDataURL, function (data) {
+            callback(data, null);
+        });
     }
 };
 
@@ -552,7 +564,7 @@ tv.plot = {
             tv.util.get_array_slice(f.baseURL(), f.current_slice(), f.render_callback, f.channels(), f.mode(), f.state_var())
         };
 
-        f.render_callback = function (data) {
+        f.render_callback = function (data, timeIndices) {
 
             var kwd = kwd || {};
 
@@ -561,7 +573,7 @@ tv.plot = {
             /* reformat data into normal ndar style */
             var flat = []
                 , sl = f.current_slice()[0]
-                , shape = [ (sl.hi - sl.lo) / sl.di, f.shape()[2]]
+                , shape = [ timeIndices ? data.length : (sl.hi - sl.lo) / sl.di, f.shape()[2]]
                 , strides = [f.shape()[2], 1];
 
             for (var i = 0; i < shape[0]; i++) {
@@ -573,7 +585,11 @@ tv.plot = {
             var ts = [], t0 = f.t0(), dt = f.dt();
 
             for (var ii = 0; ii < shape[0]; ii++) {
-                ts.push(t0 + dt * sl.lo + ii * dt * sl.di)
+                if (timeIndices) {
+                    ts.push(t0 + dt * timeIndices[ii]);
+                } else {
+                    ts.push(t0 + dt * sl.lo + ii * dt * sl.di);
+                }
             }
 
             f.ts(tv.ndar.ndfrom({data: ts, shape: [shape[0]], strides: [1]}));
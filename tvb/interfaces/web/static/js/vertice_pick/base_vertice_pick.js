@@ -255,8 +255,7 @@ function initPickingBrainBuffersAsynchronous(urlList, resultBuffers, isIndex, is
     	}
         return;
     }
-    $.get(urlList[0], function(data) {
-        var dataList = eval(data);
+    HLPR_readBinaryArrayAsync(urlList[0], function(dataList) {
         var buffer = HLPR_createWebGlBuffer(gl, dataList, isIndex, false);
         if (isVertices) {
             verticesPoints.push(dataList);
@@ -340,8 +339,7 @@ function initDrawingBrainBuffersAsynchronous(urlList, resultBuffers, isIndex, ca
         }
         return;
     }
-    $.get(urlList[0], function (data) {
-        var dataList = eval(data);
+    HLPR_readBinaryArrayAsync(urlList[0], function(dataList) {
         var buffer = HLPR_createWebGlBuffer(gl, dataList, isIndex, false);
         resultBuffers.push(buffer);
         urlList.splice(0, 1);
@@ -27,7 +27,7 @@
  * and compute the required normalization steps in order to center the brain on the canvas.
  */
 function HLPR_readPointsAndLabels(filePoints) {
-    var positions = HLPR_readJSONfromFile(filePoints);
+    var positions = HLPR_readBinaryArrayFromFile(filePoints, true);
     var labels = HLPR_readJSONfromFile(filePoints.replace('/centres', '/region_labels'));
 	var steps = HLPR_computeNormalizationSteps(positions);
     return [positions, labels, steps[0], steps[1]];
@@ -108,6 +108,86 @@ function HLPR_readJSONfromFile(fileName, staticFiles) {
 }
 
 
+var HLPR_BINARY_ARRAY_TYPES = {'float32': Float32Array, 'float64': Float64Array,
+                               'int8': Int8Array, 'int16': Int16Array, 'int32': Int32Array,
+                               'uint8': Uint8Array, 'uint16': Uint16Array, 'uint32': Uint32Array};
+
+/**
+ * Return the URL for reading as raw bytes the attribute given by a read_datatype_attribute URL.
+ */
+function HLPR_binaryArrayURL(fileName) {
+    return fileName.replace('/read_datatype_attribute/', '/read_binary_datatype_attribute/');
+}
+
+/**
+ * Build a typed array from the bytes of a read_binary_datatype_attribute response.
+ * When asRows = True and the array has more than one dimension, a list of row views is returned
+ * (so that it can be indexed like the nested lists read from JSON).
+ *
+ * @param buffer an ArrayBuffer with the raw array bytes
+ * @param dtype value of the X-Array-Dtype response header
+ * @param shape value of the X-Array-Shape response header
+ */
+function HLPR_parseBinaryArray(buffer, dtype, shape, asRows) {
+    var data = new HLPR_BINARY_ARRAY_TYPES[dtype](buffer);
+    shape = jQuery.parseJSON(shape);
+    if (!asRows || shape.length < 2) {
+        return data;
+    }
+    var rowLength = data.length / shape[0];
+    var rows = [];
+    for (var i = 0; i < shape[0]; i++) {
+        rows.push(data.subarray(i * rowLength, (i + 1) * rowLength));
+    }
+    return rows;
+}
+
+/**
+ * Initiate a synchronous HTTP GET request for a read_datatype_attribute URL, and return the array
+ * transported as raw bytes (see HLPR_parseBinaryArray), or null when the array could not be read.
+ */
+function HLPR_readBinaryArrayFromFile(fileName, asRows) {
+    var oxmlhttp = new XMLHttpRequest();
+    // Synchronous requests can not ask for an ArrayBuffer, so read the bytes as user-defined characters.
+    oxmlhttp.overrideMimeType("text/plain; charset=x-user-defined");
+    try {
+        oxmlhttp.open("GET", HLPR_binaryArrayURL(fileName), false);
+        oxmlhttp.send(null);
+    } catch(e) {
+        return null;
+    }
+    var dtype = oxmlhttp.getResponseHeader("X-Array-Dtype");
+    if (oxmlhttp.status != 200 || !dtype) {
+        return null;
+    }
+    var text = oxmlhttp.responseText;
+    var bytes = new Uint8Array(text.length);
+    for (var i = 0; i < text.length; i++) {
+        bytes[i] = text.charCodeAt(i) & 0xff;
+    }
+    return HLPR_parseBinaryArray(bytes.buffer, dtype, oxmlhttp.getResponseHeader("X-Array-Shape"), asRows);
+}
+
+/**
+ * Asynchronous version of HLPR_readBinaryArrayFromFile: callback receives the array (or null).
+ */
+function HLPR_readBinaryArrayAsync(fileName, callback, asRows) {
+    var oxmlhttp = new XMLHttpRequest();
+    oxmlhttp.open("GET", HLPR_binaryArrayURL(fileName), true);
+    oxmlhttp.responseType = "arraybuffer";
+    oxmlhttp.onload = function () {
+        var dtype = oxmlhttp.getResponseHeader("X-Array-Dtype");
+        if (oxmlhttp.status != 200 || !dtype) {
+            callback(null);
+        } else {
+            callback(HLPR_parseBinaryArray(oxmlhttp.response, dtype,
+                                           oxmlhttp.getResponseHeader("X-Array-Shape"), asRows));
+        }
+    };
+    oxmlhttp.send(null);
+}
+
+
 function HLPR_sphereBufferAtPoint(gl, point, radius, latitudeBands, longitudeBands) {
     var moonVertexPositionBuffer;
     var moonVertexNormalBuffer;
@@ -267,7 +347,12 @@ function HLPR_bufferAtPoint(glcontext, p) {
 function HLPR_getDataBuffers(glcontext, data_url_list, staticFiles, isIndex) {
     var result = [];
     for (var i = 0; i < data_url_list.length; i++) {
-        var data_json = HLPR_readJSONfromFile(data_url_list[i], staticFiles);
+        var data_json;
+        if (staticFiles) {
+            data_json = HLPR_readJSONfromFile(data_url_list[i], staticFiles);
+        } else {
+            data_json = HLPR_readBinaryArrayFromFile(data_url_list[i]);
+        }
         var buffer = HLPR_createWebGlBuffer(glcontext, data_json, isIndex, staticFiles);
         result.push(buffer);
         data_json = null;
@@ -93,7 +93,8 @@ function VS_StartPortletPreview(baseDatatypeURL, urlVerticesList, urlTrianglesLi
     GL_zTranslation = GL_DEFAULT_Z_POS;
     pageSize = 1;
     urlBase = baseDatatypeURL;
-    activitiesData = HLPR_readJSONfromFile(readDataPageURL(urlBase, 0, 1, selectedStateVar, selectedMode, TIME_STEP));
+    activitiesData = HLPR_readBinaryArrayFromFile(readDataPageURL(urlBase, 0, 1, selectedStateVar, selectedMode,
+                                                                  TIME_STEP), true);
     if (oneToOneMapping == 'True') {
         isOneToOneMapping = true;
     }
@@ -592,11 +593,14 @@ function createWebGlBuffers(dataList) {
 function readFloatData(data_url_list, staticFiles) {
     var result = [];
     for (var i = 0; i < data_url_list.length; i++) {
-        var data_json = HLPR_readJSONfromFile(data_url_list[i], staticFiles);
+        var data_json;
         if (staticFiles) {
+            data_json = HLPR_readJSONfromFile(data_url_list[i], staticFiles);
             for (var j = 0; j < data_json.length; j++) {
                 data_json[j] = parseFloat(data_json[j]);
             }
+        } else {
+            data_json = HLPR_readBinaryArrayFromFile(data_url_list[i]);
         }
         result.push(data_json);
         data_json = null;
@@ -1031,7 +1035,7 @@ function initActivityData() {
     currentTimeValue = 0;
     //read the first file
     var initUrl = getUrlForPageFromIndex(0);
-    activitiesData = HLPR_readJSONfromFile(initUrl);
+    activitiesData = HLPR_readBinaryArrayFromFile(initUrl, true);
     if (activitiesData != undefined) {
         currentActivitiesFileLength = activitiesData.length * TIME_STEP;
         totalPassedActivitiesData = 0;
@@ -1143,18 +1147,15 @@ function readFileData(fileUrl, async, callIdentifier) {
     nextActivitiesFileData = null;
     // Keep a call identifier so we don't "intersect" async calls when two
     // async calls are started before the first one finishes.
-    var self = this;
-    self.callIdentifier = callIdentifier;
-    $.ajax({
-        url: fileUrl,
-        async: async,
-        success: function(data) {
-            if ((self.callIdentifier == currentAsyncCall) || !async) {
-                nextActivitiesFileData = eval(data);
-                data = null;
-            }
+    if (!async) {
+        nextActivitiesFileData = HLPR_readBinaryArrayFromFile(fileUrl, true);
+        return;
+    }
+    HLPR_readBinaryArrayAsync(fileUrl, function(data) {
+        if (callIdentifier == currentAsyncCall) {
+            nextActivitiesFileData = data;
         }
-    });
+    }, true);
 }
 
 
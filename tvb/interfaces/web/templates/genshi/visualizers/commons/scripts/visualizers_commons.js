@@ -105,6 +105,22 @@ function readDataChannelURL(baseDatatypeMethodURL, fromIdx, toIdx, stateVariable
 	var baseURL = readDataPageURL(baseDatatypeMethodURL, fromIdx, toIdx, stateVariable, mode, step);
 	return baseURL.replace('read_data_page', 'read_channels_page') + ';channels_list=' + channels;
 }
+
+/**
+ * URL returning the min/max envelope of a TimeSeries window, drawn with (at most) two points per pixel.
+ * The answer contains the 'data' rows (minimum and maximum per pixel) and their 'time_indices'.
+ */
+function readEnvelopeURL(baseDatatypeMethodURL, fromIdx, toIdx, width, stateVariable, mode, channels) {
+	if (stateVariable == undefined || stateVariable == null) {
+		stateVariable = 0;
+	}
+	if (mode == undefined || mode == null) {
+		mode = 0;
+	}
+	return baseDatatypeMethodURL.replace('read_datatype_attribute', 'read_time_series_envelope') + '?from_idx=' +
+		   fromIdx + ";to_idx=" + toIdx + ";width=" + width + ";state_variable=" + stateVariable + ";mode=" + mode +
+		   ";channels=" + channels;
+}
  
 // -------------------------------------------------------------
 //              Datatype methods mappings end here
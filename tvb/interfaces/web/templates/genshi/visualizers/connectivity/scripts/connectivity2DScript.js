@@ -240,12 +240,48 @@ function isNodeSelected(nodeId) {
     return elemIdx != -1;
 }
 
-function prepareConnectivity2D(left_json, full_json, right_json) {
-    C2D_hemispheresJSON = {
-        left:left_json,
-        both:full_json,
-        right:right_json
-    };
+/**
+ * Read the charts to be drawn (left, right hemisphere and both, or only some of them).
+ *
+ * @param hemispheres the node labels, the colors (and the threshold between them), and for each chart
+ *                    the URLs of its node and edge arrays (see Connectivity2DViewer._get_view)
+ */
+function prepareConnectivity2D(hemispheres) {
+    C2D_hemispheresJSON = {};
+    for (var view in hemispheres.views) {
+        C2D_hemispheresJSON[view] = C2D_buildChartJSON(hemispheres, hemispheres.views[view]);
+    }
+}
+
+/**
+ * Build the JSON for a chart, from the arrays computed on the server: one row [x, y, shape dimension,
+ * color value] for each node, with x and y scaled to [-1, 1], and one row [from, to, weight] for each edge.
+ */
+function C2D_buildChartJSON(hemispheres, view) {
+    var nodes = HLPR_readBinaryArrayFromFile(view.nodesURL, true);
+    var edges = HLPR_readBinaryArrayFromFile(view.edgesURL, true);
+    var labels = hemispheres.labels;
+    var threshold = hemispheres.colorsThreshold;
+    var result = [];
+
+    for (var i = 0; i < nodes.length; i++) {
+        var x = nodes[i][0] * view.canvas[0];
+        var y = nodes[i][1] * view.canvas[1];
+        var label = labels[view.labelsOffset + i];
+        // When no colors were given, threshold is null and all the nodes get the first color.
+        var isOtherColor = threshold != null && nodes[i][3] < threshold;
+        result.push({id: label, name: label,
+                     data: {'$dim': 6, '$type': 'circle', '$color': hemispheres.colors[0],
+                            customShapeDimension: nodes[i][2],
+                            customShapeColor: hemispheres.colors[isOtherColor ? 1 : 0],
+                            angle: Math.PI + Math.atan2(y, x), radius: Math.sqrt(x * x + y * y)},
+                     adjacencies: []});
+    }
+    for (var j = 0; j < edges.length; j++) {
+        result[edges[j][0]].adjacencies.push({nodeTo: labels[view.labelsOffset + edges[j][1]],
+                                              data: {weight: edges[j][2]}});
+    }
+    return result;
 }
 
 /**
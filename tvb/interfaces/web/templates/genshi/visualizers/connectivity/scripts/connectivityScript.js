@@ -161,7 +161,7 @@ function initBuffers() {
     var normals = [];
 
     for (var i = 0; i < NO_POSITIONS; i++) {
-        points = points.concat(GVAR_positionsPoints[i]);
+        points.push(GVAR_positionsPoints[i][0], GVAR_positionsPoints[i][1], GVAR_positionsPoints[i][2]);
         normals = normals.concat(fakeNormal_1);
         colorsIndexes = colorsIndexes.concat(COLORS[WHITE_COLOR_INDEX]);       
     }
@@ -858,8 +858,8 @@ function saveRequiredInputs_con(fileWeights, fileTracts, filePositions, urlVerti
     connectivity_nose_correction = $.parseJSON(conn_nose_correction);
     NO_POSITIONS = GVAR_positionsPoints.length;
     GFUNC_initTractsAndWeights(fileWeights, fileTracts);
-    if (rays) raysWeights = $.parseJSON(rays);
-    if (colors) colorsWeights = $.parseJSON(colors);
+    if (rays) raysWeights = HLPR_readBinaryArrayFromFile(rays);
+    if (colors) colorsWeights = HLPR_readBinaryArrayFromFile(colors);
 
 	conductionSpeed = parseFloat(condSpeed);
     // Initialize the buffers for drawing the points
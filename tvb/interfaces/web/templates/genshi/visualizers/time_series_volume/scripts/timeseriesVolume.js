@@ -1,7 +1,17 @@
 // TODO: add legend, labels on axes, color scheme support
 var ctx = null;                                                      // the context for drawing on current canvas
 var currentQuadrant, quadrants = [];
-var minimumValue, maximumValue, data;                                // minimum and maximum for current data slice
+var minimumValue, maximumValue;                                      // minimum and maximum for the entire time series
+var urlVolumeSlices;                                                 // server method returning the planes for a voxel
+var urlVoxelTimeCourse;                                              // server method returning the values of a voxel
+var volumeShape;                                                     // [time, i, j, k]
+var currentTimePoint = 0;
+var slices = null;                                                   // the planes through selectedEntity; [i][j,k],
+                                                                    // [j][i,k], [k][i,j] with the K axis reversed
+var timeCourse = null;                                               // values of selectedEntity at every time point
+var LOAD_DELAY = 100;                                                // ms without picking, before asking for data
+var loadTimer = null;                                                // the pending (delayed) request for data
+var lastSlicesRequest = 0, lastTimeCourseRequest = 0;                // answers to older requests are dropped
 var voxelSize, volumeOrigin;                                         // volumeOrigin is not used for now, as in 2D it
                                                                     // is irrelevant; if needed, use it _setQuadrant
 var selectedEntity = [0, 0, 0];                                      // the selected voxel; [i, j, k]
@@ -18,14 +28,15 @@ var Quadrant = function (params) {                                  // this keep
 
 /**
  * Make all the necessary initialisations and draws the default view, with the center voxel selected
- * @param dataUrls  Urls containing data slices from server
+ * @param baseURL   Url of the time series on the server, from which the slice urls are computed
  * @param minValue  The minimum value for all the slices
  * @param maxValue  The maximum value for all the slices
  * @param volOrigin The origin of the rendering; irrelevant in 2D, for now
  * @param sizeOfVoxel   How the voxel is sized on each axis; [xScale, yScale, zScale]
  * @param voxelUnit The unit used for this rendering ("mm", "cm" etc)
+ * @param shape     The shape of the time series; [time, i, j, k]
  */
-function startVisualiser(dataUrls, minValue, maxValue, volOrigin, sizeOfVoxel, voxelUnit) {
+function startVisualiser(baseURL, minValue, maxValue, volOrigin, sizeOfVoxel, voxelUnit, shape) {
     var canvas = document.getElementById("volumetric-ts-canvas");
     if (!canvas.getContext) {
         displayMessage('You need a browser with canvas capabilities, to see this demo fully!', "errorMessage");
@@ -41,28 +52,36 @@ function startVisualiser(dataUrls, minValue, maxValue, volOrigin, sizeOfVoxel, v
 
     ctx = canvas.getContext("2d");
 
-    dataUrls = $.parseJSON(dataUrls);
-    data = HLPR_readJSONfromFile(dataUrls[0]);
-    data = data[0];                                                  // just the first slice for now
-
-    _rotateData();                                                   // rotate Z axis
-    minimumValue =  9999;                                            // compute the minimum on this slice
-    maximumValue = -9999;
-    for (var i = 0; i < data.length; ++i)
-        for (var j = 0; j < data[0].length; ++j)
-            for (var k = 0; k < data[0][0].length; ++k)
-                if (data[i][j][k] > maximumValue)
-                    maximumValue = data[i][j][k];
-                else if (data[i][j][k] < minimumValue)
-                    minimumValue = data[i][j][k];
+    volumeShape = $.parseJSON(shape);
+    urlVolumeSlices = baseURL.replace('read_datatype_attribute', 'read_volume_slices');
+    urlVoxelTimeCourse = baseURL.replace('read_datatype_attribute', 'read_voxel_time_course');
+    minimumValue = minValue;
+    maximumValue = maxValue;
 
     _setupQuadrants();
 
-    selectedEntity[0] = Math.floor(data.length / 2);                 // set the center entity as the selected one
-    selectedEntity[1] = Math.floor(data[0].length / 2);
-    selectedEntity[2] = Math.floor(data[0][0].length / 2);
+    selectedEntity[0] = Math.floor(volumeShape[1] / 2);              // set the center entity as the selected one
+    selectedEntity[1] = Math.floor(volumeShape[2] / 2);
+    selectedEntity[2] = Math.floor(volumeShape[3] / 2);
 
-    drawScene();
+    $("#volumetric-ts-time").attr("max", volumeShape[0] - 1).val(0).change(function () {
+        setTimePoint(this.value);
+    });
+    var timeCourseCanvas = document.getElementById("volumetric-ts-time-course");
+    timeCourseCanvas.width = canvas.width;
+    timeCourseCanvas.height = 100;
+
+    _loadSlices();
+    _loadTimeCourse();
+}
+
+/**
+ * Shows the given time point, for the same selected entity
+ */
+function setTimePoint(timePoint) {
+    currentTimePoint = parseInt(timePoint);
+    _loadSlices();
+    drawTimeCourse();
 }
 
 // ==================================== DRAWING FUNCTIONS START =============================================
@@ -72,22 +91,24 @@ function startVisualiser(dataUrls, minValue, maxValue, volOrigin, sizeOfVoxel, v
  */
 // TODO: since only two dimensions change at every time, redraw just those quadrants
 function drawScene() {
+    if (slices === null)
+        return;
     _setCtxOnQuadrant(0);
     ctx.fillStyle = getGradientColorString(minimumValue, minimumValue, maximumValue);
     ctx.fillRect(0, 0, ctx.canvas.width, ctx.canvas.height);
-    for (var j = 0; j < data[0].length; ++j)
-        for (var i = 0; i < data.length; ++i)
-            drawVoxel(i, j, data[i][j][selectedEntity[2]]);
+    for (var j = 0; j < _getDataSize(1); ++j)
+        for (var i = 0; i < _getDataSize(0); ++i)
+            drawVoxel(i, j, slices[2][i][j]);
 
     _setCtxOnQuadrant(1);
-    for (var k = 0; k < data[0][0].length; ++k)
-        for (var jj = 0; jj < data[0].length; ++jj)
-            drawVoxel(k, jj, data[selectedEntity[0]][jj][k]);
+    for (var k = 0; k < _getDataSize(2); ++k)
+        for (var jj = 0; jj < _getDataSize(1); ++jj)
+            drawVoxel(k, jj, slices[0][jj][k]);
 
     _setCtxOnQuadrant(2);
-    for (var kk = 0; kk < data[0][0].length; ++kk)
-        for (var ii = 0; ii < data.length; ++ii)
-            drawVoxel(kk, ii, data[ii][selectedEntity[1]][kk]);
+    for (var kk = 0; kk < _getDataSize(2); ++kk)
+        for (var ii = 0; ii < _getDataSize(0); ++ii)
+            drawVoxel(kk, ii, slices[1][ii][kk]);
     drawNavigator();
 }
 
@@ -149,12 +170,77 @@ function _setCtxOnQuadrant(quadIdx) {
 }
 
 /**
- * Rotates the K axis on the data to get a nice, upright view of the brain
+ * Draws the values of <code>selectedEntity</code> at every time point, scaled between the minimum and the
+ * maximum of the time series, with a vertical line at <code>currentTimePoint</code>
+ */
+function drawTimeCourse() {
+    var canvas = document.getElementById("volumetric-ts-time-course");
+    var tcCtx = canvas.getContext("2d");
+    tcCtx.clearRect(0, 0, canvas.width, canvas.height);
+    if (timeCourse === null || timeCourse.length === 0)
+        return;
+    var stepX = canvas.width / Math.max(timeCourse.length - 1, 1);
+    var scaleY = canvas.height / ((maximumValue - minimumValue) || 1);
+
+    tcCtx.strokeStyle = "black";
+    tcCtx.beginPath();
+    tcCtx.moveTo(0, canvas.height - (timeCourse[0] - minimumValue) * scaleY);
+    for (var t = 1; t < timeCourse.length; ++t)
+        tcCtx.lineTo(t * stepX, canvas.height - (timeCourse[t] - minimumValue) * scaleY);
+    tcCtx.stroke();
+
+    tcCtx.strokeStyle = "red";
+    tcCtx.beginPath();
+    tcCtx.moveTo(currentTimePoint * stepX, 0);
+    tcCtx.lineTo(currentTimePoint * stepX, canvas.height);
+    tcCtx.stroke();
+}
+
+/**
+ * Returns the url parameters identifying <code>selectedEntity</code> on the server, where the K axis is not reversed
+ * @private
  */
-function _rotateData() {
-    for (var i = 0; i < data.length; ++i)
-        for (var j = 0; j < data[0].length; ++j)
-            data[i][j].reverse()
+function _voxelParameters() {
+    var kOnServer = volumeShape[3] - 1 - selectedEntity[2];
+    return "x_idx=" + selectedEntity[0] + ";y_idx=" + selectedEntity[1] + ";z_idx=" + kOnServer;
+}
+
+/**
+ * Asks the server for the three planes through <code>selectedEntity</code>, at <code>currentTimePoint</code>,
+ * and draws them when they arrive, unless newer planes were requested meanwhile.
+ * The K axis is reversed, to get a nice, upright view of the brain.
+ * @private
+ */
+function _loadSlices() {
+    var requestId = ++lastSlicesRequest;
+    $.ajax({url: urlVolumeSlices + "?time_idx=" + currentTimePoint + ";" + _voxelParameters(),
+            type: 'GET', dataType: 'json',
+            success: function (planes) {
+                if (requestId !== lastSlicesRequest || !planes)
+                    return;
+                for (var i = 0; i < planes[0].length; ++i)
+                    planes[0][i].reverse();
+                for (var j = 0; j < planes[1].length; ++j)
+                    planes[1][j].reverse();
+                slices = planes;
+                drawScene();
+            }});
+}
+
+/**
+ * Asks the server for the values of <code>selectedEntity</code> at every time point, and draws them
+ * when they arrive, unless another voxel was selected meanwhile.
+ * @private
+ */
+function _loadTimeCourse() {
+    var requestId = ++lastTimeCourseRequest;
+    $.ajax({url: urlVoxelTimeCourse + "?" + _voxelParameters(), type: 'GET', dataType: 'json',
+            success: function (values) {
+                if (requestId !== lastTimeCourseRequest || !values)
+                    return;
+                timeCourse = values;
+                drawTimeCourse();
+            }});
 }
 
 /**
@@ -164,11 +250,7 @@ function _rotateData() {
  * @private
  */
 function _getDataSize(axis) {
-    switch (axis) {
-        case 0:     return data.length;
-        case 1:     return data[0].length;
-        case 2:     return data[0][0].length
-    }
+    return volumeShape[axis + 1];
 }
 
 /**
@@ -216,7 +298,8 @@ function customMouseUp() {
 }
 
 /**
- * Implements picking and redraws the scene
+ * Implements picking: the navigator is moved at once, while planes and time course are asked for only
+ * after the mouse stops for <code>LOAD_DELAY</code> ms
  */
 function customMouseMove(e) {
     if (!this.mouseDown)
@@ -232,7 +315,12 @@ function customMouseMove(e) {
 
     selectedEntity[selectedQuad.axes.x] = selectedEntityOnX;
     selectedEntity[selectedQuad.axes.y] = selectedEntityOnY;
-    drawScene()
+    drawScene();
+    clearTimeout(loadTimer);
+    loadTimer = setTimeout(function () {
+        _loadSlices();
+        _loadTimeCourse();
+    }, LOAD_DELAY);
 }
 
 // ==================================== PICKING RELATED CODE  END  ==========================================
@@ -2,6 +2,6 @@
 This package contains tests for the modules located in TVB module.
 """
 ADAPTERS = {"AdaptersTest": {'modules': ["tvb.tests.framework.adapters"], 'rawinput': True }}
-DATATYPES_PATH = ["tvb.tests.framework.datatypes", "tvb.datatypes"]
+DATATYPES_PATH = ["tvb.tests.framework.datatypes", "tvb.datatypes", "tvb.adapters.datatypes"]
 REMOVERS_PATH = ["tvb.datatype_removers"]
 PORTLETS_PATH = ["tvb.tests.framework.core.portlets"]
\ No newline at end of file
@@ -34,8 +34,18 @@
 
 import unittest
 from tvb.tests.framework.adapters.analyzers import timeseries_metrics_adapter_test
+from tvb.tests.framework.adapters.analyzers import block_parallel_test
+from tvb.tests.framework.adapters.analyzers import block_reader_test
+from tvb.tests.framework.adapters.analyzers import pairwise_tiles_test
+from tvb.tests.framework.adapters.analyzers import streamed_decompositions_test
+from tvb.tests.framework.adapters.analyzers import matlab_engine_test
+from tvb.tests.framework.adapters.analyzers import time_series_envelope_test
 from tvb.tests.framework.adapters.exporters import exporters_test
 from tvb.tests.framework.adapters.simulator import simulator_adapter_test
+from tvb.tests.framework.adapters.simulator import monitor_buffer_test
+from tvb.tests.framework.adapters.simulator import batched_simulation_test
+from tvb.tests.framework.adapters.simulator import simulator_cache_test
+from tvb.tests.framework.adapters.simulator import surface_output_test
 from tvb.tests.framework.adapters.uploaders import uploaders_tests_main
 from tvb.tests.framework.adapters.visualizers import visualizers_tests_main
 
@@ -46,8 +56,18 @@ def suite():
     """
     test_suite = unittest.TestSuite()
     test_suite.addTest(timeseries_metrics_adapter_test.suite())
+    test_suite.addTest(block_parallel_test.suite())
+    test_suite.addTest(block_reader_test.suite())
+    test_suite.addTest(pairwise_tiles_test.suite())
+    test_suite.addTest(streamed_decompositions_test.suite())
+    test_suite.addTest(matlab_engine_test.suite())
+    test_suite.addTest(time_series_envelope_test.suite())
     test_suite.addTest(exporters_test.suite())
     test_suite.addTest(simulator_adapter_test.suite())
+    test_suite.addTest(monitor_buffer_test.suite())
+    test_suite.addTest(batched_simulation_test.suite())
+    test_suite.addTest(simulator_cache_test.suite())
+    test_suite.addTest(surface_output_test.suite())
     test_suite.addTest(uploaders_tests_main.suite())
     test_suite.addTest(visualizers_tests_main.suite())
     return test_suite
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import time
+import unittest
+import numpy
+from tvb.adapters.analyzers.block_parallel import BlockParallelExecutor, compute_nr_workers
+from tvb.adapters.analyzers.block_parallel import compute_node_block_size, NODE_BLOCK_MEMORY
+
+
+
+class BlockParallelTest(unittest.TestCase):
+    """
+    Test for tvb.adapters.analyzers.block_parallel module.
+    """
+
+    def setUp(self):
+        self.data = numpy.random.random((100, 1, 12, 1))
+
+
+    def _run(self, max_workers, use_processes=False):
+        """ Compute an FFT over node blocks and return the blocks in the order they were written. """
+        written = []
+
+        def _read_block(index):
+            return index, self.data[:, :, index * 3:(index + 1) * 3, :]
+
+        def _evaluate_block(block):
+            index, data = block
+            ## Make later blocks finish first, when running in parallel.
+            time.sleep(0.01 * (4 - index))
+            return numpy.abs(numpy.fft.fft(data, axis=0))
+
+        executor = BlockParallelExecutor(1, 4, max_workers=max_workers, use_processes=use_processes)
+        executor.run(_read_block, _evaluate_block, lambda index, result: written.append((index, result)))
+        return written
+
+
+    def test_results_written_in_order(self):
+        """
+        Results computed in parallel are written in block order and equal the sequential ones.
+        """
+        parallel_written = self._run(max_workers=4)
+        sequential_written = self._run(max_workers=1)
+        self.assertEqual(range(4), [index for index, _ in parallel_written])
+        for (_, parallel), (_, sequential) in zip(parallel_written, sequential_written):
+            numpy.testing.assert_array_equal(sequential, parallel)
+        expected = numpy.abs(numpy.fft.fft(self.data, axis=0))
+        numpy.testing.assert_array_almost_equal(expected, numpy.concatenate([r for _, r in parallel_written], 2))
+
+
+    def test_results_from_processes(self):
+        """
+        Blocks evaluated in worker processes (by a function which can not be pickled) give the same results.
+        """
+        process_written = self._run(max_workers=4, use_processes=True)
+        sequential_written = self._run(max_workers=1)
+        self.assertEqual(range(4), [index for index, _ in process_written])
+        for (_, in_process), (_, sequential) in zip(process_written, sequential_written):
+            numpy.testing.assert_array_equal(sequential, in_process)
+
+
+    def test_worker_exception_raised(self):
+        """
+        An error in a worker (thread or process) is re-raised in the calling thread.
+        """
+        def _evaluate_block(data):
+            raise ValueError("bad block")
+
+        for use_processes in [False, True]:
+            executor = BlockParallelExecutor(1, 3, max_workers=2, use_processes=use_processes)
+            self.assertRaises(ValueError, executor.run, lambda index: index, _evaluate_block, lambda i, r: None)
+
+
+    def test_nr_workers_limits(self):
+        """
+        The number of workers is bounded by the number of blocks and by the free memory.
+        """
+        self.assertEqual(1, compute_nr_workers(1, 1))
+        self.assertEqual(1, compute_nr_workers(10 ** 18, 8))
+        self.assertTrue(1 <= compute_nr_workers(1, 2, max_workers=2) <= 2)
+
+
+    def test_node_block_size(self):
+        """
+        Node blocks are limited by memory and the number of nodes, and aligned to the file chunks.
+        """
+        class _FakeTimeSeries(object):
+            """ Expose only the shape and chunk layout of a stored TimeSeries. """
+            def __init__(self, shape, chunks):
+                self.shape, self.chunks = shape, chunks
+
+            def read_data_shape(self):
+                return self.shape
+
+            def get_data_chunk_shape(self, _):
+                return self.chunks
+
+        node_memory = NODE_BLOCK_MEMORY // 100
+        self.assertEqual(100, compute_node_block_size(_FakeTimeSeries((10, 1, 20000, 1), None), node_memory))
+        self.assertEqual(96, compute_node_block_size(_FakeTimeSeries((10, 1, 20000, 1), (10, 1, 32, 1)),
+                                                     node_memory))
+        self.assertEqual(50, compute_node_block_size(_FakeTimeSeries((10, 1, 50, 1), (10, 1, 32, 1)), node_memory))
+        self.assertEqual(1, compute_node_block_size(_FakeTimeSeries((10, 1, 50, 1), (10, 1, 32, 1)),
+                                                    NODE_BLOCK_MEMORY * 2))
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(BlockParallelTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
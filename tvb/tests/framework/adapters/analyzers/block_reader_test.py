@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import unittest
+import numpy
+from tvb.adapters.analyzers import block_reader
+from tvb.adapters.analyzers.block_reader import read_time_blocks, time_block_length, stored_data_lock
+
+
+
+class _ArrayTimeSeries(object):
+    """ Serve the data from memory, counting the reads. """
+
+    def __init__(self, data, gid="gid"):
+        self.data = data
+        self.gid = gid
+        self.reads = 0
+
+    def read_data_shape(self):
+        return self.data.shape
+
+    def read_data_slice(self, data_slice):
+        self.reads += 1
+        return self.data[data_slice]
+
+
+
+class BlockReaderTest(unittest.TestCase):
+    """
+    Test for tvb.adapters.analyzers.block_reader module.
+    """
+
+    def setUp(self):
+        self.initial_block_size = block_reader.READ_BLOCK_SIZE
+
+
+    def tearDown(self):
+        block_reader.READ_BLOCK_SIZE = self.initial_block_size
+
+
+    def test_block_length(self):
+        """
+        Blocks fit in READ_BLOCK_SIZE, hold at least one time point, and are rounded as requested.
+        """
+        block_reader.READ_BLOCK_SIZE = 1000
+        self.assertEqual(12, time_block_length((100, 2, 5)))
+        self.assertEqual(25, time_block_length((100, 2, 5), item_size=4))
+        self.assertEqual(12, time_block_length((100, 2, 5), multiple_of=4))
+        self.assertEqual(9, time_block_length((100, 2, 5), multiple_of=9))
+        self.assertEqual(1, time_block_length((100, 2, 500)))
+        self.assertEqual(3, time_block_length((100, 2, 500), multiple_of=3))
+
+
+    def test_read_time_blocks(self):
+        """
+        Blocks cover the requested time points, in order, with the requested dtype and spatial selection.
+        """
+        time_series = _ArrayTimeSeries(numpy.random.random((50, 2, 10, 1)))
+        block_reader.READ_BLOCK_SIZE = 7 * 2 * 10 * 8
+        blocks = list(read_time_blocks(time_series))
+        self.assertEqual(8, time_series.reads)
+        self.assertEqual([7] * 7 + [1], [block.shape[0] for _, block in blocks])
+        self.assertTrue(numpy.all(time_series.data == numpy.concatenate([block for _, block in blocks])))
+
+        space_slices = (slice(1, 2), slice(10), slice(1))
+        blocks = list(read_time_blocks(time_series, space_slices, numpy.float32, start=5, end=45))
+        ## 28 time points of 1 x 10 x 1 float32 values in a block
+        self.assertEqual([slice(5, 33), slice(33, 45)], [rows for rows, _ in blocks])
+        self.assertEqual(numpy.float32, blocks[0][1].dtype)
+        self.assertTrue(numpy.allclose(time_series.data[5:45, 1:2], numpy.concatenate([block for _, block in blocks])))
+
+
+    def test_stored_data_lock(self):
+        """ Builders for the same TimeSeries share a lock. """
+        self.assertTrue(stored_data_lock(_ArrayTimeSeries(None, "a")) is stored_data_lock(_ArrayTimeSeries(None, "a")))
+        self.assertFalse(stored_data_lock(_ArrayTimeSeries(None, "a")) is stored_data_lock(_ArrayTimeSeries(None, "b")))
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(BlockReaderTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
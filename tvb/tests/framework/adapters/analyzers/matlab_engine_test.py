@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import subprocess
+import unittest
+import numpy
+from tvb.adapters.analyzers import matlab_engine
+from tvb.adapters.analyzers.group_matlab_helper import MatlabAnalyzer
+from tvb.adapters.analyzers.matlab_engine import MatlabEngine, MatlabEnginePool, PoolActivity
+
+
+## A stand-in for the Octave interpreter. It understands only the code sent by MatlabEngine
+## (markers, binary and .mat inputs and outputs, the try / catch around the code) and the
+## `disp`, `error`, `<name> = <number>`, `<name> = '<text>';` and `<name> = <name> * 2;` statements.
+FAKE_INTERPRETER = "#!" + sys.executable + r"""
+import re, sys
+import numpy
+from scipy.io import loadmat, savemat
+
+def is_real_array(value):
+    return isinstance(value, numpy.ndarray) and value.dtype.kind in 'biuf'
+
+def user_variables(real):
+    return dict((name, value) for name, value in workspace.items()
+                if not name.startswith('tvb_') and is_real_array(value) == real)
+
+workspace = {}
+failed = False
+while True:
+    line = sys.stdin.readline()
+    if not line or line.strip() == 'exit':
+        break
+    if failed and not line.startswith('catch'):
+        continue
+    failed = False
+    marker = re.search(r"'TVB_DONE_', '(\w+)'", line)
+    text = re.match(r"disp\('(.*)'\)", line)
+    failure = re.match(r"error\('(.*)'\)", line)
+    double = re.match(r"(\w+) = (\w+) \* 2;", line)
+    number = re.match(r"(\w+) = ([\d.]+);?$", line.strip())
+    string = re.match(r"(\w+) = '(.*)';$", line.strip())
+    read = re.search(r"fopen\('(.+?)', 'r'\); (\w+) = reshape\(fread\(tvb_fid, Inf, 'double'\), \[([\d ]+)\]\)", line)
+    load = re.match(r"load\('(.+?)'\);", line)
+    write = re.search(r"fopen\(\['(.+?)' filesep", line)
+    save = re.search(r"save\('(.+?)', tvb_others", line)
+    if line.strip() == 'clear;':
+        workspace.clear()
+    elif marker:
+        sys.stdout.write('\nTVB_DONE_' + marker.group(1) + '\n')
+    elif text:
+        sys.stdout.write(text.group(1) + '\n')
+    elif failure:
+        sys.stdout.write('\nTVB_ERROR ' + failure.group(1) + '\n')
+        failed = True
+    elif double:
+        workspace[double.group(1)] = workspace[double.group(2)] * 2
+    elif number:
+        workspace[number.group(1)] = numpy.array([[float(number.group(2))]])
+    elif string:
+        workspace[string.group(1)] = string.group(2)
+    elif read:
+        shape = [int(dim) for dim in read.group(3).split()]
+        workspace[read.group(2)] = numpy.fromfile(read.group(1)).reshape(shape, order='F')
+    elif load:
+        workspace.update((name, value) for name, value in loadmat(load.group(1)).items()
+                         if not name.startswith('__'))
+    elif write:
+        for name, value in user_variables(True).items():
+            numpy.ravel(value, order='F').tofile(write.group(1) + '/' + name + '.out.bin')
+            sys.stdout.write('\nTVB_VAR %s %s\n' % (name, ' '.join(str(dim) for dim in value.shape)))
+    elif save:
+        others = user_variables(False)
+        if others:
+            savemat(save.group(1), others, format='5')
+            sys.stdout.write('\nTVB_MAT\n')
+    sys.stdout.flush()
+"""
+
+
+
+class MatlabEngineTest(unittest.TestCase):
+    """
+    Test for tvb.adapters.analyzers.matlab_engine module, with a fake interpreter.
+    """
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.executable = os.path.join(self.folder, "octave")
+        with open(self.executable, 'w') as script_file:
+            script_file.write(FAKE_INTERPRETER)
+        os.chmod(self.executable, 0700)
+
+
+    def tearDown(self):
+        """ Stop the pool server started for the fake executable, with its interpreters. """
+        subprocess.call(['pkill', '-f', self.executable])
+        for file_path in matlab_engine._server_address(self.executable):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        matlab_engine.LOCAL_POOLS.pop(self.executable, None)
+        shutil.rmtree(self.folder)
+
+
+    def test_execute(self):
+        """
+        Code is sent to the running interpreter, and its output returned as log.
+        """
+        engine = MatlabEngine(self.executable)
+        engine.start()
+        try:
+            log, result, error = engine.execute("disp('hello')", {'weights': [[1, 2], [3, 4]]})
+            self.assertTrue('hello' in log)
+            self.assertEqual({}, result)
+            self.assertTrue(error is None)
+            self.assertEqual([], os.listdir(engine.work_dir))
+        finally:
+            engine.stop()
+
+
+    def test_binary_arrays_round_trip(self):
+        """
+        Real input arrays are read by the interpreter from binary files, the other inputs from a .mat
+        workspace, and the whole workspace is read back the same as by `loadmat(squeeze_me=True)`.
+        """
+        weights = numpy.random.random((3, 4))
+        phases = numpy.array([1 + 2j, 3j])
+        engine = MatlabEngine(self.executable)
+        engine.start()
+        try:
+            _, result, error = engine.execute("doubled = weights * 2;", {'weights': weights, 'vector': [1, 2, 3],
+                                                                         'scalar': 5, 'label': 'not numeric',
+                                                                         'phases': phases})
+            self.assertTrue(error is None)
+            self.assertEqual(set(['weights', 'doubled', 'vector', 'scalar', 'label', 'phases']), set(result.keys()))
+            numpy.testing.assert_array_equal(weights, result['weights'])
+            numpy.testing.assert_array_equal(2 * weights, result['doubled'])
+            numpy.testing.assert_array_equal([1, 2, 3], result['vector'])
+            self.assertEqual(5.0, result['scalar'])
+            self.assertEqual('not numeric', result['label'])
+            numpy.testing.assert_array_equal(phases, result['phases'])
+            self.assertEqual([], os.listdir(engine.work_dir))
+
+            _, result, error = engine.execute("error('bad input')", {'weights': weights})
+            self.assertEqual('bad input', error)
+            self.assertEqual(['weights'], result.keys())
+        finally:
+            engine.stop()
+
+
+    def test_analyzer_keeps_errors_in_workspace(self):
+        """
+        On a long-lived interpreter, failing code is reported in the workspace instead of being raised,
+        and the code string is the same as the one of a new MATLAB process.
+        """
+        analyzer = MatlabAnalyzer()
+        analyzer.mlab_exe = self.executable
+        code = "disp('before')\nerror('bad input')\ndisp('after')"
+        data = {'weights': numpy.random.random((3, 4))}
+        script, log, workspace = analyzer.matlab(code, data)
+        self.assertEqual(analyzer._matlab_code(code, data), script)
+        self.assertTrue('before' in log)
+        self.assertFalse('after' in log)
+        self.assertEqual(0, workspace['success' + analyzer.hex])
+        self.assertEqual('bad input', workspace['exception' + analyzer.hex])
+        numpy.testing.assert_array_equal(data['weights'], workspace['weights'])
+
+        _, _, workspace = analyzer.matlab("disp('fine')")
+        self.assertEqual(1, workspace['success' + analyzer.hex])
+        self.assertFalse('exception' + analyzer.hex in workspace)
+
+
+    def test_pool_server(self):
+        """
+        Operations starting together share a single pool server, started by one of them.
+        """
+        logs = []
+
+        def _execute(index):
+            logs.append(matlab_engine.execute(self.executable, "disp('operation %d')" % index)[0])
+
+        threads = [threading.Thread(target=_execute, args=(index,)) for index in xrange(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(['operation 0', 'operation 1', 'operation 2'], sorted(log.strip() for log in logs))
+        self.assertFalse(self.executable in matlab_engine.LOCAL_POOLS)
+        self.assertTrue(matlab_engine._connect(self.executable) is not None)
+        servers = subprocess.Popen(['pgrep', '-f', 'matlab_engine ' + self.executable],
+                                   stdout=subprocess.PIPE).communicate()[0].split()
+        self.assertEqual(1, len(servers))
+
+
+    def test_pool_activity(self):
+        """
+        A pool server stops only when no request is in progress, and then refuses new ones.
+        """
+        activity = PoolActivity()
+        self.assertTrue(activity.begin())
+        self.assertFalse(activity.stop_if_idle(0))
+        activity.end()
+        self.assertFalse(activity.stop_if_idle(60))
+        self.assertTrue(activity.stop_if_idle(0))
+        self.assertFalse(activity.begin())
+
+
+    def test_pool_restarts_dead_engine(self):
+        """
+        An interpreter which stopped is restarted before being used again.
+        """
+        pool = MatlabEnginePool(self.executable, size=1)
+        pool.execute("disp('first')")
+        engine = pool._idle.queue[0]
+        engine.process.kill()
+        engine.process.wait()
+        self.assertFalse(engine.is_healthy())
+        log, _, _ = pool.execute("disp('second')")
+        self.assertTrue('second' in log)
+        self.assertTrue(engine.is_alive())
+        pool.close()
+        self.assertFalse(engine.is_alive())
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(MatlabEngineTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import unittest
+import numpy
+from tvb.adapters.analyzers import pairwise_tiles
+from scipy.signal import correlate
+from matplotlib import mlab
+from tvb.adapters.analyzers.pairwise_tiles import PairwiseTiles, tile_covariance
+from tvb.adapters.analyzers.pairwise_tiles import tile_cross_correlation, tile_coherence
+
+
+
+class PairwiseTilesTest(unittest.TestCase):
+    """
+    Test for tvb.adapters.analyzers.pairwise_tiles module.
+    """
+
+    def setUp(self):
+        self.data = numpy.random.random((50, 1, 10, 1))
+        ## Make groups of 3 nodes.
+        self.tiles = PairwiseTiles(10, pair_memory=pairwise_tiles.TILE_MEMORY / 18.0, node_memory=1)
+
+
+    def _assemble(self, evaluate_tile):
+        """ Run all the tiles and compose the full node x node result. """
+        result = numpy.zeros((10, 10))
+        written = numpy.zeros((10, 10), dtype=int)
+
+        def _write_tile(rows, cols, block):
+            result[rows, cols] = block
+            written[rows, cols] += 1
+
+        self.tiles.run(lambda nodes: self.data[:, :, nodes, :], evaluate_tile, _write_tile)
+        self.assertTrue((written == 1).all())
+        return result
+
+
+    def test_groups(self):
+        """
+        Groups cover all the nodes, with the size bounded by the tile memory.
+        """
+        self.assertEqual(3, self.tiles.group_size)
+        self.assertEqual([slice(0, 3), slice(3, 6), slice(6, 9), slice(9, 10)], self.tiles.groups)
+        self.assertEqual((50, 3, 3, 1, 1), self.tiles.chunk_shape((50, None, None, 1, 1), (1, 2)))
+
+
+    def test_tiled_covariance(self):
+        """
+        Tiled covariance equals the covariance computed in one go.
+        """
+        def _evaluate_tile(rows_data, cols_data):
+            return tile_covariance(rows_data[:, 0, :, 0], None if cols_data is None else cols_data[:, 0, :, 0])
+
+        result = self._assemble(_evaluate_tile)
+        numpy.testing.assert_array_almost_equal(numpy.cov(self.data[:, 0, :, 0].T), result)
+
+
+    @staticmethod
+    def _check_pairs(evaluate_pair, rows_cols, cols_rows, rows_data, cols_data, first=0):
+        """
+        Compare the tile blocks with the result computed for each pair, as the algorithms do
+        (from index `first` of the first dimension).
+        """
+        for mode in xrange(rows_data.shape[3]):
+            rows = rows_data[:, 0, :, mode] - rows_data[:, 0, :, mode].mean(axis=0)
+            cols = cols_data[:, 0, :, mode] - cols_data[:, 0, :, mode].mean(axis=0)
+            for row in xrange(rows.shape[1]):
+                for col in xrange(cols.shape[1]):
+                    numpy.testing.assert_array_almost_equal(evaluate_pair(rows[:, row], cols[:, col])[first:],
+                                                            rows_cols[first:, row, col, 0, mode])
+                    numpy.testing.assert_array_almost_equal(evaluate_pair(cols[:, col], rows[:, row])[first:],
+                                                            cols_rows[first:, col, row, 0, mode])
+
+
+    def test_tile_cross_correlation(self):
+        """
+        Only the pairs across the two groups are computed, with the values of the pairwise correlation.
+        """
+        for nr_points in [50, 51]:
+            rows_data, cols_data = numpy.random.random((nr_points, 1, 3, 2)), numpy.random.random((nr_points, 1, 4, 2))
+            rows_cols, cols_rows = tile_cross_correlation(rows_data, cols_data)
+            self.assertEqual((nr_points, 3, 4, 1, 2), rows_cols.shape)
+            self.assertEqual((nr_points, 4, 3, 1, 2), cols_rows.shape)
+            self._check_pairs(lambda one, other: correlate(one, other, mode="same"),
+                              rows_cols, cols_rows, rows_data, cols_data)
+
+
+    def test_tile_coherence(self):
+        """
+        Only the pairs across the two groups are computed, with the values of the pairwise coherence.
+        """
+        rows_data, cols_data = numpy.random.random((100, 1, 3, 2)), numpy.random.random((100, 1, 4, 2))
+        rows_cols, cols_rows = tile_coherence(rows_data, cols_data, 16)
+        self.assertEqual((9, 3, 4, 1, 2), rows_cols.shape)
+
+        def _cohere(one, other):
+            return mlab.cohere(one, other, NFFT=16, Fs=1.0, detrend=mlab.detrend_linear, window=mlab.window_none)[0]
+
+        ## Linear detrend leaves (almost) nothing at frequency 0, where the ratio is not meaningful.
+        self._check_pairs(_cohere, rows_cols, cols_rows, rows_data, cols_data, first=1)
+        self.assertRaises(ValueError, tile_coherence, rows_data[:20], cols_data[:20], 16)
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(PairwiseTilesTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import unittest
+import numpy
+from tvb.adapters.analyzers.streamed_decompositions import TimeBlocks, streamed_pca, project, project_blocks
+from tvb.adapters.analyzers.streamed_decompositions import DECOMPOSITION_INCREMENTAL, DECOMPOSITION_RANDOMIZED
+
+
+
+class StreamedDecompositionsTest(unittest.TestCase):
+    """
+    Test for tvb.adapters.analyzers.streamed_decompositions module.
+    """
+
+    def setUp(self):
+        random_state = numpy.random.RandomState(42)
+        ## 3 strong latent sources, mixed into 60 nodes, with some noise.
+        latent = random_state.normal(size=(400, 3)) * [10, 5, 2]
+        self.data = (numpy.dot(latent, random_state.normal(size=(3, 60))) +
+                     0.1 * random_state.normal(size=(400, 60)) + 3)
+        self.blocks = TimeBlocks(lambda rows: self.data[rows], 400, 60, block_size=37)
+        self.normalised = (self.data - self.data.mean(axis=0)) / self.data.std(axis=0)
+
+
+    def test_moments(self):
+        """
+        Mean and standard deviation computed block by block equal the ones on the full data.
+        """
+        numpy.testing.assert_array_almost_equal(self.data.mean(axis=0), self.blocks.mean)
+        numpy.testing.assert_array_almost_equal(self.data.std(axis=0), self.blocks.std)
+
+
+    def _check_decomposition(self, method):
+        """ The first components and their fractions equal the dense decomposition. """
+        _, singular_values, components = numpy.linalg.svd(self.normalised, full_matrices=False)
+        expected_fractions = singular_values ** 2 / (singular_values ** 2).sum()
+        weights, fractions = streamed_pca(self.blocks, 3, method)
+        self.assertEqual((3, 60), weights.shape)
+        ## Components are unique up to their sign.
+        numpy.testing.assert_array_almost_equal(numpy.ones(3), numpy.abs((weights * components[:3]).sum(axis=1)))
+        numpy.testing.assert_array_almost_equal(expected_fractions[:3], fractions)
+        numpy.testing.assert_array_almost_equal(numpy.dot(self.normalised, weights.T), project(self.blocks, weights))
+
+        for rows, normalised, components, normalised_components in project_blocks(self.blocks, weights):
+            numpy.testing.assert_array_almost_equal(self.normalised[rows], normalised)
+            numpy.testing.assert_array_almost_equal(numpy.dot(self.data[rows], weights.T), components)
+            numpy.testing.assert_array_almost_equal(numpy.dot(self.normalised[rows], weights.T), normalised_components)
+
+
+    def test_incremental_pca(self):
+        self._check_decomposition(DECOMPOSITION_INCREMENTAL)
+
+
+    def test_randomized_pca(self):
+        self._check_decomposition(DECOMPOSITION_RANDOMIZED)
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(StreamedDecompositionsTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
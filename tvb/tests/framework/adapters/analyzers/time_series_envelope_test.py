@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import unittest
+import numpy
+from tvb.core.entities.file.files_helper import FilesHelper
+from tvb.adapters.analyzers.time_series_envelope import build_envelope_pyramid, read_envelope, envelope_size_ratio
+from tvb.tests.framework.datatypes.datatypes_factory import DatatypesFactory
+from tvb.tests.framework.core.base_testcase import TransactionalTestCase
+
+
+
+class TimeSeriesEnvelopeTest(TransactionalTestCase):
+    """
+    Unit-tests for the min/max envelopes of TimeSeries, used by the line viewers.
+    """
+
+
+    def setUp(self):
+        """
+        Create a stored TimeSeries (10 time points, 10 state-variables, 10 nodes, 10 modes).
+        """
+        self.datatypeFactory = DatatypesFactory()
+        self.test_project = self.datatypeFactory.get_project()
+        _, connectivity = self.datatypeFactory.create_connectivity()
+        self.time_series = self.datatypeFactory.create_timeseries(connectivity)
+        self.data = self.time_series.read_data_slice((slice(10), slice(10), slice(10), slice(10)))
+
+
+    def tearDown(self):
+        """
+        Clean-up tests data
+        """
+        FilesHelper().remove_project_structure(self.test_project.name)
+
+
+    def _check_envelope(self, from_idx, to_idx, width):
+        """
+        Compare the envelope of state-variable 1, mode 2, channels [3, 0] with the one computed from the raw data.
+        """
+        time_indices, data = read_envelope(self.time_series, from_idx, to_idx, width, 1, 2, [3, 0], factor=2)
+        self.assertEqual(data.shape, (2 * width, 2))
+        self.assertEqual(len(time_indices), 2 * width)
+        self.assertEqual(time_indices[0], from_idx)
+        raw = self.data[from_idx:to_idx, 1, [3, 0], 2]
+        self.assertTrue(numpy.allclose(data[0::2].min(axis=0), raw.min(axis=0)))
+        self.assertTrue(numpy.allclose(data[1::2].max(axis=0), raw.max(axis=0)))
+        return time_indices, data
+
+
+    def test_envelope_from_raw_data(self):
+        """
+        Without pyramid levels, each bucket holds the min/max of the raw samples behind it.
+        """
+        time_indices, data = self._check_envelope(0, 10, 5)
+        self.assertEqual(list(time_indices), [0, 0, 2, 2, 4, 4, 6, 6, 8, 8])
+        for bucket in xrange(5):
+            samples = self.data[2 * bucket: 2 * bucket + 2, 1, [3, 0], 2]
+            self.assertTrue(numpy.allclose(data[2 * bucket], samples.min(axis=0)))
+            self.assertTrue(numpy.allclose(data[2 * bucket + 1], samples.max(axis=0)))
+
+
+    def test_build_pyramid(self):
+        """
+        Levels are stored until they get shorter than the minimum length, and not computed twice.
+        """
+        levels = build_envelope_pyramid(self.time_series, factor=2, min_length=1, min_level_length=2)
+        self.assertEqual(levels, [2, 4, 8])
+        self.assertEqual(self.time_series.get_data_shape("envelope_min_4"), (3, 10, 10, 10))
+        expected_max = numpy.maximum.reduceat(self.data, [0, 4, 8], axis=0)
+        self.assertTrue(numpy.allclose(self.time_series.get_data("envelope_max_4"), expected_max))
+        self.assertEqual(build_envelope_pyramid(self.time_series, factor=2, min_length=1, min_level_length=2),
+                         [2, 4, 8])
+        self.assertEqual(build_envelope_pyramid(self.time_series, min_length=11), [])
+
+
+    def test_size_ratio(self):
+        """
+        The estimated size of the pyramid (used for the simulation disk quota) is the size of the stored levels.
+        """
+        levels = build_envelope_pyramid(self.time_series, factor=2, min_length=1, min_level_length=2)
+        stored_points = sum(self.time_series.get_data_shape("envelope_%s_%d" % (kind, level))[0]
+                            for level in levels for kind in ("min", "max"))
+        self.assertEqual(stored_points / 10.0, envelope_size_ratio(10, factor=2, min_length=1, min_level_length=2))
+        self.assertEqual(0.0, envelope_size_ratio(10, min_length=11))
+
+
+    def test_build_after_interrupted_build(self):
+        """
+        A level left incomplete by an interrupted build is computed again, not appended to.
+        """
+        partial = numpy.maximum.reduceat(self.data[:4], [0, 2], axis=0)
+        self.time_series.store_data_chunk("envelope_max_2", partial, grow_dimension=0, close_file=False)
+        self.time_series.store_data_chunk("envelope_min_2", partial, grow_dimension=0, close_file=False)
+        self.time_series.close_file()
+
+        self.assertEqual(build_envelope_pyramid(self.time_series, factor=2, min_length=1, min_level_length=2),
+                         [2, 4, 8])
+        self.assertEqual(self.time_series.get_data_shape("envelope_max_2"), (5, 10, 10, 10))
+        expected_max = numpy.maximum.reduceat(self.data, [0, 2, 4, 6, 8], axis=0)
+        self.assertTrue(numpy.allclose(self.time_series.get_data("envelope_max_2"), expected_max))
+
+
+    def test_envelope_from_pyramid(self):
+        """
+        Wide windows are summarized from the pyramid levels, with the same extremes as the raw data.
+        """
+        build_envelope_pyramid(self.time_series, factor=2, min_length=1, min_level_length=2)
+        time_indices, _ = self._check_envelope(0, 10, 1)
+        self.assertEqual(list(time_indices), [0, 0])
+        self._check_envelope(0, 10, 2)
+        self._check_envelope(0, 10, 3)
+        self._check_envelope(2, 10, 4)
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TimeSeriesEnvelopeTest))
+    return test_suite
+
+
+
+if __name__ == "__main__":
+    #So you can run tests from this package individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
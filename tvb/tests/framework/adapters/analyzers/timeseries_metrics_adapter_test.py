@@ -43,8 +43,10 @@ from tvb.core.entities import model
 from tvb.core.entities.storage import dao
 from tvb.core.entities.file.files_helper import FilesHelper
 from tvb.core.adapters.abcadapter import ABCAdapter
+from tvb.adapters.analyzers import block_reader
 from tvb.adapters.analyzers.metrics_group_timeseries import TimeseriesMetricsAdapter
-from tvb.datatypes.time_series import TimeSeriesRegion
+from tvb.adapters.simulator.streaming_analyzers import StreamingMetrics
+from tvb.datatypes.time_series import TimeSeries, TimeSeriesRegion
 from tvb.datatypes.mapped_values import DatatypeMeasure
 from tvb.core.entities.transient.structure_entities import DataTypeMetaData
 from tvb.core.services.operation_service import OperationService
@@ -82,9 +84,9 @@ class TimeSeriesMetricsAdapterTest(TransactionalTestCase):
         cfg.CURRENT_DIR = self.old_config_file
 
 
-    def test_adapter_launch(self):
+    def _store_time_series(self, data):
         """
-        Test that the adapters launches and successfully generates a datatype measure entry.
+        Store a TimeSeriesRegion with the given data, as the result of a simulator operation.
         """
         meta = {DataTypeMetaData.KEY_SUBJECT: "John Doe", DataTypeMetaData.KEY_STATE: "RAW_DATA"}
         algo_group = FlowService().get_algorithm_by_module_and_class(SIMULATOR_MODULE, SIMULATOR_CLASS)[1]
@@ -93,8 +95,6 @@ class TimeSeriesMetricsAdapterTest(TransactionalTestCase):
                                          method_name=ABCAdapter.LAUNCH_METHOD)
         self.operation = dao.store_entity(self.operation)
         storage_path = FilesHelper().get_project_folder(self.test_project, str(self.operation.id))
-        dummy_input = numpy.arange(1, 10001).reshape(10, 10, 10, 10)
-        dummy_time = numpy.arange(1, 11)
 
         # Get connectivity
         connectivities = FlowService().get_available_datatypes(self.test_project.id,
@@ -104,8 +104,8 @@ class TimeSeriesMetricsAdapterTest(TransactionalTestCase):
 
         dummy_time_series = TimeSeriesRegion()
         dummy_time_series.storage_path = storage_path
-        dummy_time_series.write_data_slice(dummy_input)
-        dummy_time_series.write_time_slice(dummy_time)
+        dummy_time_series.write_data_slice(data)
+        dummy_time_series.write_time_slice(numpy.arange(1, data.shape[0] + 1))
         dummy_time_series.close_file()
         dummy_time_series.start_time = 0.0
         dummy_time_series.sample_period = 1.0
@@ -113,8 +113,14 @@ class TimeSeriesMetricsAdapterTest(TransactionalTestCase):
 
         adapter_instance = StoreAdapter([dummy_time_series])
         OperationService().initiate_prelaunch(self.operation, adapter_instance, {})
+        return dao.get_generic_entity(dummy_time_series.__class__, dummy_time_series.gid, 'gid')[0]
+
 
-        dummy_time_series = dao.get_generic_entity(dummy_time_series.__class__, dummy_time_series.gid, 'gid')[0]
+    def test_adapter_launch(self):
+        """
+        Test that the adapters launches and successfully generates a datatype measure entry.
+        """
+        dummy_time_series = self._store_time_series(numpy.arange(1, 10001).reshape(10, 10, 10, 10))
         ts_metric_adapter = TimeseriesMetricsAdapter()
         resulted_metric = ts_metric_adapter.launch(dummy_time_series)
         self.assertTrue(isinstance(resulted_metric, DatatypeMeasure), "Result should be a datatype measure.")
@@ -122,6 +128,34 @@ class TimeSeriesMetricsAdapterTest(TransactionalTestCase):
                         "A result should have been generated for every metric.")
 
 
+    def test_metrics_reduced_in_blocks(self):
+        """
+        Variance metrics and KuramotoIndex are reduced over blocks of time points, in less memory than
+        the full data, to the values computed by their algorithms on the full data.
+        """
+        data = numpy.random.random((50, 2, 10, 1))
+        dummy_time_series = self._store_time_series(data)
+        algorithms = StreamingMetrics.METRIC_NAMES
+        old_block_size = block_reader.READ_BLOCK_SIZE
+        ## Blocks of 5 time points.
+        block_reader.READ_BLOCK_SIZE = 5 * data[0].nbytes
+        try:
+            ts_metric_adapter = TimeseriesMetricsAdapter()
+            ts_metric_adapter.configure(dummy_time_series, algorithms)
+            self.assertTrue(ts_metric_adapter.get_required_memory_size() < data.nbytes)
+            resulted_metric = ts_metric_adapter.launch(dummy_time_series, algorithms)
+        finally:
+            block_reader.READ_BLOCK_SIZE = old_block_size
+
+        self.assertEqual(set(algorithms), set(resulted_metric.metrics.keys()))
+        for algorithm_name in algorithms:
+            algorithm = ts_metric_adapter.available_algorithms[algorithm_name]()
+            unstored_ts = TimeSeries(use_storage=False)
+            unstored_ts.data = data
+            algorithm.time_series = unstored_ts
+            self.assertAlmostEqual(algorithm.evaluate(), resulted_metric.metrics[algorithm_name])
+
+
 
 def suite():
     """
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import unittest
+import numpy
+from tvb.datatypes.connectivity import Connectivity
+from tvb.adapters.simulator.batched_simulation import stack_connectivity, stack_model_parameters, split_sample
+from tvb.adapters.simulator.batched_simulation import same_input
+
+
+
+class BatchedSimulationTest(unittest.TestCase):
+    """
+    Test for tvb.adapters.simulator.batched_simulation module.
+    """
+
+    def test_stack_connectivity(self):
+        """
+        Blocks are copies of the original network, without connections between them.
+        """
+        connectivity = Connectivity(use_storage=False)
+        connectivity.weights = numpy.random.random((4, 4))
+        connectivity.tract_lengths = numpy.random.random((4, 4))
+        connectivity.centres = numpy.random.random((4, 3))
+        stacked = stack_connectivity(connectivity, 3)
+
+        self.assertEqual((12, 12), stacked.weights.shape)
+        self.assertEqual((12, 3), stacked.centres.shape)
+        self.assertTrue(numpy.all(stacked.weights[4:8, 4:8] == connectivity.weights))
+        self.assertTrue(numpy.all(stacked.tract_lengths[8:, 8:] == connectivity.tract_lengths))
+        self.assertEqual(0, stacked.weights[:4, 4:].sum())
+
+
+    def test_stack_model_parameters(self):
+        """
+        Varying parameters get one value per stacked node, the others are kept.
+        """
+        parameters = [{'a': numpy.array([-2.0]), 'b': numpy.array([-10.0]), 'tau': numpy.array([1.0, 2.0, 3.0])},
+                      {'a': numpy.array([-1.0]), 'b': numpy.array([-10.0]), 'tau': numpy.array([1.0, 2.0, 3.0])}]
+        stacked = stack_model_parameters(parameters, 3)
+        self.assertTrue(numpy.all(stacked['a'] == [-2.0, -2.0, -2.0, -1.0, -1.0, -1.0]))
+        self.assertTrue(numpy.all(stacked['b'] == [-10.0]))
+        self.assertTrue(numpy.all(stacked['tau'] == [1.0, 2.0, 3.0, 1.0, 2.0, 3.0]))
+        self.assertTrue(same_input(parameters[0]['a'], numpy.array([-2.0])))
+
+
+    def test_split_sample(self):
+        """
+        Each block receives its own nodes.
+        """
+        sample = numpy.arange(2 * 6).reshape((2, 6, 1))
+        parts = split_sample(sample, 3)
+        self.assertEqual(3, len(parts))
+        self.assertEqual((2, 2, 1), parts[1].shape)
+        self.assertTrue(numpy.all(parts[1][:, :, 0] == [[2, 3], [8, 9]]))
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(BatchedSimulationTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
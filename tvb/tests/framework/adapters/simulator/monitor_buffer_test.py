@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import unittest
+import numpy
+import tvb.analyzers.fft as fft
+from tvb.datatypes.time_series import TimeSeries
+from tvb.analyzers.metric_kuramoto_index import KuramotoIndex
+from tvb.analyzers.metric_variance_global import GlobalVariance
+from tvb.analyzers.metric_variance_of_node_variance import VarianceNodeVariance
+from tvb.adapters.simulator.monitor_buffer import MonitorResultsBuffer, pop_output_precision, KEY_OUTPUT_PRECISION
+from tvb.adapters.simulator.streaming_analyzers import StreamingCovariance, STREAMED_COVARIANCE_DATA
+from tvb.adapters.simulator.streaming_analyzers import build_streaming_analyzers, StreamingMetrics
+from tvb.adapters.simulator.streaming_analyzers import StreamingFourier, STREAMED_METRIC_PREFIX
+from tvb.adapters.simulator.streaming_analyzers import streamed_fourier_data_name
+
+
+
+class _RecordingTimeSeries(object):
+    """ Keep in memory the slices written, instead of a TimeSeries with storage. """
+
+    def __init__(self):
+        self.time_slices = []
+        self.data_slices = []
+        self.stored = {}
+
+    def write_time_slice(self, partial_result):
+        self.time_slices.append(numpy.array(partial_result))
+
+    def write_data_slice(self, partial_result):
+        self.data_slices.append(numpy.array(partial_result))
+
+    def store_data(self, data_name, data):
+        self.stored[data_name] = data
+
+
+
+class MonitorResultsBufferTest(unittest.TestCase):
+    """
+    Test for tvb.adapters.simulator.monitor_buffer module.
+    """
+
+    def test_blocks_written(self):
+        """
+        Samples are written in blocks, in the order they were received, and nothing is lost at flush.
+        """
+        time_series = _RecordingTimeSeries()
+        sample = numpy.zeros((2, 74, 1))
+        ## Force blocks of 4 samples
+        buffer_ = MonitorResultsBuffer(time_series, max_block_size=4 * sample.nbytes)
+        for step in xrange(10):
+            buffer_.append(step * 0.5, sample + step)
+        buffer_.flush()
+
+        self.assertEqual([4, 4, 2], [len(block) for block in time_series.time_slices])
+        all_times = numpy.concatenate(time_series.time_slices)
+        all_data = numpy.concatenate(time_series.data_slices)
+        self.assertTrue(numpy.all(all_times == numpy.arange(10) * 0.5))
+        self.assertEqual((10, 2, 74, 1), all_data.shape)
+        self.assertTrue(numpy.all(all_data[:, 0, 0, 0] == numpy.arange(10)))
+
+
+    def test_expected_samples_limit(self):
+        """
+        Short simulations do not allocate more than the expected number of samples.
+        """
+        time_series = _RecordingTimeSeries()
+        buffer_ = MonitorResultsBuffer(time_series, max_samples=3)
+        for step in xrange(3):
+            buffer_.append(step, numpy.ones((1, 2, 1)))
+        self.assertEqual(1, len(time_series.data_slices))
+        buffer_.flush()
+        self.assertEqual(1, len(time_series.data_slices))
+
+
+    def test_reduced_precision(self):
+        """
+        Samples are stored in the requested precision, and blocks hold more samples for the same size.
+        """
+        parameters = {'period': 1.0, KEY_OUTPUT_PRECISION: 'float32'}
+        dtype = pop_output_precision(parameters)
+        self.assertEqual({'period': 1.0}, parameters)
+        self.assertEqual(numpy.float64, pop_output_precision({KEY_OUTPUT_PRECISION: 'invalid'}))
+        self.assertEqual(numpy.float64, pop_output_precision({KEY_OUTPUT_PRECISION: 'float16'}))
+
+        time_series = _RecordingTimeSeries()
+        sample = numpy.zeros((2, 74, 1))
+        buffer_ = MonitorResultsBuffer(time_series, max_block_size=4 * sample.nbytes, dtype=dtype)
+        for step in xrange(10):
+            buffer_.append(step, sample + step)
+        buffer_.flush()
+        self.assertEqual([8, 2], [len(block) for block in time_series.data_slices])
+        self.assertEqual(numpy.float32, time_series.data_slices[0].dtype)
+
+
+    def test_streaming_covariance(self):
+        """
+        The covariance computed block by block is the one computed on the full data.
+        """
+        time_series = _RecordingTimeSeries()
+        data = numpy.random.random((25, 2, 5, 1))
+        buffer_ = MonitorResultsBuffer(time_series, max_block_size=4 * data[0].nbytes,
+                                       analyzers=build_streaming_analyzers("covariance, unknown"))
+        self.assertTrue(isinstance(buffer_.analyzers[0], StreamingCovariance))
+        for step in xrange(data.shape[0]):
+            buffer_.append(step, data[step])
+        buffer_.finish()
+
+        streamed = time_series.stored[STREAMED_COVARIANCE_DATA]
+        self.assertEqual((5, 5, 2, 1), streamed.shape)
+        for var in xrange(2):
+            self.assertTrue(numpy.allclose(streamed[:, :, var, 0], numpy.cov(data[:, var, :, 0].T)))
+
+
+    @staticmethod
+    def _stream(data, specifications, sample_period=1.0, expected_samples=None):
+        """ Feed data to the streaming analyzers, through a buffer with blocks of 7 samples. """
+        time_series = _RecordingTimeSeries()
+        analyzers = build_streaming_analyzers(specifications, sample_period, expected_samples)
+        buffer_ = MonitorResultsBuffer(time_series, max_block_size=7 * data[0].nbytes, analyzers=analyzers)
+        for step in xrange(data.shape[0]):
+            buffer_.append(step * sample_period, data[step])
+        buffer_.finish()
+        return time_series, analyzers
+
+
+    @staticmethod
+    def _evaluate(algorithm, data, sample_period=None):
+        """ Evaluate an algorithm on the full data, the way the analyzer adapters do. """
+        unstored_ts = TimeSeries(use_storage=False)
+        if sample_period is not None:
+            unstored_ts.sample_period = sample_period
+        unstored_ts.data = data
+        algorithm.time_series = unstored_ts
+        return algorithm.evaluate()
+
+
+    def test_streaming_metrics(self):
+        """
+        The metrics streamed are the ones computed by the algorithms on the full data,
+        for series both shorter and longer than the start point of the variance metrics.
+        """
+        for nr_samples in [5, 3000]:
+            data = numpy.random.random((nr_samples, 2, 4, 1))
+            time_series, analyzers = self._stream(data, "metrics")
+            self.assertTrue(isinstance(analyzers[0], StreamingMetrics))
+            for algorithm in [GlobalVariance, VarianceNodeVariance, KuramotoIndex]:
+                streamed = time_series.stored[STREAMED_METRIC_PREFIX + algorithm.__name__]
+                self.assertAlmostEqual(float(self._evaluate(algorithm(), data)), streamed[0])
+
+
+    def test_streaming_fourier(self):
+        """
+        The spectra streamed segment by segment are the ones computed by the FFT on the full data,
+        also when the simulation produces one sample less than expected.
+        """
+        for nr_samples in [200, 199]:
+            data = numpy.random.random((nr_samples, 2, 3, 1))
+            time_series, analyzers = self._stream(data, "fourier:60:hamming", 0.5, 200)
+            self.assertTrue(isinstance(analyzers[0], StreamingFourier))
+            streamed = time_series.stored[streamed_fourier_data_name(60, "hamming")]
+            expected = self._evaluate(fft.FFT(segment_length=60.0, window_function="hamming"), data, 0.5)
+            self.assertEqual(expected.array_data.shape, streamed.shape)
+            self.assertTrue(numpy.allclose(expected.array_data, streamed))
+
+        time_series, _ = self._stream(numpy.random.random((150, 2, 3, 1)), "fourier::", 0.5, 200)
+        self.assertEqual({}, time_series.stored)
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(MonitorResultsBufferTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
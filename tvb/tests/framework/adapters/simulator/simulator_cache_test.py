@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import unittest
+import numpy
+from tvb.adapters.simulator.simulator_cache import SimulatorComponentsCache, input_fingerprint
+
+
+
+class SimulatorCacheTest(unittest.TestCase):
+    """
+    Test for tvb.adapters.simulator.simulator_cache module.
+    """
+
+    def setUp(self):
+        self.cache = SimulatorComponentsCache(max_size=2)
+        self.built = []
+
+
+    def _builder(self, name):
+        """ Return a builder which records each call. """
+        def _build():
+            self.built.append(name)
+            return {'name': name}
+        return _build
+
+
+    def test_component_reused(self):
+        """
+        The builder is called only once for the same key.
+        """
+        first = self.cache.get_or_build(('connectivity', 'gid1'), self._builder('first'))
+        second = self.cache.get_or_build(('connectivity', 'gid1'), self._builder('second'))
+        self.assertTrue(first is second)
+        self.assertEqual(['first'], self.built)
+
+
+    def test_least_recently_used_evicted(self):
+        """
+        When full, the component not used for the longest time is dropped.
+        """
+        self.cache.get_or_build(('a',), self._builder('a'))
+        self.cache.get_or_build(('b',), self._builder('b'))
+        self.cache.get_or_build(('a',), self._builder('a'))
+        self.cache.get_or_build(('c',), self._builder('c'))
+        self.assertEqual(2, len(self.cache))
+        self.cache.get_or_build(('a',), self._builder('a'))
+        self.cache.get_or_build(('b',), self._builder('b'))
+        self.assertEqual(['a', 'b', 'c', 'b'], self.built)
+
+
+    def test_input_fingerprint(self):
+        """
+        Equal inputs give equal keys, different array values give different keys.
+        """
+        params1 = {'coupling_strength': numpy.array([0.5]), 'cutoff': 40.0}
+        params2 = {'cutoff': 40.0, 'coupling_strength': numpy.array([0.5])}
+        params3 = {'coupling_strength': numpy.array([0.7]), 'cutoff': 40.0}
+        self.assertEqual(input_fingerprint(params1), input_fingerprint(params2))
+        self.assertNotEqual(input_fingerprint(params1), input_fingerprint(params3))
+        hash(input_fingerprint(params1))
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(SimulatorCacheTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import unittest
+import numpy
+from tvb.core.adapters.exceptions import LaunchException
+from tvb.adapters.simulator.surface_output import SurfaceOutputReducer, pop_output_options
+from tvb.adapters.simulator.surface_output import OUTPUT_ALL_VERTICES, OUTPUT_REGION_AVERAGE, OUTPUT_DECIMATED
+from tvb.adapters.simulator.surface_output import OUTPUT_REGIONS_SUBSET, KEY_SPATIAL_OUTPUT, KEY_DECIMATION_STEP
+
+
+
+class SurfaceOutputTest(unittest.TestCase):
+    """
+    Test for tvb.adapters.simulator.surface_output module.
+    """
+    REGION_MAPPING = numpy.array([0, 0, 1, 1, 1, 2])
+
+
+    def setUp(self):
+        ## Shape (state variables, vertices, modes)
+        self.sample = numpy.arange(2 * 6 * 1, dtype=float).reshape((2, 6, 1))
+
+
+    def test_region_average(self):
+        """
+        Vertices are averaged on the region they are mapped onto.
+        """
+        reducer = SurfaceOutputReducer(OUTPUT_REGION_AVERAGE, self.REGION_MAPPING, 3)
+        result = reducer(self.sample)
+        self.assertEqual((2, 3, 1), result.shape)
+        self.assertTrue(numpy.allclose(result[0, :, 0], [0.5, 3.0, 5.0]))
+        self.assertTrue(numpy.allclose(result[1, :, 0], [6.5, 9.0, 11.0]))
+        self.assertAlmostEqual(0.5, reducer.size_ratio)
+
+
+    def test_decimation(self):
+        """
+        Every n-th vertex is kept.
+        """
+        reducer = SurfaceOutputReducer(OUTPUT_DECIMATED, self.REGION_MAPPING, 3, decimation_step=2)
+        result = reducer(self.sample)
+        self.assertEqual([0, 2, 4], reducer.kept_vertices.tolist())
+        self.assertTrue(numpy.all(result[0, :, 0] == [0, 2, 4]))
+
+
+    def test_regions_subset(self):
+        """
+        Only vertices mapped onto the selected regions are kept.
+        """
+        reducer = SurfaceOutputReducer(OUTPUT_REGIONS_SUBSET, self.REGION_MAPPING, 3,
+                                       selected_regions=numpy.array([0, 2]))
+        self.assertEqual([0, 1, 5], reducer.kept_vertices.tolist())
+        self.assertEqual((2, 3, 1), reducer(self.sample).shape)
+        self.assertRaises(LaunchException, SurfaceOutputReducer, OUTPUT_REGIONS_SUBSET,
+                          self.REGION_MAPPING, 3, 1, numpy.array([7]))
+
+
+    def test_pop_output_options(self):
+        """
+        Output options are removed from the monitor parameters, with defaults when missing.
+        """
+        parameters = {'period': 0.5, KEY_SPATIAL_OUTPUT: OUTPUT_DECIMATED, KEY_DECIMATION_STEP: 3}
+        self.assertEqual(OUTPUT_DECIMATED, pop_output_options(parameters)[0])
+        self.assertEqual({'period': 0.5}, parameters)
+        output_type, decimation_step, selected_regions = pop_output_options({})
+        self.assertEqual(OUTPUT_ALL_VERTICES, output_type)
+        self.assertEqual(1, decimation_step)
+        self.assertEqual(0, len(selected_regions))
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(SurfaceOutputTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
@@ -30,9 +30,11 @@
 """
 .. moduleauthor:: Bogdan Neacsa <bogdan.neacsa@codemart.ro>
 """
+import json
 import unittest
+import numpy
 from tvb.core.entities.file.files_helper import FilesHelper
-from tvb.adapters.visualizers.connectivity import ConnectivityViewer
+from tvb.adapters.visualizers.connectivity import ConnectivityViewer, ConnectivityPayload, CONNECTIVITY_PAYLOADS_CACHE
 from tvb.datatypes.surfaces import CorticalSurface
 from tvb.datatypes.connectivity import Connectivity
 from tvb.tests.framework.core.test_factory import TestFactory
@@ -75,12 +77,38 @@ class ConnectivityViewerTest(TransactionalTestCase):
         result = viewer.launch(self.connectivity)
         expected_keys = ['weightsMin', 'weightsMax', 'weights', 'urlWeights', 'urlVertices',
                          'urlTriangles', 'urlTracts', 'urlPositions', 'urlNormals',
-                         'rightHemisphereJson', 'raysArray', 'rayMin', 'rayMax', 'positions',
-                         'leftHemisphereJson', 'connectivity_entity', 'bothHemisphereJson']
+                         'hemispheresJson', 'raysURL', 'colorsURL', 'rayMin', 'rayMax', 'positions',
+                         'connectivity_entity']
         for key in expected_keys:
             self.assertTrue(key in result)
     
     
+    def test_payload_cache(self):
+        """
+        The arrays drawn by the 2D and 3D viewers are computed once for a Connectivity.
+        """
+        CONNECTIVITY_PAYLOADS_CACHE.clear()
+        result = ConnectivityViewer().launch(self.connectivity)
+        payload = CONNECTIVITY_PAYLOADS_CACHE.load(self.connectivity)
+        self.assertTrue(payload is CONNECTIVITY_PAYLOADS_CACHE.load(self.connectivity))
+
+        nr_regions = self.connectivity.number_of_regions
+        half = nr_regions / 2
+        hemispheres = json.loads(result['hemispheresJson'])
+        self.assertEqual(set([ConnectivityPayload.LEFT, ConnectivityPayload.BOTH, ConnectivityPayload.RIGHT]),
+                         set(hemispheres['views'].keys()))
+        self.assertEqual((half, 4), payload.arrays[ConnectivityPayload.NODES + ConnectivityPayload.LEFT].shape)
+        self.assertEqual((nr_regions - half, 4),
+                         payload.arrays[ConnectivityPayload.NODES + ConnectivityPayload.RIGHT].shape)
+        edges = payload.arrays[ConnectivityPayload.EDGES + ConnectivityPayload.BOTH]
+        self.assertEqual(numpy.count_nonzero(self.connectivity.weights), edges.shape[0])
+        self.assertTrue(numpy.allclose(self.connectivity.weights[edges[:, 0].astype(int), edges[:, 1].astype(int)],
+                                       edges[:, 2], rtol=1e-6))
+        self.assertEqual(nr_regions, len(payload.arrays[ConnectivityPayload.RAYS]))
+        self.assertEqual(result['raysURL'], '/flow/read_connectivity_payload/%s/%s?colors_gid=;rays_gid='
+                                            % (self.connectivity.gid, ConnectivityPayload.RAYS))
+    
+    
 def suite():
     """
     Gather all the tests in a test suite.
@@ -87,6 +87,11 @@ class EEGMonitorTest(TransactionalTestCase):
                          'labelsForCheckBoxes', 'label_x', 'graphLabels', 'entities', 'channelsPage']
         for key in expected_keys:
             self.assertTrue(key in result)
+        ## Page statistics are stored on the first view only; the caller charges the added space.
+        self.assertEqual(set([time_series.gid]), viewer.extended_datatypes)
+        second_viewer = EegMonitor()
+        second_viewer.launch(time_series)
+        self.assertEqual(set(), second_viewer.extended_datatypes)
     
     
 def suite():
@@ -35,8 +35,10 @@
 
 import unittest
 from tvb.basic.config.settings import TVBSettings as config
+from tvb.core.entities.storage import dao
+from tvb.adapters.visualizers.pse_grid import PSE_GRIDS_CACHE
 from tvb.adapters.visualizers.pse_discrete import DiscretePSEAdapter
-from tvb.adapters.visualizers.pse_isocline import IsoclinePSEAdapter
+from tvb.adapters.visualizers.pse_isocline import IsoclinePSEAdapter, ISOCLINE_SURFACES_CACHE
 from tvb.tests.framework.datatypes.datatypes_factory import DatatypesFactory
 from tvb.tests.framework.core.base_testcase import TransactionalTestCase
 
@@ -55,6 +57,8 @@ class PSETest(TransactionalTestCase):
         """
         self.datatypeFactory = DatatypesFactory()
         self.group = self.datatypeFactory.create_datatype_group()
+        PSE_GRIDS_CACHE.clear()
+        ISOCLINE_SURFACES_CACHE.clear()
 
 
     def test_launch_discrete(self):
@@ -87,6 +91,48 @@ class PSETest(TransactionalTestCase):
         self.assertEqual(1, len(result["metrics"]))
 
 
+    def test_isocline_surface_cache(self):
+        """
+        Interpolated surfaces are computed once per metric, and reused by the following launches.
+        """
+        viewer = IsoclinePSEAdapter()
+        result = viewer.launch(self.group)
+        figure_number = result["figureNumbers"].values()[0]
+        surface = viewer.surfaces[figure_number]
+        self.assertEqual(len(DatatypesFactory.RANGE_1[1]), surface.nan_indices.shape[0])
+        self.assertEqual(len(DatatypesFactory.RANGE_2[1]), surface.nan_indices.shape[1])
+        self.assertFalse(surface.nan_indices.any())
+        self.assertEqual((surface.posteriori_x.size, surface.posteriori_y.size), surface.data.shape)
+        x_idx, y_idx = surface.nearest_point(surface.apriori_x[-1], surface.apriori_y[0])
+        self.assertEqual((len(surface.apriori_x) - 1, 0), (x_idx, y_idx))
+        self.assertTrue(surface.datatypes_gids[x_idx][y_idx] is not None)
+
+        second_viewer = IsoclinePSEAdapter()
+        result = second_viewer.launch(self.group)
+        self.assertTrue(surface is second_viewer.surfaces[result["figureNumbers"].values()[0]])
+
+
+    def test_grid_cache(self):
+        """
+        The PSE grid is loaded for all the operations at once, and reused until new measures are computed.
+        """
+        operation_group = dao.get_operationgroup_by_id(self.group.fk_operation_group)
+        grid = PSE_GRIDS_CACHE.load(operation_group)
+        points = list(grid)
+        self.assertEqual(len(DatatypesFactory.RANGE_1[1]) * len(DatatypesFactory.RANGE_2[1]), len(points))
+        self.assertFalse(grid.has_started_ops)
+        for key_1, key_2, point in points:
+            self.assertTrue(key_1 in DatatypesFactory.RANGE_1[1])
+            self.assertTrue(key_2 in DatatypesFactory.RANGE_2[1])
+            self.assertEqual(DatatypesFactory.DATATYPE_MEASURE_METRIC, point.measure.metrics)
+        self.assertTrue(grid is PSE_GRIDS_CACHE.load(operation_group))
+
+        self.datatypeFactory.create_datatype_measure(points[0][2].datatype)
+        new_grid = PSE_GRIDS_CACHE.load(operation_group)
+        self.assertFalse(grid is new_grid)
+        self.assertTrue(new_grid is PSE_GRIDS_CACHE.load(operation_group))
+
+
 
 
 def suite():
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import unittest
+import numpy
+from tvb.core.entities.storage import dao
+from tvb.core.entities.file.files_helper import FilesHelper
+from tvb.core.services.project_service import ProjectService
+from tvb.adapters.visualizers.time_series_page_statistics import page_statistics, has_page_statistics
+from tvb.tests.framework.datatypes.datatypes_factory import DatatypesFactory
+from tvb.tests.framework.core.base_testcase import TransactionalTestCase
+
+
+
+class TimeSeriesPageStatisticsTest(TransactionalTestCase):
+    """
+    Unit-tests for the per-page statistics of TimeSeries, used by the EEG viewer.
+    """
+
+
+    def setUp(self):
+        """
+        Create a stored TimeSeries (10 time points, 10 state-variables, 10 nodes, 10 modes).
+        """
+        self.datatypeFactory = DatatypesFactory()
+        self.test_project = self.datatypeFactory.get_project()
+        _, connectivity = self.datatypeFactory.create_connectivity()
+        self.time_series = self.datatypeFactory.create_timeseries(connectivity)
+        self.data = self.time_series.read_data_slice((slice(10), slice(10), slice(10), slice(10)))
+
+
+    def tearDown(self):
+        """
+        Clean-up tests data
+        """
+        FilesHelper().remove_project_structure(self.test_project.name)
+
+
+    def _check_page(self, page_size, page, has_nan=False):
+        """
+        Compare the statistics of a page (state-variable 1, mode 2) with the ones computed from the raw data.
+        """
+        mins, maxs, page_has_nan = page_statistics(self.time_series, page_size, page, 1, 2)
+        raw = numpy.nan_to_num(self.data[page * page_size: (page + 1) * page_size, 1, :, 2])
+        self.assertTrue(numpy.allclose(mins, raw.min(axis=0)))
+        self.assertTrue(numpy.allclose(maxs, raw.max(axis=0)))
+        self.assertEqual(page_has_nan, has_nan)
+
+
+    def test_page_statistics(self):
+        """
+        Statistics are computed for the requested page, state-variable and mode only, and then read back.
+        """
+        self.assertFalse(has_page_statistics(self.time_series, 4, 2, 1, 2))
+        self._check_page(4, 2)
+        self.assertTrue(has_page_statistics(self.time_series, 4, 2, 1, 2))
+        self.assertFalse(has_page_statistics(self.time_series, 4, 0, 1, 2))
+        self.assertFalse(has_page_statistics(self.time_series, 4, 2, 0, 2))
+        self.assertFalse(has_page_statistics(self.time_series, 4, 2, 1, 0))
+        self.assertFalse(has_page_statistics(self.time_series, 3, 2, 1, 2))
+        ## Already stored, nothing is computed again
+        self._check_page(4, 2)
+        self._check_page(4, 0)
+        self._check_page(3, 1)
+
+
+    def test_page_with_nan(self):
+        """
+        NaN values are replaced with zero, and flagged for the page where they were found.
+        """
+        self.time_series.store_data_region("data", numpy.array([numpy.nan]), (1, 1, slice(3, 4), 2),
+                                           self.data.shape)
+        self.data[1, 1, 3, 2] = numpy.nan
+        self._check_page(4, 0, has_nan=True)
+        self._check_page(4, 1)
+        self._check_page(4, 0, has_nan=True)
+
+
+    def test_stored_statistics_charged(self):
+        """
+        Storing the statistics charges nothing; the caller charges the space added to the TimeSeries
+        file to the user who created it.
+        """
+        datatype = dao.get_datatype_by_gid(self.time_series.gid)
+        initial_size = datatype.disk_size
+        initial_used_space = dao.get_user_for_datatype(datatype.id).used_disk_space
+        page_statistics(self.time_series, 4, 0)
+        self.assertEqual(initial_size, dao.get_datatype_by_gid(self.time_series.gid).disk_size)
+        self.assertEqual(initial_used_space, dao.get_user_for_datatype(datatype.id).used_disk_space)
+
+        ProjectService.update_datatype_disk_size(self.time_series.gid)
+        initial_size = initial_size or 0
+
+        new_size = FilesHelper.compute_size_on_disk(self.time_series.get_storage_file_path())
+        self.assertEqual(new_size, dao.get_datatype_by_gid(self.time_series.gid).disk_size)
+        self.assertEqual(initial_used_space + new_size - initial_size,
+                         dao.get_user_for_datatype(datatype.id).used_disk_space)
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TimeSeriesPageStatisticsTest))
+    return test_suite
+
+
+
+if __name__ == "__main__":
+    #So you can run tests from this package individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
@@ -32,8 +32,13 @@
 .. moduleauthor:: Bogdan Neacsa <bogdan.neacsa@codemart.ro>
 """
 
+import json
 import unittest
+import numpy
 from tvb.core.entities.file.files_helper import FilesHelper
+from tvb.adapters.datatypes.time_series_subset import TimeSeriesVertexSubset
+from tvb.adapters.simulator.surface_output import SurfaceOutputReducer, OUTPUT_DECIMATED
+from tvb.adapters.visualizers.brain import BrainViewer
 from tvb.adapters.visualizers.time_series import TimeSeries
 from tvb.datatypes.surfaces import CorticalSurface
 from tvb.datatypes.connectivity import Connectivity
@@ -86,6 +91,27 @@ class TimeSeriesTest(TransactionalTestCase):
             self.assertTrue(key in result)
 
 
+    def test_launch_decimated_surface_output(self):
+        """
+        A decimated surface result is read back as a vertices subset, with the kept vertices as labels,
+        and it is not offered to the Brain viewer as a full surface result.
+        """
+        nr_vertices = self.surface.number_of_vertices
+        reducer = SurfaceOutputReducer(OUTPUT_DECIMATED, numpy.zeros(nr_vertices), 1, decimation_step=100)
+        samples = [reducer(numpy.random.random((1, nr_vertices, 1))) for _ in xrange(5)]
+        timeseries = self.datatypeFactory.create_timeseries_vertex_subset(self.surface, reducer.kept_vertices,
+                                                                          numpy.array(samples))
+        self.assertTrue(isinstance(timeseries, TimeSeriesVertexSubset))
+        self.assertEqual(reducer.kept_vertices.tolist(), list(timeseries.kept_vertices))
+
+        result = TimeSeries().launch(timeseries)
+        self.assertEqual([5, 1, reducer.output_size, 1], eval(result['shape']))
+        self.assertEqual(["Vertex-%d" % vertex for vertex in reducer.kept_vertices], json.loads(result['labels_json']))
+
+        brain_filter = BrainViewer().get_input_tree()[0]['conditions']
+        self.assertFalse(timeseries.type in brain_filter.values[0])
+
+
 
 def suite():
     """
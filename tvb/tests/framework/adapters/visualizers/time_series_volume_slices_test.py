@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import unittest
+import numpy
+from tvb.core.entities.file.files_helper import FilesHelper
+from tvb.adapters.visualizers import time_series_volume_slices
+from tvb.adapters.visualizers.time_series_volume_slices import VolumesCache, VOLUMES_CACHE, read_volume
+from tvb.adapters.visualizers.time_series_volume_slices import read_orthogonal_slices, read_voxel_time_course
+from tvb.tests.framework.datatypes.datatypes_factory import DatatypesFactory
+from tvb.tests.framework.core.base_testcase import TransactionalTestCase
+
+
+
+class TimeSeriesVolumeSlicesTest(TransactionalTestCase):
+    """
+    Unit-tests for reading planes and voxel time courses, used by the volumetric TimeSeries viewer.
+    The 4D TimeSeries created by the factory is read as 10 volumes of 10 x 10 x 10 voxels.
+    """
+
+
+    def setUp(self):
+        self.datatypeFactory = DatatypesFactory()
+        self.test_project = self.datatypeFactory.get_project()
+        _, connectivity = self.datatypeFactory.create_connectivity()
+        self.time_series = self.datatypeFactory.create_timeseries(connectivity)
+        self.data = self.time_series.read_data_slice((slice(10), slice(10), slice(10), slice(10)))
+        VOLUMES_CACHE.clear()
+
+
+    def tearDown(self):
+        """
+        Clean-up tests data
+        """
+        VOLUMES_CACHE.clear()
+        FilesHelper().remove_project_structure(self.test_project.name)
+
+
+    def test_orthogonal_slices(self):
+        """
+        Planes through a voxel, and following volumes cached with the requested one.
+        """
+        plane_x, plane_y, plane_z = read_orthogonal_slices(self.time_series, 2, 1, 3, 5)
+        self.assertTrue(numpy.allclose(plane_x, self.data[2, 1, :, :]))
+        self.assertTrue(numpy.allclose(plane_y, self.data[2, :, 3, :]))
+        self.assertTrue(numpy.allclose(plane_z, self.data[2, :, :, 5]))
+        for time_idx in xrange(2, 2 + time_series_volume_slices.PREFETCH_STEPS + 1):
+            cached = VOLUMES_CACHE.get((self.time_series.gid, time_idx))
+            self.assertTrue(numpy.allclose(cached, self.data[time_idx]))
+        self.assertTrue(VOLUMES_CACHE.get((self.time_series.gid, 1)) is None)
+        self.assertTrue(numpy.allclose(read_volume(self.time_series, 9), self.data[9]))
+        self.assertRaises(IndexError, read_volume, self.time_series, 10)
+
+
+    def test_voxel_time_course(self):
+        """
+        Time courses are read from the TimeSeries data, without storing anything next to it.
+        """
+        initial_size = FilesHelper.compute_size_on_disk(self.time_series.get_storage_file_path())
+        self.assertTrue(numpy.allclose(read_voxel_time_course(self.time_series, 1, 2, 3), self.data[:, 1, 2, 3]))
+        self.assertEqual(initial_size, FilesHelper.compute_size_on_disk(self.time_series.get_storage_file_path()))
+        self.assertTrue(numpy.allclose(read_voxel_time_course(self.time_series, 9, 0, 4), self.data[:, 9, 0, 4]))
+
+
+    def test_volumes_cache_size(self):
+        """
+        The least recently used volumes are dropped first, to stay within the size limit.
+        """
+        cache = VolumesCache(3 * 800)
+        for key in xrange(3):
+            cache.put(key, numpy.zeros(100))
+        cache.get(0)
+        cache.put(3, numpy.zeros(100))
+        self.assertTrue(cache.get(1) is None)
+        self.assertTrue(cache.get(0) is not None)
+        self.assertEqual(cache.size, 3 * 800)
+        cache.put(4, numpy.zeros(1000))
+        self.assertTrue(cache.get(4) is None)
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(TimeSeriesVolumeSlicesTest))
+    return test_suite
+
+
+
+if __name__ == "__main__":
+    #So you can run tests from this package individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
@@ -40,8 +40,11 @@ from tvb.tests.framework.adapters.visualizers import crosscoherenceviewer_test
 from tvb.tests.framework.adapters.visualizers import crosscorelationviewer_test
 from tvb.tests.framework.adapters.visualizers import eegmonitor_test
 from tvb.tests.framework.adapters.visualizers import ica_test
+from tvb.tests.framework.adapters.visualizers import pca_test
 from tvb.tests.framework.adapters.visualizers import pse_test
 from tvb.tests.framework.adapters.visualizers import time_series_test
+from tvb.tests.framework.adapters.visualizers import time_series_page_statistics_test
+from tvb.tests.framework.adapters.visualizers import time_series_volume_slices_test
 
 
 def suite():
@@ -56,8 +59,11 @@ def suite():
     test_suite.addTest(crosscorelationviewer_test.suite())
     test_suite.addTest(eegmonitor_test.suite())
     test_suite.addTest(ica_test.suite())
+    test_suite.addTest(pca_test.suite())
     test_suite.addTest(pse_test.suite())
     test_suite.addTest(time_series_test.suite())
+    test_suite.addTest(time_series_page_statistics_test.suite())
+    test_suite.addTest(time_series_volume_slices_test.suite())
 #    test_suite.addTest(histogram_test.suite())
     return test_suite
 
@@ -292,6 +292,20 @@ class HDF5StorageTest(unittest.TestCase):
             self.assertArrayEqual(self.test_2D_array[sl], read_data)
 
 
+    def test_store_data_regions(self):
+        """
+        Test data stored region by region, in any order, into a data set created at the first write.
+        """
+        chunk_shape = (5, 5)
+        for rows, cols in [(slice(5, 10), slice(0, 5)), (slice(0, 5), slice(0, 5)),
+                           (slice(0, 5), slice(5, 10)), (slice(5, 10), slice(5, 10))]:
+            self.storage.store_data_region(DATASET_NAME_1, self.test_2D_array[rows, cols], (rows, cols),
+                                           self.test_2D_array.shape, chunk_shape, close_file=False)
+        self.storage.close_file()
+        self.assertArrayEqual(self.test_2D_array, self.storage.get_data(DATASET_NAME_1))
+        self.assertEqual(chunk_shape, self.storage.get_data_chunk_shape(DATASET_NAME_1))
+
+
     def test_add_metadata(self):
         """
         This method checks metadata add for root or a dataset
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import unittest
+import numpy
+from tvb.core.services.adaptive_pse_service import compute_refinement_points, CRITERION_VARIANCE
+
+
+class AdaptivePSEServiceTest(unittest.TestCase):
+    """
+    Test the selection of refinement points for tvb.core.services.adaptive_pse_service module.
+    """
+
+    def _explored(self, values_x, values_y):
+        """ All the points of a full grid. """
+        return set((x, y) for x in values_x for y in values_y)
+
+
+    def test_refine_single_range(self):
+        """
+        The biggest metric jump should be refined first.
+        """
+        values_x = [0.0, 1.0, 2.0, 3.0]
+        metric = numpy.array([[1.0], [1.1], [5.0], [5.2]])
+        points = compute_refinement_points(values_x, [None], metric, self._explored(values_x, [None]), 2)
+        self.assertEqual(points, [(1.5, None), (2.5, None)])
+
+
+    def test_refine_two_ranges_budget(self):
+        """
+        Points are only placed between explored neighbours, within the requested number.
+        """
+        values_x = [0.1, 0.2, 0.3]
+        values_y = [1.0, 2.0]
+        metric = numpy.array([[0.0, 0.0], [0.0, 0.0], [3.0, 0.0]])
+        points = compute_refinement_points(values_x, values_y, metric, self._explored(values_x, values_y), 2)
+        self.assertEqual(2, len(points))
+        self.assertTrue((0.25, 1.0) in points)
+        self.assertTrue((0.3, 1.5) in points)
+
+
+    def test_flat_surface_not_refined(self):
+        """
+        No point is proposed where the metric is constant.
+        """
+        values_x = [0.0, 1.0, 2.0]
+        values_y = [0.0, 1.0]
+        metric = numpy.ones((3, 2))
+        explored = self._explored(values_x, values_y)
+        self.assertEqual([], compute_refinement_points(values_x, values_y, metric, explored, 10))
+        self.assertEqual([], compute_refinement_points(values_x, values_y, metric, explored, 10, CRITERION_VARIANCE))
+
+
+    def test_missing_values_skipped(self):
+        """
+        NaN metrics (failed or not yet explored points) are bridged, and explored points are not proposed again.
+        """
+        values_x = [0.0, 0.5, 1.0]
+        metric = numpy.array([[0.0], [numpy.NaN], [2.0]])
+        points = compute_refinement_points(values_x, [None], metric, self._explored(values_x, [None]), 5)
+        self.assertEqual([], points)
+        points = compute_refinement_points(values_x, [None], metric, set([(0.0, None), (1.0, None)]), 5)
+        self.assertEqual([(0.5, None)], points)
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(AdaptivePSEServiceTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
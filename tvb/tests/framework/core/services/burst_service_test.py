@@ -54,6 +54,7 @@ from tvb.core.entities.transient.structure_entities import DataTypeMetaData
 from tvb.core.services.burst_service import BurstService, KEY_SAVED_VALUE, KEY_PARAMETER_CHECKED
 from tvb.core.services.flow_service import FlowService
 from tvb.core.services.workflow_service import WorkflowService
+from tvb.core.services.adaptive_pse_service import KEY_ADAPTIVE_BUDGET, KEY_ADAPTIVE_CRITERION, CRITERION_GRADIENT
 from tvb.core.services.project_service import ProjectService
 from tvb.core.services.operation_service import OperationService
 from tvb.core.services.exceptions import InvalidPortletConfiguration
@@ -624,6 +625,42 @@ class BurstServiceTest(BaseTestCase):
             self.assertEqual(4, datatype.count_results, "Should have 4 datatypes in group")
 
 
+    def test_launch_adaptive_group_burst(self):
+        """
+        Launch a range burst in adaptive PSE mode. After the first 4 simulations and their metrics, new simulations
+        should be added in the same groups (up to the budget), and the burst disk size charged only once.
+        """
+        budget = 6
+        burst_config = self._prepare_and_launch_async_burst(length=1, is_range=True, nr_ops=4, wait_to_finish=140,
+                                                            extra_params={KEY_ADAPTIVE_BUDGET: str(budget),
+                                                                          KEY_ADAPTIVE_CRITERION: CRITERION_GRADIENT})
+        ## Between refinement rounds the burst is briefly finished, wait until no new workflows are added.
+        nr_workflows = 0
+        waited = 0
+        while waited < 140 and (burst_config.status == BurstConfiguration.BURST_RUNNING
+                                or nr_workflows != len(dao.get_workflows_for_burst(burst_config.id))):
+            nr_workflows = len(dao.get_workflows_for_burst(burst_config.id))
+            sleep(2)
+            waited += 2
+            burst_config = dao.get_burst_by_id(burst_config.id)
+        if burst_config.status != BurstConfiguration.BURST_FINISHED:
+            self.burst_service.stop_burst(burst_config)
+            self.fail("Burst should have finished successfully.")
+
+        self.assertTrue(4 < nr_workflows <= budget, "Refinement workflows should have been added within budget.")
+        op_groups = self.get_all_entities(model.OperationGroup)
+        self.assertEqual(len(op_groups), 2, "Refinement should extend the existing groups.")
+        for group in op_groups:
+            self.assertEqual(nr_workflows, len(dao.get_operations_in_group(group.id)))
+            _, _, range_values = group.load_range_numbers(group.range1)
+            self.assertEqual(nr_workflows, len(range_values), "Group range should include the refined points.")
+
+        user = dao.get_user_by_id(self.test_user.id)
+        expected_size = dao.get_disk_size_for_operation(self.operation.id) + dao.get_burst_disk_size(burst_config.id)
+        self.assertEqual(expected_size, user.used_disk_space,
+                         "Burst results should be charged only once to the user disk quota.")
+
+
     def test_launch_group_burst_no_metric(self):
         """
         Test the launch burst method from burst service. Try to launch a burst with test adapter which has
@@ -716,7 +753,8 @@ class BurstServiceTest(BaseTestCase):
         self.assertEqual(first_burst.status, second_burst.status, "Statuses not equal for bursts.")
 
 
-    def _prepare_and_launch_async_burst(self, length=100, is_range=False, nr_ops=0, wait_to_finish=0):
+    def _prepare_and_launch_async_burst(self, length=100, is_range=False, nr_ops=0, wait_to_finish=0,
+                                        extra_params=None):
         """
         Launch an asyncronous burst with a simulation having all the default parameters, only the length recieved as
         a parameters. This is launched with actual simulator and not with a dummy test adapter as replacement.
@@ -726,6 +764,7 @@ class BurstServiceTest(BaseTestCase):
         :param is_range: a boolean which switches between a group burst and a non group burst.
             !! even if `is_range` is `True` you still need a non-zero positive `nr_ops` to have an actual group burst
         :param nr_ops: the number of operations in the group burst
+        :param extra_params: other values to be stored in the burst simulator configuration (e.g. adaptive PSE)
         """
         algo_id, connectivity = self._burst_create_connectivity()
 
@@ -736,6 +775,8 @@ class BurstServiceTest(BaseTestCase):
             launch_params[model.RANGE_PARAMETER_1] = 'simulation_length'
         else:
             launch_params['simulation_length'] = str(length)
+        if extra_params:
+            launch_params.update(extra_params)
 
         burst_config = self.burst_service.new_burst_configuration(self.test_project.id)
         burst_config.update_simulator_configuration(launch_params)
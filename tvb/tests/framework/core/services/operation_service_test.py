@@ -41,7 +41,7 @@ from tvb.core.entities import model
 from tvb.core.entities.storage import dao
 from tvb.core.entities.file.files_helper import FilesHelper
 from tvb.core.entities.transient.structure_entities import DataTypeMetaData
-from tvb.core.services.operation_service import OperationService
+from tvb.core.services.operation_service import OperationService, prepare_batches
 from tvb.core.services.project_service import initialize_storage, ProjectService
 from tvb.core.services.flow_service import FlowService
 from tvb.core.adapters.abcadapter import ABCAdapter
@@ -50,7 +50,7 @@ from tvb.tests.framework.datatypes.datatype2 import Datatype2
 from tvb.tests.framework.adapters.ndimensionarrayadapter import NDimensionArrayAdapter
 from tvb.tests.framework.core.base_testcase import BaseTestCase
 from tvb.tests.framework.core.test_factory import TestFactory
-from tvb.core.adapters.exceptions import NoMemoryAvailableException
+from tvb.core.adapters.exceptions import NoMemoryAvailableException, LaunchException
 
 
 
@@ -118,6 +118,73 @@ class OperationServiceTest(BaseTestCase):
         self.assertEqual(dt.fk_datatype_group, datatype_group.id, "DataTypeGroup is incorrect")
 
 
+    def test_group_launch_in_batches(self):
+        """
+        Operations in a group are split in batches, and all operations in one batch are computed
+        by launching its first operation, each with its own result in the same DataTypeGroup.
+        """
+        algogroup = dao.find_group('tvb.tests.framework.adapters.testadapter3', 'TestAdapter3')
+        algorithm = dao.get_algorithm_by_group(algogroup.id)
+        category = dao.get_category_by_id(algogroup.fk_category)
+        data = {model.RANGE_PARAMETER_1: 'param_5', 'param_5': [1, 2, 3, 4, 5]}
+        operations, operation_group = self.operation_service.prepare_operations(self.test_user.id,
+                                                                                self.test_project.id,
+                                                                                algorithm, category, {}, **data)
+        batches = prepare_batches(operations, 2)
+        self.assertEqual([len(batch) for batch in batches], [3, 2])
+
+        for batch in batches:
+            self.operation_service.launch_operation(batch[0].id, False)
+
+        for operation in operations:
+            self.assertEqual(dao.get_operation_by_id(operation.id).status, model.STATUS_FINISHED)
+        resulted_datatypes = dao.get_datatype_in_group(operation_group.id)
+        self.assertEqual(len(resulted_datatypes), 5)
+        datatype_group = dao.get_datatypegroup_by_op_group_id(operation_group.id)
+        for datatype in resulted_datatypes:
+            self.assertEqual(dao.get_datatype_by_id(datatype.id).fk_datatype_group, datatype_group.id)
+
+
+    def test_group_launch_without_batches(self):
+        """
+        With one batch per operation (as on the cluster), no operation receives others to compute.
+        """
+        algogroup = dao.find_group('tvb.tests.framework.adapters.testadapter3', 'TestAdapter3')
+        algorithm = dao.get_algorithm_by_group(algogroup.id)
+        category = dao.get_category_by_id(algogroup.fk_category)
+        data = {model.RANGE_PARAMETER_1: 'param_5', 'param_5': [1, 2, 3]}
+        operations, _ = self.operation_service.prepare_operations(self.test_user.id, self.test_project.id,
+                                                                  algorithm, category, {}, **data)
+        batches = prepare_batches(operations, len(operations))
+        self.assertEqual([[operation.id] for operation in operations],
+                         [[operation.id for operation in batch] for batch in batches])
+        for operation in operations:
+            parameters = json.loads(dao.get_operation_by_id(operation.id).parameters)
+            self.assertFalse(model.KEY_BATCH_OPERATIONS in parameters)
+
+
+    def test_failed_batch_marks_all_operations(self):
+        """
+        When a batch fails in a single computation, every operation in it ends with ERROR status.
+        """
+        algogroup = dao.find_group('tvb.tests.framework.adapters.testadapter3', 'TestAdapter3')
+        algorithm = dao.get_algorithm_by_group(algogroup.id)
+        category = dao.get_category_by_id(algogroup.fk_category)
+        data = {model.RANGE_PARAMETER_1: 'param_5', 'param_5': [1, 2, 3]}
+        operations, _ = self.operation_service.prepare_operations(self.test_user.id, self.test_project.id,
+                                                                  algorithm, category, {}, **data)
+        batches = prepare_batches(operations, 1)
+        self.assertEqual(1, len(batches))
+
+        ## TestAdapter3 accepts the batch, but does not implement launch_batch, so the computation fails.
+        adapter_instance = FlowService().build_adapter_instance(algogroup)
+        adapter_instance.can_launch_batch = lambda kwargs_list: True
+        self.assertRaises(LaunchException, self.operation_service.launch_operation,
+                          batches[0][0].id, False, adapter_instance)
+        for operation in operations:
+            self.assertEqual(model.STATUS_ERROR, dao.get_operation_by_id(operation.id).status)
+
+
     def test_initiate_operation(self):
         """
         Test the actual operation flow by executing a test adapter.
@@ -55,6 +55,9 @@ from tvb.datatypes.spectral import CoherenceSpectrum
 from tvb.datatypes.temporal_correlations import CrossCorrelation
 from tvb.datatypes.mode_decompositions import IndependentComponents
 from tvb.datatypes.mapped_values import DatatypeMeasure
+from tvb.adapters.datatypes.time_series_subset import TimeSeriesVertexSubset
+from tvb.adapters.analyzers.pca_adapter import PCAAdapter
+from tvb.adapters.analyzers.streamed_decompositions import DECOMPOSITION_RANDOMIZED
 from tvb.tests.framework.datatypes.datatype1 import Datatype1
 from tvb.tests.framework.datatypes.datatype2 import Datatype2
 from tvb.tests.framework.adapters.storeadapter import StoreAdapter
@@ -233,6 +236,21 @@ class DatatypesFactory():
         return time_series
 
 
+    def create_timeseries_vertex_subset(self, surface, kept_vertices, data):
+        """
+        Create a stored TimeSeriesVertexSubset, as written by a surface simulation with reduced output.
+        :param data: array with shape (time, state variables, len(kept_vertices), modes)
+        """
+        operation, _, storage_path = self.__create_operation()
+        time_series = TimeSeriesVertexSubset(storage_path=storage_path, surface=surface,
+                                             kept_vertices=kept_vertices, sample_period=1.0)
+        time_series.write_data_slice(data)
+        time_series.write_time_slice(numpy.arange(data.shape[0]))
+        adapter_instance = StoreAdapter([time_series])
+        OperationService().initiate_prelaunch(operation, adapter_instance, {})
+        return dao.get_datatype_by_gid(time_series.gid)
+
+
     def create_covariance(self, time_series):
         """
         :returns: a stored DataType Covariance.
@@ -341,6 +359,20 @@ class DatatypesFactory():
         return ica
 
 
+    def create_streamed_pca(self, timeseries, n_components):
+        """
+        :returns: persisted entity PrincipalComponents, as computed by the PCA analyzer from blocks of time points
+        """
+        operation, _, storage_path = self.__create_operation()
+        pca_adapter = PCAAdapter()
+        pca_adapter.storage_path = storage_path
+        pca_adapter.configure(timeseries, DECOMPOSITION_RANDOMIZED, n_components)
+        pca = pca_adapter.launch(timeseries, DECOMPOSITION_RANDOMIZED, n_components)
+        adapter_instance = StoreAdapter([pca])
+        OperationService().initiate_prelaunch(operation, adapter_instance, {})
+        return pca
+
+
     def create_datatype_group(self, subject=USER_FULL_NAME, state=DATATYPE_STATE, ):
         """ 
         This method creates, stores and returns a DataTypeGroup entity.
@@ -42,6 +42,7 @@ from tvb.tests.framework.interfaces.web.controllers import project_controller_te
 from tvb.tests.framework.interfaces.web.controllers import region_model_parameters_controller_test
 from tvb.tests.framework.interfaces.web.controllers import region_stimulus_controller_test
 from tvb.tests.framework.interfaces.web.controllers import settings_controllers_test
+from tvb.tests.framework.interfaces.web.controllers import simulator_api_controller_test
 from tvb.tests.framework.interfaces.web.controllers import surface_model_parameters_controller_test
 from tvb.tests.framework.interfaces.web.controllers import surface_stimulus_controller_test
 from tvb.tests.framework.interfaces.web.controllers import users_controller_test
@@ -62,6 +63,7 @@ def suite():
     test_suite.addTest(region_model_parameters_controller_test.suite())
     test_suite.addTest(region_stimulus_controller_test.suite())
     test_suite.addTest(settings_controllers_test.suite())
+    test_suite.addTest(simulator_api_controller_test.suite())
     test_suite.addTest(surface_model_parameters_controller_test.suite())
     test_suite.addTest(surface_stimulus_controller_test.suite())
     test_suite.addTest(users_controller_test.suite())
@@ -34,6 +34,7 @@
 import copy
 import json
 import unittest
+import numpy
 import cherrypy
 from time import sleep
 from tvb.core.entities import model
@@ -42,8 +43,9 @@ from tvb.core.adapters.abcadapter import ABCAdapter
 from tvb.core.services.operation_service import OperationService
 from tvb.core.services.flow_service import FlowService
 import tvb.interfaces.web.controllers.base_controller as b_c
-from tvb.interfaces.web.controllers.flow_controller import FlowController
+from tvb.interfaces.web.controllers.flow_controller import FlowController, HEADER_ARRAY_DTYPE, HEADER_ARRAY_SHAPE
 from tvb.interfaces.web.controllers.burst.burst_controller import BurstController
+from tvb.adapters.visualizers.connectivity import ConnectivityPayload
 from tvb.tests.framework.adapters.testadapter1 import TestAdapter1
 from tvb.tests.framework.datatypes.datatypes_factory import DatatypesFactory
 from tvb.tests.framework.interfaces.web.controllers.base_controller_test import BaseControllersTest
@@ -161,6 +163,69 @@ class FlowContollerTest(BaseControllersTest):
         args = {'length': 101}
         returned_data = self.flow_c.read_datatype_attribute(dt.gid, 'return_test_data', **args)
         self.assertTrue(returned_data == str(range(101)))
+
+        
+    def test_read_binary_datatype_attribute(self):
+        """
+        Call method on given datatype, and get the result as raw bytes.
+        """
+        dt = DatatypesFactory().create_datatype_with_storage("test_subject", "RAW_STATE",
+                                                             'this is the stored data'.split())
+        args = {'length': 101}
+        returned_data = self.flow_c.read_binary_datatype_attribute(dt.gid, 'return_test_data', **args)
+        self.assertEqual(cherrypy.response.headers[HEADER_ARRAY_DTYPE], 'int32')
+        self.assertEqual(json.loads(cherrypy.response.headers[HEADER_ARRAY_SHAPE]), [101])
+        self.assertEqual(numpy.fromstring(returned_data, dtype='<i4').tolist(), range(101))
+
+
+    def test_read_connectivity_payload(self):
+        """
+        Arrays of the Connectivity viewers are read as raw bytes from the URLs built by ConnectivityPayload,
+        and unknown arrays are answered with "404 Not Found".
+        """
+        _, connectivity = DatatypesFactory().create_connectivity()
+        url = ConnectivityPayload(connectivity).url(ConnectivityPayload.RAYS)
+        self.assertEqual(url, "/flow/read_connectivity_payload/%s/rays?colors_gid=;rays_gid=" % connectivity.gid)
+
+        returned_data = self.flow_c.read_connectivity_payload(connectivity.gid, ConnectivityPayload.RAYS)
+        self.assertEqual(cherrypy.response.headers[HEADER_ARRAY_DTYPE], 'float32')
+        self.assertEqual(json.loads(cherrypy.response.headers[HEADER_ARRAY_SHAPE]), [74])
+        self.assertEqual(numpy.fromstring(returned_data, dtype='<f4').tolist(), [1.0] * 74)
+
+        self.flow_c.read_connectivity_payload(connectivity.gid, ConnectivityPayload.EDGES + ConnectivityPayload.BOTH)
+        self.assertEqual(json.loads(cherrypy.response.headers[HEADER_ARRAY_SHAPE]), [74 * 74, 3])
+
+        try:
+            self.flow_c.read_connectivity_payload(connectivity.gid, 'weights')
+            self.fail("Should answer with 404 Not Found.")
+        except cherrypy.HTTPError, error:
+            self.assertEqual(error.status, 404)
+
+        
+    def test_read_datatype_attribute_not_modified(self):
+        """
+        Once its operation is finished, a DataType attribute is answered with "304 Not Modified"
+        when the client sends back the received ETag.
+        """
+        dt = DatatypesFactory().create_datatype_with_storage("test_subject", "RAW_STATE",
+                                                             'this is the stored data'.split())
+        operation = dao.get_operation_by_id(dt.fk_from_operation)
+        operation.mark_complete(model.STATUS_FINISHED)
+        dao.store_entity(operation)
+
+        self.flow_c.read_binary_datatype_attribute(dt.gid, 'return_test_data', length=10)
+        etag = cherrypy.response.headers['ETag']
+        self.assertTrue(dt.gid in etag)
+        self.assertEqual(cherrypy.response.headers['Cache-Control'], 'private, no-cache')
+
+        cherrypy.request.headers['If-None-Match'] = etag
+        try:
+            self.flow_c.read_binary_datatype_attribute(dt.gid, 'return_test_data', length=10)
+            self.fail("Should answer with 304 Not Modified.")
+        except cherrypy.HTTPRedirect, redirect:
+            self.assertEqual(redirect.status, 304)
+        finally:
+            del cherrypy.request.headers['If-None-Match']
         
         
     def test_get_simple_adapter_interface(self):
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import h5py
+import numpy
+import cherrypy
+from tvb.interfaces.web.controllers.api.simulator_controller import SimulatorController, JobStore, H5MonitorWriter
+from tvb.interfaces.web.controllers.api.simulator_controller import STATUS_WAITING, MAX_WAIT_TIMEOUT
+from tvb.interfaces.web.controllers.api.simulator_controller import result_file_name, spec_md5sum
+
+
+
+def simulation_options(working_folder):
+    """ A short simulation, on a connectivity with 2 regions. """
+    return {'tf': 20.0, 'wd': working_folder,
+            'model': {'class': 'Generic2dOscillator'},
+            'connectivity': {'class': 'Connectivity', 'weights': [[0.0, 1.0], [1.0, 0.0]],
+                             'tract_lengths': [[0.0, 10.0], [10.0, 0.0]],
+                             'centres': [[0.0, 0.0, 0.0], [10.0, 0.0, 0.0]]},
+            'coupling': {'class': 'Linear'},
+            'integrator': {'class': 'HeunDeterministic', 'dt': 0.5},
+            'monitors': [{'class': 'TemporalAverage', 'period': 1.0}]}
+
+
+
+class SimulatorApiControllerTest(unittest.TestCase):
+    """ Unit tests for the SimulatorController of the /api """
+
+    def setUp(self):
+        """ Jobs and results go in a temporary folder. """
+        self.folder = tempfile.mkdtemp()
+        self.jobs_folder = os.path.join(self.folder, "jobs")
+        self.controller = None
+
+
+    def tearDown(self):
+        """ Stop the process pool and remove the temporary folder. """
+        if self.controller is not None:
+            self.controller.pool.terminate()
+        shutil.rmtree(self.folder)
+
+
+    def _wait(self, ix):
+        """ :returns: the job information, once it finished """
+        spec = json.loads(self.controller.wait(ix, timeout=120))[0]
+        self.assertNotEqual(STATUS_WAITING, spec['status'])
+        return spec
+
+
+    def test_result_renamed_when_finished(self):
+        """
+        Results are written in a '.part' file, which gets the final name when the simulation ends.
+        """
+        self.controller = SimulatorController(1, self.jobs_folder)
+        ix = self.controller.create(json.dumps({'opt': simulation_options(self.folder)}))
+        spec = self._wait(ix)
+
+        self.assertTrue(spec['status'])
+        self.assertEqual(result_file_name(spec), spec['result'])
+        self.assertTrue(os.path.exists(spec['result']))
+        self.assertFalse(os.path.exists(spec['result'] + '.part'))
+        h5 = h5py.File(spec['result'], 'r')
+        try:
+            group = h5['mon_0_TemporalAverage']
+            self.assertEqual(group.attrs['count'], group['ys'].shape[0])
+            self.assertEqual(group['ts'].shape[0], group['ys'].shape[0])
+            self.assertEqual(2, group['ys'].shape[2])
+        finally:
+            h5.close()
+
+
+    def test_identical_spec_deduplicated(self):
+        """
+        An identical specification is not simulated again, while running or after it finished.
+        """
+        self.controller = SimulatorController(2, self.jobs_folder)
+        request = json.dumps({'opt': simulation_options(self.folder)})
+        first_ix = self.controller.create(request)
+        running_ix = self.controller.create(request)
+        self.assertEqual(int(first_ix), self.controller.sims[int(running_ix)]['same_as'])
+        self.assertFalse('async_result' in self.controller.sims[int(running_ix)])
+
+        first, running = self._wait(first_ix), self._wait(running_ix)
+        finished_ix = self.controller.create(request)
+        finished = json.loads(self.controller.read(finished_ix))[0]
+        for spec in [running, finished]:
+            self.assertTrue(spec['status'])
+            self.assertEqual(first['result'], spec['result'])
+        self.assertEqual(["jobs", os.path.basename(first['result'])], sorted(os.listdir(self.folder)))
+
+
+    def test_restart_with_stale_partial_result(self):
+        """
+        A job stored as running by a previous server is computed again after restart,
+        and the '.part' file it left is not served or appended to.
+        """
+        spec = {'ix': 1, 'opt': simulation_options(self.folder), 'status': STATUS_WAITING}
+        spec['md5sum'] = spec_md5sum(spec['opt'])
+        JobStore(self.jobs_folder).save(spec)
+        with open(result_file_name(spec) + '.part', 'w') as partial_file:
+            partial_file.write("interrupted")
+
+        self.controller = SimulatorController(1, self.jobs_folder)
+        self.assertEqual(1, self.controller.nsim)
+        finished = self._wait(1)
+
+        self.assertTrue(finished['status'])
+        self.assertFalse(os.path.exists(finished['result'] + '.part'))
+        h5 = h5py.File(finished['result'], 'r')
+        try:
+            self.assertTrue(h5['mon_0_TemporalAverage'].attrs['count'] > 0)
+        finally:
+            h5.close()
+        self.assertTrue(JobStore(self.jobs_folder).load_all()[1]['status'])
+
+
+    def _add_waiting_job(self):
+        """ A job as seen by the controller while the simulation process writes its results. """
+        spec = {'ix': 1, 'opt': simulation_options(self.folder), 'status': STATUS_WAITING}
+        spec['md5sum'] = spec_md5sum(spec['opt'])
+        self.controller.sims[1] = spec
+        return spec
+
+
+    def _assert_http_error(self, status, method, *args, **kwargs):
+        with self.assertRaises(cherrypy.HTTPError) as context:
+            method(*args, **kwargs)
+        self.assertEqual(status, context.exception.status)
+
+
+    def test_partial_results_while_writing(self):
+        """
+        The samples written so far are served from the '.part' file, while it is still open in SWMR mode.
+        """
+        self.controller = SimulatorController(1, self.jobs_folder)
+        spec = self._add_waiting_job()
+        self.assertEqual([], json.loads(self.controller.monitors(1))['monitors'])
+
+        h5 = h5py.File(result_file_name(spec) + '.part', 'w', libver='latest')
+        try:
+            writer = H5MonitorWriter(h5.create_group('mon_0_Raw'))
+            writer.prepare(numpy.zeros((2, 3, 1)))
+            h5.swmr_mode = True
+            data = numpy.random.random((7, 2, 3, 1))
+            writer.write_time_slice(numpy.arange(4.0))
+            writer.write_data_slice(data[:4])
+
+            info = json.loads(self.controller.monitors(1))
+            self.assertFalse(info['finished'])
+            self.assertEqual([{'name': 'mon_0_Raw', 'count': 4, 'sample_shape': [2, 3, 1], 'dtype': '<f8',
+                               't_start': 0.0, 't_end': 3.0}], info['monitors'])
+
+            writer.write_time_slice(numpy.arange(4.0, 7.0))
+            writer.write_data_slice(data[4:])
+            response = ''.join(self.controller.data(1, 'mon_0_Raw', t_start='2', t_end='6'))
+        finally:
+            h5.close()
+
+        header_line, content = response.split('\n', 1)
+        header = json.loads(header_line)
+        self.assertEqual(4, header['count'])
+        times = numpy.fromstring(content[:4 * 8], dtype='<f8')
+        samples = numpy.fromstring(content[4 * 8:], dtype=header['dtype']).reshape([4] + header['sample_shape'])
+        self.assertTrue(numpy.all(times == numpy.arange(2.0, 6.0)))
+        self.assertTrue(numpy.all(samples == data[2:6]))
+
+
+    def test_request_errors(self):
+        """
+        Invalid requests get a client error, and partial results not readable yet get 503 (retry).
+        """
+        self.controller = SimulatorController(1, self.jobs_folder)
+        spec = self._add_waiting_job()
+        self._assert_http_error(400, self.controller.create, "not json")
+        self._assert_http_error(400, self.controller.read, "first")
+        self._assert_http_error(404, self.controller.read, 2)
+        self._assert_http_error(404, self.controller.monitors, 2)
+        self._assert_http_error(400, self.controller.wait, 1, timeout="long")
+        self._assert_http_error(400, self.controller.data, 1, 'mon_0_Raw', t_start="start")
+        self._assert_http_error(404, self.controller.data, 1, 'mon_0_Raw')
+
+        ## A file just created by the simulation, not readable yet
+        with open(result_file_name(spec) + '.part', 'w') as partial_file:
+            partial_file.write("HDF")
+        self._assert_http_error(503, self.controller.monitors, 1)
+
+        spec['status'] = "Exception('failed')"
+        self._assert_http_error(500, self.controller.monitors, 1)
+
+
+    def test_wait_timeout_limited(self):
+        """
+        The long-poll does not hold the request for more than MAX_WAIT_TIMEOUT seconds.
+        """
+
+        class _RecordingResult(object):
+            timeouts = []
+
+            def wait(self, timeout):
+                self.timeouts.append(timeout)
+
+        self.controller = SimulatorController(1, self.jobs_folder)
+        spec = self._add_waiting_job()
+        spec['async_result'] = _RecordingResult()
+        self.controller.wait(1, timeout=10 * MAX_WAIT_TIMEOUT)
+        self.controller.wait(1, timeout=-1)
+        self.controller.wait(1, timeout="2.5")
+        self.assertEqual([MAX_WAIT_TIMEOUT, 0, 2.5], _RecordingResult.timeouts)
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(SimulatorApiControllerTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+#
+# TheVirtualBrain-Framework Package. This package holds all Data Management, and 
+# Web-UI helpful to run brain-simulations. To use it, you also need do download
+# TheVirtualBrain-Scientific Package (for simulators). See content of the
+# documentation-folder for more details. See also http://www.thevirtualbrain.org
+#
+# (c) 2012-2013, Baycrest Centre for Geriatric Care ("Baycrest")
+#
+# This program is free software; you can redistribute it and/or modify it under 
+# the terms of the GNU General Public License version 2 as published by the Free
+# Software Foundation. This program is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty of 
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public
+# License for more details. You should have received a copy of the GNU General 
+# Public License along with this program; if not, you can download it here
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0
+#
+#
+#   CITATION:
+# When using The Virtual Brain for scientific publications, please cite it as follows:
+#
+#   Paula Sanz Leon, Stuart A. Knock, M. Marmaduke Woodman, Lia Domide,
+#   Jochen Mersmann, Anthony R. McIntosh, Viktor Jirsa (2013)
+#       The Virtual Brain: a simulator of primate brain network dynamics.
+#   Frontiers in Neuroinformatics (7:10. doi: 10.3389/fninf.2013.00010)
+#
+#
+
+"""
+.. moduleauthor:: Lia Domide <lia.domide@codemart.ro>
+"""
+
+import gzip
+import zlib
+import unittest
+import cherrypy
+from StringIO import StringIO
+from tvb.interfaces.web import request_handler
+from tvb.interfaces.web.request_handler import RequestHandler, CompressedResponsesCache
+from tvb.interfaces.web.request_handler import accepted_encoding, compress
+
+
+
+class RequestHandlerTest(unittest.TestCase):
+    """
+    Test the compression of web responses.
+    """
+
+    def setUp(self):
+        self.response = cherrypy.serving.response
+        self.request = cherrypy.serving.request
+        self.response.headers.clear()
+        self.response.headers['Content-Type'] = 'text/html;charset=utf-8'
+        self.request.headers['Accept-Encoding'] = 'gzip, deflate'
+        self.body = '[' + ', '.join(str(i) for i in xrange(5000)) + ']'
+        self.response.body = [self.body]
+        self.backup_cache = request_handler.COMPRESSED_CACHE
+        request_handler.COMPRESSED_CACHE = CompressedResponsesCache(2 ** 20)
+
+
+    def tearDown(self):
+        request_handler.COMPRESSED_CACHE = self.backup_cache
+        del self.request.headers['Accept-Encoding']
+        self.response.headers.clear()
+
+
+    def test_accepted_encoding(self):
+        self.assertEqual(accepted_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(accepted_encoding('gzip;q=0.5, deflate'), 'deflate')
+        self.assertEqual(accepted_encoding('deflate'), 'deflate')
+        self.assertEqual(accepted_encoding('*'), 'gzip')
+        self.assertEqual(accepted_encoding('gzip;q=0, identity'), None)
+        self.assertEqual(accepted_encoding(None), None)
+
+
+    def test_compress(self):
+        unzipped = gzip.GzipFile(fileobj=StringIO(compress(self.body, 'gzip', 6))).read()
+        self.assertEqual(unzipped, self.body)
+        self.assertEqual(zlib.decompress(compress(self.body, 'deflate', 1)), self.body)
+
+
+    def test_compress_response(self):
+        RequestHandler.compress_response()
+        self.assertEqual(self.response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(self.response.headers['Vary'], 'Accept-Encoding')
+        compressed = self.response.body[0]
+        self.assertTrue(len(compressed) < len(self.body))
+        self.assertEqual(gzip.GzipFile(fileobj=StringIO(compressed)).read(), self.body)
+
+
+    def test_small_response_not_compressed(self):
+        self.response.body = ['[1, 2, 3]']
+        RequestHandler.compress_response()
+        self.assertFalse('Content-Encoding' in self.response.headers)
+        self.assertEqual(self.response.collapse_body(), '[1, 2, 3]')
+
+
+    def test_compressed_response_cached(self):
+        self.response.headers['ETag'] = '"gid-1"'
+        RequestHandler.compress_response()
+        self.assertEqual(len(request_handler.COMPRESSED_CACHE._responses), 1)
+        cached = request_handler.COMPRESSED_CACHE._responses.values()[0]
+        self.assertEqual(self.response.body, [cached])
+
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = CompressedResponsesCache(10)
+        cache.put('a', '1234')
+        cache.put('b', '1234')
+        cache.get('a')
+        cache.put('c', '1234')
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), '1234')
+        self.assertEqual(cache.size, 8)
+
+
+
+def suite():
+    """
+    Gather all the tests in a test suite.
+    """
+    test_suite = unittest.TestSuite()
+    test_suite.addTest(unittest.makeSuite(RequestHandlerTest))
+    return test_suite
+
+
+if __name__ == "__main__":
+    #So you can run tests individually.
+    TEST_RUNNER = unittest.TextTestRunner()
+    TEST_SUITE = suite()
+    TEST_RUNNER.run(TEST_SUITE)